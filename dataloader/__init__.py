@@ -20,6 +20,8 @@ from .load_datasets import (
     load_scifact,
     get_dataset_stats,
 )
+from .jsonl import JsonlRecords
+from .claim_store import ClaimStore
 
 __version__ = '1.0.0'
 
@@ -35,4 +37,10 @@ __all__ = [
     'load_pubhealth',
     'load_scifact',
     'get_dataset_stats',
+
+    # Lazy JSONL access
+    'JsonlRecords',
+
+    # Unified claim table
+    'ClaimStore',
 ]
@@ -0,0 +1,248 @@
+"""
+Medical-causal claim filtering for any dataset.
+
+scifact_medical_causal_claims.csv keeps only the SCIFACT claims that state
+a medical causal relationship (causal_result_raw / is_medical_causal).
+This stage reproduces that selection for HEALTHVER, PUBHEALTH and SCIFACT
+splits: claims are classified with packed LLM prompts (helpers/packing.py),
+every verdict is cached on disk by claim hash, and the medical-causal
+subset is written in the same CSV schema.
+
+The cache makes the stage resumable and incremental: verdicts are saved
+after every chunk of claims, an interrupted run picks up where it stopped,
+and adding a split only classifies claims that were not seen before.
+
+Usage:
+    python -m dataloader.causal_filter --data-dir ./data --datasets healthver:test pubhealth:test
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import ollama
+import pandas as pd
+
+from helpers.packing import CAUSAL, PromptPacker
+from helpers.rag import RetrievalCache, cache_key
+
+from .claim_store import DATASET_COLUMNS, dataset_rows
+
+# Columns of scifact_medical_causal_claims.csv (after its unnamed row index)
+CAUSAL_COLUMNS = [
+    "id",
+    "claim",
+    "evidence_doc_id",
+    "evidence_label",
+    "evidence_sentences",
+    "cited_doc_ids",
+    "causal_result_raw",
+    "is_medical_causal",
+]
+
+
+def _schema_row(name: str, row: Dict[str, Any], position: int) -> Dict[str, Any]:
+    """Map a loader row onto CAUSAL_COLUMNS (without the classification)."""
+    id_key, claim_key, label_key = DATASET_COLUMNS.get(name, ("id", "claim", "label"))
+    claim_id = row.get(id_key)
+    out = {
+        "id": position if claim_id is None else claim_id,
+        "claim": str(row[claim_key]),
+        "evidence_doc_id": None,
+        "evidence_label": row.get(label_key),
+        "evidence_sentences": None,
+        "cited_doc_ids": None,
+    }
+    if name == "scifact":
+        evidence = row.get("evidence") or {}
+        for doc_id, annotations in evidence.items():
+            out["evidence_doc_id"] = int(doc_id)
+            out["evidence_sentences"] = str(annotations[0].get("sentences", []))
+            break
+        out["cited_doc_ids"] = str(row.get("cited_doc_ids", []))
+    return out
+
+
+class CausalClaimFilter:
+    """
+    Classify claims as medical-causal with batched, cached LLM calls.
+
+    Example:
+        >>> claim_filter = CausalClaimFilter(client=client, cache_path="./data/causal_cache.jsonl")
+        >>> df = claim_filter.filter_split("healthver", "test", data_dir="./data")
+    """
+
+    def __init__(
+        self,
+        model: str = "deepseek-r1:32b",
+        client: Optional[ollama.Client] = None,
+        cache_path: Optional[str] = "./data/causal_cache.jsonl",
+        pack_size: int = 8,
+        parallel_requests: int = 1,
+        chunk_size: int = 64,
+    ):
+        """
+        Args:
+            model: LLM model to use
+            client: Ollama client
+            cache_path: JSONL file caching a verdict per claim hash (None for in-memory only)
+            pack_size: Largest number of claims per prompt
+            parallel_requests: Packs sent concurrently
+            chunk_size: Claims classified (and saved to the cache) per step
+        """
+        self.model = model
+        self.client = client
+        self.cache = RetrievalCache(cache_path)
+        self.pack_size = pack_size
+        self.parallel_requests = parallel_requests
+        self.chunk_size = chunk_size
+        self.classified = 0
+
+    def _key(self, claim: str) -> str:
+        return cache_key("medical_causal", " ".join(claim.split()), self.model)
+
+    def classify(self, claims: Sequence[str]) -> List[str]:
+        """
+        Raw verdicts ('Yes', 'No' or '' if unparsable) for claims, going through the cache.
+
+        Args:
+            claims: Claim texts
+
+        Returns:
+            One verdict per claim, aligned with claims
+        """
+        keys = [self._key(claim) for claim in claims]
+        todo = list(
+            dict.fromkeys(
+                claim for claim, key in zip(claims, keys) if key not in self.cache
+            )
+        )
+        if todo:
+            print(
+                f"Classifying {len(todo)} new claims ({len(claims) - len(todo)} cached)"
+            )
+            packer = PromptPacker(
+                CAUSAL,
+                model=self.model,
+                client=self.client,
+                max_pack_size=self.pack_size,
+                parallel_requests=self.parallel_requests,
+            )
+            for start in range(0, len(todo), self.chunk_size):
+                chunk = todo[start : start + self.chunk_size]
+                for claim, verdict in zip(chunk, packer.run(chunk)):
+                    if verdict:  # unparsable answers are retried on the next run
+                        self.cache.set(self._key(claim), verdict)
+                self.classified += len(chunk)
+                print(
+                    f"Classified {min(start + len(chunk), len(todo))}/{len(todo)} claims"
+                )
+
+        return [self.cache.get(key, "") for key in keys]
+
+    def classify_split(
+        self, name: str, split: str = "test", data_dir: str = "./data"
+    ) -> pd.DataFrame:
+        """
+        Classify every claim of a dataset split.
+
+        Args:
+            name: 'healthver', 'pubhealth', 'scifact' or 'scifact_causal'
+            split: Dataset split
+            data_dir: Directory with downloaded datasets
+
+        Returns:
+            DataFrame with CAUSAL_COLUMNS, indexed by row position in the split
+        """
+        _, rows = dataset_rows(name, split, data_dir)
+        if isinstance(rows, pd.DataFrame):
+            rows = (row._asdict() for row in rows.itertuples(index=False))
+        df = pd.DataFrame(
+            [_schema_row(name, row, position) for position, row in enumerate(rows)]
+        )
+        if df.empty:
+            return pd.DataFrame(columns=CAUSAL_COLUMNS)
+        df["causal_result_raw"] = self.classify(df["claim"].tolist())
+        df["is_medical_causal"] = df["causal_result_raw"] == "Yes"
+        return df[CAUSAL_COLUMNS]
+
+    def filter_split(
+        self,
+        name: str,
+        split: str = "test",
+        data_dir: str = "./data",
+        output: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Write the medical-causal claims of a split in the schema of scifact_medical_causal_claims.csv.
+
+        Args:
+            name: Dataset name
+            split: Dataset split
+            data_dir: Directory with downloaded datasets
+            output: CSV to write (default: <data_dir>/medical_causal/<name>_<split>_medical_causal_claims.csv)
+
+        Returns:
+            The medical-causal subset
+        """
+        df = self.classify_split(name, split, data_dir)
+        causal = df[df["is_medical_causal"]]
+        path = Path(
+            output
+            or Path(data_dir)
+            / "medical_causal"
+            / f"{name}_{split}_medical_causal_claims.csv"
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        causal.to_csv(path)
+        print(f"Wrote {len(causal)} of {len(df)} {name} {split} claims to {path}")
+        return causal
+
+
+def _parse_dataset(value: str) -> Tuple[str, str]:
+    name, _, split = value.partition(":")
+    return name, split or "test"
+
+
+if __name__ == "__main__":
+    from helpers.llm import setup_ollama_client
+
+    parser = argparse.ArgumentParser(
+        description="Select the medical-causal claims of dataset splits."
+    )
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument(
+        "--datasets",
+        nargs="+",
+        default=["healthver:test", "pubhealth:test"],
+        help="<dataset>:<split> entries",
+    )
+    parser.add_argument("--model", default="deepseek-r1:32b")
+    parser.add_argument("--pack-size", type=int, default=8)
+    parser.add_argument("--parallel-requests", type=int, default=1)
+    parser.add_argument(
+        "--cache", default=None, help="default: <data-dir>/causal_cache.jsonl"
+    )
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=11434)
+    args = parser.parse_args()
+
+    claim_filter = CausalClaimFilter(
+        model=args.model,
+        client=setup_ollama_client(args.host, args.port),
+        cache_path=args.cache or str(Path(args.data_dir) / "causal_cache.jsonl"),
+        pack_size=args.pack_size,
+        parallel_requests=args.parallel_requests,
+    )
+    summary = {}
+    for entry in args.datasets:
+        dataset_name, dataset_split = _parse_dataset(entry)
+        subset = claim_filter.filter_split(dataset_name, dataset_split, args.data_dir)
+        summary[entry] = len(subset)
+    print(
+        json.dumps(
+            {"medical_causal_claims": summary, "classified": claim_filter.classified},
+            indent=2,
+        )
+    )
@@ -0,0 +1,508 @@
+"""
+Unified, array-backed claim table over HEALTHVER, PUBHEALTH and SCIFACT.
+
+The loaders return different shapes (DataFrames, JSONL records, the medical
+causal claims CSV). ClaimStore normalizes them once into a few NumPy
+columns:
+
+- store id: the row number (int), stable for a saved store
+- dataset and split: small integer codes into `datasets` / `splits`
+- label: integer code into `labels` (labels mapped with normalize_label,
+  -1 for unlabelled claims)
+- text and source id: offsets into one UTF-8 string buffer each
+
+Filtering and joins are then integer operations: ids() selects with
+boolean masks, lookup()/ids_for_keys() map the claim ids used by the grid
+runner ("healthver/test/17") to store ids, and ids_for_texts() replaces
+joining result tables on raw claim text.
+
+Usage:
+    python -m dataloader.claim_store --data-dir ./data
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .load_datasets import (
+    HealthVerLoader,
+    PubHealthLoader,
+    SciFactLoader,
+    scifact_label,
+)
+
+SPLITS = ("train", "dev", "test")
+
+SCIFACT_CAUSAL_CSV = (
+    Path(__file__).resolve().parent / "scifact_medical_causal_claims.csv"
+)
+
+# Default id / claim / label columns of each tabular dataset
+DATASET_COLUMNS = {
+    "scifact_causal": ("id", "claim", "evidence_label"),
+    "healthver": ("id", "claim", "label"),
+    "pubhealth": ("claim_id", "claim", "label"),
+}
+
+DATASETS = ("healthver", "pubhealth", "scifact", "scifact_causal")
+
+
+def dataset_rows(
+    name: str, split: str = "test", data_dir: str = "./data", path: Optional[str] = None
+) -> Tuple[str, Iterable[Dict[str, Any]]]:
+    """
+    Raw rows of one dataset split, as the loaders return them.
+
+    Args:
+        name: 'healthver', 'pubhealth', 'scifact' or 'scifact_causal'
+        split: Dataset split (ignored for 'scifact_causal')
+        data_dir: Directory with downloaded datasets
+        path: CSV of the medical causal claims (default: the one shipped in dataloader/)
+
+    Returns:
+        Tuple of (claim id prefix, rows); SCIFACT rows get a 'label' field
+    """
+    if name == "scifact_causal":
+        return name, pd.read_csv(path or SCIFACT_CAUSAL_CSV, index_col=0)
+    if name == "healthver":
+        return f"{name}/{split}", HealthVerLoader(data_dir).load(split)
+    if name == "pubhealth":
+        return f"{name}/{split}", PubHealthLoader(data_dir).load(split)
+    if name == "scifact":
+        return f"{name}/{split}", (
+            {**claim, "label": scifact_label(claim)}
+            for claim in SciFactLoader(data_dir).load_claims(split)
+        )
+    raise ValueError(
+        f"Unknown dataset: {name}. Must be 'scifact_causal', 'healthver', "
+        "'pubhealth' or 'scifact'"
+    )
+
+
+def _iter_rows(rows: Any) -> Iterator[Dict[str, Any]]:
+    if isinstance(rows, pd.DataFrame):
+        return (row._asdict() for row in rows.itertuples(index=False))
+    return iter(rows)
+
+
+class _StringColumn:
+    """Strings stored as one UTF-8 buffer plus n + 1 offsets."""
+
+    def __init__(self, buffer: bytes, offsets: np.ndarray):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings: Sequence[str]) -> "_StringColumn":
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return cls(b"".join(encoded), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.buffer[self.offsets[i] : self.offsets[i + 1]].decode("utf-8")
+
+    def take(self, ids: Iterable[int]) -> List[str]:
+        return [self[int(i)] for i in ids]
+
+
+class ClaimStore:
+    """
+    Columnar table of claims from all datasets, addressed by integer id.
+
+    Example:
+        >>> store = ClaimStore.load_or_build("./data/claim_store.npz", data_dir="./data")
+        >>> test = store.ids(dataset="healthver", split="test", label="SUPPORTED")
+        >>> store.texts(test[:3])
+        >>> ids = store.ids_for_keys(results["claim_id"])  # grid runner claim ids
+        >>> results["label"] = store.labels_of(ids)
+    """
+
+    def __init__(
+        self,
+        dataset_codes: np.ndarray,
+        split_codes: np.ndarray,
+        label_codes: np.ndarray,
+        texts: _StringColumn,
+        source_ids: _StringColumn,
+        datasets: Sequence[str],
+        splits: Sequence[str],
+        labels: Sequence[str],
+    ):
+        self.dataset_codes = dataset_codes
+        self.split_codes = split_codes
+        self.label_codes = label_codes
+        self._texts = texts
+        self._source_ids = source_ids
+        self.datasets = tuple(datasets)
+        self.splits = tuple(splits)
+        self.labels = tuple(labels)
+        self._key_index: Optional[Dict[Tuple[int, int, str], int]] = None
+        self._text_index: Optional[Dict[str, List[int]]] = None
+
+    @classmethod
+    def build(
+        cls,
+        data_dir: str = "./data",
+        datasets: Sequence[str] = DATASETS,
+        splits: Sequence[str] = SPLITS,
+    ) -> "ClaimStore":
+        """
+        Load every split of the given datasets and normalize them into one table.
+
+        Splits that are not available (e.g. PUBHEALTH before its manual
+        download) are skipped with a message.
+
+        Args:
+            data_dir: Directory with downloaded datasets
+            datasets: Datasets to include
+            splits: Splits to include ('scifact_causal' has a single split, 'all')
+
+        Returns:
+            The built ClaimStore
+        """
+        from evaluation.verdicts import normalize_label
+
+        dataset_codes, split_codes, label_codes = [], [], []
+        texts, source_ids = [], []
+        split_names: List[str] = []
+        label_names: Dict[str, int] = {}
+
+        for d, name in enumerate(datasets):
+            id_key, claim_key, label_key = DATASET_COLUMNS.get(
+                name, ("id", "claim", "label")
+            )
+            for split in ["all"] if name == "scifact_causal" else splits:
+                try:
+                    _, rows = dataset_rows(name, split, data_dir)
+                    rows = list(_iter_rows(rows))
+                except OSError as e:
+                    print(f"Skipping {name} {split}: {e}")
+                    continue
+                if split not in split_names:
+                    split_names.append(split)
+                s = split_names.index(split)
+
+                for position, row in enumerate(rows):
+                    label = normalize_label(row.get(label_key))
+                    if label is not None and label not in label_names:
+                        label_names[label] = len(label_names)
+                    source_id = row.get(id_key)
+                    dataset_codes.append(d)
+                    split_codes.append(s)
+                    label_codes.append(-1 if label is None else label_names[label])
+                    texts.append(str(row[claim_key]))
+                    source_ids.append(str(position if source_id is None else source_id))
+                print(f"Added {len(rows)} claims from {name} {split}")
+
+        return cls(
+            np.asarray(dataset_codes, dtype=np.int8),
+            np.asarray(split_codes, dtype=np.int8),
+            np.asarray(label_codes, dtype=np.int16),
+            _StringColumn.from_strings(texts),
+            _StringColumn.from_strings(source_ids),
+            datasets,
+            split_names,
+            list(label_names),
+        )
+
+    def save(self, path: str) -> None:
+        """
+        Save the store to one .npz file.
+
+        Args:
+            path: Output file
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            dataset_codes=self.dataset_codes,
+            split_codes=self.split_codes,
+            label_codes=self.label_codes,
+            text_buffer=np.frombuffer(self._texts.buffer, dtype=np.uint8),
+            text_offsets=self._texts.offsets,
+            source_id_buffer=np.frombuffer(self._source_ids.buffer, dtype=np.uint8),
+            source_id_offsets=self._source_ids.offsets,
+            vocabulary=np.frombuffer(
+                json.dumps(
+                    {
+                        "datasets": self.datasets,
+                        "splits": self.splits,
+                        "labels": self.labels,
+                    }
+                ).encode("utf-8"),
+                dtype=np.uint8,
+            ),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ClaimStore":
+        """
+        Load a store saved with save().
+
+        Args:
+            path: File written by save()
+
+        Returns:
+            The loaded ClaimStore
+        """
+        with np.load(path) as data:
+            vocabulary = json.loads(data["vocabulary"].tobytes().decode("utf-8"))
+            return cls(
+                data["dataset_codes"],
+                data["split_codes"],
+                data["label_codes"],
+                _StringColumn(data["text_buffer"].tobytes(), data["text_offsets"]),
+                _StringColumn(
+                    data["source_id_buffer"].tobytes(), data["source_id_offsets"]
+                ),
+                vocabulary["datasets"],
+                vocabulary["splits"],
+                vocabulary["labels"],
+            )
+
+    @classmethod
+    def load_or_build(
+        cls, path: str, data_dir: str = "./data", **kwargs: Any
+    ) -> "ClaimStore":
+        """
+        Load the store from path, building and saving it first if it does not exist.
+
+        Args:
+            path: Store file
+            data_dir: Directory with downloaded datasets
+            **kwargs: Passed to build()
+
+        Returns:
+            The ClaimStore
+        """
+        if Path(path).exists():
+            return cls.load(path)
+        store = cls.build(data_dir, **kwargs)
+        store.save(path)
+        print(f"Saved claim store with {len(store)} claims to {path}")
+        return store
+
+    def __len__(self) -> int:
+        return len(self.dataset_codes)
+
+    def _code(self, vocabulary: Tuple[str, ...], value: str, kind: str) -> int:
+        try:
+            return vocabulary.index(value)
+        except ValueError:
+            raise ValueError(
+                f"Unknown {kind}: {value}. Must be one of {list(vocabulary)}"
+            )
+
+    def mask(
+        self,
+        dataset: Optional[str] = None,
+        split: Optional[str] = None,
+        label: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        Boolean mask over all claims; None means no condition.
+
+        Args:
+            dataset: Dataset name
+            split: Split name
+            label: Normalized label (e.g. 'SUPPORTED')
+
+        Returns:
+            Boolean array of length len(store)
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if dataset is not None:
+            mask &= self.dataset_codes == self._code(self.datasets, dataset, "dataset")
+        if split is not None:
+            mask &= self.split_codes == self._code(self.splits, split, "split")
+        if label is not None:
+            mask &= self.label_codes == self._code(self.labels, label, "label")
+        return mask
+
+    def ids(
+        self,
+        dataset: Optional[str] = None,
+        split: Optional[str] = None,
+        label: Optional[str] = None,
+    ) -> np.ndarray:
+        """Store ids of the claims matching all given conditions (see mask())."""
+        return np.flatnonzero(self.mask(dataset, split, label))
+
+    def text(self, claim_id: int) -> str:
+        """Text of one claim."""
+        return self._texts[int(claim_id)]
+
+    def texts(self, ids: Iterable[int]) -> List[str]:
+        """Texts of several claims."""
+        return self._texts.take(ids)
+
+    def labels_of(self, ids: Iterable[int]) -> List[Optional[str]]:
+        """Normalized labels of several claims (None for unlabelled or unknown ids)."""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        codes = np.where(ids >= 0, self.label_codes[np.clip(ids, 0, None)], -1)
+        return [self.labels[c] if c >= 0 else None for c in codes]
+
+    def key(self, claim_id: int) -> str:
+        """
+        Claim id in the grid runner's format, e.g. 'healthver/test/17'.
+
+        Args:
+            claim_id: Store id
+
+        Returns:
+            '<dataset>/<split>/<source id>' ('scifact_causal/<id>' for the causal claims)
+        """
+        claim_id = int(claim_id)
+        dataset = self.datasets[self.dataset_codes[claim_id]]
+        split = self.splits[self.split_codes[claim_id]]
+        prefix = dataset if dataset == "scifact_causal" else f"{dataset}/{split}"
+        return f"{prefix}/{self._source_ids[claim_id]}"
+
+    def record(self, claim_id: int) -> Dict[str, Any]:
+        """One claim as a dict (store id, key, dataset, split, source id, claim, label)."""
+        claim_id = int(claim_id)
+        label = self.label_codes[claim_id]
+        return {
+            "store_id": claim_id,
+            "key": self.key(claim_id),
+            "dataset": self.datasets[self.dataset_codes[claim_id]],
+            "split": self.splits[self.split_codes[claim_id]],
+            "source_id": self._source_ids[claim_id],
+            "claim": self.text(claim_id),
+            "label": self.labels[label] if label >= 0 else None,
+        }
+
+    def lookup(self, dataset: str, split: str, source_id: Any) -> Optional[int]:
+        """
+        Store id of a claim by its dataset, split and id in the source data.
+
+        Args:
+            dataset: Dataset name
+            split: Split name ('all' for 'scifact_causal')
+            source_id: Claim id in the source data (int or str)
+
+        Returns:
+            Store id, or None if the claim is not in the store
+        """
+        if self._key_index is None:
+            self._key_index = {
+                (int(d), int(s), self._source_ids[i]): i
+                for i, (d, s) in enumerate(zip(self.dataset_codes, self.split_codes))
+            }
+        if dataset not in self.datasets or split not in self.splits:
+            return None
+        return self._key_index.get(
+            (self.datasets.index(dataset), self.splits.index(split), str(source_id))
+        )
+
+    def ids_for_keys(self, keys: Iterable[str]) -> np.ndarray:
+        """
+        Store ids for claim ids in the grid runner's format (see key()).
+
+        Args:
+            keys: Claim ids such as 'healthver/test/17' or 'scifact_causal/12'
+
+        Returns:
+            Integer array aligned with keys, -1 where the claim is not in the store
+        """
+        ids = []
+        for key in keys:
+            key = str(key)
+            parts = key.split("/", 2)
+            if parts[0] == "scifact_causal":
+                found = self.lookup(parts[0], "all", key.split("/", 1)[-1])
+            elif len(parts) == 3:
+                found = self.lookup(*parts)
+            else:
+                found = None
+            ids.append(-1 if found is None else found)
+        return np.asarray(ids, dtype=np.int64)
+
+    def ids_for_texts(
+        self, texts: Iterable[str], dataset: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Store ids for claim texts, e.g. to attach labels to older result files.
+
+        Args:
+            texts: Claim texts
+            dataset: Only match claims of this dataset
+
+        Returns:
+            Integer array aligned with texts, -1 where no claim has the text
+            (the first matching claim when several have it)
+        """
+        if self._text_index is None:
+            self._text_index = {}
+            for i in range(len(self)):
+                self._text_index.setdefault(self.text(i), []).append(i)
+        allowed = self.mask(dataset=dataset) if dataset is not None else None
+        ids = []
+        for text in texts:
+            candidates = self._text_index.get(str(text), [])
+            if allowed is not None:
+                candidates = [i for i in candidates if allowed[i]]
+            ids.append(candidates[0] if candidates else -1)
+        return np.asarray(ids, dtype=np.int64)
+
+    def to_frame(self, ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """
+        The claims as a DataFrame with categorical dataset, split and label columns.
+
+        Args:
+            ids: Store ids to include (default: all)
+
+        Returns:
+            DataFrame indexed by store id
+        """
+        ids = np.arange(len(self)) if ids is None else np.asarray(list(ids))
+        return pd.DataFrame(
+            {
+                "dataset": pd.Categorical.from_codes(
+                    self.dataset_codes[ids], categories=list(self.datasets)
+                ),
+                "split": pd.Categorical.from_codes(
+                    self.split_codes[ids], categories=list(self.splits)
+                ),
+                "source_id": self._source_ids.take(ids),
+                "claim": self._texts.take(ids),
+                "label": pd.Categorical.from_codes(
+                    self.label_codes[ids], categories=list(self.labels)
+                ),
+            },
+            index=pd.Index(ids, name="store_id"),
+        )
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Claim counts per dataset and split."""
+        counts = pd.crosstab(self.dataset_codes, self.split_codes)
+        return {
+            self.datasets[d]: {self.splits[s]: int(n) for s, n in row.items() if n}
+            for d, row in counts.iterrows()
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build the unified claim store from the downloaded datasets."
+    )
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument(
+        "--output", default=None, help="default: <data-dir>/claim_store.npz"
+    )
+    parser.add_argument("--datasets", nargs="+", default=list(DATASETS))
+    args = parser.parse_args()
+
+    claim_store = ClaimStore.build(args.data_dir, datasets=args.datasets)
+    output = args.output or str(Path(args.data_dir) / "claim_store.npz")
+    claim_store.save(output)
+    print(f"Saved claim store with {len(claim_store)} claims to {output}")
+    print(json.dumps(claim_store.summary(), indent=2))
@@ -0,0 +1,200 @@
+"""
+Lazy, memory-mapped access to JSONL files.
+
+A JsonlRecords scans its file once to record the byte offset of every line
+(and, with a key field, the key of every record), saves that offset index
+next to the file and from then on parses records only when they are read,
+straight from a memory map. Memory use stays flat however large the file
+grows: only the offsets and keys are held in memory.
+
+It behaves like the list of dicts the loaders used to return (len,
+indexing, slicing, iteration) and adds lookup by key (get() and `key in
+records`, as for a dict), e.g. SCIFACT corpus documents by doc_id.
+"""
+
+import json
+import mmap
+import os
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+INDEX_SUFFIX = ".offsets.json"
+
+
+class JsonlRecords(Sequence):
+    """
+    Read-only sequence of the records of a JSONL file, parsed on access.
+
+    Example:
+        >>> corpus = JsonlRecords("data/scifact/data/corpus.jsonl", key="doc_id")
+        >>> len(corpus), corpus[0]["title"]
+        >>> corpus.get(4983)  # by doc_id (int or str)
+        >>> for doc in corpus: ...  # streams through the memory map
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        key: Optional[str] = None,
+        index_path: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Args:
+            path: Path to the JSONL file
+            key: Field identifying a record, for get() (default: None, no key lookup)
+            index_path: Where to keep the offset index (default: next to the file,
+                with the suffix '.offsets.json')
+        """
+        self.path = Path(path)
+        self.key = key
+        self.index_path = (
+            Path(index_path)
+            if index_path is not None
+            else self.path.with_name(self.path.name + INDEX_SUFFIX)
+        )
+        self._file = None
+        self._mmap = None
+        self._positions: Optional[Dict[str, int]] = None
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _signature(self) -> Dict[str, Any]:
+        stat = os.stat(self.path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "key": self.key}
+
+    def _load_index(self) -> None:
+        """Read the saved offset index, or rebuild it if the file has changed."""
+        signature = self._signature()
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                if saved.get("signature") == signature:
+                    self._offsets = array("q", saved["offsets"])
+                    self._keys = saved.get("keys")
+                    return
+            except (OSError, ValueError):
+                pass
+        self._build_index(signature)
+
+    def _build_index(self, signature: Dict[str, Any]) -> None:
+        """Scan the file once for line offsets (and keys) and save them."""
+        offsets = array("q")
+        keys: Optional[List[str]] = [] if self.key else None
+        with open(self.path, "rb") as f:
+            offset = 0
+            for line in f:
+                if line.strip():
+                    offsets.append(offset)
+                    if keys is not None:
+                        keys.append(str(json.loads(line).get(self.key)))
+                offset += len(line)
+        offsets.append(offset)  # end of the last record
+        self._offsets = offsets
+        self._keys = keys
+
+        try:
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"signature": signature, "offsets": list(offsets), "keys": keys}, f
+                )
+        except OSError as e:
+            print(f"Could not save offset index to {self.index_path}: {e}")
+
+    def _buffer(self):
+        """The memory map of the file, opened on first use."""
+        if len(self) == 0:
+            return b""
+        with self._lock:
+            if self._mmap is None:
+                self._file = open(self.path, "rb")
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._mmap
+
+    def _read(self, position: int) -> Dict[str, Any]:
+        buffer = self._buffer()
+        start, end = self._offsets[position], self._offsets[position + 1]
+        return json.loads(buffer[start:end])
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self._read(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("JsonlRecords index out of range")
+        return self._read(index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for position in range(len(self)):
+            yield self._read(position)
+
+    def __contains__(self, item: Any) -> bool:
+        # With a key field, membership tests keys like a dict instead of scanning records
+        if self._keys is None:
+            return super().__contains__(item)
+        return self.position(item) is not None
+
+    def __repr__(self) -> str:
+        return (
+            f"JsonlRecords({str(self.path)!r}, records={len(self)}, key={self.key!r})"
+        )
+
+    def keys(self) -> List[str]:
+        """Keys of all records (as strings), in file order."""
+        if self._keys is None:
+            raise ValueError("JsonlRecords was created without a key field")
+        return list(self._keys)
+
+    def position(self, key: Any) -> Optional[int]:
+        """Position of the record with this key (int or str), or None."""
+        if self._positions is None:
+            self._positions = {k: i for i, k in enumerate(self.keys())}
+        return self._positions.get(str(key))
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """
+        Look up a record by its key field.
+
+        Args:
+            key: Value of the key field (int or str)
+            default: Returned when no record has this key
+
+        Returns:
+            The record, or default
+        """
+        position = self.position(key)
+        return default if position is None else self._read(position)
+
+    def close(self) -> None:
+        """Release the memory map (it is reopened on the next read)."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+        self._mmap = None
+        self._file = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Memory maps cannot be pickled; workers reopen their own
+        state = self.__dict__.copy()
+        state["_file"] = None
+        state["_mmap"] = None
+        state["_lock"] = None
+        state["_offsets"] = list(self._offsets)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._offsets = array("q", self._offsets)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
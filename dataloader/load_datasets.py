@@ -9,13 +9,19 @@ This module provides functions to download and load three datasets:
 
 import os
 import json
+import hashlib
+import shutil
+import threading
 import pandas as pd
 import requests
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
 import tarfile
 import zipfile
 from pathlib import Path
 
+from .jsonl import JsonlRecords
+
 
 # Dataset URLs
 HEALTHVER_URLS = {
@@ -30,6 +36,206 @@ PUBHEALTH_URL = (
 
 SCIFACT_URL = "https://scifact.s3-us-west-2.amazonaws.com/release/latest/data.tar.gz"
 
+# Downloads are written and hashed in 1 MB chunks
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# SHA-256 of every download, recorded in the data directory on first download
+CHECKSUMS_FILE = "checksums.json"
+_CHECKSUMS_LOCK = threading.Lock()
+
+# Columns stored as categoricals in the Parquet cache
+LABEL_COLUMNS = ("label",)
+
+# Tables already loaded in this process, by (source, size, mtime, columns)
+_TABLE_MEMO: Dict[Tuple, pd.DataFrame] = {}
+# Source file hashes, by (source, size, mtime)
+_HASH_MEMO: Dict[Tuple, str] = {}
+
+
+def file_hash(path: Path, chunk_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of a file, memoized while its size and mtime are unchanged.
+
+    Args:
+        path: File to hash
+        chunk_size: Bytes read at a time
+
+    Returns:
+        Hex digest
+    """
+    stat = os.stat(path)
+    key = (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+    if key not in _HASH_MEMO:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        _HASH_MEMO[key] = digest.hexdigest()
+    return _HASH_MEMO[key]
+
+
+class _HashingReader:
+    """File-like wrapper that hashes everything read through it."""
+
+    def __init__(self, raw: BinaryIO):
+        self.raw = raw
+        self.digest = hashlib.sha256()
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.digest.update(data)
+        self.bytes_read += len(data)
+        return data
+
+    def drain(self, chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> None:
+        """Read (and hash) whatever the consumer left unread."""
+        while self.read(chunk_size):
+            pass
+
+
+def _expected_size(response: requests.Response, offset: int) -> Optional[int]:
+    """Full size of the file being downloaded, if the server reports it."""
+    content_range = response.headers.get("Content-Range", "")
+    if response.status_code == 206 and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("Content-Length")
+    if length is None or response.headers.get("Content-Encoding"):
+        return None
+    return offset + int(length)
+
+
+def _extract_all(tar: tarfile.TarFile, extract_dir: Path) -> None:
+    # Refuse absolute paths, links out of extract_dir etc. where supported
+    if hasattr(tarfile, "data_filter"):
+        tar.extractall(extract_dir, filter="data")
+    else:
+        tar.extractall(extract_dir)
+
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def manifest_path(path: Path) -> Path:
+    """Manifest file of a dataset file: '<name>.manifest.json' next to it."""
+    return path.with_name(path.name + MANIFEST_SUFFIX)
+
+
+def read_manifest(path: Path) -> Optional[Dict]:
+    """
+    Read the manifest of a dataset file if it still describes the file.
+
+    Size and mtime are checked first; if they changed, the file is hashed
+    and the manifest is still valid (and refreshed) when the hash matches.
+
+    Args:
+        path: The dataset file
+
+    Returns:
+        The manifest, or None if it is missing or the file's contents changed
+    """
+    try:
+        with open(manifest_path(path), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("size") == stat.st_size and manifest.get("mtime_ns") == stat.st_mtime_ns:
+        return manifest
+    if manifest.get("sha256") != file_hash(path):
+        return None
+    manifest.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    _save_manifest(path, manifest)
+    return manifest
+
+
+def _save_manifest(path: Path, manifest: Dict) -> None:
+    try:
+        with open(manifest_path(path), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+    except OSError as e:
+        print(f"Could not save manifest for {path}: {e}")
+
+
+def write_manifest(
+    path: Path, rows: int, labels: Dict[str, int], schema: Dict[str, str]
+) -> Dict:
+    """
+    Write the manifest of a dataset file.
+
+    Args:
+        path: The dataset file
+        rows: Number of rows / records
+        labels: Label distribution (label -> count)
+        schema: Column / field types
+
+    Returns:
+        The manifest
+    """
+    stat = os.stat(path)
+    manifest = {
+        "file": path.name,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_hash(path),
+        "rows": rows,
+        "labels": labels,
+        "schema": schema,
+    }
+    _save_manifest(path, manifest)
+    return manifest
+
+
+def table_manifest(path: Path, df: pd.DataFrame) -> Dict:
+    """Write the manifest of a CSV/TSV split from its parsed DataFrame."""
+    labels = {}
+    for column in LABEL_COLUMNS:
+        if column in df.columns:
+            labels = {str(k): int(v) for k, v in df[column].value_counts().items()}
+            break
+    schema = {str(column): str(dtype) for column, dtype in df.dtypes.items()}
+    return write_manifest(path, len(df), labels, schema)
+
+
+def scifact_label(claim: Dict) -> Optional[str]:
+    """Label of a SCIFACT claim from its first evidence annotation (None on the test split)."""
+    evidence = claim.get("evidence")
+    if evidence is None:
+        return None  # test split has no labels
+    for annotations in evidence.values():
+        for annotation in annotations:
+            return annotation["label"]
+    return "NOT_ENOUGH_INFO"
+
+
+def jsonl_manifest(path: Path, records: JsonlRecords, claims: bool = False) -> Dict:
+    """
+    Write the manifest of a SCIFACT JSONL file.
+
+    Args:
+        path: The JSONL file
+        records: Its records
+        claims: Whether the file holds claims (the label distribution of the
+            labelled ones is counted)
+
+    Returns:
+        The manifest
+    """
+    labels: Dict[str, int] = {}
+    if claims:
+        for claim in records:
+            label = scifact_label(claim)
+            if label is not None:
+                labels[label] = labels.get(label, 0) + 1
+    schema = (
+        {field: type(value).__name__ for field, value in records[0].items()}
+        if len(records)
+        else {}
+    )
+    return write_manifest(path, len(records), labels, schema)
+
 
 class DatasetLoader:
     """Base class for dataset loading with common utilities."""
@@ -44,34 +250,154 @@ class DatasetLoader:
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
+    @property
+    def checksums_path(self) -> Path:
+        """File with the SHA-256 recorded for each downloaded URL."""
+        return self.data_dir / CHECKSUMS_FILE
+
+    def _read_checksums(self) -> Dict[str, str]:
+        try:
+            with open(self.checksums_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def known_sha256(self, url: str) -> Optional[str]:
+        """SHA-256 recorded when url was first downloaded, or None."""
+        with _CHECKSUMS_LOCK:
+            return self._read_checksums().get(url)
+
+    def record_sha256(self, url: str, sha256: str) -> None:
+        """
+        Record the SHA-256 of a first download, so later downloads are verified.
+
+        Args:
+            url: Downloaded URL
+            sha256: Hex digest of its contents
+        """
+        with _CHECKSUMS_LOCK:
+            checksums = self._read_checksums()
+            if checksums.get(url) == sha256:
+                return
+            checksums[url] = sha256
+            try:
+                with open(self.checksums_path, "w", encoding="utf-8") as f:
+                    json.dump(checksums, f, indent=2, sort_keys=True)
+            except OSError as e:
+                print(f"Could not record checksum of {url}: {e}")
+
+    def _checksum_error(self, url: str) -> ValueError:
+        return ValueError(
+            f"Checksum mismatch for {url}; if the file changed upstream, remove "
+            f"its entry from {self.checksums_path} to accept the new version"
+        )
+
     def download_file(
-        self, url: str, output_path: Path, chunk_size: int = 8192
+        self,
+        url: str,
+        output_path: Path,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        sha256: Optional[str] = None,
+        retries: int = 3,
+        timeout: float = 60.0,
     ) -> None:
         """
         Download a file from URL to output path.
 
+        The file is written to '<output>.part' and renamed once complete, so
+        an interrupted download never looks finished. An existing .part file
+        is resumed with an HTTP Range request, as are connection drops
+        during the download (up to retries times). The size is checked
+        against what the server announced and the contents against the
+        SHA-256: the given one, else the one recorded when the URL was first
+        downloaded. A first download records its hash.
+
         Args:
             url: URL to download from
             output_path: Path to save the file
             chunk_size: Size of chunks to download
+            sha256: Expected SHA-256 hex digest (default: None, the recorded one)
+            retries: Resume attempts after a dropped connection
+            timeout: Seconds to wait for the server to connect or send data
         """
+        expected = sha256 or self.known_sha256(url)
         if output_path.exists():
-            print(f"File already exists: {output_path}")
-            return
-
-        print(f"Downloading {url}...")
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
+            if expected is None or file_hash(output_path) == expected:
+                print(f"File already exists: {output_path}")
+                if expected is None:
+                    self.record_sha256(url, file_hash(output_path))
+                return
+            print(f"Checksum mismatch for {output_path}, downloading again")
+            output_path.unlink()
 
         output_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path = output_path.with_name(output_path.name + ".part")
 
-        with open(output_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=chunk_size):
-                if chunk:
-                    f.write(chunk)
-
+        print(f"Downloading {url}...")
+        for attempt in range(retries + 1):
+            offset = part_path.stat().st_size if part_path.exists() else 0
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            try:
+                with requests.get(
+                    url, stream=True, headers=headers, timeout=timeout
+                ) as response:
+                    if offset and response.status_code == 416:
+                        break  # the partial file already holds everything
+                    response.raise_for_status()
+                    if offset and response.status_code != 206:
+                        offset = 0  # the server ignored the range, start over
+                    total = _expected_size(response, offset)
+                    with open(part_path, "ab" if offset else "wb") as f:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            f.write(chunk)
+                size = part_path.stat().st_size
+                if total is not None and size != total:
+                    raise IOError(f"Incomplete download: {size} of {total} bytes")
+                break
+            except requests.HTTPError:
+                raise
+            except (requests.RequestException, IOError) as e:
+                if attempt == retries:
+                    raise
+                print(f"Download of {url} interrupted ({e}), resuming...")
+
+        digest = file_hash(part_path)
+        if expected is not None and digest != expected:
+            part_path.unlink()
+            raise self._checksum_error(url)
+
+        os.replace(part_path, output_path)
+        if expected is None:
+            self.record_sha256(url, digest)
         print(f"Downloaded to {output_path}")
 
+    def download_files(
+        self,
+        downloads: List[Tuple[str, Path, Optional[str]]],
+        max_workers: int = 4,
+    ) -> None:
+        """
+        Download independent files in parallel (see download_file).
+
+        Args:
+            downloads: (url, output path, expected SHA-256 or None for the
+                recorded one) tuples
+            max_workers: Files downloaded at once
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self.download_file, url, path, sha256=sha256)
+                for url, path, sha256 in downloads
+            ]
+            errors = []
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(e)
+        if errors:
+            raise errors[0]
+
     def extract_tar_gz(self, tar_path: Path, extract_dir: Path) -> None:
         """
         Extract a tar.gz file.
@@ -82,9 +408,127 @@ class DatasetLoader:
         """
         print(f"Extracting {tar_path}...")
         with tarfile.open(tar_path, "r:gz") as tar:
-            tar.extractall(extract_dir)
+            _extract_all(tar, extract_dir)
+        print(f"Extracted to {extract_dir}")
+
+    def download_tar_gz(
+        self,
+        url: str,
+        extract_dir: Path,
+        sha256: Optional[str] = None,
+        timeout: float = 60.0,
+    ) -> None:
+        """
+        Stream a tar.gz from URL straight into extract_dir, without saving the archive.
+
+        Members are extracted into a temporary directory while the response
+        is read and moved into extract_dir only once the whole archive (and
+        its SHA-256: the given one, else the one recorded on the first
+        download) checked out. Unlike download_file, an interrupted download
+        is not resumed: the stream is extracted as it arrives, so it starts
+        over.
+
+        Args:
+            url: URL of the tar.gz file
+            extract_dir: Directory to extract to
+            sha256: Expected SHA-256 hex digest of the archive (default: None,
+                the recorded one)
+            timeout: Seconds to wait for the server to connect or send data
+        """
+        expected = sha256 or self.known_sha256(url)
+        staging = extract_dir / ".extracting"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+
+        print(f"Downloading and extracting {url}...")
+        try:
+            with requests.get(url, stream=True, timeout=timeout) as response:
+                response.raise_for_status()
+                reader = _HashingReader(response.raw)
+                with tarfile.open(fileobj=reader, mode="r|gz") as tar:
+                    _extract_all(tar, staging)
+                reader.drain()
+            digest = reader.digest.hexdigest()
+            if expected is not None and digest != expected:
+                raise self._checksum_error(url)
+
+            for entry in staging.iterdir():
+                target = extract_dir / entry.name
+                if target.is_dir():
+                    shutil.rmtree(target)
+                os.replace(entry, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        if expected is None:
+            self.record_sha256(url, digest)
         print(f"Extracted to {extract_dir}")
 
+    def load_table(
+        self,
+        source: Path,
+        read_source: Callable[[Path], pd.DataFrame],
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Load a CSV/TSV split through a Parquet cache.
+
+        The first load parses the source with read_source and writes
+        '<name>.<hash>.parquet' next to it, with LABEL_COLUMNS as categoricals;
+        later loads read the Parquet file (only the requested columns). The
+        cache is keyed by the source file's hash, so a changed source is
+        converted again. Loads within the same process are memoized.
+        Without pyarrow the source is parsed every time.
+
+        Args:
+            source: The CSV/TSV file
+            read_source: Function parsing the source into a DataFrame
+            columns: Columns to load (default: all)
+
+        Returns:
+            DataFrame (a copy of the memoized one, safe to modify)
+        """
+        stat = os.stat(source)
+        memo_key = (
+            str(source.resolve()),
+            stat.st_size,
+            stat.st_mtime_ns,
+            tuple(columns) if columns is not None else None,
+        )
+        if memo_key in _TABLE_MEMO:
+            return _TABLE_MEMO[memo_key].copy()
+
+        digest = file_hash(source)[:16]
+        cache_path = source.with_name(f"{source.stem}.{digest}.parquet")
+        df = None
+        if cache_path.exists():
+            try:
+                df = pd.read_parquet(cache_path, columns=columns)
+            except ImportError:
+                pass
+            except Exception as e:
+                print(f"Ignoring unreadable cache {cache_path}: {e}")
+
+        if df is None:
+            df = read_source(source)
+            for column in LABEL_COLUMNS:
+                if column in df.columns:
+                    df[column] = df[column].astype("category")
+            table_manifest(source, df)
+            try:
+                df.to_parquet(cache_path, index=False)
+                for stale in source.parent.glob(f"{source.stem}.*.parquet"):
+                    if stale != cache_path:
+                        stale.unlink()
+            except ImportError:
+                print("Install 'pyarrow' to cache datasets as Parquet: pip install pyarrow")
+            except Exception as e:
+                print(f"Could not cache {source} as Parquet: {e}")
+            if columns is not None:
+                df = df[list(columns)]
+
+        _TABLE_MEMO[memo_key] = df
+        return df.copy()
+
 
 class HealthVerLoader(DatasetLoader):
     """Loader for HEALTHVER dataset."""
@@ -94,18 +538,32 @@ class HealthVerLoader(DatasetLoader):
         self.healthver_dir = self.data_dir / "healthver"
         self.healthver_dir.mkdir(parents=True, exist_ok=True)
 
+    def split_path(self, split: str) -> Path:
+        """Path of a split's CSV file (it may not be downloaded yet)."""
+        return self.healthver_dir / f"healthver_{split}.csv"
+
+    def read_split(self, path: Path) -> pd.DataFrame:
+        """Parse a split's CSV file."""
+        return pd.read_csv(path)
+
     def download(self) -> None:
-        """Download all HEALTHVER dataset splits."""
-        for split, url in HEALTHVER_URLS.items():
-            output_path = self.healthver_dir / f"healthver_{split}.csv"
-            self.download_file(url, output_path)
+        """Download all HEALTHVER dataset splits (in parallel)."""
+        self.download_files(
+            [
+                (url, self.split_path(split), None)
+                for split, url in HEALTHVER_URLS.items()
+            ]
+        )
 
-    def load(self, split: str = "train") -> pd.DataFrame:
+    def load(
+        self, split: str = "train", columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
         """
         Load a specific split of the HEALTHVER dataset.
 
         Args:
             split: Dataset split ('train', 'dev', or 'test')
+            columns: Columns to load (default: all)
 
         Returns:
             DataFrame containing the dataset
@@ -115,27 +573,30 @@ class HealthVerLoader(DatasetLoader):
                 f"Invalid split: {split}. Must be 'train', 'dev', or 'test'"
             )
 
-        file_path = self.healthver_dir / f"healthver_{split}.csv"
+        file_path = self.split_path(split)
 
         if not file_path.exists():
             print(f"Dataset file not found. Downloading...")
             self.download()
 
-        df = pd.read_csv(file_path)
+        df = self.load_table(file_path, self.read_split, columns)
         print(f"Loaded HEALTHVER {split} set: {len(df)} examples")
         return df
 
-    def load_all(self) -> Dict[str, pd.DataFrame]:
+    def load_all(self, columns: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
         """
         Load all splits of the HEALTHVER dataset.
 
+        Args:
+            columns: Columns to load (default: all)
+
         Returns:
             Dictionary with 'train', 'dev', and 'test' DataFrames
         """
         return {
-            "train": self.load("train"),
-            "dev": self.load("dev"),
-            "test": self.load("test"),
+            "train": self.load("train", columns),
+            "dev": self.load("dev", columns),
+            "test": self.load("test", columns),
         }
 
 
@@ -147,6 +608,23 @@ class PubHealthLoader(DatasetLoader):
         self.pubhealth_dir = self.data_dir / "pubhealth"
         self.pubhealth_dir.mkdir(parents=True, exist_ok=True)
 
+    def split_path(self, split: str) -> Optional[Path]:
+        """Path of a split's TSV file, or None if it is not downloaded."""
+        # Try different possible file locations
+        possible_paths = [
+            self.pubhealth_dir / f"{split}.tsv",
+            self.pubhealth_dir / "public_health_fact" / f"{split}.tsv",
+            self.pubhealth_dir / "PUBHEALTH" / f"{split}.tsv",
+        ]
+        for path in possible_paths:
+            if path.exists():
+                return path
+        return None
+
+    def read_split(self, path: Path) -> pd.DataFrame:
+        """Parse a split's TSV file."""
+        return pd.read_csv(path, sep="\t")
+
     def download(self) -> None:
         """Download PUBHEALTH dataset."""
         # Note: Google Drive downloads can be tricky with direct links
@@ -192,12 +670,15 @@ class PubHealthLoader(DatasetLoader):
         except ImportError:
             print("\nNote: Install 'gdown' for automatic download: pip install gdown")
 
-    def load(self, split: str = "train") -> pd.DataFrame:
+    def load(
+        self, split: str = "train", columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
         """
         Load a specific split of the PUBHEALTH dataset.
 
         Args:
             split: Dataset split ('train', 'dev', or 'test')
+            columns: Columns to load (default: all)
 
         Returns:
             DataFrame containing the dataset
@@ -207,18 +688,7 @@ class PubHealthLoader(DatasetLoader):
                 f"Invalid split: {split}. Must be 'train', 'dev', or 'test'"
             )
 
-        # Try different possible file locations
-        possible_paths = [
-            self.pubhealth_dir / f"{split}.tsv",
-            self.pubhealth_dir / "public_health_fact" / f"{split}.tsv",
-            self.pubhealth_dir / "PUBHEALTH" / f"{split}.tsv",
-        ]
-
-        file_path = None
-        for path in possible_paths:
-            if path.exists():
-                file_path = path
-                break
+        file_path = self.split_path(split)
 
         if file_path is None:
             print(f"Dataset file not found. Please download manually.")
@@ -228,21 +698,24 @@ class PubHealthLoader(DatasetLoader):
             )
 
         # Load TSV file
-        df = pd.read_csv(file_path, sep="\t")
+        df = self.load_table(file_path, self.read_split, columns)
         print(f"Loaded PUBHEALTH {split} set: {len(df)} examples")
         return df
 
-    def load_all(self) -> Dict[str, pd.DataFrame]:
+    def load_all(self, columns: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
         """
         Load all splits of the PUBHEALTH dataset.
 
+        Args:
+            columns: Columns to load (default: all)
+
         Returns:
             Dictionary with 'train', 'dev', and 'test' DataFrames
         """
         return {
-            "train": self.load("train"),
-            "dev": self.load("dev"),
-            "test": self.load("test"),
+            "train": self.load("train", columns),
+            "dev": self.load("dev", columns),
+            "test": self.load("test", columns),
         }
 
 
@@ -254,39 +727,57 @@ class SciFactLoader(DatasetLoader):
         self.scifact_dir = self.data_dir / "scifact"
         self.scifact_dir.mkdir(parents=True, exist_ok=True)
 
-    def download(self) -> None:
-        """Download SCIFACT dataset."""
-        tar_path = self.scifact_dir / "data.tar.gz"
+    @property
+    def corpus_path(self) -> Path:
+        """Path of corpus.jsonl (it may not be downloaded yet)."""
+        return self.scifact_dir / "data" / "corpus.jsonl"
 
-        if not tar_path.exists():
-            self.download_file(SCIFACT_URL, tar_path)
+    def claims_path(self, split: str) -> Path:
+        """Path of a split's claims file (it may not be downloaded yet)."""
+        return self.scifact_dir / "data" / f"claims_{split}.jsonl"
 
-        # Extract if not already extracted
-        if not (self.scifact_dir / "data" / "corpus.jsonl").exists():
+    def download(self) -> None:
+        """Download SCIFACT dataset, extracting the archive while it downloads."""
+        files = [self.corpus_path] + [
+            self.claims_path(split) for split in ["train", "dev", "test"]
+        ]
+        if all(path.exists() for path in files):
+            return
+
+        # An archive downloaded by an earlier version is extracted in place
+        tar_path = self.scifact_dir / "data.tar.gz"
+        if tar_path.exists():
+            expected = self.known_sha256(SCIFACT_URL)
+            if expected is not None and file_hash(tar_path) != expected:
+                raise self._checksum_error(SCIFACT_URL)
             self.extract_tar_gz(tar_path, self.scifact_dir)
+        else:
+            self.download_tar_gz(SCIFACT_URL, self.scifact_dir)
 
-    def load_corpus(self) -> List[Dict]:
+    def load_corpus(self) -> JsonlRecords:
         """
         Load the SCIFACT corpus (evidence documents).
 
+        Documents are read lazily from a memory map; the offset index is
+        built on the first load and saved next to corpus.jsonl.
+
         Returns:
-            List of corpus documents
+            Sequence of corpus documents, with corpus.get(doc_id) lookup
         """
-        corpus_path = self.scifact_dir / "data" / "corpus.jsonl"
+        corpus_path = self.corpus_path
 
         if not corpus_path.exists():
             print("Corpus not found. Downloading...")
             self.download()
 
-        corpus = []
-        with open(corpus_path, "r") as f:
-            for line in f:
-                corpus.append(json.loads(line))
+        corpus = JsonlRecords(corpus_path, key="doc_id")
+        if read_manifest(corpus_path) is None:
+            jsonl_manifest(corpus_path, corpus)
 
         print(f"Loaded SCIFACT corpus: {len(corpus)} documents")
         return corpus
 
-    def load_claims(self, split: str = "train") -> List[Dict]:
+    def load_claims(self, split: str = "train") -> JsonlRecords:
         """
         Load claims from a specific split.
 
@@ -294,23 +785,22 @@ class SciFactLoader(DatasetLoader):
             split: Dataset split ('train', 'dev', or 'test')
 
         Returns:
-            List of claims
+            Sequence of claims (read lazily like the corpus), with claims.get(id) lookup
         """
         if split not in ["train", "dev", "test"]:
             raise ValueError(
                 f"Invalid split: {split}. Must be 'train', 'dev', or 'test'"
             )
 
-        claims_path = self.scifact_dir / "data" / f"claims_{split}.jsonl"
+        claims_path = self.claims_path(split)
 
         if not claims_path.exists():
             print("Claims not found. Downloading...")
             self.download()
 
-        claims = []
-        with open(claims_path, "r") as f:
-            for line in f:
-                claims.append(json.loads(line))
+        claims = JsonlRecords(claims_path, key="id")
+        if read_manifest(claims_path) is None:
+            jsonl_manifest(claims_path, claims, claims=True)
 
         print(f"Loaded SCIFACT {split} claims: {len(claims)} examples")
         return claims
@@ -355,38 +845,44 @@ class SciFactLoader(DatasetLoader):
 
 
 # Convenience functions
-def load_healthver(split: str = "train", data_dir: str = "./data") -> pd.DataFrame:
+def load_healthver(
+    split: str = "train", data_dir: str = "./data", columns: Optional[List[str]] = None
+) -> pd.DataFrame:
     """
     Load HEALTHVER dataset.
 
     Args:
         split: Dataset split ('train', 'dev', or 'test', or 'all')
         data_dir: Directory to store/load data
+        columns: Columns to load (default: all)
 
     Returns:
         DataFrame or dict of DataFrames
     """
     loader = HealthVerLoader(data_dir)
     if split == "all":
-        return loader.load_all()
-    return loader.load(split)
+        return loader.load_all(columns)
+    return loader.load(split, columns)
 
 
-def load_pubhealth(split: str = "train", data_dir: str = "./data") -> pd.DataFrame:
+def load_pubhealth(
+    split: str = "train", data_dir: str = "./data", columns: Optional[List[str]] = None
+) -> pd.DataFrame:
     """
     Load PUBHEALTH dataset.
 
     Args:
         split: Dataset split ('train', 'dev', or 'test', or 'all')
         data_dir: Directory to store/load data
+        columns: Columns to load (default: all)
 
     Returns:
         DataFrame or dict of DataFrames
     """
     loader = PubHealthLoader(data_dir)
     if split == "all":
-        return loader.load_all()
-    return loader.load(split)
+        return loader.load_all(columns)
+    return loader.load(split, columns)
 
 
 def load_scifact(
@@ -409,10 +905,37 @@ def load_scifact(
     return loader.load(split, include_corpus)
 
 
+def _split_manifests(paths: Dict[str, Optional[Path]], recount) -> Dict[str, Dict]:
+    """Manifests of the downloaded files among paths, recounting stale ones."""
+    manifests = {}
+    for name, path in paths.items():
+        if path is None or not path.exists():
+            continue
+        manifests[name] = read_manifest(path) or recount(path)
+    return manifests
+
+
+def _table_stats(name: str, manifests: Dict[str, Dict], directory: Path) -> Dict:
+    if not manifests:
+        return {"error": f"{name} not found in {directory}"}
+    stats = {split: manifests[split]["rows"] for split in manifests}
+    stats["total"] = sum(stats.values())
+    stats["labels"] = {split: manifests[split]["labels"] for split in manifests}
+    missing = [split for split in ["train", "dev", "test"] if split not in manifests]
+    if missing:
+        stats["missing"] = missing
+    return stats
+
+
 def get_dataset_stats(data_dir: str = "./data") -> Dict[str, Dict]:
     """
     Get statistics for all available datasets.
 
+    Statistics come from the manifests the loaders write next to each file
+    (row counts, label distribution, schema), so nothing is loaded and
+    nothing is downloaded. A file without a manifest, or whose hash no
+    longer matches its manifest, is counted once and gets a new manifest.
+
     Args:
         data_dir: Directory containing the datasets
 
@@ -420,41 +943,56 @@ def get_dataset_stats(data_dir: str = "./data") -> Dict[str, Dict]:
         Dictionary with statistics for each dataset
     """
     stats = {}
+    splits = ["train", "dev", "test"]
 
     # HEALTHVER stats
     try:
-        healthver = load_healthver("all", data_dir)
-        stats["healthver"] = {
-            "train": len(healthver["train"]),
-            "dev": len(healthver["dev"]),
-            "test": len(healthver["test"]),
-            "total": sum(len(df) for df in healthver.values()),
-        }
+        healthver = HealthVerLoader(data_dir)
+        manifests = _split_manifests(
+            {split: healthver.split_path(split) for split in splits},
+            lambda path: table_manifest(
+                path, healthver.load_table(path, healthver.read_split)
+            ),
+        )
+        stats["healthver"] = _table_stats("HEALTHVER", manifests, healthver.healthver_dir)
     except Exception as e:
         stats["healthver"] = {"error": str(e)}
 
     # PUBHEALTH stats
     try:
-        pubhealth = load_pubhealth("all", data_dir)
-        stats["pubhealth"] = {
-            "train": len(pubhealth["train"]),
-            "dev": len(pubhealth["dev"]),
-            "test": len(pubhealth["test"]),
-            "total": sum(len(df) for df in pubhealth.values()),
-        }
+        pubhealth = PubHealthLoader(data_dir)
+        manifests = _split_manifests(
+            {split: pubhealth.split_path(split) for split in splits},
+            lambda path: table_manifest(
+                path, pubhealth.load_table(path, pubhealth.read_split)
+            ),
+        )
+        stats["pubhealth"] = _table_stats("PUBHEALTH", manifests, pubhealth.pubhealth_dir)
     except Exception as e:
         stats["pubhealth"] = {"error": str(e)}
 
     # SCIFACT stats
     try:
-        scifact = load_scifact("all", data_dir, include_corpus=True)
-        stats["scifact"] = {
-            "train_claims": len(scifact["train"]["claims"]),
-            "dev_claims": len(scifact["dev"]["claims"]),
-            "test_claims": len(scifact["test"]["claims"]),
-            "corpus_docs": len(scifact["train"]["corpus"]),
-            "total_claims": sum(len(split["claims"]) for split in scifact.values()),
-        }
+        scifact = SciFactLoader(data_dir)
+        claims = _split_manifests(
+            {split: scifact.claims_path(split) for split in splits},
+            lambda path: jsonl_manifest(
+                path, JsonlRecords(path, key="id"), claims=True
+            ),
+        )
+        corpus = _split_manifests(
+            {"corpus": scifact.corpus_path},
+            lambda path: jsonl_manifest(path, JsonlRecords(path, key="doc_id")),
+        )
+        if not claims and not corpus:
+            stats["scifact"] = {"error": f"SCIFACT not found in {scifact.scifact_dir}"}
+        else:
+            stats["scifact"] = {
+                **{f"{split}_claims": claims[split]["rows"] for split in claims},
+                "corpus_docs": corpus["corpus"]["rows"] if corpus else 0,
+                "total_claims": sum(m["rows"] for m in claims.values()),
+                "labels": {split: claims[split]["labels"] for split in claims},
+            }
     except Exception as e:
         stats["scifact"] = {"error": str(e)}
 
@@ -0,0 +1,33 @@
+"""
+Evaluation utilities for claim verification results.
+
+- verdicts: parse model responses into SUPPORTED / CONTRADICT / UNKNOWN,
+  one at a time, a column at a time or while a run is being written
+- metrics: incremental metrics (accuracy, macro-F1, UNKNOWN rate) with
+  bootstrap confidence intervals, overall or per (model, method, dataset)
+"""
+
+from .verdicts import (
+    SUPPORTED,
+    CONTRADICT,
+    UNKNOWN,
+    extract_classification,
+    extract_classifications,
+    normalize_label,
+    VerdictStream,
+)
+from .metrics import GroupedMetrics, RunningMetrics
+
+__all__ = [
+    # Verdicts
+    "SUPPORTED",
+    "CONTRADICT",
+    "UNKNOWN",
+    "extract_classification",
+    "extract_classifications",
+    "normalize_label",
+    "VerdictStream",
+    # Metrics
+    "RunningMetrics",
+    "GroupedMetrics",
+]
@@ -0,0 +1,447 @@
+"""
+Incremental metrics for claim verification runs.
+
+Metrics are accumulated one result at a time so long runs can report
+progress without holding every result in memory. RunningMetrics keeps the
+confusion counts of one stream of results; GroupedMetrics keeps one per
+(model, method, dataset) and serves the live summary of an experiment run.
+
+Confidence intervals come from a bootstrap over the confusion counts:
+resampling n results with replacement is a multinomial draw over the cells
+of the confusion matrix, so every bootstrap replicate is computed at once
+with NumPy and no per-result data has to be kept.
+
+Usage (follow a run and print its metrics as results arrive):
+    python -m evaluation.metrics runs/scifact_causal/results.jsonl --follow
+"""
+
+import argparse
+import json
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from evaluation.verdicts import UNKNOWN, normalize_label
+
+METRICS = ("accuracy", "accuracy_excluding_unknown", "macro_f1", "unknown_rate")
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Elementwise numerator / denominator, 0 where the denominator is 0."""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    out = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def _scores(
+    confusion: np.ndarray, unlabeled: np.ndarray, unknown_column: Optional[int]
+) -> Dict[str, np.ndarray]:
+    """
+    Metrics of one or many confusion matrices at once.
+
+    Args:
+        confusion: Counts of shape (..., labels, predictions); the first
+            `labels` prediction columns are the label classes, in the same order
+        unlabeled: Counts of shape (..., 2): unlabeled UNKNOWN and other predictions
+        unknown_column: Column of UNKNOWN predictions, if any
+
+    Returns:
+        Dictionary of arrays with the leading shape of confusion
+    """
+    n_labels = confusion.shape[-2]
+    diagonal = confusion[..., np.arange(n_labels), np.arange(n_labels)]
+    labeled = confusion.sum(axis=(-2, -1))
+    correct = diagonal.sum(axis=-1)
+    labeled_unknown = (
+        confusion[..., unknown_column].sum(axis=-1)
+        if unknown_column is not None
+        else np.zeros_like(labeled)
+    )
+    total = labeled + unlabeled.sum(axis=-1)
+
+    # F1 per label class (UNKNOWN predictions count as misses), then their mean
+    predicted = confusion[..., :n_labels].sum(axis=-2)
+    actual = confusion.sum(axis=-1)
+    f1 = _ratio(2 * diagonal, predicted + actual)
+
+    return {
+        "accuracy": _ratio(correct, labeled),
+        "accuracy_excluding_unknown": _ratio(correct, labeled - labeled_unknown),
+        "macro_f1": f1.mean(axis=-1) if n_labels else np.zeros(labeled.shape),
+        "unknown_rate": _ratio(labeled_unknown + unlabeled[..., 0], total),
+    }
+
+
+class RunningMetrics:
+    """
+    Confusion counts over (ground truth, prediction) pairs, updated per result.
+
+    Updates may come from several threads; the metrics are computed from a
+    consistent copy of the counts (see copy()).
+    """
+
+    def __init__(self):
+        self.confusion = Counter()
+        self.total = 0
+        self.unknown = 0
+        self.unlabeled = 0
+        self._lock = threading.Lock()
+
+    def update(
+        self, prediction: str, label: Optional[str] = None, count: int = 1
+    ) -> None:
+        """
+        Add one prediction to the running counts.
+
+        Args:
+            prediction: Predicted verdict ('SUPPORTED', 'CONTRADICT' or 'UNKNOWN')
+            label: Ground-truth label, in any spelling accepted by normalize_label
+            count: Number of identical results to add (for bulk updates)
+        """
+        label = normalize_label(label)
+        with self._lock:
+            self.total += count
+            if prediction == UNKNOWN:
+                self.unknown += count
+            if label is None:
+                self.unlabeled += count
+            else:
+                self.confusion[(label, prediction)] += count
+
+    def copy(self) -> "RunningMetrics":
+        """A snapshot of the counts that later updates do not change."""
+        snapshot = RunningMetrics()
+        with self._lock:
+            snapshot.confusion = Counter(self.confusion)
+            snapshot.total = self.total
+            snapshot.unknown = self.unknown
+            snapshot.unlabeled = self.unlabeled
+        return snapshot
+
+    @property
+    def labeled(self) -> int:
+        return self.total - self.unlabeled
+
+    @property
+    def correct(self) -> int:
+        return sum(n for (label, pred), n in self.confusion.items() if label == pred)
+
+    def matrix(self) -> Tuple[List[str], List[str], np.ndarray]:
+        """
+        The confusion counts as a matrix.
+
+        Returns:
+            Tuple of (label classes, prediction classes, counts of shape
+            (labels, predictions)); the prediction classes start with the label
+            classes in the same order, followed by UNKNOWN and any other prediction
+        """
+        with self._lock:
+            cells = list(self.confusion.items())
+        labels = sorted({label for (label, _), _ in cells})
+        others = {pred for (_, pred), _ in cells if pred not in labels}
+        predictions = labels + sorted(others, key=lambda p: (p != UNKNOWN, p))
+        counts = np.zeros((len(labels), len(predictions)), dtype=np.int64)
+        for (label, pred), n in cells:
+            counts[labels.index(label), predictions.index(pred)] = n
+        return labels, predictions, counts
+
+    def _cells(self) -> Tuple[np.ndarray, np.ndarray, Optional[int]]:
+        _, predictions, counts = self.matrix()
+        unknown_column = predictions.index(UNKNOWN) if UNKNOWN in predictions else None
+        labeled_unknown = (
+            int(counts[:, unknown_column].sum()) if unknown_column is not None else 0
+        )
+        unlabeled_unknown = self.unknown - labeled_unknown
+        unlabeled = np.array([unlabeled_unknown, self.unlabeled - unlabeled_unknown])
+        return counts, unlabeled, unknown_column
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Compute the current metrics.
+
+        Returns:
+            Dictionary with counts, accuracy over all labeled results, accuracy
+            excluding UNKNOWN predictions, macro-F1 over the label classes, and
+            the UNKNOWN rate
+        """
+        state = self.copy()
+        counts, unlabeled, unknown_column = state._cells()
+        scores = _scores(counts, unlabeled, unknown_column)
+        return {
+            "total": state.total,
+            "labeled": state.labeled,
+            "correct": state.correct,
+            **{metric: float(scores[metric]) for metric in METRICS},
+        }
+
+    def confidence_intervals(
+        self,
+        confidence: float = 0.95,
+        n_boot: int = 1000,
+        seed: Optional[int] = 0,
+    ) -> Dict[str, Tuple[float, float]]:
+        """
+        Percentile bootstrap confidence intervals of the metrics.
+
+        Args:
+            confidence: Coverage of the intervals
+            n_boot: Bootstrap replicates
+            seed: Seed of the random generator (None for a fresh one)
+
+        Returns:
+            Dictionary mapping each metric in METRICS to its (low, high) bounds
+        """
+        if not 0 < confidence < 1:
+            raise ValueError(f"confidence must be in (0, 1), got {confidence}")
+        state = self.copy()
+        counts, unlabeled, unknown_column = state._cells()
+        if state.total == 0:
+            return {metric: (0.0, 0.0) for metric in METRICS}
+
+        cells = np.concatenate([counts.ravel(), unlabeled])
+        draws = np.random.default_rng(seed).multinomial(
+            state.total, cells / state.total, size=n_boot
+        )
+        scores = _scores(
+            draws[:, : counts.size].reshape((n_boot,) + counts.shape),
+            draws[:, counts.size :],
+            unknown_column,
+        )
+        tail = (1 - confidence) / 2 * 100
+        return {
+            metric: tuple(
+                float(bound)
+                for bound in np.percentile(scores[metric], [tail, 100 - tail])
+            )
+            for metric in METRICS
+        }
+
+
+def _missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _field(result: Any, name: str) -> Any:
+    if isinstance(result, dict):
+        return result.get(name)
+    return getattr(result, name, None)
+
+
+class GroupedMetrics:
+    """
+    RunningMetrics per group of results, by default per (model, method, dataset).
+
+    Example:
+        >>> metrics = GroupedMetrics()
+        >>> for result in run.iter_results():
+        ...     metrics.add(result)
+        >>> metrics.summary()  # one row per group, with bootstrap intervals
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[str] = ("model", "method", "dataset"),
+        prediction_field: str = "verdict",
+        label_field: str = "label",
+    ):
+        """
+        Args:
+            keys: Result fields the results are grouped by (empty for one overall group)
+            prediction_field: Field holding the predicted verdict
+            label_field: Field holding the ground-truth label
+        """
+        self.keys = tuple(keys)
+        self.prediction_field = prediction_field
+        self.label_field = label_field
+        self.groups: Dict[Tuple[Any, ...], RunningMetrics] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    def _update(
+        self, group: Tuple[Any, ...], prediction: Any, label: Any, count: int = 1
+    ) -> None:
+        # Rows read from files carry NaN where results carry None
+        group = tuple(None if _missing(value) else value for value in group)
+        if _missing(prediction):
+            prediction = UNKNOWN
+        with self._lock:
+            if group not in self.groups:
+                self.groups[group] = RunningMetrics()
+            self.groups[group].update(prediction, label, count)
+
+    def add(self, result: Any) -> Tuple[Any, ...]:
+        """
+        Add one result.
+
+        Args:
+            result: ClaimResult or a stored result row (dict)
+
+        Returns:
+            The group the result was counted in
+        """
+        group = tuple(_field(result, key) for key in self.keys)
+        self._update(
+            group,
+            _field(result, self.prediction_field),
+            _field(result, self.label_field),
+        )
+        return group
+
+    def add_results(self, results: Iterable[Any]) -> None:
+        """Add every result of an iterable (e.g. RunManager.iter_results())."""
+        for result in results:
+            self.add(result)
+
+    def add_frame(
+        self,
+        df: pd.DataFrame,
+        prediction: Optional[str] = None,
+        label: Optional[str] = None,
+    ) -> None:
+        """
+        Add the results of a DataFrame in bulk (one update per distinct row outcome).
+
+        Args:
+            df: Results, one row per result; missing key columns count as None
+            prediction: Column of predicted verdicts (default: prediction_field)
+            label: Column of ground-truth labels (default: label_field)
+        """
+        prediction = prediction or self.prediction_field
+        label = label or self.label_field
+        columns = {key: df[key] if key in df else None for key in self.keys}
+        columns["_prediction"] = df[prediction].fillna(UNKNOWN)
+        columns["_label"] = df[label] if label in df else None
+        frame = pd.DataFrame(columns, index=df.index)
+        counts = frame.groupby(list(frame.columns), dropna=False, sort=False).size()
+        for values, count in counts.items():
+            *group, predicted, truth = values
+            self._update(tuple(group), predicted, truth, int(count))
+
+    def rows(
+        self,
+        confidence: Optional[float] = 0.95,
+        n_boot: int = 1000,
+        seed: Optional[int] = 0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Metrics of every group, one dictionary per group.
+
+        Args:
+            confidence: Coverage of the bootstrap intervals (None to skip them)
+            n_boot: Bootstrap replicates per group
+            seed: Seed of the random generator
+
+        Returns:
+            The group keys with the RunningMetrics.summary fields and, with
+            confidence set, <metric>_low / <metric>_high bounds
+        """
+        rows = []
+        with self._lock:
+            groups = [(group, metrics.copy()) for group, metrics in self.groups.items()]
+        for group, metrics in groups:
+            row = dict(zip(self.keys, group))
+            row.update(metrics.summary())
+            if confidence is not None:
+                intervals = metrics.confidence_intervals(confidence, n_boot, seed)
+                for metric, (low, high) in intervals.items():
+                    row[f"{metric}_low"] = low
+                    row[f"{metric}_high"] = high
+            rows.append(row)
+        return rows
+
+    def summary(self, **kwargs: Any) -> pd.DataFrame:
+        """
+        Metrics of every group as a DataFrame indexed by the group keys.
+
+        Args:
+            **kwargs: Passed to rows() (confidence, n_boot, seed)
+        """
+        df = pd.DataFrame(self.rows(**kwargs))
+        if df.empty or not self.keys:
+            return df
+        return df.set_index(list(self.keys)).sort_index()
+
+    def describe(self, group: Tuple[Any, ...], confidence: float = 0.95) -> str:
+        """One-line progress report of a group, e.g. for printing during a run."""
+        with self._lock:
+            metrics = self.groups[group].copy()
+        summary = metrics.summary()
+        low, high = metrics.confidence_intervals(confidence)["accuracy"]
+        name = "|".join(str(value) for value in group) or "all"
+        return (
+            f"[{name}] {summary['total']} claims - "
+            f"accuracy: {summary['accuracy']:.2%} [{low:.2%}, {high:.2%}], "
+            f"macro-F1: {summary['macro_f1']:.3f}, "
+            f"unknown: {summary['unknown_rate']:.2%}"
+        )
+
+    def save(self, path: Union[str, Path], **kwargs: Any) -> None:
+        """
+        Write the summary as JSON, replacing the file atomically so readers never see a partial one.
+
+        Args:
+            path: Output file (e.g. <run_dir>/metrics.json)
+            **kwargs: Passed to rows() (confidence, n_boot, seed)
+        """
+        rows = self.rows(**kwargs)
+        path = Path(path)
+        # Unique per writer: workers and model threads may save at the same time
+        tmp_path = path.with_name(
+            f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"keys": list(self.keys), "groups": rows}, f, indent=2, default=str
+            )
+        os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    from evaluation.verdicts import VerdictStream
+
+    parser = argparse.ArgumentParser(
+        description="Metrics with bootstrap confidence intervals for a results.jsonl."
+    )
+    parser.add_argument("results", help="Path to a run's results.jsonl")
+    parser.add_argument(
+        "--follow", action="store_true", help="Keep reporting as new results arrive"
+    )
+    parser.add_argument("--interval", type=float, default=30.0)
+    parser.add_argument(
+        "--reextract",
+        action="store_true",
+        help="Classify the stored answers again instead of using the stored verdicts",
+    )
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--n-boot", type=int, default=1000)
+    args = parser.parse_args()
+
+    stream = VerdictStream(args.results)
+    metrics = GroupedMetrics(
+        prediction_field="classification" if args.reextract else "verdict"
+    )
+    columns = ["total", "accuracy", "macro_f1", "unknown_rate"]
+    columns += ["accuracy_low", "accuracy_high"]
+
+    def report(df: pd.DataFrame) -> None:
+        if df.empty:
+            print("No results yet")
+            return
+        metrics.add_frame(df)
+        summary = metrics.summary(confidence=args.confidence, n_boot=args.n_boot)
+        print(summary[columns].round(4).to_string())
+
+    report(stream.poll())
+    if args.follow:
+        for new_results in stream.follow(interval=args.interval):
+            print(f"\n{len(new_results)} new results")
+            report(new_results)
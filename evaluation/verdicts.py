@@ -0,0 +1,334 @@
+"""
+Verdict extraction for model responses.
+
+Parses free-text LLM answers into one of the verdict labels used across the
+project (SUPPORTED, CONTRADICT or UNKNOWN) and normalizes dataset labels onto
+the same vocabulary so predictions and ground truth can be compared directly.
+
+extract_classification handles one response. extract_classifications gives
+the same labels for a whole column of a results frame, and VerdictStream
+classifies a results.jsonl while the run writing it is still going.
+
+Usage (benchmark the column extractor against a per-row apply):
+    python -m evaluation.verdicts examples/reports/zero_shot_results.csv reports/rag_results.csv
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+SUPPORTED = "SUPPORTED"
+CONTRADICT = "CONTRADICT"
+UNKNOWN = "UNKNOWN"
+
+# Dataset label spellings mapped onto the verdict vocabulary
+LABEL_ALIASES = {
+    "SUPPORT": SUPPORTED,
+    "SUPPORTS": SUPPORTED,
+    "SUPPORTED": SUPPORTED,
+    "TRUE": SUPPORTED,
+    "CONTRADICT": CONTRADICT,
+    "CONTRADICTS": CONTRADICT,
+    "CONTRADICTED": CONTRADICT,
+    "REFUTE": CONTRADICT,
+    "REFUTES": CONTRADICT,
+    "FALSE": CONTRADICT,
+}
+
+_FINAL_ANSWER_RE = re.compile(r"FINAL\s+ANSWER\s*:?\s*(\w+)")
+_ANSWER_RE = re.compile(r"ANSWER\s*:?\s*(\w+)")
+_SUPPORTED_RE = re.compile(r"\bSUPPORT(?:ED)?\b")
+_CONTRADICT_RE = re.compile(r"\bCONTRADICT(?:ED|S)?\b")
+
+
+def normalize_label(label: Any) -> Optional[str]:
+    """
+    Map a dataset label onto the verdict vocabulary.
+
+    Args:
+        label: Raw label (e.g. 'SUPPORT', 'Refutes', 'true')
+
+    Returns:
+        'SUPPORTED' or 'CONTRADICT' for known spellings, the upper-cased label
+        for anything else (e.g. 'NEUTRAL'), or None for missing labels
+    """
+    if label is None or (isinstance(label, float) and label != label):
+        return None
+
+    label = str(label).strip().upper()
+    if not label:
+        return None
+    return LABEL_ALIASES.get(label, label)
+
+
+def _answer_verdict(match: Optional[re.Match]) -> Optional[str]:
+    """Verdict named by an "Answer: X" match, or None if X names neither."""
+    if match:
+        answer = match.group(1)
+        if "SUPPORT" in answer:
+            return SUPPORTED
+        elif "CONTRADICT" in answer:
+            return CONTRADICT
+    return None
+
+
+def _classify_upper(response: str) -> str:
+    """Verdict of an upper-cased response (the strategies of extract_classification)."""
+    # Strategy 1: Look for explicit "Final Answer:" pattern (common in CoT responses)
+    # Strategy 2: Look for "Answer:" pattern (common in zero-shot responses)
+    if "ANSWER" in response:
+        verdict = _answer_verdict(_FINAL_ANSWER_RE.search(response))
+        verdict = verdict or _answer_verdict(_ANSWER_RE.search(response))
+        if verdict:
+            return verdict
+
+    # Strategy 3: Check after </think> tag (for models like deepseek-r1)
+    _, think_tag, after_think = response.rpartition("</THINK>")
+    if think_tag:
+        # Look for SUPPORTED or CONTRADICT at the start of the conclusion
+        conclusion = after_think.strip()[:500]
+        if "SUPPORTED" in conclusion:
+            return SUPPORTED
+        elif "CONTRADICT" in conclusion:
+            return CONTRADICT
+
+    # Strategy 4: Look for these keywords anywhere in the response
+    # Count occurrences to handle cases where both appear
+    last_supported = response.rfind("SUPPORT")
+    last_contradict = response.rfind("CONTRADICT")
+    if last_supported < 0 and last_contradict < 0:
+        return UNKNOWN
+    supported_count = len(_SUPPORTED_RE.findall(response))
+    contradict_count = len(_CONTRADICT_RE.findall(response))
+
+    if supported_count > contradict_count:
+        return SUPPORTED
+    elif contradict_count > supported_count:
+        return CONTRADICT
+    elif supported_count > 0:
+        # If equal, look at the last occurrence
+        if last_supported > last_contradict:
+            return SUPPORTED
+        return CONTRADICT
+
+    return UNKNOWN
+
+
+def extract_classification(response: Any) -> str:
+    """
+    Extract whether the model classified the claim as SUPPORTED or CONTRADICT(ED).
+
+    Args:
+        response: The model's response text
+
+    Returns:
+        'SUPPORTED', 'CONTRADICT', or 'UNKNOWN' if classification cannot be determined
+
+    Example:
+        >>> extract_classification("Reasoning: ...\\nFinal Answer: SUPPORTED")
+        'SUPPORTED'
+    """
+    # None, NaN, pd.NA and NaT all count as a missing response, as in extract_classifications
+    if pd.api.types.is_scalar(response) and pd.isna(response):
+        return UNKNOWN
+    if response == "NAN":
+        return UNKNOWN
+
+    return _classify_upper(str(response).upper())
+
+
+def extract_classifications(responses: Union[pd.Series, Sequence[Any]]) -> pd.Series:
+    """
+    Extract the classification of every response in a column at once.
+
+    Gives the same labels as responses.apply(extract_classification), but
+    each distinct response is classified only once (result frames repeat
+    short answers such as "SUPPORTED." many times) and upper-casing runs
+    as one pandas string operation over the distinct responses.
+
+    Args:
+        responses: Model responses, e.g. df["answer"]
+
+    Returns:
+        Series of 'SUPPORTED', 'CONTRADICT' or 'UNKNOWN' aligned with responses
+
+    Example:
+        >>> df["classification"] = extract_classifications(df["answer"])
+    """
+    if not isinstance(responses, pd.Series):
+        responses = pd.Series(list(responses), dtype=object)
+
+    present = responses.notna() & (responses != "NAN")
+    codes, distinct = pd.factorize(responses.where(present))
+    upper = pd.Series(distinct).astype(str).str.upper()
+
+    # Missing responses have code -1, which picks the trailing UNKNOWN
+    labels = np.array([_classify_upper(r) for r in upper] + [UNKNOWN], dtype=object)
+    return pd.Series(labels[codes], index=responses.index, dtype=object)
+
+
+class VerdictStream:
+    """
+    Classify the results of a run as they are appended to its results.jsonl.
+
+    Each poll reads only the lines completed since the previous one (a
+    trailing line without a newline is still being written and is picked up
+    on a later poll), so the classifications can be followed while
+    generation is running.
+
+    Example:
+        >>> stream = VerdictStream("runs/grid/results.jsonl")
+        >>> new_rows = stream.poll()  # DataFrame with a 'classification' column
+        >>> for chunk in stream.follow(interval=10): ...
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        answer_field: str = "answer",
+        output_field: str = "classification",
+    ):
+        """
+        Args:
+            path: JSONL file of results, e.g. a RunManager's results.jsonl
+            answer_field: Field holding the model response
+            output_field: Column the classification is written to
+        """
+        self.path = Path(path)
+        self.answer_field = answer_field
+        self.output_field = output_field
+        self.offset = 0
+        self.rows = 0
+
+    def poll(self) -> pd.DataFrame:
+        """
+        Read and classify the results completed since the last poll.
+
+        Returns:
+            DataFrame of the new results with the classification column (empty if none)
+        """
+        rows: List[dict] = []
+        if self.path.exists():
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    self.offset += len(line)
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        continue
+                    # Failed results a RunManager will run again
+                    if not row.get("retryable"):
+                        rows.append(row)
+
+        df = pd.DataFrame(rows)
+        if df.empty:
+            return df
+        df.index = pd.RangeIndex(self.rows, self.rows + len(df))
+        self.rows += len(df)
+        answers = df[self.answer_field] if self.answer_field in df else [None] * len(df)
+        df[self.output_field] = extract_classifications(answers).to_numpy()
+        return df
+
+    def follow(
+        self, interval: float = 5.0, idle_timeout: Optional[float] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Poll the file repeatedly, yielding every non-empty batch of new results.
+
+        Args:
+            interval: Seconds between polls
+            idle_timeout: Stop after this many seconds without new results
+                (default: None, follow until the caller stops iterating)
+
+        Yields:
+            DataFrames of newly classified results
+        """
+        idle_since = time.monotonic()
+        while True:
+            df = self.poll()
+            if not df.empty:
+                idle_since = time.monotonic()
+                yield df
+            elif (
+                idle_timeout is not None
+                and time.monotonic() - idle_since >= idle_timeout
+            ):
+                return
+            time.sleep(interval)
+
+
+def _read_results(path: Union[str, Path]) -> pd.DataFrame:
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        return pd.read_json(path, lines=True)
+    return pd.read_csv(path)
+
+
+def benchmark_extraction(
+    paths: Sequence[Union[str, Path]], column: str = "answer", repeat: int = 5
+) -> pd.DataFrame:
+    """
+    Time extract_classifications against a per-row apply of extract_classification.
+
+    The result files are concatenated the way the evaluation notebook does,
+    and both extractors must produce identical labels.
+
+    Args:
+        paths: Result CSV or JSONL files (e.g. zero_shot_results.csv and the RAG results)
+        column: Column holding the model responses
+        repeat: Runs per extractor (the fastest one is reported)
+
+    Returns:
+        DataFrame with one row per extractor: seconds, rows/sec and speedup
+    """
+    responses = pd.concat(
+        [_read_results(path)[column] for path in paths], ignore_index=True
+    )
+    extractors = {
+        "apply": lambda: responses.apply(extract_classification),
+        "vectorized": lambda: extract_classifications(responses),
+    }
+    rows, labels = [], {}
+    for name, extract in extractors.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            labels[name] = extract()
+            timings.append(time.perf_counter() - start)
+        seconds = min(timings)
+        rows.append(
+            {
+                "extractor": name,
+                "rows": len(responses),
+                "distinct": responses.nunique(),
+                "seconds": seconds,
+                "rows_per_second": len(responses) / seconds if seconds else 0.0,
+            }
+        )
+    if labels["apply"].tolist() != labels["vectorized"].tolist():
+        raise ValueError("Vectorized labels differ from extract_classification")
+
+    report = pd.DataFrame(rows).set_index("extractor")
+    report["speedup"] = report["seconds"].iloc[0] / report["seconds"]
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark vectorized verdict extraction on result files."
+    )
+    parser.add_argument("paths", nargs="+", help="Result CSV or JSONL files")
+    parser.add_argument("--column", default="answer")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(benchmark_extraction(args.paths, args.column, args.repeat).round(4))
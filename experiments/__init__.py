@@ -0,0 +1,15 @@
+"""
+Experiment orchestration for claim verification methods.
+
+- run_manager: checkpointed, resumable and multi-worker safe result storage
+- results_store: normalized SQLite store of claims, document sets and answers
+"""
+
+from .run_manager import RunManager, result_key
+from .results_store import ResultsStore
+
+__all__ = [
+    "RunManager",
+    "result_key",
+    "ResultsStore",
+]
@@ -0,0 +1,202 @@
+"""
+Declarative experiment grids.
+
+A grid file (YAML) lists models, methods and datasets; expand_grid() turns it
+into the jobs the scheduler runs. See experiments/grids/ for examples.
+
+Results are stored under the name of the method instance, which is the
+entry's name unless the method derives its own (self_consistency stores
+e.g. 'cot_sc5') or the entry sets a 'label'. Two entries of the same method
+with different settings need distinct labels, otherwise the second would
+find the results of the first and be skipped as done.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+import yaml
+
+from dataloader.claim_store import DATASET_COLUMNS, dataset_rows
+from methods.base_method import BaseMethod, ClaimRecord, iter_claim_records
+from methods.bm25_rag import BM25RAG
+from methods.dense_rag import DenseRAG
+from methods.few_shot import FewShot
+from methods.flare import FLARE
+from methods.hybrid_rag import HybridRAG
+from methods.reranked_rag import RerankedRAG
+from methods.self_consistency import SelfConsistency
+from methods.simple_rag import SimpleRAG
+from methods.zero_shot import ChainOfThought, ZeroShot
+
+METHODS = {
+    "zero_shot": ZeroShot,
+    "cot": ChainOfThought,
+    "few_shot": FewShot,
+    "rag": SimpleRAG,
+    "reranked_rag": RerankedRAG,
+    "dense_rag": DenseRAG,
+    "bm25_rag": BM25RAG,
+    "hybrid_rag": HybridRAG,
+    "flare": FLARE,
+    "self_consistency": SelfConsistency,
+}
+
+DEFAULT_SCHEDULER = {
+    # Concurrent requests sent to Ollama; match OLLAMA_NUM_PARALLEL
+    "parallel_requests": 4,
+    # Models verified at the same time; >1 only if they fit in GPU memory together
+    "max_loaded_models": 1,
+    # Claims per prepare_batch() call for methods that batch retrieval
+    "prepare_batch_size": 64,
+    # Print a job's running metrics and rewrite metrics.json every this many results (0 disables)
+    "metrics_every": 50,
+    # Write nested spans of every claim to trace.jsonl (see helpers/tracing.py)
+    "trace": False,
+}
+
+
+def load_grid(path: str) -> Dict[str, Any]:
+    """
+    Load and validate a grid file.
+
+    Args:
+        path: Path to a YAML grid file
+
+    Returns:
+        Grid dictionary with defaults filled in
+    """
+    with open(path, "r") as f:
+        grid = yaml.safe_load(f) or {}
+
+    for field in ("models", "methods", "datasets"):
+        if not grid.get(field):
+            raise ValueError(f"Grid {path} must define at least one entry in '{field}'")
+
+    grid["methods"] = [
+        m if isinstance(m, dict) else {"name": m} for m in grid["methods"]
+    ]
+    grid["datasets"] = [
+        d if isinstance(d, dict) else {"name": d} for d in grid["datasets"]
+    ]
+    for method in grid["methods"]:
+        if method["name"] not in METHODS:
+            raise ValueError(
+                f"Unknown method: {method['name']}. Must be one of {sorted(METHODS)}"
+            )
+
+    grid.setdefault("name", Path(path).stem)
+    grid.setdefault("output_dir", str(Path("runs") / grid["name"]))
+    grid.setdefault("data_dir", "./data")
+    grid.setdefault("method_config", {})
+    grid["scheduler"] = {**DEFAULT_SCHEDULER, **(grid.get("scheduler") or {})}
+
+    names = [result_name(grid, method) for method in grid["methods"]]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(
+            f"Grid {path} has several method entries storing results as "
+            f"{duplicates}; give each of them a unique 'label'"
+        )
+    return grid
+
+
+def expand_grid(grid: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+    """
+    Expand a grid into (model, method, dataset) jobs.
+
+    Args:
+        grid: Grid dictionary from load_grid
+
+    Returns:
+        List of (model, method result name, dataset name) tuples
+    """
+    names = [result_name(grid, method) for method in grid["methods"]]
+    return [
+        (model, name, dataset["name"])
+        for model in grid["models"]
+        for name in names
+        for dataset in grid["datasets"]
+    ]
+
+
+def _instantiate(
+    grid: Dict[str, Any], method: Dict[str, Any], model: str, **shared: Any
+) -> BaseMethod:
+    config = {
+        "llm_host": grid.get("llm_host", "localhost"),
+        "llm_port": grid.get("llm_port", 11434),
+        **grid["method_config"],
+        **{k: v for k, v in method.items() if k not in ("name", "label")},
+        **shared,
+        "model": model,
+    }
+    instance = METHODS[method["name"]](config)
+    if method.get("label"):
+        instance.name = str(method["label"])
+    return instance
+
+
+def result_name(grid: Dict[str, Any], method: Dict[str, Any]) -> str:
+    """
+    Method name the results of a grid method entry are stored under.
+
+    Args:
+        grid: Grid dictionary
+        method: Method entry ({'name': ..., 'label': ..., plus per-method overrides})
+
+    Returns:
+        The entry's label, or the name its method instance reports
+    """
+    return _instantiate(grid, method, grid["models"][0]).name
+
+
+def build_method(
+    grid: Dict[str, Any], method: Dict[str, Any], model: str, **shared: Any
+) -> BaseMethod:
+    """
+    Instantiate and set up a method for one model.
+
+    Args:
+        grid: Grid dictionary from load_grid
+        method: Method entry ({'name': ..., 'label': ..., plus per-method overrides})
+        model: Model name
+        **shared: Objects shared between methods (e.g. retrieval_cache)
+
+    Returns:
+        A set-up BaseMethod instance, named after the entry's label if it has one
+    """
+    instance = _instantiate(grid, method, model, **shared)
+    instance.setup()
+    return instance
+
+
+def load_claim_records(
+    dataset: Dict[str, Any], data_dir: str = "./data"
+) -> Iterator[ClaimRecord]:
+    """
+    Load the claims of one grid dataset entry as ClaimRecord objects.
+
+    Claim ids are prefixed with the dataset and split so results from several
+    datasets can share one run.
+
+    Args:
+        dataset: Dataset entry ({'name': ..., 'split': ..., 'limit': ...})
+        data_dir: Directory with downloaded datasets
+
+    Yields:
+        ClaimRecord objects
+    """
+    name = dataset["name"]
+    split = dataset.get("split", "test")
+    limit = dataset.get("limit")
+    prefix, rows = dataset_rows(name, split, data_dir, path=dataset.get("path"))
+
+    id_key, claim_key, label_key = DATASET_COLUMNS.get(name, ("id", "claim", "label"))
+    records = iter_claim_records(
+        rows, id_key=id_key, claim_key=claim_key, label_key=label_key, dataset=name
+    )
+    for i, record in enumerate(records):
+        if limit is not None and i >= limit:
+            break
+        record.claim_id = f"{prefix}/{record.claim_id}"
+        yield record
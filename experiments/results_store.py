@@ -0,0 +1,520 @@
+"""
+Normalized SQLite store for experiment results.
+
+The wide result CSVs (rag_results.csv, reranked_rag_results.csv, ...) repeat
+the claim text, keywords and full concatenated abstracts on every model row.
+This store keeps each of them once, in separate tables keyed by integer ids:
+
+- claims: one row per (dataset, claim text), with its source id and label
+- document_sets: one row per distinct retrieved document set (keywords,
+  paper ids, abstracts), shared by every model and method that used it
+- answers: one row per (model, method, claim), pointing at its claim and
+  document set, indexed by model and method for filtered reads
+
+Long answers (e.g. deepseek-r1 think traces) and document texts are stored
+zlib-compressed. Rows can come from the legacy CSVs or from a run's
+results.jsonl, and re-importing the same rows is a no-op.
+
+Usage:
+    python -m experiments.results_store reports/results.sqlite import reports/*_results.csv
+    python -m experiments.results_store runs/scifact_causal/results.sqlite import runs/scifact_causal/results.jsonl
+    python -m experiments.results_store reports/results.sqlite stats
+    python -m experiments.results_store reports/results.sqlite benchmark reports/*_results.csv
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+
+# Text at least this long is stored zlib-compressed
+COMPRESS_MIN_CHARS = 256
+
+# Result fields holding the parts of a retrieved document set, in the layouts
+# of the RAG CSVs, the reranked RAG CSVs and ClaimResult rows
+DOCUMENT_FIELDS = {
+    "keywords": ("keywords",),
+    "paper_ids": ("paper_ids", "top3_paper_ids", "evidence_pmids"),
+    "num_papers": ("num_papers", "num_selected"),
+    "content": ("documents", "top3_abstracts"),
+}
+
+# Result fields kept in their own answers columns; anything else goes to extra
+ANSWER_FIELDS = (
+    "model",
+    "method",
+    "verdict",
+    "answer",
+    "prompt_tokens",
+    "completion_tokens",
+    "error",
+)
+CLAIM_FIELDS = ("claim", "claim_id", "dataset", "label")
+_STORED_FIELDS = {
+    *ANSWER_FIELDS,
+    *CLAIM_FIELDS,
+    *(field for fields in DOCUMENT_FIELDS.values() for field in fields),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    id INTEGER PRIMARY KEY,
+    dataset TEXT NOT NULL,
+    claim TEXT NOT NULL,
+    source_id TEXT,
+    label TEXT,
+    UNIQUE (dataset, claim)
+);
+CREATE TABLE IF NOT EXISTS document_sets (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    keywords TEXT,
+    paper_ids TEXT,
+    num_papers INTEGER,
+    content
+);
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    claim_id INTEGER NOT NULL REFERENCES claims (id),
+    document_set_id INTEGER REFERENCES document_sets (id),
+    model TEXT NOT NULL,
+    method TEXT NOT NULL,
+    verdict TEXT,
+    answer,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    error TEXT,
+    extra TEXT,
+    UNIQUE (model, method, claim_id)
+);
+CREATE INDEX IF NOT EXISTS answers_model_method ON answers (model, method);
+"""
+
+
+def _missing(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, float) and value != value:
+        return True
+    if isinstance(value, (list, tuple, dict, str)) and len(value) == 0:
+        return True
+    return value == "NAN"
+
+
+def _text(value: Any) -> Optional[str]:
+    """Store lists (e.g. evidence_pmids) as JSON and everything else as text."""
+    if _missing(value):
+        return None
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def compress(text: Optional[str]) -> Union[str, bytes, None]:
+    """Text as stored: zlib-compressed bytes when long, unchanged otherwise."""
+    if text is None or len(text) < COMPRESS_MIN_CHARS:
+        return text
+    return zlib.compress(text.encode("utf-8"))
+
+
+def decompress(value: Union[str, bytes, None]) -> Optional[str]:
+    """Inverse of compress()."""
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+
+def _first(row: Dict[str, Any], fields: Sequence[str]) -> Any:
+    for field in fields:
+        if not _missing(row.get(field)):
+            return row[field]
+    return None
+
+
+class ResultsStore:
+    """
+    Claims, document sets and answers of experiment runs in one SQLite file.
+
+    Example:
+        >>> store = ResultsStore("reports/results.sqlite")
+        >>> store.import_file("reports/rag_results.csv", dataset="scifact_causal")
+        >>> df = store.load(models=["mistral:7b"], methods=["rag"])
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Args:
+            path: SQLite file (created if missing)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL lets readers (e.g. a notebook) load while a run is importing
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._claim_ids: Dict[tuple, int] = {}
+        self._document_ids: Dict[str, int] = {}
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def _claim_id(self, row: Dict[str, Any], dataset: Optional[str]) -> int:
+        dataset = row.get("dataset") if not _missing(row.get("dataset")) else dataset
+        key = (dataset or "", str(row["claim"]))
+        if key not in self._claim_ids:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO claims (dataset, claim, source_id, label) "
+                "VALUES (?, ?, ?, ?)",
+                (*key, _text(row.get("claim_id")), _text(row.get("label"))),
+            )
+            self._claim_ids[key] = self._conn.execute(
+                "SELECT id FROM claims WHERE dataset = ? AND claim = ?", key
+            ).fetchone()[0]
+        return self._claim_ids[key]
+
+    def _document_set_id(self, row: Dict[str, Any]) -> Optional[int]:
+        parts = {
+            name: _text(_first(row, fields)) for name, fields in DOCUMENT_FIELDS.items()
+        }
+        if parts["paper_ids"] is None and parts["content"] is None:
+            return None
+
+        digest = hashlib.sha1(
+            json.dumps(parts, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        if digest not in self._document_ids:
+            num_papers = parts["num_papers"]
+            self._conn.execute(
+                "INSERT OR IGNORE INTO document_sets "
+                "(digest, keywords, paper_ids, num_papers, content) VALUES (?, ?, ?, ?, ?)",
+                (
+                    digest,
+                    parts["keywords"],
+                    parts["paper_ids"],
+                    int(float(num_papers)) if num_papers is not None else None,
+                    compress(parts["content"]),
+                ),
+            )
+            self._document_ids[digest] = self._conn.execute(
+                "SELECT id FROM document_sets WHERE digest = ?", (digest,)
+            ).fetchone()[0]
+        return self._document_ids[digest]
+
+    def add_rows(
+        self, rows: Iterable[Dict[str, Any]], dataset: Optional[str] = None
+    ) -> int:
+        """
+        Store result rows in one transaction, skipping (model, method, claim) already stored.
+
+        Args:
+            rows: Result dicts in the layout of the result CSVs or of ClaimResult
+            dataset: Dataset of rows that do not name one
+
+        Returns:
+            Number of answers added
+        """
+        added = 0
+        with self._lock:
+            try:
+                with self._conn:
+                    for row in rows:
+                        added += self._insert(row, dataset)
+            except Exception:
+                # The transaction was rolled back: forget ids it assigned
+                self._claim_ids.clear()
+                self._document_ids.clear()
+                raise
+        return added
+
+    def _insert(self, row: Dict[str, Any], dataset: Optional[str]) -> int:
+        if _missing(row.get("claim")):
+            raise ValueError(f"Result row without claim text: {row}")
+        extra = {
+            k: v for k, v in row.items() if k not in _STORED_FIELDS and not _missing(v)
+        }
+        # Kept verbatim (including "NAN") so verdict extraction sees the same text
+        answer = row.get("answer")
+        answer = str(answer) if answer is not None and answer == answer else None
+        tokens = [
+            None if _missing(row.get(field)) else int(row[field])
+            for field in ("prompt_tokens", "completion_tokens")
+        ]
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO answers (claim_id, document_set_id, model, "
+            "method, verdict, answer, prompt_tokens, completion_tokens, error, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                self._claim_id(row, dataset),
+                self._document_set_id(row),
+                str(row.get("model")),
+                str(row.get("method")),
+                _text(row.get("verdict")),
+                compress(answer),
+                *tokens,
+                _text(row.get("error")),
+                json.dumps(extra, default=str) if extra else None,
+            ),
+        )
+        return cursor.rowcount
+
+    def import_file(
+        self,
+        path: Union[str, Path],
+        dataset: Optional[str] = "scifact_causal",
+        chunk_size: int = 5000,
+    ) -> int:
+        """
+        Import a result CSV or a run's results.jsonl.
+
+        Args:
+            path: CSV (e.g. rag_results.csv) or JSONL file of results
+            dataset: Dataset of rows that do not name one (the legacy CSVs all
+                hold SCIFACT medical causal claims)
+            chunk_size: Rows per transaction
+
+        Returns:
+            Number of answers added
+        """
+        path = Path(path)
+        added = 0
+        for chunk in self._read_rows(path, chunk_size):
+            added += self.add_rows(chunk, dataset)
+        print(f"Imported {added} new answers from {path}")
+        return added
+
+    @staticmethod
+    def _read_rows(path: Path, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+        if path.suffix == ".jsonl":
+            chunk = []
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # partial line still being written
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        continue
+                    # Failed results a RunManager will run again; importing
+                    # them would shadow the successful retry
+                    if not row.get("retryable"):
+                        chunk.append(row)
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+            if chunk:
+                yield chunk
+            return
+
+        # keep_default_na=False: the CSVs spell missing answers as "NAN" text
+        for df in pd.read_csv(path, chunksize=chunk_size, keep_default_na=False):
+            yield df.to_dict(orient="records")
+
+    def load(
+        self,
+        models: Optional[Sequence[str]] = None,
+        methods: Optional[Sequence[str]] = None,
+        datasets: Optional[Sequence[str]] = None,
+        answers: bool = True,
+        documents: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Read answers joined with their claims (and optionally documents).
+
+        Args:
+            models: Only these models (default: all)
+            methods: Only these methods (default: all)
+            datasets: Only claims of these datasets (default: all)
+            answers: Include the (decompressed) answer texts
+            documents: Include keywords, paper ids and document texts
+
+        Returns:
+            DataFrame with model, method, dataset, claim_id (store id),
+            source_id, claim, label, verdict, document_set_id and the
+            requested text columns
+        """
+        columns = [
+            "a.model",
+            "a.method",
+            "c.dataset",
+            "a.claim_id",
+            "c.source_id",
+            "c.claim",
+            "c.label",
+            "a.verdict",
+            "a.document_set_id",
+        ]
+        if answers:
+            columns.append("a.answer")
+        sql = f"SELECT {', '.join(columns)} FROM answers a JOIN claims c ON c.id = a.claim_id"
+        where, params = [], []
+        for column, values in (
+            ("a.model", models),
+            ("a.method", methods),
+            ("c.dataset", datasets),
+        ):
+            if values is not None:
+                where.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY a.id"
+
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params)
+        if "answer" in df:
+            df["answer"] = [decompress(value) for value in df["answer"]]
+        if documents:
+            # Each document set is decompressed once and shared by its rows
+            ids = df["document_set_id"].dropna().astype(int).unique().tolist()
+            sets = self.document_sets(ids).set_index("id")
+            document_set_ids = df["document_set_id"]
+            for column, source in (
+                ("keywords", "keywords"),
+                ("paper_ids", "paper_ids"),
+                ("num_papers", "num_papers"),
+                ("documents", "content"),
+            ):
+                df[column] = document_set_ids.map(sets[source])
+        return df
+
+    def claims(self) -> pd.DataFrame:
+        """The claims table."""
+        with self._lock:
+            return pd.read_sql_query("SELECT * FROM claims ORDER BY id", self._conn)
+
+    def document_sets(self, ids: Optional[Sequence[int]] = None) -> pd.DataFrame:
+        """
+        The document sets, with decompressed document texts.
+
+        Args:
+            ids: Only these document set ids (default: all)
+        """
+        if ids is None:
+            queries = [("SELECT * FROM document_sets ORDER BY id", [])]
+        else:
+            # Chunked to stay below SQLite's limit on query parameters
+            ids = list(ids)
+            queries = [
+                (
+                    f"SELECT * FROM document_sets WHERE id IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for chunk in (ids[i : i + 500] for i in range(0, len(ids), 500))
+            ] or [("SELECT * FROM document_sets WHERE 0", [])]
+        with self._lock:
+            df = pd.concat(
+                [pd.read_sql_query(sql, self._conn, params=p) for sql, p in queries],
+                ignore_index=True,
+            )
+        df["content"] = [decompress(value) for value in df["content"]]
+        return df
+
+    def stats(self) -> Dict[str, Any]:
+        """Row counts per table, answers per (model, method) and the file size."""
+        with self._lock:
+            counts = {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("claims", "document_sets", "answers")
+            }
+            jobs = self._conn.execute(
+                "SELECT model, method, COUNT(*) FROM answers GROUP BY model, method"
+            ).fetchall()
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {
+            **counts,
+            "jobs": {f"{model}|{method}": n for model, method, n in jobs},
+            "bytes": os.path.getsize(self.path),
+        }
+
+
+def benchmark_store(
+    csv_paths: Sequence[Union[str, Path]], store: ResultsStore, repeat: int = 3
+) -> pd.DataFrame:
+    """
+    Compare size and full load time of the wide CSVs with the store.
+
+    Args:
+        csv_paths: Result CSVs (already imported into the store)
+        store: The store holding them
+        repeat: Loads per layout (the fastest one is reported)
+
+    Returns:
+        DataFrame with bytes and load seconds for the CSVs and the store
+    """
+
+    def fastest(load) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            load()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    csv_seconds = fastest(
+        lambda: pd.concat([pd.read_csv(path) for path in csv_paths], ignore_index=True)
+    )
+    report = pd.DataFrame(
+        [
+            {
+                "layout": "csv",
+                "bytes": sum(os.path.getsize(path) for path in csv_paths),
+                "load_seconds": csv_seconds,
+            },
+            {
+                "layout": "sqlite",
+                "bytes": store.stats()["bytes"],
+                "load_seconds": fastest(lambda: store.load(documents=True)),
+            },
+            {
+                "layout": "sqlite (no documents)",
+                "bytes": store.stats()["bytes"],
+                "load_seconds": fastest(lambda: store.load()),
+            },
+        ]
+    ).set_index("layout")
+    report["size_ratio"] = report["bytes"].iloc[0] / report["bytes"]
+    report["load_speedup"] = report["load_seconds"].iloc[0] / report["load_seconds"]
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Normalized store of experiment results."
+    )
+    parser.add_argument("db", help="SQLite file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser(
+        "import", help="Import result CSV / JSONL files"
+    )
+    import_parser.add_argument("paths", nargs="+")
+    import_parser.add_argument("--dataset", default="scifact_causal")
+    subparsers.add_parser("stats", help="Print table sizes")
+    benchmark_parser = subparsers.add_parser(
+        "benchmark", help="Compare with the wide CSVs (imports them first)"
+    )
+    benchmark_parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    results_store = ResultsStore(args.db)
+    if args.command == "import":
+        for file_path in args.paths:
+            results_store.import_file(file_path, dataset=args.dataset)
+        print(json.dumps(results_store.stats(), indent=2))
+    elif args.command == "stats":
+        print(json.dumps(results_store.stats(), indent=2))
+    else:
+        for file_path in args.paths:
+            results_store.import_file(file_path)
+        print(benchmark_store(args.paths, results_store).round(4))
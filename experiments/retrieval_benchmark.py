@@ -0,0 +1,584 @@
+"""
+Retrieval quality against cost for retriever configurations.
+
+Each configuration is a retrieval method of the grid (rag, reranked_rag,
+bm25_rag, dense_rag, hybrid_rag) with its settings (top_k, n_keywords, the
+AND -> OR keyword_fallback, reranker, sources, ...). It retrieves documents
+for the SCIFACT medical causal claims, and the ranking it would show the
+model (reranked documents first, then the rest of the retrieved ones) is
+scored against the gold evidence:
+
+- recall@k / mrr: evidence_doc_id
+- cited_recall@k / cited_mrr: any of cited_doc_ids
+
+SCIFACT doc ids are corpus ids, not PMIDs, so a PubMed paper also counts as
+a hit when its normalized title is the title of a gold corpus document
+(needs the SCIFACT corpus in data_dir). Every configuration gets a fresh
+retrieval cache and reports its cost: NCBI requests (esearch, efetch, PMC
+checks), LLM and embedding requests, prompt/completion tokens and wall time.
+
+Usage:
+    python -m experiments.retrieval_benchmark --config retrievers.yaml --target recall@3=0.5
+    python -m experiments.retrieval_benchmark --backend stub --n-claims 20
+
+A config file lists configurations under 'configurations' (each a dict with
+'name', 'method' and method settings) and optional shared 'method_config'.
+"""
+
+import argparse
+import ast
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import yaml
+from Bio import Entrez
+
+from experiments.grid import METHODS
+from experiments.stage_benchmark import (
+    REPO_ROOT,
+    Recording,
+    RecordedEntrez,
+    RecordedOllama,
+    StubEntrez,
+    StubOllama,
+    use_entrez,
+)
+from helpers.llm import setup_ollama_client, token_counts
+from helpers.pubmed import PubMedPaper
+from helpers.rag import RetrievalCache
+from methods import simple_rag
+from methods.base_method import ClaimRecord, iter_claim_records
+
+KS = (1, 3, 5, 10)
+
+# The settings the pipeline uses today, and the alternatives worth pricing
+DEFAULT_CONFIGURATIONS = [
+    {"name": "rag_k10", "method": "rag"},
+    {"name": "rag_k10_and_only", "method": "rag", "keyword_fallback": False},
+    {"name": "rag_k5", "method": "rag", "top_k": 5},
+    {"name": "rag_k20", "method": "rag", "top_k": 20},
+    {"name": "rag_k10_kw3", "method": "rag", "n_keywords": 3},
+    {"name": "rag_k10_kw6", "method": "rag", "n_keywords": 6},
+    {"name": "reranked_k10_top3", "method": "reranked_rag"},
+    {"name": "reranked_k20_top3", "method": "reranked_rag", "top_k": 20},
+    {"name": "bm25_k10", "method": "bm25_rag"},
+    {"name": "hybrid_pubmed_bm25", "method": "hybrid_rag"},
+]
+
+_TITLE_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase a title and keep only its letters and digits, space separated."""
+    return _TITLE_RE.sub(" ", str(title).lower()).strip()
+
+
+def _doc_ids(value: Any) -> List[str]:
+    """Doc ids of an evidence_doc_id / cited_doc_ids cell ('[123, 456]', 123 or '')."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return []
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return []
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return [value]
+    if isinstance(value, (list, tuple, set)):
+        return [str(v) for v in value]
+    return [str(int(value)) if isinstance(value, float) else str(value)]
+
+
+class CountingClient:
+    """
+    Ollama client wrapper counting generate/embed requests and tokens.
+
+    Attributes other than generate and embed are forwarded to the client.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+        self.counts = {
+            "llm_requests": 0,
+            "embed_requests": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def generate(self, *args, **kwargs):
+        response = self.client.generate(*args, **kwargs)
+        prompt_tokens, completion_tokens = token_counts(response)
+        with self._lock:
+            self.counts["llm_requests"] += 1
+            self.counts["prompt_tokens"] += prompt_tokens
+            self.counts["completion_tokens"] += completion_tokens
+        return response
+
+    def embed(self, *args, **kwargs):
+        response = self.client.embed(*args, **kwargs)
+        with self._lock:
+            self.counts["embed_requests"] += 1
+            self.counts["prompt_tokens"] += response.get("prompt_eval_count") or 0
+        return response
+
+
+class CountingEntrez:
+    """Entrez backend wrapper counting esearch, PubMed efetch and PMC requests."""
+
+    def __init__(self, backend: Any):
+        """
+        Args:
+            backend: StubEntrez, RecordedEntrez or the Bio.Entrez module (captured now)
+        """
+        self._esearch, self._efetch = backend.esearch, backend.efetch
+        self.counts = {"esearch": 0, "efetch": 0, "pmc": 0}
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = dict.fromkeys(self.counts, 0)
+
+    def esearch(self, **kwargs):
+        with self._lock:
+            self.counts["esearch"] += 1
+        return self._esearch(**kwargs)
+
+    def efetch(self, **kwargs):
+        with self._lock:
+            self.counts["pmc" if kwargs.get("db") == "pmc" else "efetch"] += 1
+        return self._efetch(**kwargs)
+
+
+class GoldEvidence:
+    """
+    Gold documents of the claims, matched by doc id or by title.
+
+    Example:
+        >>> gold = GoldEvidence.from_claims(claims_df, data_dir="./data")
+        >>> evidence_rank, cited_rank = gold.ranks(record.claim_id, papers)
+    """
+
+    def __init__(
+        self,
+        evidence: Dict[str, Set[str]],
+        cited: Dict[str, Set[str]],
+        titles: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Args:
+            evidence: Claim id -> evidence_doc_id set
+            cited: Claim id -> cited_doc_ids set
+            titles: Corpus doc id -> normalized title, for matching PubMed papers
+        """
+        self.evidence = evidence
+        self.cited = cited
+        self.titles = titles or {}
+
+    @classmethod
+    def from_claims(
+        cls, claims: pd.DataFrame, data_dir: Optional[str] = "./data"
+    ) -> "GoldEvidence":
+        """
+        Read gold documents from a scifact_medical_causal_claims.csv frame.
+
+        Args:
+            claims: Frame with id, evidence_doc_id and cited_doc_ids
+            data_dir: Directory with the SCIFACT corpus for title matching (None to match ids only)
+        """
+        evidence, cited = {}, {}
+        for row in claims.itertuples(index=False):
+            claim_id = str(row.id)
+            evidence[claim_id] = set(_doc_ids(row.evidence_doc_id))
+            cited[claim_id] = set(_doc_ids(row.cited_doc_ids)) | evidence[claim_id]
+
+        titles = {}
+        if data_dir is not None:
+            from methods.dense_rag import load_scifact_papers
+
+            gold_ids = set().union(*cited.values()) if cited else set()
+            try:
+                corpus = load_scifact_papers(data_dir)
+            except Exception as e:
+                print(f"Warning: matching gold documents by id only ({e})")
+            else:
+                titles = {
+                    doc_id: normalize_title(corpus[doc_id].title)
+                    for doc_id in gold_ids
+                    if doc_id in corpus and corpus[doc_id].title
+                }
+        return cls(evidence, cited, titles)
+
+    def ranks(
+        self, claim_id: str, papers: Sequence[PubMedPaper]
+    ) -> Tuple[Optional[int], Optional[int]]:
+        """
+        1-based rank of the first evidence and first cited document among papers.
+
+        Returns:
+            Tuple of (evidence rank, cited rank); None when no document is found
+        """
+        ranks = []
+        for gold in (
+            self.evidence.get(claim_id, set()),
+            self.cited.get(claim_id, set()),
+        ):
+            titles = {self.titles[d] for d in gold if d in self.titles}
+            rank = None
+            for position, paper in enumerate(papers, 1):
+                if paper.pmid in gold or (
+                    titles and normalize_title(paper.title) in titles
+                ):
+                    rank = position
+                    break
+            ranks.append(rank)
+        return ranks[0], ranks[1]
+
+
+def _quality(ranks: Sequence[Optional[int]], prefix: str = "") -> Dict[str, float]:
+    found = np.array([r if r is not None else np.inf for r in ranks], dtype=float)
+    if not len(found):
+        return {}
+    metrics = {f"{prefix}recall@{k}": float(np.mean(found <= k)) for k in KS}
+    metrics[f"{prefix}mrr"] = float(np.mean(1.0 / found))
+    return metrics
+
+
+def run_configuration(
+    configuration: Dict[str, Any],
+    records: Sequence[ClaimRecord],
+    gold: GoldEvidence,
+    client: Any,
+    entrez: CountingEntrez,
+    method_config: Optional[Dict[str, Any]] = None,
+    workers: int = 1,
+) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    """
+    Retrieve for every claim with one configuration and score the rankings.
+
+    Args:
+        configuration: {'name': ..., 'method': ..., plus method settings}
+        records: Claims (claim_id must match the gold claim ids)
+        gold: Gold evidence
+        client: Ollama client the method calls (wrapped to count requests)
+        entrez: Installed counting Entrez backend (reset here)
+        method_config: Settings shared by all configurations
+        workers: Claims retrieved concurrently
+
+    Returns:
+        Tuple of (summary row, per-claim frame with ranks and seconds)
+    """
+    settings = {k: v for k, v in configuration.items() if k not in ("name", "method")}
+    method_name = configuration["method"]
+    if method_name not in METHODS or not issubclass(
+        METHODS[method_name], simple_rag.SimpleRAG
+    ):
+        raise ValueError(f"Not a retrieval method: {method_name}")
+
+    counting = CountingClient(client)
+    config = {
+        **(method_config or {}),
+        **settings,
+        "retrieval_cache": RetrievalCache(),
+    }
+    method = METHODS[method_name](config)
+    with mock.patch.object(
+        simple_rag, "setup_ollama_client", lambda *args, **kwargs: counting
+    ):
+        method.setup()
+    entrez.reset()
+
+    def retrieve(record: ClaimRecord) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            _, papers = method.retrieve(record)
+            selected = method.select_documents(record, papers)
+            error = None
+        except Exception as e:
+            papers, selected, error = [], [], str(e)
+        seconds = time.perf_counter() - start
+        chosen = {paper.pmid for paper in selected}
+        ranking = list(selected) + [p for p in papers if p.pmid not in chosen]
+        evidence_rank, cited_rank = gold.ranks(record.claim_id, ranking)
+        return {
+            "claim_id": record.claim_id,
+            "retrieved": len(papers),
+            "evidence_rank": evidence_rank,
+            "cited_rank": cited_rank,
+            "seconds": seconds,
+            "error": error,
+        }
+
+    start = time.perf_counter()
+    if workers <= 1:
+        rows = [retrieve(record) for record in records]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(retrieve, records))
+    wall = time.perf_counter() - start
+
+    claims = pd.DataFrame(rows)
+    n = max(len(records), 1)
+    ncbi = sum(entrez.counts.values())
+    tokens = counting.counts["prompt_tokens"] + counting.counts["completion_tokens"]
+    summary = {
+        "name": configuration["name"],
+        "method": method_name,
+        "claims": len(records),
+        "errors": int(claims["error"].notna().sum()) if len(claims) else 0,
+        "mean_retrieved": float(claims["retrieved"].mean()) if len(claims) else 0.0,
+        **_quality(claims["evidence_rank"].tolist() if len(claims) else []),
+        **_quality(claims["cited_rank"].tolist() if len(claims) else [], "cited_"),
+        **entrez.counts,
+        "ncbi_requests": ncbi,
+        **counting.counts,
+        "requests_per_claim": (ncbi + counting.counts["llm_requests"]) / n,
+        "tokens_per_claim": tokens / n,
+        "wall_s": wall,
+        "seconds_per_claim": float(claims["seconds"].mean()) if len(claims) else 0.0,
+        "p95_seconds": (
+            float(np.percentile(claims["seconds"], 95)) if len(claims) else 0.0
+        ),
+    }
+    return summary, claims.assign(configuration=configuration["name"])
+
+
+def benchmark_retrieval(
+    claims: pd.DataFrame,
+    configurations: Sequence[Dict[str, Any]] = DEFAULT_CONFIGURATIONS,
+    client: Any = None,
+    entrez_backend: Any = Entrez,
+    method_config: Optional[Dict[str, Any]] = None,
+    data_dir: Optional[str] = "./data",
+    time_scale: float = 1.0,
+    workers: int = 1,
+    output: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """
+    Score every retriever configuration against SCIFACT gold evidence.
+
+    Configurations that cannot be set up (e.g. a missing local index) are
+    reported with their error and skipped.
+
+    Args:
+        claims: scifact_medical_causal_claims.csv frame
+        configurations: Configurations to compare
+        client: Ollama client (StubOllama, RecordedOllama or a live client)
+        entrez_backend: Entrez backend (Bio.Entrez for live NCBI, StubEntrez, RecordedEntrez)
+        method_config: Settings shared by all configurations
+        data_dir: Directory with the SCIFACT corpus and local indexes
+        time_scale: Multiplier applied to the NCBI rate-limit pauses
+        workers: Claims retrieved concurrently per configuration
+        output: JSON report to write (metadata, one row per configuration, per-claim ranks)
+        metadata: Extra metadata for the report
+
+    Returns:
+        DataFrame with one row per configuration
+    """
+    if client is None:
+        client = setup_ollama_client()
+    records = list(iter_claim_records(claims, label_key="evidence_label"))
+    gold = GoldEvidence.from_claims(claims, data_dir)
+    entrez = CountingEntrez(entrez_backend)
+    shared = {"data_dir": data_dir or "./data", **(method_config or {})}
+
+    rows, per_claim = [], []
+    with use_entrez(entrez, time_scale=time_scale):
+        for configuration in configurations:
+            try:
+                summary, claim_rows = run_configuration(
+                    configuration, records, gold, client, entrez, shared, workers
+                )
+            except Exception as e:
+                print(f"{configuration['name']:>24}  skipped: {e}")
+                rows.append(
+                    {
+                        "name": configuration["name"],
+                        "method": configuration.get("method"),
+                        "error": str(e),
+                    }
+                )
+                continue
+            rows.append(summary)
+            per_claim.append(claim_rows)
+            print(
+                f"{summary['name']:>24}  recall@3 {summary.get('recall@3', 0):.3f}  "
+                f"recall@10 {summary.get('recall@10', 0):.3f}  mrr {summary.get('mrr', 0):.3f}  "
+                f"{summary['requests_per_claim']:6.1f} req/claim  "
+                f"{summary['tokens_per_claim']:7.0f} tok/claim  "
+                f"{summary['seconds_per_claim']:6.2f} s/claim"
+            )
+
+    report = pd.DataFrame(rows)
+    if output:
+        meta = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "claims": len(records),
+            "gold_titles": len(gold.titles),
+            "method_config": shared,
+            "configurations": list(configurations),
+            **(metadata or {}),
+        }
+        path = Path(output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        claim_frame = pd.concat(per_claim) if per_claim else pd.DataFrame()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "metadata": meta,
+                    "rows": json.loads(report.to_json(orient="records")),
+                    "claims": json.loads(claim_frame.to_json(orient="records")),
+                },
+                f,
+                indent=2,
+            )
+        print(f"Wrote {path}")
+    return report
+
+
+def cheapest_configuration(
+    report: pd.DataFrame,
+    metric: str = "recall@3",
+    target: float = 0.5,
+    cost: str = "seconds_per_claim",
+) -> Optional[pd.Series]:
+    """
+    The cheapest configuration reaching a quality target.
+
+    Args:
+        report: Output of benchmark_retrieval
+        metric: Quality column (recall@k, mrr, cited_recall@k, ...)
+        target: Minimum value of metric
+        cost: Cost column to minimize (seconds_per_claim, requests_per_claim, tokens_per_claim, ...)
+
+    Returns:
+        The report row, or None if no configuration reaches the target
+    """
+    if metric not in report or cost not in report:
+        raise ValueError(f"Report has no '{metric}' or '{cost}' column")
+    passing = report[report[metric] >= target]
+    if passing.empty:
+        return None
+    return passing.sort_values([cost, metric], ascending=[True, False]).iloc[0]
+
+
+def _parse_target(value: str) -> Tuple[str, float]:
+    metric, _, target = value.partition("=")
+    return metric, float(target or 0.5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare retriever configurations on SCIFACT gold evidence."
+    )
+    parser.add_argument(
+        "--claims",
+        default=str(REPO_ROOT / "dataloader/scifact_medical_causal_claims.csv"),
+    )
+    parser.add_argument("--n-claims", type=int, default=None)
+    parser.add_argument(
+        "--config",
+        default=None,
+        help="YAML with 'configurations' and optional 'method_config' (default: built-in list)",
+    )
+    parser.add_argument(
+        "--only", nargs="+", default=None, help="Names of configurations to run"
+    )
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument(
+        "--backend", choices=("live", "stub", "replay", "record"), default="live"
+    )
+    parser.add_argument(
+        "--recording",
+        default="reports/retrieval_recording.jsonl",
+        help="Recording written by --backend record and read by --backend replay",
+    )
+    parser.add_argument("--time-scale", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--keyword-model", default="deepseek-r1:32b")
+    parser.add_argument("--rerank-model", default="deepseek-r1:32b")
+    parser.add_argument(
+        "--target",
+        default="recall@3=0.5",
+        help="<metric>=<minimum> the cheapest configuration must reach",
+    )
+    parser.add_argument(
+        "--cost",
+        default="seconds_per_claim",
+        choices=("seconds_per_claim", "requests_per_claim", "tokens_per_claim"),
+    )
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--output", default="reports/retrieval_benchmark.json")
+    args = parser.parse_args()
+
+    method_config = {
+        "keyword_model": args.keyword_model,
+        "rerank_model": args.rerank_model,
+    }
+    configurations = DEFAULT_CONFIGURATIONS
+    if args.config:
+        with open(args.config, "r") as f:
+            spec = yaml.safe_load(f) or {}
+        configurations = spec.get("configurations") or configurations
+        method_config.update(spec.get("method_config") or {})
+    if args.only:
+        configurations = [c for c in configurations if c["name"] in args.only]
+
+    if args.backend == "stub":
+        entrez_backend = StubEntrez(time_scale=args.time_scale)
+        client = StubOllama(time_scale=args.time_scale)
+    elif args.backend == "replay":
+        recording = Recording(args.recording, time_scale=args.time_scale)
+        entrez_backend, client = RecordedEntrez(recording), RecordedOllama(recording)
+    else:
+        from helpers.pubmed import set_api_key
+
+        set_api_key()
+        client = setup_ollama_client(args.host, args.port)
+        entrez_backend = Entrez
+        if args.backend == "record":
+            recording = Recording(args.recording)
+            entrez_backend = RecordedEntrez(recording, live=Entrez)
+            client = RecordedOllama(recording, live=client)
+
+    claims = pd.read_csv(args.claims)
+    if args.n_claims:
+        claims = claims.head(args.n_claims)
+    report = benchmark_retrieval(
+        claims,
+        configurations,
+        client=client,
+        entrez_backend=entrez_backend,
+        method_config=method_config,
+        data_dir=args.data_dir,
+        time_scale=args.time_scale,
+        workers=args.workers,
+        output=args.output,
+        metadata={"backend": args.backend, "time_scale": args.time_scale},
+    )
+
+    metric, target = _parse_target(args.target)
+    if metric in report:
+        best = cheapest_configuration(report, metric, target, args.cost)
+        if best is None:
+            print(f"No configuration reaches {metric} >= {target}")
+        else:
+            print(
+                f"Cheapest configuration with {metric} >= {target}: {best['name']} "
+                f"({metric} {best[metric]:.3f}, {args.cost} {best[args.cost]:.2f})"
+            )
@@ -0,0 +1,93 @@
+"""
+Run an experiment grid from the command line.
+
+Usage:
+    python -m experiments.run experiments/grids/scifact_causal.yaml
+    python -m experiments.run grid.yaml --dry-run
+    python -m experiments.run grid.yaml --worker-index 0 --num-workers 2
+
+Results are appended to <output_dir>/results.jsonl as they complete, so an
+interrupted run resumes where it stopped when the same command is re-run.
+"""
+
+import argparse
+import json
+from collections import Counter
+
+from experiments.grid import expand_grid, load_grid
+from experiments.run_manager import RunManager
+from experiments.scheduler import GridScheduler
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Run a models x methods x datasets experiment grid."
+    )
+    parser.add_argument("grid", help="Path to a YAML grid file")
+    parser.add_argument(
+        "--output-dir", help="Override the grid's output directory", default=None
+    )
+    parser.add_argument(
+        "--worker-index", type=int, default=0, help="Index of this worker (0-based)"
+    )
+    parser.add_argument(
+        "--num-workers", type=int, default=1, help="Number of workers sharing the run"
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Write nested spans of every claim to <output_dir>/trace.jsonl",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the expanded jobs and pending counts without running anything",
+    )
+    args = parser.parse_args(argv)
+
+    grid = load_grid(args.grid)
+    if args.output_dir:
+        grid["output_dir"] = args.output_dir
+    if args.trace:
+        grid["scheduler"]["trace"] = True
+
+    jobs = expand_grid(grid)
+    print(
+        f"Grid '{grid['name']}': {len(grid['models'])} models x "
+        f"{len(grid['methods'])} methods x {len(grid['datasets'])} datasets "
+        f"= {len(jobs)} jobs"
+    )
+
+    run = RunManager(
+        grid["output_dir"], worker_index=args.worker_index, num_workers=args.num_workers
+    )
+    print(f"Run directory: {run.run_dir} ({len(run)} results already stored)")
+
+    if args.dry_run:
+        # Claim ids start with the dataset name (see load_claim_records); only
+        # the claims this worker owns are counted
+        done = Counter(
+            (row["model"], row["method"], str(row["claim_id"]).split("/", 1)[0])
+            for row in run.iter_results()
+            if run.owns(row["claim_id"])
+        )
+        for model, method, dataset in jobs:
+            print(
+                f"  {model:<20} {method:<14} {dataset:<16} "
+                f"done: {done[(model, method, dataset)]}"
+            )
+        return
+
+    scheduler = GridScheduler(grid, run)
+    report = scheduler.run_grid()
+    print(json.dumps(report["phases"], indent=2))
+
+    summary = scheduler.metrics.summary()
+    if not summary.empty:
+        columns = ["total", "accuracy", "accuracy_low", "accuracy_high"]
+        columns += ["macro_f1", "unknown_rate"]
+        print(summary[columns].round(4).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Checkpointed, resumable experiment runs.
+
+Every (model, method, claim) result is appended to a JSONL file as soon as it
+is finished and flushed to disk, so a crash or an Ollama restart only loses
+the claims that were in flight. Re-opening the run skips the keys that are
+already stored, and several workers (processes or machines sharing the run
+directory) can write to the same run: appends are serialized with a file
+lock and a key is never written twice.
+
+Results that failed (an error was set, or Ollama gave no answer and the
+answer is "NAN") are stored too, flagged as retryable, but they do not count
+as done: the next invocation runs those claims again, and a successful
+result then supersedes the failed ones.
+"""
+
+import json
+import os
+import threading
+import zlib
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import pandas as pd
+
+from methods.base_method import BaseMethod, ClaimRecord, ClaimResult, iter_claim_records
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, run a single worker
+    fcntl = None
+
+
+ResultKey = Tuple[str, str, str]
+
+
+def _json_default(value: Any) -> Any:
+    # NumPy scalars (e.g. values read from a DataFrame row) -> Python scalars
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def result_key(model: Optional[str], method: str, claim_id: Any) -> ResultKey:
+    """
+    Build the key identifying one result in a run.
+
+    Args:
+        model: Model name
+        method: Method name
+        claim_id: Claim identifier
+
+    Returns:
+        Tuple of (model, method, claim_id) as strings
+    """
+    return (str(model), str(method), str(claim_id))
+
+
+def is_retryable(row: Dict[str, Any]) -> bool:
+    """
+    Check whether a stored result failed and should be run again.
+
+    Args:
+        row: Stored result (or ClaimResult fields) with 'error' and 'answer'
+
+    Returns:
+        True if the row is flagged retryable, has an error or a "NAN" answer
+    """
+    return (
+        bool(row.get("retryable"))
+        or row.get("error") is not None
+        or row.get("answer") == "NAN"
+    )
+
+
+class RunManager:
+    """Durable, append-only store of results for one experiment run."""
+
+    def __init__(
+        self,
+        run_dir: str,
+        worker_index: int = 0,
+        num_workers: int = 1,
+        fsync: bool = True,
+    ):
+        """
+        Open (or create) a run.
+
+        Args:
+            run_dir: Directory holding the run's results.jsonl
+            worker_index: Index of this worker, used to shard claims (0-based)
+            num_workers: Total number of workers sharing the run
+            fsync: Whether to fsync after every append (safer, slightly slower)
+        """
+        if not 0 <= worker_index < num_workers:
+            raise ValueError(
+                f"Invalid worker_index {worker_index} for {num_workers} workers"
+            )
+
+        self.run_dir = Path(run_dir)
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self.results_path = self.run_dir / "results.jsonl"
+        self.results_path.touch(exist_ok=True)
+        self.worker_index = worker_index
+        self.num_workers = num_workers
+        self.fsync = fsync
+
+        self._completed: Set[ResultKey] = set()
+        self._offset = 0
+        self._lock = threading.RLock()
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Read results appended since the last refresh (e.g. by other workers)."""
+        with self._lock, open(self.results_path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                # A line without a newline is a partial write still in progress
+                # (or left behind by a crash); it is re-read once completed.
+                if not line.endswith(b"\n"):
+                    break
+                self._offset += len(line)
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if is_retryable(row):
+                    continue
+                self._completed.add(
+                    result_key(row.get("model"), row.get("method"), row.get("claim_id"))
+                )
+
+    def __len__(self) -> int:
+        return len(self._completed)
+
+    def is_done(self, model: Optional[str], method: str, claim_id: Any) -> bool:
+        """Check whether a successful result for this key is already stored."""
+        return result_key(model, method, claim_id) in self._completed
+
+    def owns(self, claim_id: Any) -> bool:
+        """Check whether this worker's shard contains the claim."""
+        if self.num_workers == 1:
+            return True
+        shard = zlib.crc32(str(claim_id).encode("utf-8")) % self.num_workers
+        return shard == self.worker_index
+
+    def record(self, result: Union[ClaimResult, Dict[str, Any]]) -> bool:
+        """
+        Durably append one result.
+
+        Failed results (see is_retryable) are written with retryable set and
+        leave the key pending.
+
+        Args:
+            result: ClaimResult or dict with at least 'model', 'method' and 'claim_id'
+
+        Returns:
+            True if the result was written, False if its key was already stored
+        """
+        row = asdict(result) if is_dataclass(result) else dict(result)
+        key = result_key(row.get("model"), row.get("method"), row.get("claim_id"))
+        retryable = is_retryable(row)
+        if retryable:
+            row["retryable"] = True
+        line = (
+            json.dumps(row, ensure_ascii=False, default=_json_default) + "\n"
+        ).encode("utf-8")
+
+        with self._lock, open(self.results_path, "ab+") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                # Pick up anything other workers wrote while we were computing
+                self.refresh()
+                if key in self._completed:
+                    return False
+
+                # Terminate a partial line left behind by a crashed writer
+                f.seek(0, os.SEEK_END)
+                end = f.tell()
+                if end > self._offset:
+                    f.seek(end - 1)
+                    if f.read(1) != b"\n":
+                        line = b"\n" + line
+
+                f.write(line)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+                self._offset = f.tell()
+                if not retryable:
+                    self._completed.add(key)
+                return True
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def pending(
+        self, claims: Iterable[Any], model: Optional[str], method: str
+    ) -> Iterator[ClaimRecord]:
+        """
+        Filter claims down to the ones this worker still has to run.
+
+        Args:
+            claims: Claims in any shape accepted by iter_claim_records
+            model: Model name
+            method: Method name
+
+        Yields:
+            ClaimRecord objects in this worker's shard without a successful
+            stored result
+        """
+        for record in iter_claim_records(claims):
+            if not self.owns(record.claim_id):
+                continue
+            if self.is_done(model, method, record.claim_id):
+                continue
+            yield record
+
+    def run(self, method: BaseMethod, claims: Iterable[Any]) -> Iterator[ClaimResult]:
+        """
+        Run a method over the pending claims, recording each result as it finishes.
+
+        Args:
+            method: A set-up BaseMethod instance
+            claims: Claims in any shape accepted by iter_claim_records
+
+        Yields:
+            ClaimResult objects that were newly recorded by this worker
+            (failed ones included; they stay pending)
+        """
+        records = self.pending(claims, method.model, method.name)
+        for result in method.validate_claims(records):
+            if self.record(result):
+                yield result
+
+    def iter_results(self, include_retryable: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the stored results, skipping partial lines.
+
+        Args:
+            include_retryable: Also yield failed results (flagged retryable),
+                including those superseded by a later successful result
+        """
+        with open(self.results_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if include_retryable or not is_retryable(row):
+                    yield row
+
+    def load_results(
+        self, columns: Optional[List[str]] = None, include_retryable: bool = False
+    ) -> pd.DataFrame:
+        """
+        Load the stored results as a DataFrame.
+
+        Args:
+            columns: Optional subset of fields to keep
+            include_retryable: Also load failed results (see iter_results)
+
+        Returns:
+            DataFrame with one row per stored result
+        """
+        df = pd.DataFrame(list(self.iter_results(include_retryable)))
+        if columns is not None:
+            df = df.reindex(columns=columns)
+        return df
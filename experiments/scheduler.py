@@ -0,0 +1,312 @@
+"""
+Scheduler for experiment grids.
+
+Jobs are ordered to keep the GPU busy instead of sleeping between models:
+
+1. Prepare: model-independent stages (keyword generation, PubMed retrieval,
+   reranking) run once per claim for every method that defines them, so the
+   keyword / rerank model is loaded once and its output is cached for all
+   verification models.
+2. Verify: claims are grouped by model, so each model is loaded once, and all
+   methods for that model are interleaved in one queue with a fixed number of
+   requests in flight (parallel_requests, matching OLLAMA_NUM_PARALLEL).
+
+Results are recorded through a RunManager as they complete, and a timing
+report (per phase and per model/method/stage) is written next to them. The
+running metrics of every (model, method, dataset) job, with bootstrap
+confidence intervals, are kept up to date in metrics.json while the grid runs.
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from evaluation.metrics import GroupedMetrics
+from experiments.grid import build_method, load_claim_records
+from experiments.run_manager import RunManager, is_retryable
+from helpers import tracing
+from helpers.rag import RetrievalCache
+from methods.base_method import BaseMethod, ClaimRecord, ClaimResult
+
+
+def _run_bounded(
+    tasks: Iterable[Tuple[Callable, tuple]],
+    max_in_flight: int,
+    on_done: Callable[[Any], None],
+) -> None:
+    """Run (fn, args) tasks on a thread pool with at most max_in_flight pending."""
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        pending = set()
+        for fn, args in tasks:
+            pending.add(executor.submit(fn, *args))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    on_done(future.result())
+        for future in pending:
+            on_done(future.result())
+
+
+def _summarize(values: List[float]) -> Dict[str, float]:
+    arr = np.asarray(values, dtype=np.float64)
+    p50, p95 = np.percentile(arr, [50, 95])
+    return {
+        "count": int(arr.size),
+        "sum": float(arr.sum()),
+        "mean": float(arr.mean()),
+        "p50": float(p50),
+        "p95": float(p95),
+        "max": float(arr.max()),
+    }
+
+
+class TimingReport:
+    """Collects per-phase wall times and per-(model, method) stage timings."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.stages = defaultdict(lambda: defaultdict(list))
+        self.tokens = defaultdict(lambda: [0, 0])
+        self.counts = defaultdict(lambda: [0, 0])
+        self.samples = defaultdict(int)
+        # Results of the per-model verify threads are added concurrently
+        self._lock = threading.Lock()
+
+    def add(self, result: ClaimResult) -> None:
+        key = f"{result.model}|{result.method}"
+        with self._lock:
+            for stage, seconds in result.timings.items():
+                self.stages[key][stage].append(seconds)
+            self.tokens[key][0] += result.prompt_tokens
+            self.tokens[key][1] += result.completion_tokens
+            self.counts[key][0] += 1
+            self.counts[key][1] += result.error is not None
+            # Sampling methods (e.g. self-consistency) report the samples they used
+            self.samples[key] += result.metadata.get("samples", 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._to_dict()
+
+    def _to_dict(self) -> Dict[str, Any]:
+        jobs = {}
+        for key, stages in self.stages.items():
+            model, method = key.split("|", 1)
+            claims, errors = self.counts[key]
+            prompt_tokens, completion_tokens = self.tokens[key]
+            jobs[key] = {
+                "model": model,
+                "method": method,
+                "claims": claims,
+                "errors": errors,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "avg_samples": self.samples[key] / claims if claims else 0.0,
+                "stages": {
+                    stage: _summarize(values) for stage, values in stages.items()
+                },
+            }
+        return {"phases": dict(self.phases), "jobs": jobs}
+
+
+class GridScheduler:
+    """Runs the jobs of an expanded grid against one RunManager."""
+
+    def __init__(
+        self,
+        grid: Dict[str, Any],
+        run: RunManager,
+        retrieval_cache: Optional[RetrievalCache] = None,
+    ):
+        """
+        Args:
+            grid: Grid dictionary from load_grid
+            run: RunManager that stores the results
+            retrieval_cache: Cache shared by the retrieval-based methods
+                (default: a JSONL cache in the run directory)
+        """
+        self.grid = grid
+        self.run = run
+        if retrieval_cache is None:
+            # Workers shard claims, so each keeps its own cache file
+            suffix = f".worker{run.worker_index}" if run.num_workers > 1 else ""
+            retrieval_cache = RetrievalCache(
+                str(run.run_dir / f"retrieval_cache{suffix}.jsonl")
+            )
+        self.retrieval_cache = retrieval_cache
+        self.parallel_requests = grid["scheduler"]["parallel_requests"]
+        self.max_loaded_models = grid["scheduler"]["max_loaded_models"]
+        self.metrics_every = grid["scheduler"]["metrics_every"]
+        self.report = TimingReport()
+        self.metrics = GroupedMetrics()
+
+    def _worker_path(self, stem: str, suffix: str = ".json") -> Path:
+        """File in the run directory, per worker when the run is sharded."""
+        if self.run.num_workers > 1:
+            stem = f"{stem}.worker{self.run.worker_index}"
+        return self.run.run_dir / f"{stem}{suffix}"
+
+    def _build(self, method: Dict[str, Any], model: str) -> BaseMethod:
+        return build_method(
+            self.grid, method, model, retrieval_cache=self.retrieval_cache
+        )
+
+    def _load_records(self) -> List[ClaimRecord]:
+        records = []
+        for dataset in self.grid["datasets"]:
+            for record in load_claim_records(dataset, self.grid["data_dir"]):
+                if self.run.owns(record.claim_id):
+                    records.append(record)
+        return records
+
+    def _prepare(self, records: List[ClaimRecord]) -> None:
+        """Warm the retrieval cache for every method that has a prepare stage."""
+        models = self.grid["models"]
+        batch_size = self.grid["scheduler"]["prepare_batch_size"]
+        for method in self.grid["methods"]:
+            instance = self._build(method, models[0])
+            try:
+                self._prepare_method(instance, records, models, batch_size)
+            finally:
+                instance.close()
+
+    def _prepare_method(
+        self,
+        instance: BaseMethod,
+        records: List[ClaimRecord],
+        models: List[str],
+        batch_size: int,
+    ) -> None:
+        """Run the prepare stage of one method instance for the claims still pending."""
+        cls = type(instance)
+        batched = instance.batches_prepare
+        if cls.prepare is BaseMethod.prepare and not batched:
+            return
+
+        todo = [
+            r
+            for r in records
+            if not all(self.run.is_done(m, instance.name, r.claim_id) for m in models)
+        ]
+        if not todo:
+            return
+
+        # Batched methods get chunks; the others one claim per task so
+        # their network / LLM calls overlap
+        chunk = batch_size if batched else 1
+        chunks = [todo[i : i + chunk] for i in range(0, len(todo), chunk)]
+        errors = []
+
+        def prepare_chunk(chunk_records: List[ClaimRecord]) -> None:
+            claim_ids = [r.claim_id for r in chunk_records]
+            try:
+                with tracing.span("prepare", method=instance.name, claim_ids=claim_ids):
+                    instance.prepare_batch(chunk_records)
+            except Exception as e:
+                errors.append((claim_ids, str(e)))
+
+        start = time.perf_counter()
+        _run_bounded(
+            ((prepare_chunk, (c,)) for c in chunks),
+            self.parallel_requests,
+            lambda _: None,
+        )
+        self.report.phases[f"prepare:{instance.name}"] = time.perf_counter() - start
+        print(
+            f"Prepared {len(todo)} claims for {instance.name} "
+            f"({len(errors)} failed batches, cache: {len(self.retrieval_cache)} entries)"
+        )
+
+    def _verify_model(self, model: str, records: List[ClaimRecord]) -> None:
+        """Run every method for one model through a shared request queue."""
+        methods = [self._build(method, model) for method in self.grid["methods"]]
+        tasks = (
+            (method.run_one, (record,))
+            for record in records
+            for method in methods
+            if not self.run.is_done(model, method.name, record.claim_id)
+        )
+
+        completed, failed = [0], [0]
+
+        def on_done(result: ClaimResult) -> None:
+            if not self.run.record(result):
+                return
+            self.report.add(result)
+            # Failed results stay pending for the next invocation; keeping
+            # them out of the metrics avoids counting the claim twice
+            if is_retryable(vars(result)):
+                failed[0] += 1
+                return
+            completed[0] += 1
+            group = self.metrics.add(result)
+            if (
+                self.metrics_every
+                and self.metrics.groups[group].total % self.metrics_every == 0
+            ):
+                print(self.metrics.describe(group))
+                self.metrics.save(self._worker_path("metrics"))
+
+        start = time.perf_counter()
+        try:
+            _run_bounded(tasks, self.parallel_requests, on_done)
+        finally:
+            for method in methods:
+                method.close()
+        self.report.phases[f"verify:{model}"] = time.perf_counter() - start
+        print(
+            f"Completed {model}: {completed[0]} new results, "
+            f"{failed[0]} failed (retried on the next run)"
+        )
+
+    def run_grid(self) -> Dict[str, Any]:
+        """
+        Run all pending jobs of the grid.
+
+        Returns:
+            The timing report for this invocation (also written to
+            timing_report.json in the run directory, next to metrics.json)
+        """
+        start = time.perf_counter()
+        records = self._load_records()
+        print(f"Loaded {len(records)} claims for this worker")
+
+        if self.grid["scheduler"]["trace"]:
+            tracing.start_tracing(str(self._worker_path("trace", ".jsonl")))
+        try:
+            self._prepare(records)
+            # Live metrics cover the results stored by earlier invocations too
+            self.metrics.add_results(self.run.iter_results())
+
+            with ThreadPoolExecutor(max_workers=self.max_loaded_models) as executor:
+                for future in [
+                    executor.submit(self._verify_model, model, records)
+                    for model in self.grid["models"]
+                ]:
+                    future.result()
+        finally:
+            tracing.stop_tracing()
+
+        self.report.phases["total"] = time.perf_counter() - start
+        report = self.report.to_dict()
+        report["retrieval_cache"] = {
+            "entries": len(self.retrieval_cache),
+            "hits": self.retrieval_cache.hits,
+            "misses": self.retrieval_cache.misses,
+        }
+
+        report_path = self._worker_path("timing_report")
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Timing report saved to {report_path}")
+
+        metrics_path = self._worker_path("metrics")
+        self.metrics.save(metrics_path)
+        print(f"Metrics saved to {metrics_path}")
+        return report
@@ -0,0 +1,924 @@
+"""
+Stage-level latency benchmark of the claim-to-evidence pipeline.
+
+Drives each stage on its own - keyword generation, PubMed esearch, efetch,
+the PMC availability check, LLM reranking and verification - and the whole
+SimpleRAG / RerankedRAG pipeline, at several concurrency levels. Every
+(stage, concurrency) pair reports p50/p95/p99 latency, throughput and errors;
+a separate sequential pass under tracemalloc reports the memory allocated
+per call. The report is a JSON file that records the git commit and hashes
+of helpers/pubmed.py and helpers/llm.py, so two runs can be compared with
+the compare command.
+
+The benchmark runs offline against one of three backends:
+
+- stub: synthetic PubMed XML (parsed by the real Entrez.read) and a fake
+  Ollama server whose latency follows prompt and completion token counts
+- replay: responses and latencies of a recording
+- record: live NCBI and Ollama, saving every response to a recording
+
+Backend latencies and the NCBI rate-limit pauses are
+multiplied by time_scale, so the stub and replay backends can be run faster
+than real time. Only compare reports made with the same backend and scale.
+
+Usage:
+    python -m experiments.stage_benchmark run --backend stub --time-scale 0.02 --concurrency 1 4 8
+    python -m experiments.stage_benchmark run --backend record --recording reports/pipeline_recording.jsonl
+    python -m experiments.stage_benchmark compare reports/stage_benchmark_old.json reports/stage_benchmark.json
+"""
+
+import argparse
+import contextlib
+import gc
+import hashlib
+import io
+import json
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+from Bio import Entrez
+
+from helpers import pubmed
+from helpers.evidence import approx_tokens
+from helpers.llm import call_ollama
+from helpers.rag import (
+    format_abstracts,
+    get_keywords,
+    rank_documents,
+    retrieve_papers_with_fallback,
+)
+from methods.base_method import ClaimRecord, iter_claim_records
+from methods.prompts import RAG_PROMPT
+
+STAGES = ("keywords", "esearch", "efetch", "pmc", "rerank", "verify", "pipeline")
+PERCENTILES = (50, 95, 99)
+SOURCES = ("helpers/pubmed.py", "helpers/llm.py")
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+_ESEARCH_XML = """<?xml version="1.0" encoding="UTF-8" ?>
+<!DOCTYPE eSearchResult PUBLIC "-//NLM//DTD esearch 20060628//EN" "https://eutils.ncbi.nlm.nih.gov/eutils/dtd/20060628/esearch.dtd">
+<eSearchResult><Count>{count}</Count><RetMax>{retmax}</RetMax><RetStart>0</RetStart><IdList>{ids}</IdList><TranslationSet/><QueryTranslation>{term}</QueryTranslation></eSearchResult>
+"""
+
+_EFETCH_XML = """<?xml version="1.0" ?>
+<!DOCTYPE PubmedArticleSet PUBLIC "-//NLM//DTD PubMedArticle, 1st January 2025//EN" "https://dtd.nlm.nih.gov/ncbi/pubmed/out/pubmed_250101.dtd">
+<PubmedArticleSet><PubmedArticle><MedlineCitation Status="MEDLINE" Owner="NLM"><PMID Version="1">{pmid}</PMID><Article PubModel="Print"><Journal><JournalIssue CitedMedium="Print"><PubDate><Year>{year}</Year></PubDate></JournalIssue><Title>Journal of Synthetic Medicine</Title></Journal><ArticleTitle>{title}</ArticleTitle><Abstract><AbstractText>{abstract}</AbstractText></Abstract><AuthorList><Author ValidYN="Y"><LastName>Doe</LastName><ForeName>Jane</ForeName></Author></AuthorList></Article></MedlineCitation><PubmedData><ArticleIdList><ArticleId IdType="pubmed">{pmid}</ArticleId><ArticleId IdType="doi">10.5555/{pmid}</ArticleId>{pmc}</ArticleIdList></PubmedData></PubmedArticle></PubmedArticleSet>
+"""
+
+_VOCABULARY = (
+    "patients cohort randomized trial risk association increased reduced "
+    "treatment outcome mortality incidence exposure dose placebo controlled "
+    "significant analysis baseline follow-up adults children disease therapy "
+    "expression levels clinical effect receptor protein inflammation chronic"
+).split()
+
+
+def _seed(*parts: Any) -> int:
+    raw = "\x1f".join(str(part) for part in parts).encode("utf-8")
+    return int.from_bytes(hashlib.sha1(raw).digest()[:8], "big")
+
+
+def _scaled_sleep(seconds: float) -> None:
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+class StubEntrez:
+    """
+    Offline stand-in for Entrez.esearch and Entrez.efetch.
+
+    Answers are deterministic per query and PMID and shaped like NCBI's XML,
+    so the real Entrez.read and fetch_paper_details parsing is exercised.
+    AND queries with more terms find fewer papers, which makes
+    retrieve_papers_with_fallback take its OR path about as often as it does
+    against PubMed.
+    """
+
+    def __init__(
+        self,
+        time_scale: float = 1.0,
+        esearch_seconds: float = 0.35,
+        efetch_seconds: float = 0.25,
+        pmc_seconds: float = 0.6,
+        jitter: float = 0.3,
+        pmc_fraction: float = 0.3,
+        abstract_words: int = 220,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            time_scale: Multiplier applied to every simulated latency
+            esearch_seconds: Median latency of an esearch request
+            efetch_seconds: Median latency of a PubMed efetch request
+            pmc_seconds: Median latency of a PMC efetch request
+            jitter: Sigma of the log-normal noise on latencies
+            pmc_fraction: Share of papers with a PMC ID
+            abstract_words: Length of the synthetic abstracts
+            seed: Seed of the latency noise
+        """
+        self.time_scale = time_scale
+        self.esearch_seconds = esearch_seconds
+        self.efetch_seconds = efetch_seconds
+        self.pmc_seconds = pmc_seconds
+        self.jitter = jitter
+        self.pmc_fraction = pmc_fraction
+        self.abstract_words = abstract_words
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _wait(self, seconds: float) -> None:
+        with self._lock:
+            noise = self._random.lognormvariate(0.0, self.jitter)
+        _scaled_sleep(seconds * noise * self.time_scale)
+
+    def esearch(self, db: str = "pubmed", term: str = "", retmax: int = 20, **kwargs):
+        self._wait(self.esearch_seconds)
+        rng = random.Random(_seed("esearch", db, term))
+        count = int(rng.randrange(200) / 4 ** term.count(" AND "))
+        ids = "".join(
+            f"<Id>{rng.randrange(1_000_000, 40_000_000)}</Id>"
+            for _ in range(min(count, int(retmax)))
+        )
+        return io.BytesIO(
+            _ESEARCH_XML.format(
+                count=count, retmax=retmax, ids=ids, term=escape(term)
+            ).encode("utf-8")
+        )
+
+    def efetch(self, db: str = "pubmed", id: str = "", **kwargs):
+        if db == "pmc":
+            self._wait(self.pmc_seconds)
+            return io.BytesIO(
+                f"<pmc-articleset><article><front>PMC{id}</front></article></pmc-articleset>".encode()
+            )
+        self._wait(self.efetch_seconds)
+        rng = random.Random(_seed("efetch", id))
+        words = rng.choices(_VOCABULARY, k=self.abstract_words)
+        pmc = ""
+        if rng.random() < self.pmc_fraction:
+            pmc = f'<ArticleId IdType="pmc">PMC{rng.randrange(1_000_000, 9_000_000)}</ArticleId>'
+        return io.BytesIO(
+            _EFETCH_XML.format(
+                pmid=escape(str(id)),
+                year=rng.randrange(1990, 2025),
+                title=" ".join(words[:10]).capitalize() + ".",
+                abstract=" ".join(words).capitalize() + ".",
+                pmc=pmc,
+            ).encode("utf-8")
+        )
+
+
+class StubOllama:
+    """
+    Offline stand-in for an ollama.Client.
+
+    generate() recognizes the keyword, reranking and verification prompts
+    of helpers.rag and methods.prompts and answers them in the expected
+    format. Its latency is prompt tokens / prompt_rate + completion tokens /
+    generation_rate (plus load_seconds on the first request of a model),
+    and at most `parallel` requests are served at once, like an Ollama server
+    with OLLAMA_NUM_PARALLEL set. Responses carry Ollama's token counts and
+    durations.
+    """
+
+    def __init__(
+        self,
+        time_scale: float = 1.0,
+        prompt_rate: float = 1500.0,
+        generation_rate: float = 30.0,
+        think_tokens: int = 150,
+        load_seconds: float = 0.0,
+        parallel: int = 1,
+    ):
+        """
+        Args:
+            time_scale: Multiplier applied to every simulated latency
+            prompt_rate: Prompt tokens evaluated per second
+            generation_rate: Completion tokens generated per second
+            think_tokens: Length of the <think> trace of every answer (0 for none)
+            load_seconds: Model load time paid by the first request of each model
+            parallel: Requests served concurrently; others wait in line
+        """
+        self.time_scale = time_scale
+        self.prompt_rate = prompt_rate
+        self.generation_rate = generation_rate
+        self.think_tokens = think_tokens
+        self.load_seconds = load_seconds
+        self._slots = threading.Semaphore(parallel)
+        self._loaded = set()
+        self._lock = threading.Lock()
+
+    def _answer(self, prompt: str) -> str:
+        rng = random.Random(_seed("generate", prompt))
+        if prompt.startswith("Suggest me a set of keywords"):
+            claim = prompt.split("following claim: ", 1)[-1].rsplit(". Give just", 1)[0]
+            words = [w.strip(".,;:()") for w in claim.split() if len(w) > 4]
+            return ", ".join(dict.fromkeys(words[:4])) or "medicine"
+        if "Please respond with ONLY the numbers" in prompt:
+            n_documents = max(1, prompt.count("[PMID: "))
+            picks = rng.sample(range(1, n_documents + 1), min(3, n_documents))
+            return ",".join(str(pick) for pick in picks)
+        return f"FINAL ANSWER: {rng.choice(['SUPPORT', 'REFUTE'])}"
+
+    def generate(
+        self,
+        model: str = "",
+        prompt: str = "",
+        system: Optional[str] = None,
+        stream: bool = False,
+        options: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        answer = self._answer(prompt)
+        if self.think_tokens:
+            answer = (
+                "<think>\n"
+                + " ".join(["reasoning"] * self.think_tokens)
+                + "\n</think>\n\n"
+            ) + answer
+        prompt_tokens = approx_tokens((system or "") + prompt)
+        completion_tokens = approx_tokens(answer)
+        prompt_seconds = prompt_tokens / self.prompt_rate * self.time_scale
+        eval_seconds = completion_tokens / self.generation_rate * self.time_scale
+
+        with self._slots:
+            start = time.perf_counter()
+            with self._lock:
+                load_seconds = 0.0 if model in self._loaded else self.load_seconds
+                self._loaded.add(model)
+            _scaled_sleep(
+                load_seconds * self.time_scale + prompt_seconds + eval_seconds
+            )
+            total = time.perf_counter() - start
+
+        return {
+            "model": model,
+            "response": answer,
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": completion_tokens,
+            "load_duration": int(load_seconds * self.time_scale * 1e9),
+            "prompt_eval_duration": int(prompt_seconds * 1e9),
+            "eval_duration": int(eval_seconds * 1e9),
+            "total_duration": int(total * 1e9),
+        }
+
+
+class Recording:
+    """
+    JSONL log of PubMed and Ollama responses with the latency they took.
+
+    Written by the record backend (RecordedEntrez / RecordedOllama wrapping
+    live backends) and read by the replay backend (the same classes without
+    a live backend), which sleeps for the recorded latency times time_scale.
+    """
+
+    def __init__(self, path: str, time_scale: float = 1.0):
+        """
+        Args:
+            path: JSONL file (appended to when recording)
+            time_scale: Multiplier applied to recorded latencies when replaying
+        """
+        self.path = Path(path)
+        self.time_scale = time_scale
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # partial line from an interrupted recording
+                    self._entries[(entry["kind"], entry["key"])] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, kind: str, key: str, body: Any, seconds: float) -> None:
+        """Save a response and its latency."""
+        entry = {"kind": kind, "key": key, "body": body, "seconds": seconds}
+        with self._lock:
+            self._entries[(kind, key)] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+
+    def replay(self, kind: str, key: str) -> Any:
+        """Wait for the recorded latency and return the recorded response."""
+        entry = self._entries.get((kind, key))
+        if entry is None:
+            raise KeyError(f"No recorded {kind} response for {key[:200]!r}")
+        _scaled_sleep(entry["seconds"] * self.time_scale)
+        return entry["body"]
+
+
+class RecordedEntrez:
+    """Entrez esearch/efetch that record live answers, or replay them if live is None."""
+
+    def __init__(self, recording: Recording, live: Any = None):
+        """
+        Args:
+            recording: Where responses are saved or read from
+            live: Object with esearch/efetch to record (e.g. the Bio.Entrez module);
+                captured now, so installing this backend does not recurse into it
+        """
+        self.recording = recording
+        self._live = (live.esearch, live.efetch) if live is not None else None
+
+    def _call(self, kind: str, key: str, index: int, **kwargs):
+        if self._live is None:
+            body = self.recording.replay(kind, key)
+        else:
+            start = time.perf_counter()
+            handle = self._live[index](**kwargs)
+            body = handle.read()
+            handle.close()
+            if isinstance(body, bytes):
+                body = body.decode("utf-8")
+            self.recording.add(kind, key, body, time.perf_counter() - start)
+        return io.BytesIO(body.encode("utf-8"))
+
+    def esearch(self, db: str = "pubmed", term: str = "", retmax: int = 20, **kwargs):
+        key = json.dumps([db, term, int(retmax)])
+        return self._call("esearch", key, 0, db=db, term=term, retmax=retmax, **kwargs)
+
+    def efetch(self, db: str = "pubmed", id: str = "", **kwargs):
+        key = json.dumps([db, str(id)])
+        return self._call("efetch", key, 1, db=db, id=id, **kwargs)
+
+
+class RecordedOllama:
+    """Ollama client whose generate records live answers, or replays them if live is None."""
+
+    def __init__(self, recording: Recording, live: Any = None):
+        """
+        Args:
+            recording: Where responses are saved or read from
+            live: ollama.Client to record
+        """
+        self.recording = recording
+        self.live = live
+
+    def generate(
+        self,
+        model: str = "",
+        prompt: str = "",
+        system: Optional[str] = None,
+        stream: bool = False,
+        options: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        key = hashlib.sha1(
+            json.dumps([model, system, prompt, options], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        if self.live is None:
+            return self.recording.replay("generate", key)
+        start = time.perf_counter()
+        response = self.live.generate(
+            model=model, prompt=prompt, system=system, stream=False, options=options
+        )
+        response = (
+            response.model_dump() if hasattr(response, "model_dump") else dict(response)
+        )
+        self.recording.add("generate", key, response, time.perf_counter() - start)
+        return response
+
+
+@contextlib.contextmanager
+def use_entrez(backend: Any, time_scale: float = 1.0) -> Iterator[None]:
+    """
+    Route helpers.pubmed through an Entrez backend.
+
+    Replaces Entrez.esearch / Entrez.efetch and divides the rate of
+    pubmed.rate_limiter by time_scale, so its pauses shrink with the backend
+    latencies; both are restored on exit.
+
+    Args:
+        backend: StubEntrez, RecordedEntrez or the Bio.Entrez module itself
+        time_scale: Multiplier applied to the NCBI rate-limit pauses
+    """
+    limiter = pubmed.rate_limiter
+    saved = (Entrez.esearch, Entrez.efetch, limiter.rate)
+    Entrez.esearch, Entrez.efetch = backend.esearch, backend.efetch
+    if time_scale != 1.0:
+        limiter.rate = limiter.current_rate / time_scale if time_scale > 0 else 1e9
+    try:
+        yield
+    finally:
+        Entrez.esearch, Entrez.efetch, limiter.rate = saved
+
+
+def _percentiles(seconds: Sequence[float]) -> Dict[str, float]:
+    if not seconds:
+        return {f"p{q}_ms": float("nan") for q in PERCENTILES}
+    values = np.percentile(np.asarray(seconds) * 1000.0, PERCENTILES)
+    return {f"p{q}_ms": float(v) for q, v in zip(PERCENTILES, values)}
+
+
+def _failed(output: Any) -> bool:
+    if isinstance(output, tuple) and output:
+        output = output[-1]
+    if isinstance(output, dict):
+        return "error" in output
+    return getattr(output, "error", None) is not None
+
+
+def measure_stage(
+    fn: Callable[[Any], Any], items: Sequence[Any], concurrency: int = 1
+) -> Tuple[Dict[str, float], List[Any]]:
+    """
+    Call fn on every item with up to `concurrency` calls in flight.
+
+    Args:
+        fn: Stage driver
+        items: One input per call
+        concurrency: Worker threads
+
+    Returns:
+        Tuple of (latency percentiles, mean, max, wall time, throughput and
+        error count; outputs aligned with items, None where fn raised)
+    """
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            output, ok = fn(item), True
+        except Exception:
+            output, ok = None, False
+        return time.perf_counter() - start, output, ok and not _failed(output)
+
+    start = time.perf_counter()
+    if concurrency <= 1:
+        calls = [timed(item) for item in items]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            calls = list(executor.map(timed, items))
+    wall = time.perf_counter() - start
+
+    latencies = [seconds for seconds, _, _ in calls]
+    stats = {
+        "calls": len(calls),
+        "errors": sum(1 for _, _, ok in calls if not ok),
+        **_percentiles(latencies),
+        "mean_ms": float(np.mean(latencies) * 1000.0) if latencies else float("nan"),
+        "max_ms": float(np.max(latencies) * 1000.0) if latencies else float("nan"),
+        "wall_s": wall,
+        "throughput_per_s": len(calls) / wall if wall else 0.0,
+    }
+    return stats, [output for _, output, _ in calls]
+
+
+def measure_allocations(
+    fn: Callable[[Any], Any], items: Sequence[Any]
+) -> Dict[str, float]:
+    """
+    Memory allocated by sequential calls of fn, traced with tracemalloc.
+
+    Args:
+        fn: Stage driver
+        items: Inputs (a handful is enough)
+
+    Returns:
+        Mean peak and net (still allocated after the call) KiB per call
+    """
+    if not items:
+        return {"alloc_peak_kib": float("nan"), "alloc_net_kib": float("nan")}
+    peaks, nets = [], []
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        for item in items:
+            gc.collect()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            try:
+                fn(item)
+            except Exception:
+                pass
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            nets.append(after - before)
+    finally:
+        if started:
+            tracemalloc.stop()
+    return {
+        "alloc_peak_kib": float(np.mean(peaks)) / 1024.0,
+        "alloc_net_kib": float(np.mean(nets)) / 1024.0,
+    }
+
+
+class PipelineStages:
+    """
+    Stage drivers and their inputs for a set of claims.
+
+    prepare() runs the pipeline once, untimed, to collect what each stage
+    consumes: the keywords of every claim, the AND and OR queries, the
+    retrieved PMIDs and PMC IDs, and the abstracts to rerank and verify.
+    Each driver then repeats exactly one stage on one input.
+    """
+
+    def __init__(
+        self,
+        records: Sequence[ClaimRecord],
+        client: Any,
+        model: str = "deepseek-r1:32b",
+        keyword_model: str = "deepseek-r1:32b",
+        rerank_model: str = "deepseek-r1:32b",
+        pipeline_method: str = "reranked_rag",
+        n_keywords: int = 4,
+        top_k: int = 10,
+        rerank_top_k: int = 3,
+    ):
+        """
+        Args:
+            records: Claims to benchmark
+            client: Ollama client (StubOllama, RecordedOllama or a live client)
+            model: Verification model
+            keyword_model: Keyword generation model
+            rerank_model: Reranking model
+            pipeline_method: 'rag' or 'reranked_rag', run by the pipeline stage
+            n_keywords: Keywords per claim
+            top_k: Papers retrieved per claim
+            rerank_top_k: Papers kept by the reranker
+        """
+        if pipeline_method not in ("rag", "reranked_rag"):
+            raise ValueError(
+                f"Unknown pipeline method: {pipeline_method}. Must be 'rag' or 'reranked_rag'"
+            )
+        self.records = list(records)
+        self.client = client
+        self.model = model
+        self.keyword_model = keyword_model
+        self.rerank_model = rerank_model
+        self.pipeline_method = pipeline_method
+        self.n_keywords = n_keywords
+        self.top_k = top_k
+        self.rerank_top_k = rerank_top_k
+        self.inputs: Dict[str, List[Any]] = {}
+
+    def prepare(self) -> Dict[str, int]:
+        """
+        Collect the inputs of every stage.
+
+        Returns:
+            Number of inputs per stage
+        """
+        queries, pmids, pmc_ids, documents = [], [], [], []
+        for record in self.records:
+            keywords = get_keywords(
+                record.claim,
+                n_keywords=self.n_keywords,
+                model=self.keyword_model,
+                client=self.client,
+            )
+            queries.extend([keywords, keywords.replace(" AND ", " OR ")])
+            papers = retrieve_papers_with_fallback(keywords, top_k=self.top_k)
+            pmids.extend(paper.pmid for paper in papers)
+            pmc_ids.extend(paper.pmc_id for paper in papers if paper.pmc_id)
+            documents.append((record.claim, papers))
+
+        self.inputs = {
+            "keywords": [record.claim for record in self.records],
+            "esearch": queries,
+            "efetch": pmids,
+            "pmc": pmc_ids,
+            "rerank": documents,
+            "verify": documents,
+            "pipeline": self.records,
+        }
+        return {stage: len(items) for stage, items in self.inputs.items()}
+
+    def keywords(self, claim: str) -> str:
+        return get_keywords(
+            claim,
+            n_keywords=self.n_keywords,
+            model=self.keyword_model,
+            client=self.client,
+        )
+
+    def esearch(self, query: str) -> List[str]:
+        return pubmed.search_pubmed(query, top_k=self.top_k)
+
+    def efetch(self, pmid: str) -> pubmed.PubMedPaper:
+        return pubmed.fetch_paper_details(pmid, check_pmc=False)
+
+    def pmc(self, pmc_id: str) -> bool:
+        return pubmed.check_pmc_availability(pmc_id)
+
+    def rerank(self, item: Tuple[str, List[pubmed.PubMedPaper]]):
+        claim, papers = item
+        return rank_documents(
+            claim,
+            [f"[PMID: {paper.pmid}] {paper.abstract}" for paper in papers],
+            model=self.rerank_model,
+            client=self.client,
+            top_k=self.rerank_top_k,
+        )
+
+    def verify(self, item: Tuple[str, List[pubmed.PubMedPaper]]) -> Dict[str, Any]:
+        claim, papers = item
+        return call_ollama(
+            model=self.model,
+            prompt=RAG_PROMPT.format(
+                claim=claim, documents=format_abstracts(papers[: self.rerank_top_k])
+            ),
+            client=self.client,
+        )
+
+    def method(self):
+        """A set-up pipeline method with a fresh retrieval cache, calling self.client."""
+        from methods.reranked_rag import RerankedRAG
+        from methods.simple_rag import SimpleRAG
+
+        method_class = (
+            RerankedRAG if self.pipeline_method == "reranked_rag" else SimpleRAG
+        )
+        method = method_class(
+            {
+                "model": self.model,
+                "keyword_model": self.keyword_model,
+                "rerank_model": self.rerank_model,
+                "n_keywords": self.n_keywords,
+                "top_k": self.top_k,
+                "rerank_top_k": self.rerank_top_k,
+            }
+        )
+        method.setup()
+        method.llm = self.client
+        return method
+
+    def driver(self, stage: str) -> Callable[[Any], Any]:
+        """The function running one call of stage."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}. Must be one of {STAGES}")
+        if stage == "pipeline":
+            return self.method().run_one
+        return getattr(self, stage)
+
+
+def _source_hashes() -> Dict[str, Optional[str]]:
+    hashes = {}
+    for source in SOURCES:
+        path = REPO_ROOT / source
+        hashes[source] = (
+            hashlib.sha1(path.read_bytes()).hexdigest()[:12] if path.exists() else None
+        )
+    return hashes
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def benchmark_stages(
+    stages: PipelineStages,
+    stage_names: Sequence[str] = STAGES,
+    concurrency: Sequence[int] = (1, 4),
+    alloc_calls: int = 5,
+    output: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """
+    Measure latency, throughput and allocations of pipeline stages.
+
+    Every stage runs all its inputs once per concurrency level. The pipeline
+    stage also contributes one row per sub-stage (pipeline.retrieval,
+    pipeline.selection, ...) from the timings of its ClaimResults.
+
+    Args:
+        stages: Stage drivers; prepare() is called if it has not been
+        stage_names: Stages to run
+        concurrency: Concurrency levels
+        alloc_calls: Sequential calls per stage traced for allocations (0 to skip)
+        output: JSON report to write (metadata + rows)
+        metadata: Extra metadata for the report (backend, time_scale, ...)
+
+    Returns:
+        DataFrame with one row per (stage, concurrency)
+    """
+    if not stages.inputs:
+        print(f"Preparing stage inputs for {len(stages.records)} claims")
+        counts = stages.prepare()
+        print(", ".join(f"{stage}: {n}" for stage, n in counts.items()))
+
+    rows = []
+    for stage in stage_names:
+        items = stages.inputs[stage]
+        allocations = (
+            measure_allocations(stages.driver(stage), items[:alloc_calls])
+            if alloc_calls
+            else {}
+        )
+        for level in concurrency:
+            stats, outputs = measure_stage(stages.driver(stage), items, level)
+            rows.append({"stage": stage, "concurrency": level, **stats, **allocations})
+            print(
+                f"{stage:>9} x{level:<3} p50 {stats['p50_ms']:9.1f} ms  "
+                f"p95 {stats['p95_ms']:9.1f} ms  p99 {stats['p99_ms']:9.1f} ms  "
+                f"{stats['throughput_per_s']:8.2f}/s  errors {stats['errors']}"
+            )
+            if stage != "pipeline":
+                continue
+            timings: Dict[str, List[float]] = {}
+            for result in outputs:
+                for name, seconds in (getattr(result, "timings", None) or {}).items():
+                    timings.setdefault(name, []).append(seconds)
+            for name, seconds in timings.items():
+                rows.append(
+                    {
+                        "stage": f"pipeline.{name}",
+                        "concurrency": level,
+                        "calls": len(seconds),
+                        **_percentiles(seconds),
+                        "mean_ms": float(np.mean(seconds) * 1000.0),
+                        "max_ms": float(np.max(seconds) * 1000.0),
+                    }
+                )
+
+    report = pd.DataFrame(rows)
+    if output:
+        meta = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "sources": _source_hashes(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "claims": len(stages.records),
+            "concurrency": list(concurrency),
+            "pipeline_method": stages.pipeline_method,
+            "top_k": stages.top_k,
+            **(metadata or {}),
+        }
+        path = Path(output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        records = json.loads(report.to_json(orient="records"))  # NaN -> null
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"metadata": meta, "rows": records}, f, indent=2)
+        print(f"Wrote {path}")
+    return report
+
+
+def load_report(path: str) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    """
+    Read a report written by benchmark_stages.
+
+    Returns:
+        Tuple of (metadata, rows as a DataFrame)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return report["metadata"], pd.DataFrame(report["rows"])
+
+
+def compare_reports(baseline: str, candidate: str) -> pd.DataFrame:
+    """
+    Compare two benchmark reports stage by stage.
+
+    Args:
+        baseline: Report of the reference run
+        candidate: Report of the changed code
+
+    Returns:
+        DataFrame indexed by (stage, concurrency) with the p50/p95/p99
+        latencies and throughput of both runs and their candidate/baseline ratio
+    """
+    columns = [f"p{q}_ms" for q in PERCENTILES] + ["throughput_per_s"]
+    base_meta, base = load_report(baseline)
+    cand_meta, cand = load_report(candidate)
+    for key in ("backend", "time_scale"):
+        if base_meta.get(key) != cand_meta.get(key):
+            print(
+                f"Warning: reports differ in {key} "
+                f"({base_meta.get(key)} vs {cand_meta.get(key)})"
+            )
+    merged = base.set_index(["stage", "concurrency"])[columns].join(
+        cand.set_index(["stage", "concurrency"])[columns],
+        how="inner",
+        lsuffix="_base",
+        rsuffix="_new",
+    )
+    for column in columns:
+        merged[f"{column}_ratio"] = merged[f"{column}_new"] / merged[f"{column}_base"]
+    return merged
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the latency of each stage of the claim-to-evidence pipeline."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmark")
+    run_parser.add_argument(
+        "--claims",
+        default=str(REPO_ROOT / "dataloader/scifact_medical_causal_claims.csv"),
+    )
+    run_parser.add_argument("--n-claims", type=int, default=20)
+    run_parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    run_parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4])
+    run_parser.add_argument("--alloc-calls", type=int, default=5)
+    run_parser.add_argument(
+        "--backend", choices=("stub", "replay", "record"), default="stub"
+    )
+    run_parser.add_argument(
+        "--recording",
+        default="reports/pipeline_recording.jsonl",
+        help="Recording written by --backend record and read by --backend replay",
+    )
+    run_parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=None,
+        help="Latency multiplier for stub/replay (default: 0.02 for stub, 1 otherwise)",
+    )
+    run_parser.add_argument(
+        "--llm-parallel",
+        type=int,
+        default=1,
+        help="Concurrent requests of the stub LLM",
+    )
+    run_parser.add_argument("--model", default="deepseek-r1:32b")
+    run_parser.add_argument("--keyword-model", default="deepseek-r1:32b")
+    run_parser.add_argument("--rerank-model", default="deepseek-r1:32b")
+    run_parser.add_argument(
+        "--pipeline-method", choices=("rag", "reranked_rag"), default="reranked_rag"
+    )
+    run_parser.add_argument("--top-k", type=int, default=10)
+    run_parser.add_argument("--host", default="localhost")
+    run_parser.add_argument("--port", type=int, default=11434)
+    run_parser.add_argument("--output", default="reports/stage_benchmark.json")
+
+    compare_parser = commands.add_parser("compare", help="Compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with pd.option_context("display.width", 200, "display.max_columns", None):
+            print(compare_reports(args.baseline, args.candidate).round(2))
+        sys.exit(0)
+
+    time_scale = args.time_scale
+    if time_scale is None:
+        time_scale = 0.02 if args.backend == "stub" else 1.0
+    if args.backend == "stub":
+        entrez = StubEntrez(time_scale=time_scale)
+        client = StubOllama(time_scale=time_scale, parallel=args.llm_parallel)
+    elif args.backend == "replay":
+        recording = Recording(args.recording, time_scale=time_scale)
+        print(f"Replaying {len(recording)} responses from {args.recording}")
+        entrez, client = RecordedEntrez(recording), RecordedOllama(recording)
+    else:
+        from helpers.llm import setup_ollama_client
+
+        pubmed.set_api_key()
+        recording = Recording(args.recording)
+        entrez = RecordedEntrez(recording, live=Entrez)
+        client = RecordedOllama(
+            recording, live=setup_ollama_client(args.host, args.port)
+        )
+
+    claims = pd.read_csv(args.claims).head(args.n_claims)
+    pipeline_stages = PipelineStages(
+        list(iter_claim_records(claims, label_key="evidence_label")),
+        client,
+        model=args.model,
+        keyword_model=args.keyword_model,
+        rerank_model=args.rerank_model,
+        pipeline_method=args.pipeline_method,
+        top_k=args.top_k,
+    )
+    with use_entrez(entrez, time_scale=time_scale):
+        benchmark_stages(
+            pipeline_stages,
+            stage_names=args.stages,
+            concurrency=args.concurrency,
+            alloc_calls=args.alloc_calls,
+            output=args.output,
+            metadata={"backend": args.backend, "time_scale": time_scale},
+        )
@@ -0,0 +1,376 @@
+"""
+BM25 inverted index for local lexical retrieval over abstracts.
+
+Postings are stored as compact NumPy arrays in CSR layout (indptr per term,
+document index and precomputed BM25 impact per posting), so an index can be
+saved to a directory and memory-mapped back in milliseconds. Batches of
+queries are scored with one np.bincount over the gathered postings.
+
+The index can be built over the SCIFACT corpus or over PubMed abstracts that
+were already retrieved (e.g. the retrieval cache of a run):
+
+    python -m helpers.bm25 --data-dir ./data --index-dir ./data/scifact/bm25_index
+"""
+
+import argparse
+import json
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from helpers.dense_index import top_k_indices
+
+# Greek letters are common in gene / protein names (TNF-α, IFN-γ, β-blocker)
+_GREEK = {
+    "α": "alpha",
+    "β": "beta",
+    "γ": "gamma",
+    "δ": "delta",
+    "ε": "epsilon",
+    "κ": "kappa",
+    "λ": "lambda",
+    "μ": "mu",
+}
+
+# Words joined by hyphens, slashes or dots stay together (IL-6, COVID-19,
+# 5-FU, HbA1c, p53/MDM2) and a trailing '+' is kept (CD4+)
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-/.][a-z0-9]+)*[+]?")
+_SPLIT_RE = re.compile(r"[-/.]")
+
+STOPWORDS = frozenset("""
+    a about above after again against all am an and any are as at be because been
+    before being below between both but by can could did do does doing down during
+    each few for from further had has have having he her here hers herself him
+    himself his how i if in into is it its itself just me more most my myself no
+    nor not of off on once only or other our ours ourselves out over own same she
+    should so some such than that the their theirs them themselves then there these
+    they this those through to too under until up very was we were what when where
+    which while who whom why will with would you your yours yourself yourselves
+    """.split())
+
+
+def _stem(token: str) -> str:
+    # Light plural stripping; keeps abbreviations and gene names intact
+    if len(token) > 4 and token.isalpha():
+        if token.endswith("ies"):
+            return token[:-3] + "y"
+        if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+            return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize biomedical text for BM25.
+
+    Lower-cases, spells out Greek letters, keeps compound terms such as
+    'il-6', 'covid-19' or 'cd4+' as single tokens and also emits their parts,
+    drops stopwords and strips plurals.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of tokens
+
+    Example:
+        >>> tokenize("IL-6 levels predict COVID-19 outcomes")
+        ['il-6', 'il', '6', 'level', 'predict', 'covid-19', 'covid', '19', 'outcome']
+    """
+    text = text.lower()
+    for letter, name in _GREEK.items():
+        if letter in text:
+            text = text.replace(letter, name)
+
+    tokens = []
+    for token in _TOKEN_RE.findall(text):
+        if token in STOPWORDS:
+            continue
+        tokens.append(_stem(token))
+        if len(token) > 1 and _SPLIT_RE.search(token):
+            parts = [p for p in _SPLIT_RE.split(token.rstrip("+")) if p]
+            tokens.extend(_stem(p) for p in parts if p not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """Inverted index with precomputed BM25 impacts in CSR arrays."""
+
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        indptr: np.ndarray,
+        doc_indices: np.ndarray,
+        impacts: np.ndarray,
+        doc_ids: Sequence[str],
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            vocab: Term -> term id
+            indptr: Postings of term t are [indptr[t], indptr[t + 1]) (int64, n_terms + 1)
+            doc_indices: Document index of each posting (int32)
+            impacts: BM25 contribution of each posting (float32)
+            doc_ids: Document ids by document index
+            metadata: Parameters and statistics saved with the index
+        """
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_indices = doc_indices
+        self.impacts = impacts
+        self.doc_ids = [str(doc_id) for doc_id in doc_ids]
+        self.metadata = metadata or {}
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @classmethod
+    def build(
+        cls,
+        doc_ids: Sequence[str],
+        texts: Iterable[str],
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> "BM25Index":
+        """
+        Build an index over documents.
+
+        Args:
+            doc_ids: Document ids
+            texts: Document texts aligned with doc_ids
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+
+        Returns:
+            BM25Index over the documents
+        """
+        vocab: Dict[str, int] = {}
+        term_ids, doc_indices, tfs = [], [], []
+        doc_lengths = []
+
+        for doc_index, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_indices.append(doc_index)
+                tfs.append(tf)
+
+        n_docs = len(doc_lengths)
+        if n_docs != len(doc_ids):
+            raise ValueError(f"Got {len(doc_ids)} doc ids for {n_docs} texts")
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        doc_indices = np.asarray(doc_indices, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+        doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        avgdl = float(doc_lengths.mean()) if n_docs else 0.0
+
+        # Group postings by term (stable, so documents stay sorted within a term)
+        order = np.argsort(term_ids, kind="stable")
+        term_ids, doc_indices, tfs = term_ids[order], doc_indices[order], tfs[order]
+        df = np.bincount(term_ids, minlength=len(vocab))
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = k1 * (1.0 - b + b * doc_lengths[doc_indices] / max(avgdl, 1e-9))
+        impacts = idf[term_ids] * tfs * (k1 + 1.0) / (tfs + norm)
+
+        metadata = {"k1": k1, "b": b, "avgdl": avgdl, "n_docs": n_docs}
+        return cls(
+            vocab, indptr, doc_indices, impacts.astype(np.float32), doc_ids, metadata
+        )
+
+    def save(self, index_dir: str) -> None:
+        """
+        Save the index to a directory of .npy arrays plus vocab / doc id JSON files.
+
+        Args:
+            index_dir: Directory to write to
+        """
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        np.save(index_dir / "indptr.npy", np.asarray(self.indptr))
+        np.save(index_dir / "doc_indices.npy", np.asarray(self.doc_indices))
+        np.save(index_dir / "impacts.npy", np.asarray(self.impacts))
+        with open(index_dir / "vocab.json", "w") as f:
+            json.dump(self.vocab, f)
+        with open(index_dir / "doc_ids.json", "w") as f:
+            json.dump(self.doc_ids, f)
+        with open(index_dir / "meta.json", "w") as f:
+            json.dump({**self.metadata, "n_terms": len(self.vocab)}, f, indent=2)
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True) -> "BM25Index":
+        """
+        Load an index saved with save().
+
+        Args:
+            index_dir: Directory the index was saved to
+            mmap: Memory-map the postings arrays instead of reading them into memory
+
+        Returns:
+            BM25Index
+        """
+        index_dir = Path(index_dir)
+        mode = "r" if mmap else None
+        with open(index_dir / "vocab.json", "r") as f:
+            vocab = json.load(f)
+        with open(index_dir / "doc_ids.json", "r") as f:
+            doc_ids = json.load(f)
+        with open(index_dir / "meta.json", "r") as f:
+            metadata = json.load(f)
+        return cls(
+            vocab,
+            np.load(index_dir / "indptr.npy", mmap_mode=mode),
+            np.load(index_dir / "doc_indices.npy", mmap_mode=mode),
+            np.load(index_dir / "impacts.npy", mmap_mode=mode),
+            doc_ids,
+            metadata,
+        )
+
+    def _term_ids(self, query: str) -> List[int]:
+        return sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab})
+
+    def score_batch(self, queries: Sequence[str]) -> np.ndarray:
+        """
+        BM25 scores of every document for a batch of queries.
+
+        Args:
+            queries: Query texts
+
+        Returns:
+            float32 array of shape (len(queries), n_docs)
+        """
+        n_docs = len(self.doc_ids)
+        rows, postings = [], []
+        for row, query in enumerate(queries):
+            for term_id in self._term_ids(query):
+                start, end = self.indptr[term_id], self.indptr[term_id + 1]
+                postings.append(np.arange(start, end))
+                rows.append(np.full(end - start, row, dtype=np.int64))
+
+        if not postings:
+            return np.zeros((len(queries), n_docs), dtype=np.float32)
+
+        postings = np.concatenate(postings)
+        flat = np.concatenate(rows) * n_docs + self.doc_indices[postings]
+        scores = np.bincount(
+            flat, weights=self.impacts[postings], minlength=len(queries) * n_docs
+        )
+        return scores.reshape(len(queries), n_docs).astype(np.float32)
+
+    def search(
+        self, queries: Sequence[str], top_k: int = 10, batch_size: int = 256
+    ) -> Tuple[List[List[str]], List[List[float]]]:
+        """
+        Retrieve the top_k documents for a batch of queries.
+
+        Documents that share no term with a query are never returned.
+
+        Args:
+            queries: Query texts (e.g. claims)
+            top_k: Number of documents per query
+            batch_size: Maximum number of queries scored together
+
+        Returns:
+            Tuple of (doc ids per query, best first; BM25 scores per query)
+        """
+        # Keep the dense score matrix of one batch around ~32 MB
+        n_docs = max(len(self.doc_ids), 1)
+        batch_size = max(1, min(batch_size, 8_000_000 // n_docs))
+
+        ids, scores = [], []
+        for start in range(0, len(queries), batch_size):
+            batch_scores = self.score_batch(queries[start : start + batch_size])
+            top = top_k_indices(batch_scores, top_k)
+            top_scores = np.take_along_axis(batch_scores, top, axis=1)
+            for row, row_scores in zip(top, top_scores):
+                keep = row_scores > 0
+                ids.append([self.doc_ids[i] for i in row[keep]])
+                scores.append(row_scores[keep].tolist())
+        return ids, scores
+
+
+def build_scifact_bm25(index_dir: str, data_dir: str = "./data") -> BM25Index:
+    """
+    Build and save a BM25 index over the SCIFACT corpus.
+
+    Args:
+        index_dir: Directory to save the index to
+        data_dir: Directory with the SCIFACT dataset
+
+    Returns:
+        The built BM25Index
+    """
+    from dataloader.load_datasets import SciFactLoader
+    from helpers.dense_index import scifact_document_text
+
+    corpus = SciFactLoader(data_dir).load_corpus()
+    index = BM25Index.build(
+        [doc["doc_id"] for doc in corpus],
+        (scifact_document_text(doc) for doc in corpus),
+    )
+    index.save(index_dir)
+    print(f"Saved BM25 index over {len(index)} documents to {index_dir}")
+    return index
+
+
+def build_papers_bm25(papers: Iterable[Any], index_dir: str) -> BM25Index:
+    """
+    Build and save a BM25 index over PubMed papers (deduplicated by PMID).
+
+    The papers are saved next to the index (papers.jsonl) so the index can
+    serve documents on its own, e.g. to a RAG method.
+
+    Args:
+        papers: PubMedPaper objects (e.g. from load_cached_papers)
+        index_dir: Directory to save the index to
+
+    Returns:
+        The built BM25Index
+    """
+    from helpers.rag import save_papers
+
+    unique = {}
+    for paper in papers:
+        unique.setdefault(paper.pmid, paper)
+    papers = list(unique.values())
+
+    index = BM25Index.build(
+        [paper.pmid for paper in papers],
+        (f"{paper.title}. {paper.abstract}" for paper in papers),
+    )
+    index.save(index_dir)
+    save_papers(papers, str(Path(index_dir) / "papers.jsonl"))
+    print(f"Saved BM25 index over {len(index)} PubMed abstracts to {index_dir}")
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a BM25 index.")
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--index-dir", default="./data/scifact/bm25_index")
+    parser.add_argument(
+        "--retrieval-cache",
+        help="Index the PubMed abstracts in a run's retrieval cache instead of SCIFACT",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.retrieval_cache:
+        from helpers.rag import load_cached_papers
+
+        build_papers_bm25(load_cached_papers(args.retrieval_cache), args.index_dir)
+    else:
+        build_scifact_bm25(args.index_dir, args.data_dir)
+    print(f"Built in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    BM25Index.load(args.index_dir)
+    print(f"Loaded (memory-mapped) in {(time.perf_counter() - start) * 1000:.1f} ms")
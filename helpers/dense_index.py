@@ -0,0 +1,345 @@
+"""
+Dense retrieval over a local document collection (e.g. the SCIFACT corpus).
+
+Documents are embedded once into an L2-normalized float32 matrix stored on
+disk (embeddings.npy + doc_ids.json). Queries are answered in batches with a
+single matrix product and np.argpartition, so a batch of claims costs one
+embedding request and one BLAS call instead of one search per claim.
+
+Usage:
+    python -m helpers.dense_index --data-dir ./data --index-dir ./data/scifact/dense_index
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+EmbedFn = Callable[[List[str]], np.ndarray]
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize the rows of a matrix (rows of zeros are left as zeros).
+
+    Args:
+        matrix: Array of shape (n, d)
+
+    Returns:
+        float32 array of shape (n, d) with unit-norm rows
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Indices of the top_k highest scores in each row, best first.
+
+    Uses np.argpartition so only the top_k candidates of each row are sorted.
+
+    Args:
+        scores: Array of shape (n_queries, n_docs)
+        top_k: Number of indices to return per row
+
+    Returns:
+        int array of shape (n_queries, min(top_k, n_docs))
+    """
+    n_docs = scores.shape[1]
+    top_k = min(top_k, n_docs)
+    if top_k == 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64)
+    if top_k < n_docs:
+        candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+    else:
+        candidates = np.tile(np.arange(n_docs), (scores.shape[0], 1))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def scifact_document_text(doc: Dict[str, Any]) -> str:
+    """Title and abstract sentences of a SCIFACT corpus document as one string."""
+    abstract = doc.get("abstract", "")
+    if isinstance(abstract, list):
+        abstract = " ".join(abstract)
+    return f"{doc.get('title', '')}. {abstract}".strip()
+
+
+class DenseIndex:
+    """Normalized embedding matrix with the ids of the documents it indexes."""
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        doc_ids: Sequence[str],
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            embeddings: Normalized float32 matrix of shape (n_docs, d)
+            doc_ids: Document ids aligned with the rows of embeddings
+            metadata: Free-form information saved with the index (e.g. embedding model)
+        """
+        if len(doc_ids) != embeddings.shape[0]:
+            raise ValueError(
+                f"Got {len(doc_ids)} doc ids for {embeddings.shape[0]} embeddings"
+            )
+        self.embeddings = embeddings
+        self.doc_ids = [str(doc_id) for doc_id in doc_ids]
+        self.metadata = metadata or {}
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @classmethod
+    def build(
+        cls,
+        doc_ids: Sequence[str],
+        texts: Sequence[str],
+        embed_fn: EmbedFn,
+        batch_size: int = 256,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> "DenseIndex":
+        """
+        Embed documents and build an index.
+
+        Args:
+            doc_ids: Document ids
+            texts: Document texts aligned with doc_ids
+            embed_fn: Function mapping a list of texts to an (n, d) array
+            batch_size: Number of documents embedded per call
+            metadata: Free-form information saved with the index
+
+        Returns:
+            DenseIndex over the documents
+        """
+        batches = [
+            embed_fn(list(texts[start : start + batch_size]))
+            for start in range(0, len(texts), batch_size)
+        ]
+        embeddings = normalize_rows(np.concatenate(batches, axis=0))
+        return cls(embeddings, doc_ids, metadata)
+
+    def save(self, index_dir: str) -> None:
+        """
+        Save the index to a directory (embeddings.npy, doc_ids.json, meta.json).
+
+        Args:
+            index_dir: Directory to write to
+        """
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        np.save(index_dir / "embeddings.npy", np.ascontiguousarray(self.embeddings))
+        with open(index_dir / "doc_ids.json", "w") as f:
+            json.dump(self.doc_ids, f)
+        with open(index_dir / "meta.json", "w") as f:
+            json.dump(
+                {**self.metadata, "n_docs": len(self), "dim": self.embeddings.shape[1]},
+                f,
+                indent=2,
+            )
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True) -> "DenseIndex":
+        """
+        Load an index saved with save().
+
+        Args:
+            index_dir: Directory the index was saved to
+            mmap: Memory-map the embedding matrix instead of reading it into memory
+
+        Returns:
+            DenseIndex
+        """
+        index_dir = Path(index_dir)
+        embeddings = np.load(
+            index_dir / "embeddings.npy", mmap_mode="r" if mmap else None
+        )
+        with open(index_dir / "doc_ids.json", "r") as f:
+            doc_ids = json.load(f)
+        metadata = {}
+        if (index_dir / "meta.json").exists():
+            with open(index_dir / "meta.json", "r") as f:
+                metadata = json.load(f)
+        return cls(embeddings, doc_ids, metadata)
+
+    def search(
+        self, query_embeddings: np.ndarray, top_k: int = 10, batch_size: int = 1024
+    ) -> Tuple[List[List[str]], np.ndarray]:
+        """
+        Find the top_k documents for a batch of query embeddings.
+
+        Args:
+            query_embeddings: Array of shape (n_queries, d) (normalized here)
+            top_k: Number of documents per query
+            batch_size: Number of queries scored per matrix product
+
+        Returns:
+            Tuple of (doc ids per query, best first; cosine scores of shape (n_queries, top_k))
+        """
+        queries = normalize_rows(np.atleast_2d(query_embeddings))
+        ids, all_scores = [], []
+        for start in range(0, queries.shape[0], batch_size):
+            scores = queries[start : start + batch_size] @ self.embeddings.T
+            top = top_k_indices(scores, top_k)
+            all_scores.append(np.take_along_axis(scores, top, axis=1))
+            ids.extend([[self.doc_ids[i] for i in row] for row in top])
+        if not all_scores:
+            return [], np.zeros((0, top_k), dtype=np.float32)
+        return ids, np.concatenate(all_scores, axis=0)
+
+    def search_texts(
+        self, queries: Sequence[str], embed_fn: EmbedFn, top_k: int = 10
+    ) -> Tuple[List[List[str]], np.ndarray]:
+        """
+        Embed a batch of query texts and search the index.
+
+        Args:
+            queries: Query texts (e.g. claims)
+            embed_fn: The same embedding function used to build the index
+            top_k: Number of documents per query
+
+        Returns:
+            Same as search()
+        """
+        return self.search(embed_fn(list(queries)), top_k=top_k)
+
+
+def recall_at_k(
+    retrieved: Sequence[Sequence[str]], gold: Sequence[Sequence[str]], k: int
+) -> float:
+    """
+    Fraction of queries with at least one gold document in the top k.
+
+    Args:
+        retrieved: Ranked doc ids per query
+        gold: Gold doc ids per query
+        k: Cutoff
+
+    Returns:
+        Recall@k in [0, 1]
+    """
+    if not retrieved:
+        return 0.0
+    hits = sum(
+        1
+        for ranked, relevant in zip(retrieved, gold)
+        if set(map(str, relevant)) & set(ranked[:k])
+    )
+    return hits / len(retrieved)
+
+
+def evaluate_retrieval(
+    index: DenseIndex,
+    claims: pd.DataFrame,
+    embed_fn: EmbedFn,
+    ks: Sequence[int] = (1, 3, 5, 10),
+    gold_column: str = "evidence_doc_id",
+) -> Dict[str, float]:
+    """
+    Measure recall@k against gold evidence and query throughput.
+
+    Args:
+        index: Index over the SCIFACT corpus
+        claims: DataFrame with 'claim' and gold_column (e.g. scifact_medical_causal_claims.csv)
+        embed_fn: Embedding function used to build the index
+        ks: Cutoffs to report
+        gold_column: Column with the gold document id
+
+    Returns:
+        Dictionary with recall@k per cutoff, queries/sec for the search alone
+        and queries/sec including query embedding
+    """
+    queries = claims["claim"].tolist()
+    gold = [[str(doc_id)] for doc_id in claims[gold_column]]
+
+    start = time.perf_counter()
+    query_embeddings = embed_fn(queries)
+    embed_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    retrieved, _ = index.search(query_embeddings, top_k=max(ks))
+    search_seconds = time.perf_counter() - start
+
+    metrics = {f"recall@{k}": recall_at_k(retrieved, gold, k) for k in ks}
+    metrics["queries"] = len(queries)
+    metrics["search_qps"] = len(queries) / search_seconds if search_seconds else 0.0
+    total = embed_seconds + search_seconds
+    metrics["end_to_end_qps"] = len(queries) / total if total else 0.0
+    return metrics
+
+
+def build_scifact_index(
+    index_dir: str,
+    embed_fn: EmbedFn,
+    data_dir: str = "./data",
+    metadata: Optional[Dict[str, Any]] = None,
+) -> DenseIndex:
+    """
+    Embed the SCIFACT corpus and save the index.
+
+    Args:
+        index_dir: Directory to save the index to
+        embed_fn: Embedding function for documents
+        data_dir: Directory with the SCIFACT dataset
+        metadata: Free-form information saved with the index
+
+    Returns:
+        The built DenseIndex
+    """
+    from dataloader.load_datasets import SciFactLoader
+
+    corpus = SciFactLoader(data_dir).load_corpus()
+    index = DenseIndex.build(
+        [doc["doc_id"] for doc in corpus],
+        [scifact_document_text(doc) for doc in corpus],
+        embed_fn,
+        metadata=metadata,
+    )
+    index.save(index_dir)
+    print(f"Saved dense index over {len(index)} documents to {index_dir}")
+    return index
+
+
+if __name__ == "__main__":
+    from helpers.llm import embed_texts, setup_ollama_client
+
+    parser = argparse.ArgumentParser(
+        description="Build and evaluate a dense SCIFACT index."
+    )
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--index-dir", default="./data/scifact/dense_index")
+    parser.add_argument("--model", default="nomic-embed-text")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument(
+        "--claims",
+        default=str(
+            Path(__file__).resolve().parents[1]
+            / "dataloader"
+            / "scifact_medical_causal_claims.csv"
+        ),
+    )
+    args = parser.parse_args()
+
+    client = setup_ollama_client(args.host, args.port)
+
+    def embed(texts: List[str]) -> np.ndarray:
+        return embed_texts(texts, model=args.model, client=client)
+
+    if (Path(args.index_dir) / "embeddings.npy").exists():
+        index = DenseIndex.load(args.index_dir)
+    else:
+        index = build_scifact_index(
+            args.index_dir, embed, args.data_dir, metadata={"model": args.model}
+        )
+
+    metrics = evaluate_retrieval(index, pd.read_csv(args.claims), embed)
+    print(json.dumps(metrics, indent=2))
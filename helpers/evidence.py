@@ -0,0 +1,316 @@
+"""
+Sentence-level evidence extraction for the verification prompt.
+
+Instead of whole abstracts, only the sentences that score highest against
+the claim (with the embedding + lexical scorer of helpers/rerank.py) are
+passed to the verifier, grouped under the PMID they come from so the RAG
+prompt format and PMID citations are unchanged.
+
+evaluate_evidence_extraction measures, on the SCIFACT medical causal
+claims, how often the gold evidence sentences (evidence_sentences column)
+are kept and how much shorter the documents get.
+
+Usage:
+    python -m helpers.evidence --data-dir ./data --top-sentences 3
+"""
+
+import argparse
+import ast
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from helpers.rag import DOCUMENT_SEPARATOR
+from helpers.rerank import CheapReranker, EmbedFn
+
+# Sentence ends before whitespace followed by an upper-case letter, digit or
+# bracket, except after common abbreviations of biomedical abstracts
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\[])")
+_ABBREVIATIONS = re.compile(
+    r"(?:\b(?:e\.g|i\.e|et al|vs|Fig|Figs|approx|ca|cf|Dr|No|Ref|resp)\.|\b[A-Z]\.)$"
+)
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split an abstract into sentences.
+
+    Args:
+        text: Abstract text
+
+    Returns:
+        List of non-empty sentences
+    """
+    if not isinstance(text, str):
+        return []
+    sentences: List[str] = []
+    for piece in _SENTENCE_RE.split(text.strip()):
+        if sentences and _ABBREVIATIONS.search(sentences[-1]):
+            sentences[-1] = f"{sentences[-1]} {piece}"
+        elif piece.strip():
+            sentences.append(piece.strip())
+    return sentences
+
+
+def approx_tokens(text: str) -> int:
+    """Rough token count of English text (about 4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+# (PMID, sentence index in its abstract, sentence, score)
+Evidence = Tuple[str, int, str, float]
+
+
+def format_evidence(evidence: Sequence[Evidence]) -> str:
+    """
+    Format selected sentences like format_abstracts: one block per PMID.
+
+    Sentences keep their order within the abstract, and abstracts keep the
+    order of their best sentence.
+
+    Args:
+        evidence: Selected sentences
+
+    Returns:
+        "[PMID: <pmid>] <sentence> ... <sentence>" blocks joined by DOCUMENT_SEPARATOR
+    """
+    by_pmid: Dict[str, List[Tuple[int, str]]] = {}
+    for pmid, index, sentence, _ in evidence:
+        by_pmid.setdefault(pmid, []).append((index, sentence))
+    return DOCUMENT_SEPARATOR.join(
+        f"[PMID: {pmid}] " + " ... ".join(s for _, s in sorted(sentences))
+        for pmid, sentences in by_pmid.items()
+    )
+
+
+class EvidenceExtractor:
+    """
+    Select the sentences of retrieved abstracts that best match a claim.
+
+    Example:
+        >>> extractor = EvidenceExtractor(top_sentences=3)
+        >>> evidence = extractor.extract(claim, [(paper.pmid, paper.abstract) for paper in papers])
+        >>> prompt = RAG_PROMPT.format(claim=claim, documents=format_evidence(evidence))
+    """
+
+    def __init__(
+        self,
+        embed_fn: Optional[EmbedFn] = None,
+        top_sentences: int = 3,
+        embedding_weight: float = 0.7,
+    ):
+        """
+        Args:
+            embed_fn: Function mapping a list of texts to an (n, d) array; without it
+                sentences are scored lexically only
+            top_sentences: Sentences kept per claim (over all abstracts)
+            embedding_weight: Weight of the cosine similarity in the score
+        """
+        if top_sentences < 1:
+            raise ValueError("top_sentences must be at least 1")
+        self.top_sentences = top_sentences
+        self.scorer = CheapReranker(
+            embed_fn=embed_fn, embedding_weight=embedding_weight
+        )
+
+    def extract_batch(
+        self,
+        claims: Sequence[str],
+        documents: Sequence[Sequence[Tuple[str, Any]]],
+    ) -> List[List[Evidence]]:
+        """
+        Select evidence sentences for several claims, scoring all sentences in one batch.
+
+        Args:
+            claims: Claims
+            documents: For each claim, (PMID, abstract) pairs; an abstract is either a
+                string or a list of sentences (as in the SCIFACT corpus)
+
+        Returns:
+            For each claim, the selected sentences, best first
+        """
+        candidates = []
+        for docs in documents:
+            sentences = []
+            for pmid, abstract in docs:
+                if not isinstance(abstract, list):
+                    abstract = split_sentences(abstract)
+                sentences.extend(
+                    (str(pmid), index, sentence)
+                    for index, sentence in enumerate(abstract)
+                )
+            candidates.append(sentences)
+
+        scores = self.scorer.score_batch(
+            claims, [[sentence for _, _, sentence in c] for c in candidates]
+        )
+        selected = []
+        for sentences, sentence_scores in zip(candidates, scores):
+            order = sorted(
+                range(len(sentences)), key=lambda i: -float(sentence_scores[i])
+            )
+            selected.append(
+                [
+                    (*sentences[i], float(sentence_scores[i]))
+                    for i in order[: self.top_sentences]
+                ]
+            )
+        return selected
+
+    def extract(
+        self, claim: str, documents: Sequence[Tuple[str, Any]]
+    ) -> List[Evidence]:
+        """
+        Select evidence sentences for one claim.
+
+        Args:
+            claim: The claim
+            documents: (PMID, abstract) pairs
+
+        Returns:
+            The selected sentences, best first
+        """
+        return self.extract_batch([claim], [documents])[0]
+
+
+def _parse_id_list(value: Any) -> List[int]:
+    """Parse list columns of the claims CSV, e.g. '[1 9]' or '[ 3512154 26996935]'."""
+    if isinstance(value, (list, tuple)):
+        return [int(v) for v in value]
+    text = str(value).strip()
+    if not text or text.lower() == "nan":
+        return []
+    try:
+        parsed = ast.literal_eval(text)
+        return [
+            int(v) for v in (parsed if isinstance(parsed, (list, tuple)) else [parsed])
+        ]
+    except (ValueError, SyntaxError):
+        return [int(v) for v in re.findall(r"\d+", text)]
+
+
+def evaluate_evidence_extraction(
+    claims: pd.DataFrame,
+    corpus: Dict[str, Dict[str, Any]],
+    extractor: EvidenceExtractor,
+    gold_only: bool = False,
+) -> Dict[str, float]:
+    """
+    Compare extracted sentences with the gold SCIFACT evidence sentences.
+
+    Candidates are the abstracts of cited_doc_ids (or only evidence_doc_id
+    when gold_only is set), as full SCIFACT sentence lists.
+
+    Args:
+        claims: DataFrame with 'claim', 'evidence_doc_id', 'evidence_sentences'
+            and 'cited_doc_ids' (e.g. scifact_medical_causal_claims.csv)
+        corpus: SCIFACT corpus documents by doc_id (as strings), or the
+            corpus returned by SciFactLoader.load_corpus()
+        extractor: The extractor to evaluate
+        gold_only: Use only the gold evidence document as candidate
+
+    Returns:
+        Dictionary with the share of gold evidence sentences selected (sentence_recall),
+        the share of claims with at least one selected (claim_hit_rate), the share of
+        selected sentences that are gold (sentence_precision) and approximate
+        prompt tokens with full abstracts vs. selected sentences
+    """
+    claim_texts, documents, gold = [], [], []
+    for row in claims.itertuples(index=False):
+        doc_ids = (
+            [row.evidence_doc_id] if gold_only else _parse_id_list(row.cited_doc_ids)
+        )
+        if row.evidence_doc_id not in doc_ids:
+            doc_ids.append(row.evidence_doc_id)
+        found = [(str(d), corpus.get(str(d))) for d in doc_ids]
+        docs = [(d, doc["abstract"]) for d, doc in found if doc is not None]
+        claim_texts.append(row.claim)
+        documents.append(docs)
+        gold.append(
+            {
+                (str(row.evidence_doc_id), i)
+                for i in _parse_id_list(row.evidence_sentences)
+            }
+        )
+
+    selections = extractor.extract_batch(claim_texts, documents)
+
+    gold_total = gold_hits = selected_total = claim_hits = 0
+    full_tokens = selected_tokens = 0
+    for docs, selected, relevant in zip(documents, selections, gold):
+        chosen = {(pmid, index) for pmid, index, _, _ in selected}
+        hits = len(chosen & relevant)
+        gold_total += len(relevant)
+        gold_hits += hits
+        selected_total += len(chosen)
+        claim_hits += hits > 0
+        full_tokens += approx_tokens(
+            DOCUMENT_SEPARATOR.join(
+                f"[PMID: {pmid}] "
+                + (abstract if isinstance(abstract, str) else " ".join(abstract))
+                for pmid, abstract in docs
+            )
+        )
+        selected_tokens += approx_tokens(format_evidence(selected))
+
+    n = max(len(claim_texts), 1)
+    return {
+        "claims": len(claim_texts),
+        "top_sentences": extractor.top_sentences,
+        "sentence_recall": gold_hits / max(gold_total, 1),
+        "sentence_precision": gold_hits / max(selected_total, 1),
+        "claim_hit_rate": claim_hits / n,
+        "approx_prompt_tokens_full": full_tokens / n,
+        "approx_prompt_tokens_evidence": selected_tokens / n,
+        "token_reduction": 1 - selected_tokens / max(full_tokens, 1),
+    }
+
+
+if __name__ == "__main__":
+    from dataloader.load_datasets import SciFactLoader
+
+    parser = argparse.ArgumentParser(
+        description="Evaluate sentence-level evidence extraction on SCIFACT."
+    )
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument(
+        "--claims",
+        default=str(
+            Path(__file__).resolve().parents[1]
+            / "dataloader"
+            / "scifact_medical_causal_claims.csv"
+        ),
+    )
+    parser.add_argument("--top-sentences", type=int, nargs="+", default=[1, 2, 3, 5])
+    parser.add_argument(
+        "--embedding-model",
+        default=None,
+        help="Ollama embedding model (default: lexical scores only)",
+    )
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--gold-only", action="store_true")
+    args = parser.parse_args()
+
+    embed_fn = None
+    if args.embedding_model:
+        from helpers.llm import embed_texts, setup_ollama_client
+
+        client = setup_ollama_client(args.host, args.port)
+        embed_fn = lambda texts: embed_texts(  # noqa: E731
+            texts, model=args.embedding_model, client=client
+        )
+
+    corpus = SciFactLoader(args.data_dir).load_corpus()
+    claims_df = pd.read_csv(args.claims)
+    for top_sentences in args.top_sentences:
+        metrics = evaluate_evidence_extraction(
+            claims_df,
+            corpus,
+            EvidenceExtractor(embed_fn=embed_fn, top_sentences=top_sentences),
+            gold_only=args.gold_only,
+        )
+        print(json.dumps(metrics, indent=2))
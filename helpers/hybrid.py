@@ -0,0 +1,191 @@
+"""
+Hybrid retrieval: several rankings fused with reciprocal-rank fusion (RRF).
+
+Each source (PubMed esearch, a local BM25 index, a local dense index, ...)
+maps a claim to a ranked list of document ids. The sources of a claim run
+concurrently and each has its own latency budget: a source that has not
+answered when its budget runs out is left out of the fusion for that claim
+instead of stalling it. The fused ranking is deduplicated by document id,
+so all sources of a retriever must rank documents in the same id space:
+PubMed ids (PubMed esearch, indexes built over PubMed abstracts) or SCIFACT
+doc ids (indexes built over the SCIFACT corpus).
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from helpers import tracing
+
+SearchFn = Callable[[str, int], List[str]]
+
+
+def reciprocal_rank_fusion(
+    rankings: Mapping[str, Sequence[str]],
+    k: int = 60,
+    weights: Optional[Mapping[str, float]] = None,
+) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked lists with reciprocal-rank fusion.
+
+    Each document scores sum(weight / (k + rank)) over the rankings it
+    appears in (rank starting at 1). Duplicates within a ranking only count
+    at their best rank.
+
+    Args:
+        rankings: Source name -> ranked document ids, best first
+        k: RRF constant; larger values flatten the contribution of top ranks
+        weights: Optional source name -> weight (default: 1.0 for every source)
+
+    Returns:
+        List of (document id, fused score), best first
+
+    Example:
+        >>> reciprocal_rank_fusion({"bm25": ["1", "2"], "dense": ["2", "3"]})
+        [('2', 0.0325...), ('1', 0.0163...), ('3', 0.0161...)]
+    """
+    weights = weights or {}
+    scores: Dict[str, float] = {}
+    for source, ranking in rankings.items():
+        weight = weights.get(source, 1.0)
+        seen = set()
+        for rank, doc_id in enumerate(ranking, 1):
+            doc_id = str(doc_id)
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+    # Ties keep the order in which documents were first seen
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+@dataclass
+class RetrievalSource:
+    """A ranked retrieval source with a latency budget."""
+
+    name: str
+    search: SearchFn  # (query, top_k) -> ranked document ids
+    budget: Optional[float] = None  # seconds; None waits for the source
+    weight: float = 1.0
+
+
+class HybridRetriever:
+    """
+    Query several retrieval sources concurrently and fuse their rankings.
+
+    Example:
+        >>> retriever = HybridRetriever([
+        ...     RetrievalSource("bm25", bm25_search, budget=0.5),
+        ...     RetrievalSource("pubmed", pubmed_search, budget=5.0),
+        ... ])
+        >>> fused, report = retriever.search("Aspirin reduces stroke risk", top_k=10)
+    """
+
+    def __init__(
+        self,
+        sources: Sequence[RetrievalSource],
+        rrf_k: int = 60,
+        depth: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            sources: Retrieval sources to fuse
+            rrf_k: RRF constant
+            depth: Documents requested from each source (default: 2 * top_k)
+            max_workers: Threads shared by all searches (default: 4 per source).
+                Sources cut off by their budget keep their thread until they return.
+        """
+        if not sources:
+            raise ValueError("HybridRetriever needs at least one source")
+        names = [source.name for source in sources]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Source names must be unique, got {names}")
+        self.sources = list(sources)
+        self.rrf_k = rrf_k
+        self.depth = depth
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or 4 * len(self.sources),
+            thread_name_prefix="hybrid-retrieval",
+        )
+
+    def search(
+        self,
+        claim: str,
+        top_k: int = 10,
+        queries: Optional[Mapping[str, str]] = None,
+    ) -> Tuple[List[Tuple[str, float]], Dict[str, Dict]]:
+        """
+        Retrieve and fuse documents for a claim.
+
+        Args:
+            claim: The claim
+            top_k: Number of fused documents to return
+            queries: Optional source name -> query that source searches instead
+                of the claim (e.g. PubMed keywords generated before the
+                budgeted searches start)
+
+        Returns:
+            Tuple of (fused (document id, score) list, best first;
+            source name -> {"status": "ok" | "timeout" | "error", "latency": seconds,
+            "n_results": int, "error": message if any})
+        """
+        depth = self.depth or 2 * top_k
+        queries = queries or {}
+        start = time.perf_counter()
+        futures = {
+            source.name: self._executor.submit(
+                tracing.bind(self._timed),
+                source,
+                queries.get(source.name, claim),
+                depth,
+            )
+            for source in self.sources
+        }
+
+        rankings, report = {}, {}
+        for source in self.sources:
+            timeout = None
+            if source.budget is not None:
+                timeout = max(0.0, source.budget - (time.perf_counter() - start))
+            try:
+                ranking, latency = futures[source.name].result(timeout=timeout)
+            except FutureTimeoutError:
+                report[source.name] = {
+                    "status": "timeout",
+                    "latency": time.perf_counter() - start,
+                    "n_results": 0,
+                }
+                continue
+            except Exception as e:
+                report[source.name] = {
+                    "status": "error",
+                    "latency": time.perf_counter() - start,
+                    "n_results": 0,
+                    "error": str(e),
+                }
+                continue
+            rankings[source.name] = ranking
+            report[source.name] = {
+                "status": "ok",
+                "latency": latency,
+                "n_results": len(ranking),
+            }
+
+        weights = {source.name: source.weight for source in self.sources}
+        fused = reciprocal_rank_fusion(rankings, k=self.rrf_k, weights=weights)
+        return fused[:top_k], report
+
+    @staticmethod
+    def _timed(source: RetrievalSource, query: str, depth: int):
+        start = time.perf_counter()
+        with tracing.span("hybrid.source", source=source.name, depth=depth) as span:
+            ranking = [str(doc_id) for doc_id in source.search(query, depth)]
+            span.set(n_results=len(ranking))
+        return ranking, time.perf_counter() - start
+
+    def close(self) -> None:
+        """Release the worker threads (without waiting for cut-off sources)."""
+        self._executor.shutdown(wait=False)
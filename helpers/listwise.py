@@ -0,0 +1,287 @@
+"""
+Listwise LLM reranking of candidate pools larger than one prompt.
+
+rerank_abstracts (helpers/rag.py) shows every candidate to the LLM in a
+single prompt, which only works for the ~10 abstracts that fit. The
+tournament reranker here splits N candidates into overlapping windows of
+window_size, asks the LLM for the best `advance` documents of every window
+(windows of a round run concurrently), merges the partial orders with
+reciprocal-rank fusion and repeats on the survivors until one window is
+left, whose answer is the global top-k.
+
+With window_size=10, stride=5 and advance=3, 40 candidates take at most
+7 + 4 + 2 + 1 = 14 LLM calls over 4 rounds (fewer when overlapping
+windows keep the same documents). A budget on LLM calls trims
+the pool (keeping its input order, e.g. the PubMed or BM25 ranking) to the
+largest size the budget can cover.
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import ollama
+import pandas as pd
+
+from helpers import tracing
+from helpers.hybrid import reciprocal_rank_fusion
+from helpers.llm import token_counts
+from helpers.rag import DOCUMENT_SEPARATOR, rank_documents, split_abstracts
+
+
+def window_starts(n: int, window_size: int, stride: int) -> List[int]:
+    """
+    Start offsets of overlapping windows covering n candidates.
+
+    Args:
+        n: Number of candidates
+        window_size: Candidates per window
+        stride: Offset between consecutive windows
+
+    Returns:
+        List of start offsets; the last window ends at n
+    """
+    if n <= window_size:
+        return [0]
+    n_windows = math.ceil((n - window_size) / stride) + 1
+    return [min(i * stride, n - window_size) for i in range(n_windows)]
+
+
+def tournament_calls(n: int, window_size: int, stride: int, advance: int) -> int:
+    """
+    Upper bound on the LLM calls of a tournament over n candidates.
+
+    Args:
+        n: Number of candidates
+        window_size: Candidates per window
+        stride: Offset between consecutive windows
+        advance: Documents kept per window in the intermediate rounds
+
+    Returns:
+        Number of LLM calls (0 for an empty pool)
+    """
+    calls = 0
+    while n > window_size:
+        n_windows = len(window_starts(n, window_size, stride))
+        calls += n_windows
+        n = min(n - 1, n_windows * advance)
+    return calls + (1 if n > 0 else 0)
+
+
+class ListwiseReranker:
+    """
+    Tournament of overlapping listwise LLM windows.
+
+    Example:
+        >>> reranker = ListwiseReranker(model="deepseek-r1:32b", client=client, max_llm_calls=10)
+        >>> pmids, top_abstracts = reranker.rerank(claim, concatenated_abstracts, top_k=3)
+        >>> reranker.stats
+        {'claims': 1, 'llm_calls': 10, 'prompt_tokens': ..., 'completion_tokens': ...}
+    """
+
+    def __init__(
+        self,
+        model: str = "deepseek-r1:32b",
+        client: Optional[ollama.Client] = None,
+        window_size: int = 10,
+        stride: int = 5,
+        advance: int = 3,
+        max_llm_calls: Optional[int] = None,
+        max_workers: int = 4,
+    ):
+        """
+        Args:
+            model: LLM model used to rank the windows
+            client: Ollama client
+            window_size: Candidates shown to the LLM per call
+            stride: Offset between consecutive windows (window_size - stride overlap)
+            advance: Documents kept per window in the intermediate rounds
+                (at least top_k of rerank() is kept in the final window)
+            max_llm_calls: Budget on LLM calls per claim (default: unlimited)
+            max_workers: Windows ranked concurrently
+        """
+        if not 0 < stride <= window_size:
+            raise ValueError("stride must be between 1 and window_size")
+        if not 0 < advance < stride:
+            raise ValueError("advance must be between 1 and stride - 1")
+        if max_llm_calls is not None and max_llm_calls < 0:
+            raise ValueError("max_llm_calls must be non-negative")
+        self.model = model
+        self.client = client
+        self.window_size = window_size
+        self.stride = stride
+        self.advance = advance
+        self.max_llm_calls = max_llm_calls
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self.stats = {
+            "claims": 0,
+            "llm_calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    def _budgeted_pool_size(self, n: int) -> int:
+        if self.max_llm_calls is None:
+            return n
+        while (
+            n > 0
+            and tournament_calls(n, self.window_size, self.stride, self.advance)
+            > self.max_llm_calls
+        ):
+            n -= 1
+        return n
+
+    def _rank_window(self, claim: str, documents: List[str], top_k: int) -> List[int]:
+        indices, response = rank_documents(
+            claim, documents, model=self.model, client=self.client, top_k=top_k
+        )
+        prompt_tokens, completion_tokens = token_counts(response)
+        with self._lock:
+            self.stats["llm_calls"] += 1
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+
+        ranked = list(dict.fromkeys(indices))
+        # Fill up in input order if the model answered with fewer documents
+        for i in range(len(documents)):
+            if len(ranked) >= top_k:
+                break
+            if i not in ranked:
+                ranked.append(i)
+        return ranked[:top_k]
+
+    def rank(self, claim: str, documents: Sequence[str], top_k: int = 3) -> List[int]:
+        """
+        Indices of the top_k documents for a claim, best first.
+
+        Args:
+            claim: The medical claim
+            documents: Candidate documents, in their prior order (e.g. retrieval rank)
+            top_k: Number of documents to select
+
+        Returns:
+            0-based indices into documents
+        """
+        with self._lock:
+            self.stats["claims"] += 1
+        pool = list(range(self._budgeted_pool_size(len(documents))))
+        if not pool:
+            return list(range(min(top_k, len(documents))))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(pool) > self.window_size:
+                windows = [
+                    pool[start : start + self.window_size]
+                    for start in window_starts(len(pool), self.window_size, self.stride)
+                ]
+                answers = executor.map(
+                    tracing.bind(
+                        lambda window: self._rank_window(
+                            claim, [documents[i] for i in window], self.advance
+                        )
+                    ),
+                    windows,
+                )
+                # Merge the partial orders; a document kept by several
+                # overlapping windows ranks higher
+                rankings = {
+                    str(w): [str(window[i]) for i in answer]
+                    for w, (window, answer) in enumerate(zip(windows, answers))
+                }
+                fused = reciprocal_rank_fusion(rankings)
+                next_size = min(len(pool) - 1, len(windows) * self.advance)
+                pool = [int(doc) for doc, _ in fused[:next_size]]
+
+        final = self._rank_window(
+            claim, [documents[i] for i in pool], min(top_k, len(pool))
+        )
+        return [pool[i] for i in final]
+
+    def rerank(
+        self, claim: str, concatenated_abstracts: str, top_k: int = 3
+    ) -> Tuple[List[str], str]:
+        """
+        Drop-in replacement for rag.rerank_abstracts on pools of any size.
+
+        Args:
+            claim: The medical claim
+            concatenated_abstracts: String with all abstracts concatenated
+            top_k: Number of top abstracts to select (default: 3)
+
+        Returns:
+            Tuple of (list of PMIDs, concatenated top abstracts)
+        """
+        documents = split_abstracts(concatenated_abstracts)
+        if not documents:
+            return [], ""
+        selected = [
+            documents[i]
+            for i in self.rank(claim, [doc for _, doc in documents], top_k=top_k)
+        ]
+        return (
+            [pmid for pmid, _ in selected if pmid],
+            DOCUMENT_SEPARATOR.join(doc for _, doc in selected),
+        )
+
+
+def compare_rerank_cost(
+    claims: Sequence[str],
+    concatenated_abstracts: Sequence[str],
+    model: str = "deepseek-r1:32b",
+    client: Optional[ollama.Client] = None,
+    top_k: int = 3,
+    **listwise_kwargs: Any,
+) -> pd.DataFrame:
+    """
+    Compare LLM calls, tokens and wall time of rerank_abstracts and the listwise reranker.
+
+    rerank_abstracts is measured through rank_documents, which sends the
+    exact same single prompt over the whole pool.
+
+    Args:
+        claims: Claims
+        concatenated_abstracts: Candidate abstracts of each claim
+        model: LLM model used by both rerankers
+        client: Ollama client
+        top_k: Number of abstracts to select
+        **listwise_kwargs: Passed to ListwiseReranker (window_size, stride, advance, max_llm_calls, ...)
+
+    Returns:
+        DataFrame with one row per reranker: claims, llm_calls, prompt_tokens,
+        completion_tokens, seconds and the per-claim averages
+    """
+    single = {"claims": 0, "llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    start = time.perf_counter()
+    for claim, abstracts in zip(claims, concatenated_abstracts):
+        documents = split_abstracts(abstracts)
+        single["claims"] += 1
+        if not documents:
+            continue
+        _, response = rank_documents(
+            claim,
+            [doc for _, doc in documents],
+            model=model,
+            client=client,
+            top_k=top_k,
+        )
+        prompt_tokens, completion_tokens = token_counts(response)
+        single["llm_calls"] += 1
+        single["prompt_tokens"] += prompt_tokens
+        single["completion_tokens"] += completion_tokens
+    single["seconds"] = time.perf_counter() - start
+
+    reranker = ListwiseReranker(model=model, client=client, **listwise_kwargs)
+    start = time.perf_counter()
+    for claim, abstracts in zip(claims, concatenated_abstracts):
+        reranker.rerank(claim, abstracts, top_k=top_k)
+    listwise = {**reranker.stats, "seconds": time.perf_counter() - start}
+
+    report = pd.DataFrame(
+        [single, listwise], index=["rerank_abstracts", "listwise"]
+    ).rename_axis("reranker")
+    for column in ["llm_calls", "prompt_tokens", "completion_tokens", "seconds"]:
+        report[f"{column}_per_claim"] = report[column] / report["claims"].clip(lower=1)
+    return report
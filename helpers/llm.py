@@ -1,5 +1,8 @@
+import numpy as np
 import ollama
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+
+from helpers import tracing
 
 
 def setup_ollama_client(host: str = "localhost", port: int = 11434) -> ollama.Client:
@@ -30,6 +33,7 @@ def call_ollama(
     client: Optional[ollama.Client] = None,
     host: str = "localhost",
     port: int = 11434,
+    options: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     """
     Call Ollama models with a prompt.
@@ -44,6 +48,7 @@ def call_ollama(
         client: Optional pre-configured Ollama client. If not provided, one will be created.
         host: Ollama server host (default: "localhost")
         port: Ollama server port (default: 11434)
+        options: Further Ollama options (e.g. num_ctx), overriding the ones above
 
     Returns:
         Dictionary containing the model's response and metadata
@@ -59,18 +64,24 @@ def call_ollama(
             client = setup_ollama_client(host, port)
 
         # Prepare options
-        options = {"temperature": temperature}
+        generate_options = {"temperature": temperature}
         if max_tokens:
-            options["num_predict"] = max_tokens
+            generate_options["num_predict"] = max_tokens
+        generate_options.update(options or {})
 
         # Call the generate API
-        response = client.generate(
-            model=model,
-            prompt=prompt,
-            system=system_prompt,
-            stream=stream,
-            options=options,
-        )
+        with tracing.span(
+            "llm.generate", model=model, prompt_chars=len(prompt), stream=stream
+        ) as span:
+            response = client.generate(
+                model=model,
+                prompt=prompt,
+                system=system_prompt,
+                stream=stream,
+                options=generate_options,
+            )
+            if not stream and tracing.enabled():
+                span.set(**generation_stats(response))
 
         if stream:
             return {"stream": response, "status": "streaming"}
@@ -79,3 +90,87 @@ def call_ollama(
 
     except Exception as e:
         return {"error": f"Ollama error: {str(e)}", "status": "error"}
+
+
+def token_counts(response: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    Get the prompt and completion token counts reported by Ollama.
+
+    Args:
+        response: Response returned by call_ollama
+
+    Returns:
+        Tuple of (prompt tokens, completion tokens); zeros if not reported
+    """
+    if not response or "error" in response:
+        return 0, 0
+    prompt_tokens = response.get("prompt_eval_count") or 0
+    completion_tokens = response.get("eval_count") or 0
+    return prompt_tokens, completion_tokens
+
+
+def generation_stats(response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Token counts and Ollama's timing breakdown of a response.
+
+    Args:
+        response: Response returned by call_ollama
+
+    Returns:
+        Dictionary with prompt/completion tokens, the done reason and the
+        load, prompt evaluation and generation times in seconds
+    """
+    prompt_tokens, completion_tokens = token_counts(response)
+    stats = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "done_reason": response.get("done_reason"),
+    }
+    for name in ("load", "prompt_eval", "eval"):
+        nanoseconds = response.get(f"{name}_duration")
+        if nanoseconds is not None:
+            stats[f"{name}_seconds"] = nanoseconds / 1e9
+    return stats
+
+
+def embed_texts(
+    texts: List[str],
+    model: str = "nomic-embed-text",
+    client: Optional[ollama.Client] = None,
+    batch_size: int = 64,
+    host: str = "localhost",
+    port: int = 11434,
+) -> np.ndarray:
+    """
+    Embed texts with an Ollama embedding model.
+
+    Args:
+        texts: Texts to embed
+        model: The name of the Ollama embedding model (default: "nomic-embed-text")
+        client: Optional pre-configured Ollama client. If not provided, one will be created.
+        batch_size: Number of texts sent per request
+        host: Ollama server host (default: "localhost")
+        port: Ollama server port (default: 11434)
+
+    Returns:
+        float32 array of shape (len(texts), embedding dimension)
+
+    Example:
+        >>> vectors = embed_texts(["Folate lowers homocysteine."], client=client)
+        >>> vectors.shape
+        (1, 768)
+    """
+    if client is None:
+        client = setup_ollama_client(host, port)
+
+    batches = []
+    with tracing.span("llm.embed", model=model, n_texts=len(texts)):
+        for start in range(0, len(texts), batch_size):
+            response = client.embed(
+                model=model, input=list(texts[start : start + batch_size])
+            )
+            batches.append(np.asarray(response["embeddings"], dtype=np.float32))
+
+    if not batches:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.concatenate(batches, axis=0)
@@ -0,0 +1,450 @@
+"""
+Multi-claim prompt packing for keyword generation and verification.
+
+Instead of one prompt per claim, K claims share one structured prompt and
+the model answers one line per claim id ("C3 | diabetes, insulin, ...",
+"C3 | SUPPORTED" or, for the medical-causal filter, "C3 | Yes"). Models like deepseek-r1 then pay their reasoning
+preamble and the instruction prefill once per pack instead of once per
+claim.
+
+The pack size adapts: it halves when a pack would not fit the context
+budget, when the answer was truncated or when too many of its lines could
+not be parsed, and grows back by one after every clean pack. Claims missing
+from a pack's answer are retried one by one with the regular per-claim
+prompt (KEYWORDS_PROMPT / ZERO_SHOT_PROMPT / MEDICAL_CAUSAL_PROMPT).
+
+Keyword packing is used by SimpleRAG (keyword_pack_size) and causal packing
+by dataloader/causal_filter.py; VERIFY packing is only measured by
+benchmark_packing, since the methods store one raw response per claim.
+
+Usage:
+    python -m helpers.packing --task keywords --model deepseek-r1:32b --pack-size 8
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import ollama
+import pandas as pd
+
+from evaluation.verdicts import UNKNOWN, extract_classification
+from helpers import llm, tracing
+from helpers.evidence import approx_tokens
+from helpers.rag import KEYWORDS_PROMPT, parse_keywords, strip_think
+
+KEYWORDS = "keywords"
+VERIFY = "verify"
+CAUSAL = "causal"
+TASKS = (KEYWORDS, VERIFY, CAUSAL)
+
+PACKED_KEYWORDS_PROMPT = """Suggest keywords to search for scientific articles about each of the following claims.
+For every claim give a simple list of {n_keywords} keywords, separated by commas.
+
+Claims:
+{claims}
+
+Answer with exactly one line per claim, in the format "<claim id> | <keyword>, <keyword>, ...", and nothing else."""
+
+PACKED_VERIFY_PROMPT = """You are a biomedical expert specializing in causal inference and evidence-based reasoning.
+You task is to assess whether each of the following medical causal claims is SUPPORTED or CONTRADICT based on general scientific and clinical knowledge.
+
+Claims:
+{claims}
+
+Answer with exactly one line per claim, in the format "<claim id> | SUPPORTED" or "<claim id> | CONTRADICT", and nothing else."""
+
+MEDICAL_CAUSAL_PROMPT = """Does the following claim state a causal relationship in medicine, i.e. that an exposure, treatment, gene, behaviour or condition causes, prevents, increases or reduces a health outcome or biological effect?
+
+Claim: {claim}
+
+Answer with just Yes or No."""
+
+PACKED_CAUSAL_PROMPT = """For each of the following claims, decide whether it states a causal relationship in medicine, i.e. that an exposure, treatment, gene, behaviour or condition causes, prevents, increases or reduces a health outcome or biological effect.
+
+Claims:
+{claims}
+
+Answer with exactly one line per claim, in the format "<claim id> | Yes" or "<claim id> | No", and nothing else."""
+
+# Answers are matched within one line, so an empty answer does not swallow the next line
+_LINE_RE = re.compile(
+    r"^[^\w\n]*(C\d+)[^\w\n]*?[ \t]*[|:\-][ \t]*(.+?)[ \t]*$", re.MULTILINE
+)
+
+
+def build_packed_prompt(task: str, claims: Sequence[str], n_keywords: int = 4) -> str:
+    """
+    Build one prompt for several claims, numbered C1..CK.
+
+    Args:
+        task: KEYWORDS, VERIFY or CAUSAL
+        claims: Claims to pack
+        n_keywords: Keywords per claim (KEYWORDS only)
+
+    Returns:
+        The packed prompt
+    """
+    listed = "\n".join(f"C{i} | {claim}" for i, claim in enumerate(claims, 1))
+    if task == KEYWORDS:
+        return PACKED_KEYWORDS_PROMPT.format(claims=listed, n_keywords=n_keywords)
+    if task == VERIFY:
+        return PACKED_VERIFY_PROMPT.format(claims=listed)
+    if task == CAUSAL:
+        return PACKED_CAUSAL_PROMPT.format(claims=listed)
+    raise ValueError(f"Unknown task: {task}. Must be one of {list(TASKS)}")
+
+
+def parse_yes_no(answer: str) -> Optional[str]:
+    """'Yes' or 'No' if the answer starts with one of them, else None."""
+    match = re.match(r"\W*(yes|no)\b", answer, re.IGNORECASE)
+    return match.group(1).capitalize() if match else None
+
+
+def parse_packed_output(
+    task: str, output: str, n_claims: int, n_keywords: int = 4
+) -> Dict[int, str]:
+    """
+    Parse the per-claim lines of a packed answer.
+
+    Args:
+        task: KEYWORDS, VERIFY or CAUSAL
+        output: Model output (a reasoning trace is stripped)
+        n_claims: Number of packed claims
+        n_keywords: Keywords kept per claim (KEYWORDS only)
+
+    Returns:
+        Dictionary of 0-based claim position -> keywords joined with ' AND '
+        (KEYWORDS), verdict (VERIFY) or 'Yes' / 'No' (CAUSAL); claims without
+        a usable line are missing
+    """
+    parsed = {}
+    for claim_id, answer in _LINE_RE.findall(strip_think(output)):
+        position = int(claim_id[1:]) - 1
+        if not 0 <= position < n_claims or position in parsed:
+            continue
+        if task == KEYWORDS:
+            keywords = parse_keywords(answer, n_keywords)
+            if keywords:
+                parsed[position] = " AND ".join(keywords)
+        elif task == VERIFY:
+            verdict = extract_classification(answer)
+            if verdict != UNKNOWN:
+                parsed[position] = verdict
+        else:
+            causal = parse_yes_no(answer)
+            if causal is not None:
+                parsed[position] = causal
+    return parsed
+
+
+class PromptPacker:
+    """
+    Run keyword generation or verification for many claims in packed prompts.
+
+    Example:
+        >>> packer = PromptPacker(KEYWORDS, model="deepseek-r1:32b", client=client)
+        >>> keywords = packer.run(claims)  # one ' AND '-joined string per claim
+        >>> packer.stats
+    """
+
+    def __init__(
+        self,
+        task: str,
+        model: str = "deepseek-r1:32b",
+        client: Optional[ollama.Client] = None,
+        max_pack_size: int = 8,
+        context_tokens: int = 4096,
+        output_tokens_per_claim: int = 40,
+        reasoning_tokens: int = 1024,
+        max_failure_rate: float = 0.25,
+        parallel_requests: int = 1,
+        n_keywords: int = 4,
+    ):
+        """
+        Args:
+            task: KEYWORDS, VERIFY or CAUSAL
+            model: LLM model to use
+            client: Ollama client
+            max_pack_size: Largest number of claims per prompt
+            context_tokens: Context window budget per request (prompt + answer)
+            output_tokens_per_claim: Answer tokens reserved per packed claim
+            reasoning_tokens: Answer tokens reserved for a reasoning trace
+            max_failure_rate: Share of unparsed claims above which a pack counts as failed
+            parallel_requests: Packs sent concurrently
+            n_keywords: Keywords per claim (KEYWORDS only)
+        """
+        build_packed_prompt(task, [])  # validates task
+        self.task = task
+        self.model = model
+        self.client = client
+        self.max_pack_size = max_pack_size
+        self.pack_size = max_pack_size
+        self.context_tokens = context_tokens
+        self.output_tokens_per_claim = output_tokens_per_claim
+        self.reasoning_tokens = reasoning_tokens
+        self.max_failure_rate = max_failure_rate
+        self.parallel_requests = parallel_requests
+        self.n_keywords = n_keywords
+        self._lock = threading.Lock()
+        self.stats = {
+            "claims": 0,
+            "packs": 0,
+            "packed_claims": 0,
+            "single_calls": 0,
+            "failed_packs": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    def _count(self, response: Dict[str, Any], **counters: int) -> None:
+        prompt_tokens, completion_tokens = llm.token_counts(response)
+        with self._lock:
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+            for name, value in counters.items():
+                self.stats[name] += value
+
+    def answer_tokens(self, n_claims: int) -> int:
+        """Answer tokens reserved for a pack of n_claims claims."""
+        return self.reasoning_tokens + self.output_tokens_per_claim * n_claims
+
+    def fits(self, claims: Sequence[str]) -> bool:
+        """Whether a pack of these claims fits the context budget."""
+        prompt = build_packed_prompt(self.task, claims, self.n_keywords)
+        return (
+            approx_tokens(prompt) + self.answer_tokens(len(claims))
+            <= self.context_tokens
+        )
+
+    def run_single(self, claim: str) -> str:
+        """The regular per-claim path (the keyword, zero-shot or causal prompt)."""
+        if self.task == KEYWORDS:
+            prompt = KEYWORDS_PROMPT.format(claim=claim, n_keywords=self.n_keywords)
+        elif self.task == VERIFY:
+            from methods.prompts import ZERO_SHOT_PROMPT
+
+            prompt = ZERO_SHOT_PROMPT.format(claim=claim)
+        else:
+            prompt = MEDICAL_CAUSAL_PROMPT.format(claim=claim)
+        # Same context window as the packs (so Ollama does not reload the model
+        # between them), but no answer cap: this is the fallback path
+        response = llm.call_ollama(
+            model=self.model,
+            prompt=prompt,
+            client=self.client,
+            options={"num_ctx": self.context_tokens},
+        )
+        self._count(response, single_calls=1)
+        if self.task == KEYWORDS:
+            # Same prompt and parsing as get_keywords, but the tokens are counted
+            return " AND ".join(
+                parse_keywords(response.get("response", ""), self.n_keywords)
+            )
+        answer = strip_think(response.get("response", ""))
+        if self.task == VERIFY:
+            return extract_classification(answer)
+        return parse_yes_no(answer) or ""
+
+    def _adapt(self, failed: bool) -> None:
+        with self._lock:
+            if failed:
+                self.pack_size = max(1, self.pack_size // 2)
+            else:
+                self.pack_size = min(self.max_pack_size, self.pack_size + 1)
+
+    def run_pack(self, claims: Sequence[str]) -> Dict[int, str]:
+        """
+        Send one packed prompt.
+
+        Args:
+            claims: Claims of the pack
+
+        Returns:
+            Parsed answers by position in claims (missing positions failed)
+        """
+        if len(claims) == 1:
+            answer = self.run_single(claims[0])
+            # A pack of one is the per-claim path; it counts as clean so the size recovers
+            self._adapt(not answer or answer == UNKNOWN)
+            return {0: answer}
+
+        response = llm.call_ollama(
+            model=self.model,
+            prompt=build_packed_prompt(self.task, claims, self.n_keywords),
+            client=self.client,
+            # Enforce the budget fits() planned with, so an answer running past
+            # its reserve ends as done_reason "length" and the pack is retried
+            options={
+                "num_ctx": self.context_tokens,
+                "num_predict": self.answer_tokens(len(claims)),
+            },
+        )
+        parsed = parse_packed_output(
+            self.task, response.get("response", ""), len(claims), self.n_keywords
+        )
+        truncated = response.get("done_reason") == "length"
+        failed = truncated or (1 - len(parsed) / len(claims) > self.max_failure_rate)
+        self._count(response, packs=1, packed_claims=len(claims), failed_packs=failed)
+        self._adapt(failed)
+        return parsed
+
+    def _next_pack(self, claims: Sequence[str], start: int) -> int:
+        """End offset of the next pack: the current pack size, shrunk to fit the context."""
+        with self._lock:
+            size = self.pack_size
+        end = min(start + size, len(claims))
+        while end - start > 1 and not self.fits(claims[start:end]):
+            end = start + (end - start) // 2
+            with self._lock:
+                self.pack_size = max(1, min(self.pack_size, end - start))
+        return end
+
+    def run(self, claims: Sequence[str]) -> List[str]:
+        """
+        Run the task for all claims.
+
+        Args:
+            claims: Claims
+
+        Returns:
+            One answer per claim, aligned with claims: keywords joined with
+            ' AND ' (KEYWORDS), a verdict (VERIFY) or 'Yes' / 'No' (CAUSAL,
+            '' if even the per-claim answer could not be parsed)
+        """
+        claims = list(claims)
+        with self._lock:
+            self.stats["claims"] += len(claims)
+        results: List[Optional[str]] = [None] * len(claims)
+
+        def run_range(start: int, end: int) -> List[int]:
+            parsed = self.run_pack(claims[start:end])
+            missing = []
+            for offset in range(end - start):
+                if offset in parsed:
+                    results[start + offset] = parsed[offset]
+                else:
+                    missing.append(start + offset)
+            return missing
+
+        # Packs are cut as the pack size adapts, with up to parallel_requests in flight
+        missing: List[int] = []
+        with ThreadPoolExecutor(max_workers=self.parallel_requests) as executor:
+            futures, start = [], 0
+            while start < len(claims):
+                end = self._next_pack(claims, start)
+                futures.append(executor.submit(tracing.bind(run_range), start, end))
+                start = end
+                if len(futures) >= self.parallel_requests:
+                    missing.extend(futures.pop(0).result())
+            for future in futures:
+                missing.extend(future.result())
+
+            # Failed items are retried individually
+            for i, answer in zip(
+                missing,
+                executor.map(
+                    tracing.bind(lambda i: self.run_single(claims[i])), missing
+                ),
+            ):
+                results[i] = answer
+        return results
+
+
+def benchmark_packing(
+    claims: Sequence[str],
+    task: str = KEYWORDS,
+    model: str = "deepseek-r1:32b",
+    client: Optional[ollama.Client] = None,
+    pack_sizes: Sequence[int] = (1, 4, 8),
+    parallel_requests: int = 1,
+    **packer_kwargs: Any,
+) -> pd.DataFrame:
+    """
+    Measure throughput of the packed path against the per-claim path.
+
+    Pack size 1 is the per-claim path (KEYWORDS_PROMPT / ZERO_SHOT_PROMPT /
+    MEDICAL_CAUSAL_PROMPT).
+
+    Args:
+        claims: Claims (e.g. the 200 SCIFACT medical causal claims)
+        task: KEYWORDS, VERIFY or CAUSAL
+        model: LLM model to use
+        client: Ollama client
+        pack_sizes: Maximum pack sizes to compare
+        parallel_requests: Requests in flight for every configuration
+        **packer_kwargs: Passed to PromptPacker (context_tokens, ...)
+
+    Returns:
+        DataFrame with one row per pack size: seconds, claims/sec, LLM calls,
+        tokens, failed packs and individual retries
+    """
+    rows = []
+    for pack_size in pack_sizes:
+        packer = PromptPacker(
+            task,
+            model=model,
+            client=client,
+            max_pack_size=pack_size,
+            parallel_requests=parallel_requests,
+            **packer_kwargs,
+        )
+        start = time.perf_counter()
+        answers = packer.run(claims)
+        seconds = time.perf_counter() - start
+        rows.append(
+            {
+                "pack_size": pack_size,
+                "seconds": seconds,
+                "claims_per_second": len(claims) / seconds if seconds else 0.0,
+                "llm_calls": packer.stats["packs"] + packer.stats["single_calls"],
+                "unanswered": sum(1 for a in answers if not a or a == UNKNOWN),
+                **packer.stats,
+            }
+        )
+    report = pd.DataFrame(rows).set_index("pack_size")
+    report["speedup"] = (
+        report["claims_per_second"] / report["claims_per_second"].iloc[0]
+    )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare packed and per-claim prompts on the SCIFACT causal claims."
+    )
+    parser.add_argument("--task", choices=list(TASKS), default=KEYWORDS)
+    parser.add_argument("--model", default="deepseek-r1:32b")
+    parser.add_argument("--pack-size", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--parallel-requests", type=int, default=1)
+    parser.add_argument("--context-tokens", type=int, default=4096)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument(
+        "--claims",
+        default=str(
+            Path(__file__).resolve().parents[1]
+            / "dataloader"
+            / "scifact_medical_causal_claims.csv"
+        ),
+    )
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    claims_list = pd.read_csv(args.claims)["claim"].tolist()[: args.limit]
+    report = benchmark_packing(
+        claims_list,
+        task=args.task,
+        model=args.model,
+        client=llm.setup_ollama_client(args.host, args.port),
+        pack_sizes=args.pack_size,
+        parallel_requests=args.parallel_requests,
+        context_tokens=args.context_tokens,
+    )
+    print(report.to_string())
+    print(json.dumps(report.reset_index().to_dict(orient="records"), indent=2))
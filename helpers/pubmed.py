@@ -3,15 +3,19 @@ PubMed API wrapper for searching and retrieving papers.
 
 Uses Biopython's Entrez package to access NCBI E-utilities API.
 Requires an API key for better rate limits (10 requests/sec vs 3 requests/sec).
+Every request (esearch, efetch and the PMC calls) first takes a slot from
+rate_limiter, which is shared by all threads of the process.
 """
 
 from Bio import Entrez
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
+import threading
 import time
 import os
 from dotenv import load_dotenv
 
+from helpers import tracing
 
 # Global settings for Entrez
 Entrez.email = "your.email@example.com"  # Required by NCBI
@@ -53,6 +57,65 @@ def set_api_key(api_key: str = None, email: str = None, load_from_env: bool = Tr
         Entrez.email = email
 
 
+class RateLimiter:
+    """
+    Token bucket shared by the threads of a process.
+
+    Callers reserve the next free slot under a lock and then sleep until it,
+    so concurrent callers are spaced 1 / rate seconds apart.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: int = 1):
+        """
+        Args:
+            rate: Requests per second (default: NCBI's limit, 10 with an API key, else 3)
+            burst: Requests that may be sent back to back after an idle period
+        """
+        if rate is not None and rate <= 0:
+            raise ValueError(f"Invalid rate {rate}. Must be positive")
+        if burst < 1:
+            raise ValueError(f"Invalid burst {burst}. Must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def current_rate(self) -> float:
+        """The enforced rate in requests per second."""
+        if self.rate is not None:
+            return self.rate
+        return 10.0 if Entrez.api_key else 3.0
+
+    def acquire(self) -> float:
+        """
+        Wait for a request slot.
+
+        Returns:
+            Seconds waited
+        """
+        with self._lock:
+            rate = self.current_rate
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            # A negative balance is a reservation held by earlier callers
+            self._tokens -= 1.0
+            wait = -self._tokens / rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+rate_limiter = RateLimiter()
+
+
+def _throttle() -> None:
+    with tracing.span("pubmed.rate_limit") as span:
+        span.set(seconds=rate_limiter.acquire())
+
+
 @dataclass
 class PubMedPaper:
     """Container for PubMed paper information."""
@@ -86,23 +149,28 @@ def search_pubmed(keyword: str, top_k: int = 10) -> List[str]:
         ['12345678', '87654321', ...]
     """
     try:
-        handle = Entrez.esearch(db="pubmed", term=keyword, retmax=top_k)
-        record = Entrez.read(handle)
-        handle.close()
-
-        pmids = record.get("IdList", [])
+        with tracing.span("pubmed.esearch", term=keyword, retmax=top_k) as span:
+            _throttle()
+            handle = Entrez.esearch(db="pubmed", term=keyword, retmax=top_k)
+            record = Entrez.read(handle)
+            handle.close()
+
+            pmids = record.get("IdList", [])
+            span.set(n_results=len(pmids))
         return pmids
 
     except Exception as e:
         raise Exception(f"Error searching PubMed: {str(e)}")
 
 
-def fetch_paper_details(pmid: str) -> PubMedPaper:
+def fetch_paper_details(pmid: str, check_pmc: bool = True) -> PubMedPaper:
     """
     Fetch detailed information for a single paper by PMID.
 
     Args:
         pmid: PubMed ID of the paper
+        check_pmc: Whether to ask PMC if the paper is freely available (one more request
+            for papers with a PMC ID)
 
     Returns:
         PubMedPaper object with paper details
@@ -112,9 +180,11 @@ def fetch_paper_details(pmid: str) -> PubMedPaper:
         >>> print(paper.title)
     """
     try:
-        handle = Entrez.efetch(db="pubmed", id=pmid, retmode="xml")
-        records = Entrez.read(handle)
-        handle.close()
+        with tracing.span("pubmed.efetch", pmid=pmid):
+            _throttle()
+            handle = Entrez.efetch(db="pubmed", id=pmid, retmode="xml")
+            records = Entrez.read(handle)
+            handle.close()
 
         if not records.get("PubmedArticle"):
             raise Exception(f"No article found for PMID {pmid}")
@@ -173,7 +243,7 @@ def fetch_paper_details(pmid: str) -> PubMedPaper:
 
         # Check if available in PMC
         is_free_in_pmc = False
-        if pmc_id:
+        if pmc_id and check_pmc:
             is_free_in_pmc = check_pmc_availability(pmc_id)
 
         # Generate paper URL
@@ -200,7 +270,9 @@ def fetch_paper_details(pmid: str) -> PubMedPaper:
         raise Exception(f"Error fetching paper {pmid}: {str(e)}")
 
 
-def get_papers(keyword: str, top_k: int = 10) -> List[PubMedPaper]:
+def get_papers(
+    keyword: str, top_k: int = 10, failed: Optional[List[str]] = None
+) -> List[PubMedPaper]:
     """
     Search PubMed and retrieve detailed information for top-k papers.
 
@@ -209,6 +281,7 @@ def get_papers(keyword: str, top_k: int = 10) -> List[PubMedPaper]:
     Args:
         keyword: Search query/keyword
         top_k: Maximum number of papers to retrieve
+        failed: If given, the PMIDs that could not be fetched are appended to it
 
     Returns:
         List of PubMedPaper objects
@@ -224,20 +297,39 @@ def get_papers(keyword: str, top_k: int = 10) -> List[PubMedPaper]:
     if not pmids:
         return []
 
+    return fetch_papers(pmids, failed=failed)
+
+
+def fetch_papers(
+    pmids: List[str], failed: Optional[List[str]] = None
+) -> List[PubMedPaper]:
+    """
+    Fetch detailed information for several papers, respecting the rate limit.
+
+    Papers that cannot be fetched are skipped with a warning.
+
+    Args:
+        pmids: PubMed IDs of the papers
+        failed: If given, the PMIDs that could not be fetched are appended to
+            it, so callers can avoid caching the incomplete list
+
+    Returns:
+        List of PubMedPaper objects, in the order of pmids
+
+    Example:
+        >>> papers = fetch_papers(search_pubmed("COVID-19 vaccine", top_k=5))
+    """
     # Fetch details for each paper
     papers = []
-    for pmid in pmids:
-        try:
-            paper = fetch_paper_details(pmid)
-            papers.append(paper)
-            # Rate limiting (with API key: 10 req/s, without: 3 req/s)
-            if Entrez.api_key:
-                time.sleep(0.11)  # ~10 requests per second
-            else:
-                time.sleep(0.34)  # ~3 requests per second
-        except Exception as e:
-            print(f"Warning: Could not fetch paper {pmid}: {e}")
-            continue
+    with tracing.span("pubmed.fetch_papers", n_pmids=len(pmids)) as span:
+        for pmid in pmids:
+            try:
+                papers.append(fetch_paper_details(pmid))
+            except Exception as e:
+                print(f"Warning: Could not fetch paper {pmid}: {e}")
+                if failed is not None:
+                    failed.append(pmid)
+        span.set(n_fetched=len(papers))
 
     return papers
 
@@ -253,13 +345,19 @@ def check_pmc_availability(pmc_id: str) -> bool:
         True if the paper is freely available in PMC, False otherwise
     """
     try:
-        # Try to fetch from PMC
-        handle = Entrez.efetch(db="pmc", id=pmc_id.replace("PMC", ""), retmode="xml")
-        xml_text = handle.read()
-        handle.close()
-
-        # If we get a valid response with article content, it's available
-        return b"article" in xml_text.lower()
+        with tracing.span("pubmed.pmc_check", pmc_id=pmc_id) as span:
+            # Try to fetch from PMC
+            _throttle()
+            handle = Entrez.efetch(
+                db="pmc", id=pmc_id.replace("PMC", ""), retmode="xml"
+            )
+            xml_text = handle.read()
+            handle.close()
+
+            # If we get a valid response with article content, it's available
+            available = b"article" in xml_text.lower()
+            span.set(available=available)
+        return available
 
     except Exception:
         return False
@@ -281,9 +379,13 @@ def fetch_pmc_fulltext(pmc_id: str) -> Optional[str]:
         ...     print(fulltext[:500])
     """
     try:
-        handle = Entrez.efetch(db="pmc", id=pmc_id.replace("PMC", ""), retmode="xml")
-        xml_text = handle.read()
-        handle.close()
+        with tracing.span("pubmed.pmc_fulltext", pmc_id=pmc_id):
+            _throttle()
+            handle = Entrez.efetch(
+                db="pmc", id=pmc_id.replace("PMC", ""), retmode="xml"
+            )
+            xml_text = handle.read()
+            handle.close()
 
         # Convert bytes to string
         if isinstance(xml_text, bytes):
@@ -0,0 +1,439 @@
+"""
+Building blocks shared by the retrieval-augmented methods.
+
+Keyword generation with an LLM, PubMed retrieval with the AND -> OR fallback
+used in examples/store_rag_documents.ipynb, LLM reranking as in
+examples/rerank_rag_documents.ipynb, helpers for the "[PMID: ...] abstract"
+document format the RAG prompts expect, and a cache so retrieval is shared
+between methods and runs.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import ollama
+
+from helpers import llm
+from helpers import pubmed
+from helpers import tracing
+from helpers.pubmed import PubMedPaper
+
+DOCUMENT_SEPARATOR = "\n\n---\n\n"
+
+_PMID_RE = re.compile(r"\[PMID: (\d+)\]")
+
+KEYWORDS_PROMPT = "Suggest me a set of keywords to search for finding scientific articles about the following claim: {claim}. Give just a simple list of {n_keywords} keywords, separated by commas with no further explanation."
+
+
+def strip_think(output: str) -> str:
+    """
+    Drop the reasoning trace of models like deepseek-r1.
+
+    Args:
+        output: Raw model output
+
+    Returns:
+        The text after the last </think> tag (or the whole output if there is none)
+    """
+    if "</think>" in output:
+        output = output.split("</think>")[-1]
+    return output.strip()
+
+
+def parse_keywords(output: str, n_keywords: int = 4) -> List[str]:
+    """
+    Parse the comma-separated keyword list of a keyword generation answer.
+
+    Args:
+        output: Raw model output (a reasoning trace is stripped)
+        n_keywords: Number of keywords to keep
+
+    Returns:
+        Up to n_keywords non-empty keywords
+    """
+    output = strip_think(output)
+    return [kw.strip() for kw in output.split(",") if kw.strip()][:n_keywords]
+
+
+def get_keywords(
+    claim: str,
+    n_keywords: int = 4,
+    model: str = "deepseek-r1:32b",
+    client: Optional[ollama.Client] = None,
+) -> str:
+    """
+    Generate keywords for a claim using LLM.
+
+    Args:
+        claim: The medical claim to generate keywords for
+        n_keywords: Number of keywords to generate (default: 4)
+        model: LLM model to use
+        client: Ollama client
+
+    Returns:
+        String with keywords separated by ' AND '
+    """
+    with tracing.span("rag.keywords", model=model) as span:
+        response = llm.call_ollama(
+            model=model,
+            prompt=KEYWORDS_PROMPT.format(claim=claim, n_keywords=n_keywords),
+            client=client,
+        )
+        keywords = parse_keywords(response.get("response", ""), n_keywords)
+        span.set(keywords=keywords)
+
+    # Join with AND for PubMed search
+    return " AND ".join(keywords)
+
+
+def retrieve_papers_with_fallback(
+    keywords: str, top_k: int = 10, failed: Optional[List[str]] = None
+) -> List[PubMedPaper]:
+    """
+    Retrieve papers from PubMed with augmentation strategy.
+
+    First searches with AND logic. If fewer than top_k papers are found,
+    augments the results with additional papers from OR search (avoiding duplicates).
+
+    Args:
+        keywords: String with keywords separated by 'AND' (e.g., "diabetes AND insulin AND glucose")
+        top_k: Target number of papers to retrieve (default: 10)
+        failed: If given, the PMIDs that could not be fetched are appended to it
+
+    Returns:
+        List of PubMedPaper objects (up to top_k papers)
+    """
+    with tracing.span("rag.pubmed_retrieval", keywords=keywords, top_k=top_k) as span:
+        # First attempt: Use AND logic
+        papers_and = pubmed.get_papers(keywords, top_k=top_k, failed=failed)
+        span.set(and_papers=len(papers_and), fallback=len(papers_and) < top_k)
+
+        # If we got enough papers with AND, return them
+        if len(papers_and) >= top_k:
+            return papers_and[:top_k]
+
+        # Otherwise, augment with OR search (convert 'AND' to 'OR' for broader search)
+        keywords_or = keywords.replace(" AND ", " OR ")
+        papers_or = pubmed.get_papers(
+            keywords_or, top_k=top_k + len(papers_and), failed=failed
+        )
+
+    # Add papers from OR search that aren't already in AND results
+    and_pmids = {paper.pmid for paper in papers_and}
+    augmented_papers = papers_and.copy()
+    for paper in papers_or:
+        if paper.pmid not in and_pmids:
+            augmented_papers.append(paper)
+            if len(augmented_papers) >= top_k:
+                break
+
+    return augmented_papers[:top_k]
+
+
+def format_abstracts(papers: List[PubMedPaper]) -> str:
+    """
+    Concatenate paper abstracts in the format used by the RAG prompts.
+
+    Args:
+        papers: Papers to include
+
+    Returns:
+        Abstracts as "[PMID: <pmid>] <abstract>" joined by DOCUMENT_SEPARATOR
+    """
+    return DOCUMENT_SEPARATOR.join(
+        f"[PMID: {paper.pmid}] {paper.abstract}" for paper in papers
+    )
+
+
+def split_abstracts(concatenated_abstracts: str) -> List[Tuple[Optional[str], str]]:
+    """
+    Split concatenated abstracts back into (PMID, document) pairs.
+
+    Args:
+        concatenated_abstracts: Output of format_abstracts (or the
+            'concatenated_abstracts' column of rag_documents.csv)
+
+    Returns:
+        List of (PMID or None, document text including the PMID prefix)
+    """
+    if (
+        not isinstance(concatenated_abstracts, str)
+        or not concatenated_abstracts.strip()
+    ):
+        return []
+
+    documents = []
+    for document in concatenated_abstracts.split(DOCUMENT_SEPARATOR):
+        pmid_match = _PMID_RE.search(document)
+        documents.append((pmid_match.group(1) if pmid_match else None, document))
+    return documents
+
+
+def rank_documents(
+    claim: str,
+    documents: List[str],
+    model: str = "deepseek-r1:32b",
+    client: Optional[ollama.Client] = None,
+    top_k: int = 3,
+) -> Tuple[List[int], Dict[str, Any]]:
+    """
+    Ask an LLM for the top_k documents most relevant to a claim.
+
+    Args:
+        claim: The medical claim
+        documents: Documents to choose from (fitting in one prompt)
+        model: LLM model to use
+        client: Ollama client
+        top_k: Number of documents to select
+
+    Returns:
+        Tuple of (0-based indices into documents as answered by the model,
+        raw Ollama response for token accounting)
+    """
+    # Create a numbered list for the LLM
+    papers_list = ""
+    for i, paper in enumerate(documents, 1):
+        papers_list += f"\n{i}. {paper}\n"
+
+    prompt = f"""You are a scientific assistant tasked with identifying the most relevant research papers for a given medical claim.
+
+Claim: {claim}
+
+Below are {len(documents)} abstracts from PubMed. Please analyze each abstract and select the top {top_k} most relevant ones that best address or relate to the claim above.
+
+Abstracts:
+{papers_list}
+
+Please respond with ONLY the numbers of the top {top_k} most relevant abstracts, separated by commas (e.g., "1,5,8"). Do not provide any explanation, just the numbers."""
+
+    with tracing.span(
+        "rag.rank_documents", model=model, n_documents=len(documents)
+    ) as span:
+        response = llm.call_ollama(model=model, prompt=prompt, client=client)
+        output = strip_think(response.get("response", ""))
+
+        # Extract numbers from the response (converted to 0-indexed)
+        numbers = re.findall(r"\d+", output)
+        selected_indices = [int(n) - 1 for n in numbers[:top_k]]
+        selected = [i for i in selected_indices if 0 <= i < len(documents)]
+        span.set(selected=selected)
+    return selected, response
+
+
+def rerank_abstracts(
+    claim: str,
+    concatenated_abstracts: str,
+    model: str = "deepseek-r1:32b",
+    client: Optional[ollama.Client] = None,
+    top_k: int = 3,
+) -> Tuple[List[str], str]:
+    """
+    Rerank abstracts using LLM to find the most relevant ones.
+
+    Args:
+        claim: The medical claim
+        concatenated_abstracts: String with all abstracts concatenated
+        model: LLM model to use
+        client: Ollama client
+        top_k: Number of top abstracts to select (default: 3)
+
+    Returns:
+        Tuple of (list of PMIDs, concatenated top abstracts)
+    """
+    documents = split_abstracts(concatenated_abstracts)
+    if not documents:
+        return [], ""
+
+    selected_indices, _ = rank_documents(
+        claim,
+        [document for _, document in documents],
+        model=model,
+        client=client,
+        top_k=top_k,
+    )
+    selected = [documents[i] for i in selected_indices]
+
+    selected_pmids = [pmid for pmid, _ in selected if pmid]
+    concatenated_top_abstracts = DOCUMENT_SEPARATOR.join(doc for _, doc in selected)
+
+    return selected_pmids, concatenated_top_abstracts
+
+
+def cache_key(*parts: Any) -> str:
+    """
+    Build a stable cache key from the parts that determine a cached value.
+
+    Args:
+        *parts: Claim text, model names, parameters, ...
+
+    Returns:
+        Hex digest identifying the combination
+    """
+    raw = json.dumps([str(part) for part in parts], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class Uncached:
+    """
+    A value computed for RetrievalCache.get_or_compute that must not be stored.
+
+    Computations return their result wrapped in Uncached when it was degraded
+    by a transient failure (an Ollama error, papers PubMed failed to return),
+    so the caller still gets it but the next call computes it again.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class RetrievalCache:
+    """
+    Thread-safe cache of JSON-serializable retrieval results.
+
+    Used to share keywords, retrieved papers and reranking decisions between
+    methods (e.g. RAG and reranked RAG) and between models in a run. When a
+    path is given, entries are appended to a JSONL file and reloaded later,
+    so cached retrieval survives restarts.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Optional JSONL file backing the cache
+        """
+        self.path = Path(path) if path else None
+        self._entries: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+        if self.path is not None and self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # partial line from an interrupted run
+                    self._entries[entry["key"]] = entry["value"]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for key, or default (a miss) if it is missing."""
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value (persisted if the cache has a path)."""
+        with self._lock:
+            self._entries[key] = value
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(
+                        json.dumps({"key": key, "value": value}, ensure_ascii=False)
+                        + "\n"
+                    )
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, computing (once) and storing it if missing.
+
+        Concurrent callers asking for the same key wait for a single computation.
+
+        Args:
+            key: Cache key (see cache_key)
+            compute: Function producing a JSON-serializable value, or an
+                Uncached one to return without storing it
+
+        Returns:
+            The cached or newly computed value
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                return self._entries[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    return self._entries[key]
+                self.misses += 1
+
+            try:
+                value = compute()
+                if isinstance(value, Uncached):
+                    return value.value
+                self.set(key, value)
+                return value
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+
+def save_papers(papers: List[PubMedPaper], path: str) -> None:
+    """
+    Save papers as JSONL (one PubMedPaper per line).
+
+    Args:
+        papers: Papers to save
+        path: Output file
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for paper in papers:
+            f.write(json.dumps(asdict(paper), ensure_ascii=False) + "\n")
+
+
+def load_papers(path: str) -> Dict[str, PubMedPaper]:
+    """
+    Load papers saved with save_papers.
+
+    Args:
+        path: JSONL file
+
+    Returns:
+        Dictionary of PMID -> PubMedPaper
+    """
+    papers = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            paper = PubMedPaper(**json.loads(line))
+            papers[paper.pmid] = paper
+    return papers
+
+
+def load_cached_papers(cache_path: str) -> List[PubMedPaper]:
+    """
+    Collect the PubMed papers stored in a RetrievalCache file.
+
+    Args:
+        cache_path: JSONL file backing a RetrievalCache (e.g. a run's retrieval_cache.jsonl)
+
+    Returns:
+        Papers from all cached retrievals, deduplicated by PMID
+    """
+    papers = {}
+    for value in RetrievalCache(cache_path)._entries.values():
+        if isinstance(value, dict) and "papers" in value:
+            for paper in value["papers"]:
+                papers.setdefault(paper["pmid"], PubMedPaper(**paper))
+    return list(papers.values())
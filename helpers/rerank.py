@@ -0,0 +1,245 @@
+"""
+Non-generative reranking of retrieved abstracts.
+
+Claim/abstract pairs are scored with embedding cosine similarity and
+IDF-weighted lexical coverage of the claim, computed with numpy over whole
+batches of claims. The LLM reranker of helpers/rag.py (rerank_abstracts) is
+only called when the abstracts around the top_k cut-off score too close to
+call, and then only on the contested candidates.
+
+The output matches rerank_abstracts: (PMIDs, concatenated top abstracts).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from helpers.bm25 import tokenize
+from helpers.dense_index import normalize_rows
+from helpers.rag import DOCUMENT_SEPARATOR, split_abstracts
+
+EmbedFn = Callable[[List[str]], np.ndarray]
+# (claim, concatenated abstracts, top_k) -> (PMIDs, concatenated top abstracts)
+LLMRerankFn = Callable[[str, str, int], Tuple[List[str], str]]
+
+
+def lexical_scores(claim: str, documents: Sequence[str]) -> np.ndarray:
+    """
+    IDF-weighted fraction of the claim's terms found in each document.
+
+    Document frequencies come from the candidate documents themselves, so
+    terms shared by every candidate contribute almost nothing.
+
+    Args:
+        claim: The claim
+        documents: Candidate documents
+
+    Returns:
+        float array of shape (len(documents),) with scores in [0, 1]
+    """
+    terms = sorted(set(tokenize(claim)))
+    if not terms or not documents:
+        return np.zeros(len(documents), dtype=np.float32)
+
+    term_index = {term: i for i, term in enumerate(terms)}
+    presence = np.zeros((len(documents), len(terms)), dtype=np.float32)
+    for row, document in enumerate(documents):
+        for token in set(tokenize(document)):
+            column = term_index.get(token)
+            if column is not None:
+                presence[row, column] = 1.0
+
+    df = presence.sum(axis=0)
+    idf = np.log((len(documents) + 1) / (df + 0.5))
+    idf = np.maximum(idf, 0.0)
+    return (presence @ idf) / max(float(idf.sum()), 1e-9)
+
+
+class CheapReranker:
+    """
+    Rerank abstracts with embeddings and lexical overlap, falling back to an LLM on near-ties.
+
+    Example:
+        >>> reranker = CheapReranker(
+        ...     embed_fn=lambda texts: embed_texts(texts, client=client),
+        ...     llm_fallback=lambda claim, abstracts, k: rerank_abstracts(
+        ...         claim, abstracts, client=client, top_k=k
+        ...     ),
+        ... )
+        >>> pmids, top_abstracts = reranker.rerank(claim, concatenated_abstracts, top_k=3)
+    """
+
+    def __init__(
+        self,
+        embed_fn: Optional[EmbedFn] = None,
+        llm_fallback: Optional[LLMRerankFn] = None,
+        embedding_weight: float = 0.7,
+        margin: float = 0.02,
+        fallback_candidates: Optional[int] = None,
+        max_cached_embeddings: int = 4096,
+    ):
+        """
+        Args:
+            embed_fn: Function mapping a list of texts to an (n, d) array; without it
+                only lexical scores are used
+            llm_fallback: LLM reranker called on near-ties; without it the cheap
+                ranking is always used
+            embedding_weight: Weight of the cosine similarity (the lexical score gets the rest)
+            margin: Score gap at the top_k cut-off below which the LLM decides
+            fallback_candidates: Candidates sent to the LLM on a near-tie (default: 2 * top_k)
+            max_cached_embeddings: Embeddings kept for reuse; the least recently used
+                are dropped beyond this
+        """
+        if not 0.0 <= embedding_weight <= 1.0:
+            raise ValueError("embedding_weight must be between 0 and 1")
+        if max_cached_embeddings < 0:
+            raise ValueError("max_cached_embeddings must not be negative")
+        self.embed_fn = embed_fn
+        self.llm_fallback = llm_fallback
+        self.embedding_weight = embedding_weight if embed_fn is not None else 0.0
+        self.margin = margin
+        self.fallback_candidates = fallback_candidates
+        self.max_cached_embeddings = max_cached_embeddings
+        self._embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.llm_calls = 0
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, reusing the embeddings of recently seen texts."""
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for text in dict.fromkeys(texts):
+                if text in self._embeddings:
+                    self._embeddings.move_to_end(text)
+                    found[text] = self._embeddings[text]
+        missing = [t for t in dict.fromkeys(texts) if t not in found]
+        if missing:
+            vectors = normalize_rows(self.embed_fn(missing))
+            found.update(zip(missing, vectors))
+            with self._lock:
+                self._embeddings.update(zip(missing, vectors))
+                while len(self._embeddings) > self.max_cached_embeddings:
+                    self._embeddings.popitem(last=False)
+        return np.stack([found[t] for t in texts])
+
+    def score_batch(
+        self, claims: Sequence[str], documents: Sequence[Sequence[str]]
+    ) -> List[np.ndarray]:
+        """
+        Score the candidate documents of several claims.
+
+        All claims and documents are embedded in one call, and each claim's
+        cosine similarities are a single matrix-vector product.
+
+        Args:
+            claims: Claims
+            documents: Candidate documents of each claim
+
+        Returns:
+            List of float arrays, one score per candidate document
+        """
+        scores = [lexical_scores(c, docs) for c, docs in zip(claims, documents)]
+        if self.embedding_weight == 0.0:
+            return scores
+
+        texts = list(claims) + [doc for docs in documents for doc in docs]
+        embeddings = self._embed(texts) if texts else None
+        offset = len(claims)
+        for i, docs in enumerate(documents):
+            if not docs:
+                continue
+            cosine = embeddings[offset : offset + len(docs)] @ embeddings[i]
+            offset += len(docs)
+            scores[i] = (
+                self.embedding_weight * cosine
+                + (1.0 - self.embedding_weight) * scores[i]
+            )
+        return scores
+
+    def _is_near_tie(self, scores: np.ndarray, order: np.ndarray, top_k: int) -> bool:
+        if len(scores) <= top_k:
+            return False
+        return scores[order[top_k - 1]] - scores[order[top_k]] < self.margin
+
+    def rerank_batch(
+        self,
+        claims: Sequence[str],
+        concatenated_abstracts: Sequence[str],
+        top_k: int = 3,
+    ) -> List[Tuple[List[str], str]]:
+        """
+        Select the top_k abstracts for several claims.
+
+        Args:
+            claims: Claims
+            concatenated_abstracts: Abstracts of each claim in the format of format_abstracts
+            top_k: Number of abstracts to keep per claim
+
+        Returns:
+            List of (list of PMIDs, concatenated top abstracts), aligned with claims
+        """
+        parsed = [split_abstracts(abstracts) for abstracts in concatenated_abstracts]
+        scores = self.score_batch(
+            claims, [[document for _, document in docs] for docs in parsed]
+        )
+
+        results = []
+        for claim, documents, doc_scores in zip(claims, parsed, scores):
+            with self._lock:
+                self.calls += 1
+            order = np.argsort(-doc_scores, kind="stable")
+
+            if self.llm_fallback is not None and self._is_near_tie(
+                doc_scores, order, top_k
+            ):
+                # Keep the cheap order for the candidates everyone agrees on
+                # and let the LLM pick among the contested ones
+                pool = self.fallback_candidates or 2 * top_k
+                threshold = doc_scores[order[top_k - 1]] + self.margin
+                sure = [i for i in order[:top_k] if doc_scores[i] >= threshold]
+                contested = [i for i in order[:pool] if i not in sure]
+                with self._lock:
+                    self.llm_calls += 1
+                pmids, _ = self.llm_fallback(
+                    claim,
+                    DOCUMENT_SEPARATOR.join(documents[i][1] for i in contested),
+                    top_k - len(sure),
+                )
+                by_pmid = {documents[i][0]: i for i in contested}
+                chosen = [by_pmid[p] for p in pmids if p in by_pmid]
+                # Fill up from the cheap ranking if the LLM answer is short or unusable
+                for i in contested:
+                    if len(chosen) >= top_k - len(sure):
+                        break
+                    if i not in chosen:
+                        chosen.append(i)
+                selected = [documents[i] for i in sure + chosen[: top_k - len(sure)]]
+            else:
+                selected = [documents[i] for i in order[:top_k]]
+
+            results.append(
+                (
+                    [pmid for pmid, _ in selected if pmid],
+                    DOCUMENT_SEPARATOR.join(document for _, document in selected),
+                )
+            )
+        return results
+
+    def rerank(
+        self, claim: str, concatenated_abstracts: str, top_k: int = 3
+    ) -> Tuple[List[str], str]:
+        """
+        Drop-in replacement for rag.rerank_abstracts.
+
+        Args:
+            claim: The medical claim
+            concatenated_abstracts: String with all abstracts concatenated
+            top_k: Number of top abstracts to select (default: 3)
+
+        Returns:
+            Tuple of (list of PMIDs, concatenated top abstracts)
+        """
+        return self.rerank_batch([claim], [concatenated_abstracts], top_k=top_k)[0]
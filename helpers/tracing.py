@@ -0,0 +1,398 @@
+"""
+Lightweight hierarchical tracing of the pipeline stages.
+
+Spans nest through a context variable: a claim span opened by
+BaseMethod.run_one contains the retrieval, reranking and verification spans
+of the method, which contain the PubMed requests, rate-limit pauses and
+Ollama calls below them. Each span carries attributes (claim id, model,
+PMIDs, token counts, Ollama's load / prompt / generation durations, ...).
+
+Tracing is off by default. While it is off, span() returns a shared no-op
+object, so instrumented code only pays a function call. start_tracing()
+turns it on and exports finished spans to a JSONL file (one span per line,
+written as spans end) or a Chrome trace file (written by stop_tracing(),
+opens in chrome://tracing or https://ui.perfetto.dev).
+
+Spans started in another thread pool do not see their parent unless the
+submitted function is wrapped with bind().
+
+Usage:
+    python -m experiments.run experiments/grids/scifact_causal.yaml --trace
+    python -m helpers.tracing runs/scifact_causal/trace.jsonl --slowest 5
+    python -m helpers.tracing runs/scifact_causal/trace.jsonl --claim-id scifact_causal/12 --chrome claim12.json
+"""
+
+import argparse
+import atexit
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+_ids = itertools.count(1)
+_tracer: Optional["Tracer"] = None
+
+
+class _NullSpan:
+    """What span() returns while tracing is off."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A timed, nested operation with attributes. Use through span()."""
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "attributes",
+        "span_id",
+        "parent_id",
+        "trace_id",
+        "start_ns",
+        "end_ns",
+        "error",
+        "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(_ids)
+        self.parent_id = None
+        self.trace_id = self.span_id
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error = None
+        self._token = None
+
+    def set(self, **attributes: Any) -> None:
+        """Add or overwrite attributes (e.g. token counts once a call returns)."""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        parent = _current.get()
+        if parent is not None:
+            self.parent_id = parent.span_id
+            self.trace_id = parent.trace_id
+        self._token = _current.set(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.perf_counter_ns()
+        _current.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer.export(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The span as exported to JSONL (start in epoch seconds, duration in seconds)."""
+        thread = threading.current_thread()
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.tracer.epoch + (self.start_ns - self.tracer.origin_ns) / 1e9,
+            "duration": (self.end_ns - self.start_ns) / 1e9,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "thread": thread.name,
+            "attributes": self.attributes,
+        }
+        if self.error is not None:
+            record["error"] = self.error
+        return record
+
+
+class Tracer:
+    """
+    Exports finished spans to a JSONL or Chrome trace file.
+
+    Spans are exported by the thread that ends them; JSONL lines are
+    flushed as they are written so a trace survives an interrupted run.
+    """
+
+    def __init__(self, path: str, format: Optional[str] = None):
+        """
+        Args:
+            path: Output file
+            format: 'jsonl' or 'chrome' (default: 'chrome' for .json files, else 'jsonl')
+        """
+        self.path = Path(path)
+        self.format = format or ("chrome" if self.path.suffix == ".json" else "jsonl")
+        if self.format not in ("jsonl", "chrome"):
+            raise ValueError(
+                f"Unknown trace format: {self.format}. Must be 'jsonl' or 'chrome'"
+            )
+        self.epoch = time.time()
+        self.origin_ns = time.perf_counter_ns()
+        self.spans = 0
+        self._records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = (
+            open(self.path, "a", encoding="utf-8") if self.format == "jsonl" else None
+        )
+
+    def export(self, span: Span) -> None:
+        record = span.to_dict()
+        with self._lock:
+            self.spans += 1
+            if self.format == "chrome":
+                self._records.append(record)
+            elif self._file is not None:  # spans ending after close() are dropped
+                self._file.write(json.dumps(record, default=str) + "\n")
+                self._file.flush()
+
+    def close(self) -> None:
+        """Close the JSONL file, or write the buffered spans as a Chrome trace."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            elif self._records:
+                write_chrome_trace(self._records, self.path)
+                self._records = []
+
+
+def enabled() -> bool:
+    """Whether spans are being recorded."""
+    return _tracer is not None
+
+
+def span(name: str, **attributes: Any):
+    """
+    Open a span as a context manager; a no-op while tracing is off.
+
+    Args:
+        name: Span name (e.g. 'pubmed.esearch', 'llm.generate')
+        **attributes: Span attributes; keep them cheap to compute, they are
+            evaluated even when tracing is off
+
+    Returns:
+        Context manager yielding an object with set(**attributes)
+
+    Example:
+        >>> with tracing.span("llm.generate", model=model) as s:
+        ...     response = client.generate(model=model, prompt=prompt)
+        ...     s.set(completion_tokens=response.get("eval_count"))
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, attributes)
+
+
+def current_span():
+    """The innermost open span of this context (the no-op span if there is none)."""
+    if _tracer is None:
+        return _NULL_SPAN
+    return _current.get() or _NULL_SPAN
+
+
+def bind(fn: Callable) -> Callable:
+    """
+    Make fn run in the current span context when it is called from another thread.
+
+    Args:
+        fn: Function submitted to a thread pool
+
+    Returns:
+        fn itself while tracing is off, else a wrapper running it in a copy of the current context
+    """
+    if _tracer is None:
+        return fn
+    context = contextvars.copy_context()
+    # A context can only be entered by one thread at a time, so each call gets a copy
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def start_tracing(path: str, format: Optional[str] = None) -> Tracer:
+    """
+    Record spans to a file until stop_tracing() (or interpreter exit).
+
+    Args:
+        path: Output file ('.jsonl' for JSONL, '.json' for a Chrome trace)
+        format: 'jsonl' or 'chrome' to override the suffix
+
+    Returns:
+        The active Tracer
+    """
+    global _tracer
+    stop_tracing()
+    _tracer = Tracer(path, format)
+    print(f"Tracing spans to {_tracer.path} ({_tracer.format})")
+    return _tracer
+
+
+def stop_tracing() -> None:
+    """Stop recording spans and close the trace file."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.close()
+
+
+atexit.register(stop_tracing)
+
+
+def load_spans(path: str) -> List[Dict[str, Any]]:
+    """Read the spans of a JSONL trace (partial lines are skipped)."""
+    spans = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except ValueError:
+                continue
+    return spans
+
+
+def write_chrome_trace(spans: Iterable[Dict[str, Any]], path: str) -> None:
+    """
+    Write spans in the Chrome trace event format.
+
+    Args:
+        spans: Span records (Span.to_dict() / load_spans output)
+        path: Output .json file
+    """
+    events, threads = [], {}
+    for record in spans:
+        args = dict(record.get("attributes") or {})
+        args.update(span_id=record["span_id"], parent_id=record["parent_id"])
+        if "error" in record:
+            args["error"] = record["error"]
+        events.append(
+            {
+                "name": record["name"],
+                "cat": record["name"].split(".")[0],
+                "ph": "X",
+                "ts": record["start"] * 1e6,
+                "dur": record["duration"] * 1e6,
+                "pid": record["pid"],
+                "tid": record["tid"],
+                "args": args,
+            }
+        )
+        threads[(record["pid"], record["tid"])] = record.get("thread")
+    for (pid, tid), name in threads.items():
+        events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+        )
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+
+
+def traces(spans: Iterable[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+    """Group spans by trace id."""
+    grouped = defaultdict(list)
+    for record in spans:
+        grouped[record["trace_id"]].append(record)
+    return dict(grouped)
+
+
+def breakdown(trace: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Self time per span name in a trace: each span's duration minus that of its children.
+
+    Returns:
+        Span name -> seconds, largest first
+    """
+    children = defaultdict(float)
+    for record in trace:
+        if record["parent_id"] is not None:
+            children[record["parent_id"]] += record["duration"]
+    totals = defaultdict(float)
+    for record in trace:
+        own = record["duration"] - children.get(record["span_id"], 0.0)
+        totals[record["name"]] += max(own, 0.0)
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def _root(trace: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return next(
+        (record for record in trace if record["parent_id"] is None),
+        max(trace, key=lambda record: record["duration"]),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Inspect a JSONL trace and export traces for a trace viewer."
+    )
+    parser.add_argument("trace", help="JSONL trace written with start_tracing()")
+    parser.add_argument(
+        "--slowest", type=int, default=5, help="Print the N slowest traces"
+    )
+    parser.add_argument("--claim-id", default=None, help="Only traces of this claim")
+    parser.add_argument(
+        "--chrome",
+        default=None,
+        help="Write the selected traces (the slowest ones, or those of --claim-id) as a Chrome trace",
+    )
+    args = parser.parse_args()
+
+    grouped = traces(load_spans(args.trace))
+    selected = sorted(grouped.values(), key=lambda trace: -_root(trace)["duration"])
+    if args.claim_id is not None:
+        selected = [
+            trace
+            for trace in selected
+            if any(
+                str(record["attributes"].get("claim_id")) == args.claim_id
+                or args.claim_id in map(str, record["attributes"].get("claim_ids", []))
+                for record in trace
+            )
+        ]
+    selected = selected[: args.slowest]
+    if not selected:
+        print("No matching traces")
+
+    for trace in selected:
+        root = _root(trace)
+        attributes = root["attributes"]
+        print(
+            f"{root['name']} {attributes.get('claim_id', '')} "
+            f"{attributes.get('model', '')} {attributes.get('method', '')}: "
+            f"{root['duration']:.2f}s, {len(trace)} spans"
+        )
+        for name, seconds in list(breakdown(trace).items())[:6]:
+            print(f"    {name:<24} {seconds:9.3f}s")
+
+    if args.chrome and selected:
+        write_chrome_trace(
+            (record for trace in selected for record in trace), args.chrome
+        )
+        print(f"Wrote {args.chrome}")
@@ -1,40 +1,334 @@
-from typing import List
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from evaluation.metrics import RunningMetrics
+from evaluation.verdicts import UNKNOWN, extract_classification
+from helpers import tracing
+from helpers.llm import token_counts
 
 """
 Use this class to implement all the methods.
 A 'method' is a method(!) for solving the claim verification task.
+
+Methods consume an iterable of ClaimRecord objects and lazily yield one
+ClaimResult per claim as soon as it is finished, so large datasets can be
+streamed through a method without holding all results in memory.
 """
 
 
+@dataclass
+class ClaimRecord:
+    """A single claim to validate, with its ground-truth label if known."""
+
+    claim_id: str
+    claim: str
+    label: Optional[str] = None
+    dataset: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ClaimResult:
+    """The outcome of validating one claim with a method."""
+
+    claim_id: str
+    claim: str
+    verdict: str
+    method: str
+    model: Optional[str] = None
+    answer: str = ""
+    evidence_pmids: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    label: Optional[str] = None
+    dataset: Optional[str] = None
+    error: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+def iter_claim_records(
+    claims: Any,
+    id_key: str = "id",
+    claim_key: str = "claim",
+    label_key: Optional[str] = None,
+    dataset: Optional[str] = None,
+) -> Iterator[ClaimRecord]:
+    """
+    Lazily convert loader output into ClaimRecord objects.
+
+    Accepts ClaimRecord objects, plain claim strings, dicts (e.g. SCIFACT claims)
+    or a DataFrame (e.g. HEALTHVER / PUBHEALTH splits or the medical causal
+    claims CSV). Records without an id get their position as id.
+
+    Args:
+        claims: Iterable of claims in any of the supported shapes
+        id_key: Field holding the claim id
+        claim_key: Field holding the claim text
+        label_key: Field holding the ground-truth label, if any
+        dataset: Dataset name attached to every record
+
+    Yields:
+        ClaimRecord objects
+
+    Example:
+        >>> df = pd.read_csv("dataloader/scifact_medical_causal_claims.csv")
+        >>> records = iter_claim_records(df, label_key="evidence_label")
+    """
+    if isinstance(claims, pd.DataFrame):
+        claims = (row._asdict() for row in claims.itertuples(index=False))
+
+    for position, item in enumerate(claims):
+        if isinstance(item, ClaimRecord):
+            yield item
+        elif isinstance(item, str):
+            yield ClaimRecord(claim_id=str(position), claim=item, dataset=dataset)
+        else:
+            claim_id = item.get(id_key)
+            yield ClaimRecord(
+                claim_id=str(position if claim_id is None else claim_id),
+                claim=str(item[claim_key]),
+                label=item.get(label_key) if label_key else None,
+                dataset=dataset,
+                metadata=dict(item),
+            )
+
+
 class BaseMethod:
+    name = "base"
+
     def __init__(self, config):
+        """
+        Config may include:
+        - model: str, the LLM model to use
+        - max_workers: int, number of claims validated concurrently (default: 1)
+        """
         self.config = config
+        self.model = config.get("model")
+        self.max_workers = config.get("max_workers", 1)
 
     def setup(self):
         raise NotImplementedError("Subclasses must implement this method")
 
-    def validate_claims(self, claims: List[str]):
+    def close(self) -> None:
+        """
+        Release what setup() acquired (e.g. thread pools).
+
+        Called by the scheduler once it is done with an instance; the default
+        does nothing.
+        """
+
+    def prepare(self, record: ClaimRecord) -> None:
+        """
+        Run the model-independent stages for a claim (e.g. retrieval) ahead of time.
+
+        Methods that cache such stages override this so a scheduler can warm
+        the cache once before running the claim against several models.
+
+        Args:
+            record (ClaimRecord): The claim to prepare.
+        """
+
+    def prepare_batch(self, records: List[ClaimRecord]) -> None:
+        """
+        Prepare several claims at once.
+
+        Methods whose model-independent stages are cheaper in batches (e.g.
+        one embedding request and one matrix product for many claims)
+        override this; by default each claim is prepared on its own.
+
+        Args:
+            records (List[ClaimRecord]): The claims to prepare.
+        """
+        for record in records:
+            self.prepare(record)
+
+    @property
+    def batches_prepare(self) -> bool:
+        """Whether prepare_batch does more than prepare each claim on its own."""
+        return type(self).prepare_batch is not BaseMethod.prepare_batch
+
+    def validate_claim(self, record: ClaimRecord) -> ClaimResult:
         """
-        This is the main function to call when you want to validate a claim with this method.
+        Validate a single claim. Subclasses implement their method here.
 
         Args:
-            claims (List[str]): A list of claims to validate.
+            record (ClaimRecord): The claim to validate.
 
         Raises:
             NotImplementedError
         """
         raise NotImplementedError("Subclasses must implement this method")
 
-    def evaluate_method(self, claims: List[str], ground_truth: List[str]):
+    def result_from_response(
+        self,
+        record: ClaimRecord,
+        response: Dict[str, Any],
+        evidence_pmids: Optional[List[str]] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> ClaimResult:
         """
-        Evaluate the whole method by running on a dataset and reporting some metrics
+        Build a ClaimResult from an Ollama response.
 
         Args:
-            claims (List[str]): List of claims to validate
-            ground_truth (List[str]): List of ground truth values for the claims
+            record (ClaimRecord): The validated claim.
+            response (Dict): Response returned by call_ollama.
+            evidence_pmids (List[str], optional): PMIDs of the documents shown to the model.
+            timings (Dict[str, float], optional): Per-stage timings in seconds.
 
-        Raises:
-            NotImplementedError: If the method is not implemented.
+        Returns:
+            ClaimResult: Result with the parsed verdict and token counts.
         """
-        # TODO: not sure what ground_truth should look like here
-        raise NotImplementedError("Subclasses must implement this method")
+        answer = response.get("response", "NAN")
+        prompt_tokens, completion_tokens = token_counts(response)
+        return ClaimResult(
+            claim_id=record.claim_id,
+            claim=record.claim,
+            verdict=extract_classification(answer),
+            method=self.name,
+            model=self.model,
+            answer=answer,
+            evidence_pmids=list(evidence_pmids or []),
+            timings=dict(timings or {}),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            error=response.get("error"),
+        )
+
+    def run_one(self, record: ClaimRecord) -> ClaimResult:
+        """
+        Validate one claim, turning failures into UNKNOWN results and adding timings.
+
+        Args:
+            record (ClaimRecord): The claim to validate.
+
+        Returns:
+            ClaimResult: The result, with timings["total"] set.
+        """
+        start = time.perf_counter()
+        with tracing.span(
+            "claim",
+            claim_id=record.claim_id,
+            method=self.name,
+            model=self.model,
+            dataset=record.dataset,
+        ) as span:
+            try:
+                result = self.validate_claim(record)
+            except Exception as e:
+                result = ClaimResult(
+                    claim_id=record.claim_id,
+                    claim=record.claim,
+                    verdict=UNKNOWN,
+                    method=self.name,
+                    model=self.model,
+                    error=str(e),
+                )
+            span.set(
+                verdict=result.verdict,
+                evidence_pmids=result.evidence_pmids,
+                prompt_tokens=result.prompt_tokens,
+                completion_tokens=result.completion_tokens,
+                error=result.error,
+            )
+        result.label = record.label
+        result.dataset = record.dataset
+        result.timings["total"] = time.perf_counter() - start
+        return result
+
+    def validate_claims(self, claims: Iterable[Any]) -> Iterator[ClaimResult]:
+        """
+        This is the main function to call when you want to validate claims with this method.
+
+        Claims are pulled from the iterable lazily and results are yielded as
+        soon as each claim is finished. With max_workers > 1 up to that many
+        claims are in flight at once and results arrive in completion order.
+
+        Args:
+            claims (Iterable): ClaimRecord objects, claim strings or loader rows.
+
+        Yields:
+            ClaimResult: One result per claim.
+        """
+        records = iter_claim_records(claims)
+
+        if self.max_workers <= 1:
+            for record in records:
+                yield self.run_one(record)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = set()
+            for record in records:
+                pending.add(executor.submit(self.run_one, record))
+                if len(pending) >= self.max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in pending:
+                yield future.result()
+
+    def evaluate_method(
+        self,
+        claims: Iterable[Any],
+        ground_truth: Optional[Iterable[str]] = None,
+        report_every: int = 50,
+        on_result: Optional[Callable[[ClaimResult], None]] = None,
+        id_key: str = "id",
+        claim_key: str = "claim",
+        label_key: Optional[str] = "label",
+        dataset: Optional[str] = None,
+    ) -> Dict[str, float]:
+        """
+        Evaluate the whole method by running on a dataset and reporting some metrics.
+
+        Results are consumed from validate_claims() one at a time, so metrics
+        are available while the run is still in progress.
+
+        Args:
+            claims (Iterable): Claims to validate (labels are read from ClaimRecord.label,
+                or from the label_key field of dicts and DataFrame rows)
+            ground_truth (Iterable[str], optional): Labels aligned with claims,
+                overriding the labels carried by the records
+            report_every (int): Print the running metrics every this many results (0 disables)
+            on_result (Callable, optional): Called with every ClaimResult, e.g. to persist it
+            id_key (str): Field holding the claim id (see iter_claim_records)
+            claim_key (str): Field holding the claim text
+            label_key (str, optional): Field holding the ground-truth label
+                (e.g. 'evidence_label' for the medical causal claims CSV)
+            dataset (str, optional): Dataset name attached to every record
+
+        Returns:
+            Dict[str, float]: Final metrics (see RunningMetrics.summary)
+        """
+        records = iter_claim_records(claims, id_key, claim_key, label_key, dataset)
+        if ground_truth is not None:
+            records = (
+                ClaimRecord(
+                    claim_id=record.claim_id,
+                    claim=record.claim,
+                    label=label,
+                    dataset=record.dataset,
+                    metadata=record.metadata,
+                )
+                for record, label in zip(records, ground_truth)
+            )
+
+        metrics = RunningMetrics()
+        for result in self.validate_claims(records):
+            metrics.update(result.verdict, result.label)
+            if on_result is not None:
+                on_result(result)
+            if report_every and metrics.total % report_every == 0:
+                summary = metrics.summary()
+                print(
+                    f"[{self.name}] {summary['total']} claims - "
+                    f"accuracy: {summary['accuracy']:.2%}, "
+                    f"unknown: {summary['unknown_rate']:.2%}"
+                )
+
+        return metrics.summary()
@@ -0,0 +1,46 @@
+from typing import List, Tuple
+from methods.base_method import ClaimRecord
+from methods.dense_rag import LocalCorpusRAG
+from methods.simple_rag import SimpleRAG
+from helpers.bm25 import BM25Index
+from helpers.pubmed import PubMedPaper
+
+
+class BM25RAG(LocalCorpusRAG):
+    """
+    RAG over a local BM25 index (see helpers/bm25.py), optionally before PubMed.
+
+    With pubmed_fallback enabled, claims for which the local index returns
+    fewer than min_local_results documents are topped up with the regular
+    keyword -> PubMed retrieval of SimpleRAG.
+    """
+
+    name = "bm25_rag"
+    default_index_dir = "./data/scifact/bm25_index"
+
+    def __init__(self, config):
+        """
+        Config accepts everything LocalCorpusRAG does, plus:
+        - pubmed_fallback: bool, top up sparse local results from PubMed (default: False)
+        - min_local_results: int, local results needed to skip PubMed (default: top_k)
+        """
+        super().__init__(config)
+        self.pubmed_fallback = config.get("pubmed_fallback", False)
+        self.min_local_results = config.get("min_local_results", self.top_k)
+
+    def load_index(self) -> BM25Index:
+        return BM25Index.load(self.index_dir)
+
+    def search_batch(self, claims: List[str]) -> List[List[str]]:
+        ids, _ = self.index.search(claims, top_k=self.top_k)
+        return ids
+
+    def retrieve(self, record: ClaimRecord) -> Tuple[str, List[PubMedPaper]]:
+        keywords, papers = super().retrieve(record)
+        if not self.pubmed_fallback or len(papers) >= self.min_local_results:
+            return keywords, papers
+
+        keywords, pubmed_papers = SimpleRAG.retrieve(self, record)
+        seen = {paper.pmid for paper in papers}
+        papers = papers + [p for p in pubmed_papers if p.pmid not in seen]
+        return keywords, papers[: self.top_k]
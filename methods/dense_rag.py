@@ -0,0 +1,136 @@
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from methods.base_method import ClaimRecord
+from methods.simple_rag import SimpleRAG
+from dataloader.load_datasets import SciFactLoader
+from helpers.dense_index import DenseIndex
+from helpers.llm import embed_texts
+from helpers.pubmed import PubMedPaper
+from helpers.rag import cache_key, load_papers
+
+
+def load_scifact_papers(data_dir: str) -> Dict[str, PubMedPaper]:
+    """SCIFACT corpus documents as PubMedPaper objects keyed by doc_id."""
+    papers = {}
+    for doc in SciFactLoader(data_dir).load_corpus():
+        abstract = doc.get("abstract", "")
+        if isinstance(abstract, list):
+            abstract = " ".join(abstract)
+        papers[str(doc["doc_id"])] = PubMedPaper(
+            pmid=str(doc["doc_id"]),
+            title=doc.get("title", ""),
+            abstract=abstract,
+            authors=[],
+            journal="SCIFACT corpus",
+            publication_date="Unknown",
+        )
+    return papers
+
+
+class LocalCorpusRAG(SimpleRAG):
+    """
+    RAG over a local index instead of PubMed.
+
+    Documents come from papers.jsonl next to the index if present (an index
+    over cached PubMed abstracts), otherwise from the SCIFACT corpus, in which
+    case the pmid of each PubMedPaper is the SCIFACT doc_id. Subclasses
+    implement load_index() and search_batch().
+    """
+
+    name = "local_rag"
+    default_index_dir = None
+
+    def __init__(self, config):
+        """
+        Config accepts everything SimpleRAG does, plus:
+        - index_dir: str, directory of the saved index
+        - data_dir: str, directory with the SCIFACT dataset (default: "./data")
+        """
+        super().__init__(config)
+        self.index_dir = config.get("index_dir", self.default_index_dir)
+        self.data_dir = config.get("data_dir", "./data")
+
+    def setup(self):
+        super().setup()
+        self.index = self.load_index()
+        papers_path = Path(self.index_dir) / "papers.jsonl"
+        if papers_path.exists():
+            self.documents = load_papers(str(papers_path))
+        else:
+            self.documents = load_scifact_papers(self.data_dir)
+
+    def load_index(self):
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def search_batch(self, claims: List[str]) -> List[List[str]]:
+        """Ranked document ids for each claim."""
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def _key(self, record: ClaimRecord) -> str:
+        return cache_key(self.name, record.claim, self.index_dir, self.top_k)
+
+    def retrieve_batch(
+        self, records: Sequence[ClaimRecord]
+    ) -> List[Tuple[str, List[PubMedPaper]]]:
+        """
+        Retrieve documents for several claims with one batched search.
+
+        Args:
+            records: Claims to retrieve for
+
+        Returns:
+            List of ('', papers) tuples aligned with records (no keywords are used)
+        """
+        keys = [self._key(record) for record in records]
+        doc_ids = [self.retrieval_cache.get(key) for key in keys]
+
+        missing = [i for i, ids in enumerate(doc_ids) if ids is None]
+        if missing:
+            retrieved = self.search_batch([records[i].claim for i in missing])
+            for i, ids in zip(missing, retrieved):
+                self.retrieval_cache.set(keys[i], ids)
+                doc_ids[i] = ids
+
+        return [
+            ("", [self.documents[d] for d in ids if d in self.documents])
+            for ids in doc_ids
+        ]
+
+    def retrieve(self, record: ClaimRecord) -> Tuple[str, List[PubMedPaper]]:
+        return self.retrieve_batch([record])[0]
+
+    batches_prepare = True
+
+    def prepare_batch(self, records: Sequence[ClaimRecord]) -> None:
+        self.retrieve_batch(records)
+
+
+class DenseRAG(LocalCorpusRAG):
+    """RAG over a local DenseIndex (see helpers/dense_index.py)."""
+
+    name = "dense_rag"
+    default_index_dir = "./data/scifact/dense_index"
+
+    def __init__(self, config):
+        """
+        Config accepts everything LocalCorpusRAG does, plus:
+        - embedding_model: str, the Ollama embedding model used to build the index (default: "nomic-embed-text")
+        """
+        super().__init__(config)
+        self.embedding_model = config.get("embedding_model", "nomic-embed-text")
+
+    def load_index(self) -> DenseIndex:
+        return DenseIndex.load(self.index_dir)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return embed_texts(texts, model=self.embedding_model, client=self.llm)
+
+    def _key(self, record: ClaimRecord) -> str:
+        return cache_key(
+            self.name, record.claim, self.index_dir, self.embedding_model, self.top_k
+        )
+
+    def search_batch(self, claims: List[str]) -> List[List[str]]:
+        ids, _ = self.index.search_texts(claims, self.embed, top_k=self.top_k)
+        return ids
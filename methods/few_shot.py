@@ -0,0 +1,271 @@
+"""
+Few-shot verification with nearest-neighbour demonstrations.
+
+Demonstrations are labelled train claims from HEALTHVER, PUBHEALTH and
+SCIFACT, embedded once into a DenseIndex (build_demo_index). For a batch of
+claims the demonstrations are selected with one embedding request and one
+matrix product.
+
+Prompts are laid out for the server's prefix cache: the fixed instructions
+come first, then a few shared demonstrations that are identical for every
+claim (one per label, closest to the label centroid), then the claim's
+nearest neighbours (most similar last, next to the claim), then the claim.
+
+Usage:
+    python -m methods.few_shot --data-dir ./data --index-dir ./data/few_shot_index
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from methods.base_method import ClaimRecord, ClaimResult
+from methods.prompts import FEW_SHOT_DEMONSTRATION, FEW_SHOT_PROMPT
+from methods.zero_shot import ZeroShot
+from evaluation.verdicts import CONTRADICT, SUPPORTED, normalize_label
+from helpers.dense_index import DenseIndex, EmbedFn
+from helpers.llm import call_ollama, embed_texts
+from helpers.rag import RetrievalCache, cache_key
+
+DEMO_DATASETS = ("healthver", "pubhealth", "scifact")
+
+
+def _normalize_claim(claim: str) -> str:
+    return " ".join(claim.lower().split())
+
+
+def shared_demo_ids(index: DenseIndex, labels: Sequence[str]) -> List[str]:
+    """
+    Pick one demonstration per label, the one closest to its label's centroid.
+
+    Args:
+        index: Index over the demonstration claims
+        labels: Label of each indexed demonstration
+
+    Returns:
+        Demonstration ids, in the order of (SUPPORTED, CONTRADICT)
+    """
+    labels = np.asarray(labels)
+    ids = []
+    for label in (SUPPORTED, CONTRADICT):
+        rows = np.flatnonzero(labels == label)
+        if rows.size == 0:
+            continue
+        embeddings = np.asarray(index.embeddings[rows])
+        centroid = embeddings.mean(axis=0)
+        ids.append(index.doc_ids[rows[int(np.argmax(embeddings @ centroid))]])
+    return ids
+
+
+def build_demo_index(
+    index_dir: str,
+    embed_fn: EmbedFn,
+    data_dir: str = "./data",
+    datasets: Sequence[str] = DEMO_DATASETS,
+    max_per_dataset: Optional[int] = None,
+) -> DenseIndex:
+    """
+    Embed the labelled train claims of the given datasets and save the index.
+
+    Only claims labelled SUPPORTED or CONTRADICT (after normalize_label) are
+    kept, since those are the answers the prompt allows.
+
+    Args:
+        index_dir: Directory to save the index (plus demos.jsonl) to
+        embed_fn: Embedding function for claims
+        data_dir: Directory with the downloaded datasets
+        datasets: Train splits to draw demonstrations from
+        max_per_dataset: Optional cap on demonstrations per dataset
+
+    Returns:
+        The built DenseIndex
+    """
+    from experiments.grid import load_claim_records
+
+    demos = []
+    for name in datasets:
+        count = 0
+        try:
+            records = list(
+                load_claim_records({"name": name, "split": "train"}, data_dir)
+            )
+        except FileNotFoundError as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        for record in records:
+            label = normalize_label(record.label)
+            if label not in (SUPPORTED, CONTRADICT):
+                continue
+            demos.append({"id": record.claim_id, "claim": record.claim, "label": label})
+            count += 1
+            if max_per_dataset is not None and count >= max_per_dataset:
+                break
+        print(f"Collected {count} demonstrations from {name}")
+
+    index = DenseIndex.build(
+        [demo["id"] for demo in demos], [demo["claim"] for demo in demos], embed_fn
+    )
+    index.metadata["shared_demo_ids"] = shared_demo_ids(
+        index, [demo["label"] for demo in demos]
+    )
+    index.save(index_dir)
+    with open(Path(index_dir) / "demos.jsonl", "w", encoding="utf-8") as f:
+        for demo in demos:
+            f.write(json.dumps(demo, ensure_ascii=False) + "\n")
+    print(f"Saved demonstration index over {len(index)} claims to {index_dir}")
+    return index
+
+
+class FewShot(ZeroShot):
+    name = "few_shot"
+    prompt = FEW_SHOT_PROMPT
+
+    def __init__(self, config):
+        """
+        Config accepts everything ZeroShot does, plus:
+        - demo_index_dir: str, directory of the demonstration index (default: "./data/few_shot_index")
+        - n_demos: int, nearest-neighbour demonstrations per claim (default: 4)
+        - n_shared_demos: int, demonstrations shared by every prompt (default: 2)
+        - embedding_model: str, the Ollama embedding model of the index (default: "nomic-embed-text")
+        - retrieval_cache: RetrievalCache for the selected demonstrations (default: a private in-memory cache)
+        """
+        super().__init__(config)
+        self.demo_index_dir = config.get("demo_index_dir", "./data/few_shot_index")
+        self.n_demos = config.get("n_demos", 4)
+        self.n_shared_demos = config.get("n_shared_demos", 2)
+        self.embedding_model = config.get("embedding_model", "nomic-embed-text")
+        self.retrieval_cache = config.get("retrieval_cache")
+        if self.retrieval_cache is None:
+            self.retrieval_cache = RetrievalCache()
+
+    def setup(self):
+        super().setup()
+        self.index = DenseIndex.load(self.demo_index_dir)
+        self.demos: Dict[str, Dict[str, Any]] = {}
+        # Cached selections are keyed by the index contents, so rebuilding
+        # the index in the same directory does not serve stale demo ids
+        digest = hashlib.sha1(str(len(self.index)).encode("utf-8"))
+        with open(
+            Path(self.demo_index_dir) / "demos.jsonl", "r", encoding="utf-8"
+        ) as f:
+            for line in f:
+                digest.update(line.encode("utf-8"))
+                demo = json.loads(line)
+                self.demos[demo["id"]] = demo
+        self.index_fingerprint = digest.hexdigest()
+        self.shared_ids = self.index.metadata.get("shared_demo_ids", [])[
+            : self.n_shared_demos
+        ]
+        # Rendered once; every prompt starts with exactly these characters
+        self.shared_prefix = "".join(
+            FEW_SHOT_DEMONSTRATION.format(**self.demos[demo_id])
+            for demo_id in self.shared_ids
+        )
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return embed_texts(texts, model=self.embedding_model, client=self.llm)
+
+    def _key(self, record: ClaimRecord) -> str:
+        return cache_key(
+            self.name,
+            record.claim,
+            self.demo_index_dir,
+            self.index_fingerprint,
+            self.embedding_model,
+            self.n_demos,
+            self.n_shared_demos,
+        )
+
+    def select_demos_batch(self, records: Sequence[ClaimRecord]) -> List[List[str]]:
+        """
+        Nearest-neighbour demonstration ids for several claims, going through the cache.
+
+        The uncached claims are embedded in one request and searched with one
+        matrix product. Demonstrations with the same text as the claim (e.g.
+        the claim itself when it comes from a train split) and the shared
+        demonstrations are skipped.
+
+        Args:
+            records: Claims to select demonstrations for
+
+        Returns:
+            Demonstration ids per claim, least similar first
+        """
+        keys = [self._key(record) for record in records]
+        selected = [self.retrieval_cache.get(key) for key in keys]
+
+        missing = [i for i, ids in enumerate(selected) if ids is None]
+        if missing:
+            depth = self.n_demos + self.n_shared_demos + 2
+            neighbours, _ = self.index.search_texts(
+                [records[i].claim for i in missing], self.embed, top_k=depth
+            )
+            for i, ids in zip(missing, neighbours):
+                claim = _normalize_claim(records[i].claim)
+                ids = [
+                    demo_id
+                    for demo_id in ids
+                    if demo_id not in self.shared_ids
+                    and _normalize_claim(self.demos[demo_id]["claim"]) != claim
+                ][: self.n_demos]
+                ids.reverse()  # most similar demonstration right before the claim
+                self.retrieval_cache.set(keys[i], ids)
+                selected[i] = ids
+        return selected
+
+    def prepare_batch(self, records: Sequence[ClaimRecord]) -> None:
+        self.select_demos_batch(records)
+
+    def build_prompt(self, record: ClaimRecord, demo_ids: List[str]) -> str:
+        demonstrations = self.shared_prefix + "".join(
+            FEW_SHOT_DEMONSTRATION.format(**self.demos[demo_id]) for demo_id in demo_ids
+        )
+        return self.prompt.format(
+            demonstrations=demonstrations.rstrip("\n"), claim=record.claim
+        )
+
+    def validate_claim(self, record: ClaimRecord) -> ClaimResult:
+        timings = {}
+
+        start = time.perf_counter()
+        demo_ids = self.select_demos_batch([record])[0]
+        timings["selection"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        response = call_ollama(
+            model=self.model,
+            prompt=self.build_prompt(record, demo_ids),
+            client=self.llm,
+        )
+        timings["verification"] = time.perf_counter() - start
+        return self.result_from_response(record, response, timings=timings)
+
+
+if __name__ == "__main__":
+    from helpers.llm import setup_ollama_client
+
+    parser = argparse.ArgumentParser(
+        description="Build the nearest-neighbour demonstration index for FewShot."
+    )
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--index-dir", default="./data/few_shot_index")
+    parser.add_argument("--model", default="nomic-embed-text")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--datasets", nargs="+", default=list(DEMO_DATASETS))
+    parser.add_argument("--max-per-dataset", type=int, default=None)
+    args = parser.parse_args()
+
+    client = setup_ollama_client(args.host, args.port)
+    build_demo_index(
+        args.index_dir,
+        lambda texts: embed_texts(texts, model=args.model, client=client),
+        data_dir=args.data_dir,
+        datasets=args.datasets,
+        max_per_dataset=args.max_per_dataset,
+    )
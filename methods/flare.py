@@ -0,0 +1,191 @@
+import re
+import time
+from typing import Any, Dict, Iterable, Optional, Union
+import pandas as pd
+from methods.base_method import BaseMethod, ClaimRecord, ClaimResult
+from methods.prompts import FLARE_DRAFT_PROMPT
+from methods.simple_rag import SimpleRAG
+from evaluation.verdicts import UNKNOWN, extract_classification, normalize_label
+from helpers.llm import call_ollama, token_counts
+from helpers.rag import strip_think
+
+_CONFIDENCE_RE = re.compile(r"CONFIDENCE\s*(?:LEVEL)?\s*[:=]?\s*(\d+(?:\.\d+)?)\s*(%)?")
+
+# Phrases that signal the draft is unsure even if it states a high confidence
+HEDGES = (
+    "unclear",
+    "uncertain",
+    "not sure",
+    "insufficient",
+    "not enough evidence",
+    "limited evidence",
+    "mixed evidence",
+    "conflicting",
+    "cannot determine",
+    "can't determine",
+    "difficult to determine",
+    "it depends",
+    "more research",
+    "further research",
+    "inconclusive",
+)
+
+
+def parse_confidence(answer: str) -> Optional[float]:
+    """
+    Read the self-reported confidence of a draft answer.
+
+    Args:
+        answer: Draft answer containing e.g. "Confidence: 85"
+
+    Returns:
+        Confidence in [0, 1], or None if the answer does not state one
+    """
+    match = _CONFIDENCE_RE.search(answer.upper())
+    if not match:
+        return None
+    value = float(match.group(1))
+    if match.group(2) or value > 1:
+        value /= 100
+    return min(max(value, 0.0), 1.0)
+
+
+def find_hedges(answer: str) -> list:
+    """Return the hedging phrases found in an answer."""
+    answer = answer.lower()
+    return [hedge for hedge in HEDGES if hedge in answer]
+
+
+class FLARE(SimpleRAG):
+    """
+    Adaptive retrieval: answer from parametric knowledge first, retrieve only when unsure.
+
+    The model drafts an answer with a self-reported confidence. If the draft
+    gives a verdict, reports at least confidence_threshold and does not
+    hedge, it is the final answer and no keywords, PubMed search or
+    reranking are paid for. Otherwise the claim goes through the regular RAG
+    pipeline of SimpleRAG. Results that used retrieval have a "retrieval"
+    timing, see flare_report().
+    """
+
+    name = "flare"
+
+    # Retrieval is decided per claim, so it is not warmed ahead of time
+    prepare = BaseMethod.prepare
+    prepare_batch = BaseMethod.prepare_batch
+    batches_prepare = False
+
+    def __init__(self, config):
+        """
+        Config accepts everything SimpleRAG does, plus:
+        - confidence_threshold: float in [0, 1], minimum draft confidence to skip retrieval (default: 0.8)
+        - retrieve_on_hedge: bool, retrieve when the draft hedges whatever its confidence (default: True)
+        """
+        super().__init__(config)
+        self.confidence_threshold = config.get("confidence_threshold", 0.8)
+        if not 0.0 <= self.confidence_threshold <= 1.0:
+            raise ValueError("confidence_threshold must be between 0 and 1")
+        self.retrieve_on_hedge = config.get("retrieve_on_hedge", True)
+
+    def needs_retrieval(self, verdict: str, answer: str) -> bool:
+        """Decide from a draft answer whether to retrieve evidence."""
+        if verdict == UNKNOWN:
+            return True
+        confidence = parse_confidence(answer)
+        if confidence is None or confidence < self.confidence_threshold:
+            return True
+        return self.retrieve_on_hedge and bool(find_hedges(answer))
+
+    def validate_claim(self, record: ClaimRecord) -> ClaimResult:
+        start = time.perf_counter()
+        draft = call_ollama(
+            model=self.model,
+            prompt=FLARE_DRAFT_PROMPT.format(claim=record.claim),
+            client=self.llm,
+        )
+        draft_seconds = time.perf_counter() - start
+
+        # Judge the draft (and record its verdict) without the think trace, whose
+        # discarded guesses would otherwise be read as the answer
+        answer = strip_think(draft.get("response", ""))
+        verdict = extract_classification(answer)
+        if "error" not in draft and not self.needs_retrieval(verdict, answer):
+            result = self.result_from_response(
+                record, draft, timings={"draft": draft_seconds}
+            )
+            result.verdict = verdict
+            return result
+
+        result = super().validate_claim(record)
+        prompt_tokens, completion_tokens = token_counts(draft)
+        result.prompt_tokens += prompt_tokens
+        result.completion_tokens += completion_tokens
+        result.timings["draft"] = draft_seconds
+        return result
+
+
+def _as_frame(results: Union[pd.DataFrame, Iterable[Any]]) -> pd.DataFrame:
+    if isinstance(results, pd.DataFrame):
+        return results
+    return pd.DataFrame([r if isinstance(r, dict) else r.__dict__ for r in results])
+
+
+def _accuracy(df: pd.DataFrame) -> Optional[float]:
+    if "label" not in df:
+        return None
+    labels = df["label"].map(normalize_label)
+    labeled = labels.notna()
+    if not labeled.any():
+        return None
+    return float((df.loc[labeled, "verdict"] == labels[labeled]).mean())
+
+
+def flare_report(
+    flare_results: Union[pd.DataFrame, Iterable[Any]],
+    rag_results: Optional[Union[pd.DataFrame, Iterable[Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Summarize how often FLARE retrieved and the time it saved against RAG.
+
+    Args:
+        flare_results: FLARE ClaimResults (or a DataFrame, e.g. RunManager.load_results())
+        rag_results: Results of the rag method for the same models and claims
+
+    Returns:
+        Dictionary with claims, retrieval_rate, flare_seconds and accuracy; with
+        rag_results also rag_seconds, time_saved, time_saved_fraction and
+        rag_accuracy over the (model, claim_id) pairs both runs share
+    """
+    flare = _as_frame(flare_results)
+    flare = flare.assign(
+        retrieved=flare["timings"].map(lambda t: "retrieval" in (t or {})),
+        seconds=flare["timings"].map(lambda t: (t or {}).get("total", 0.0)),
+    )
+    report = {
+        "claims": len(flare),
+        "retrieval_rate": float(flare["retrieved"].mean()) if len(flare) else 0.0,
+        "flare_seconds": float(flare["seconds"].sum()),
+        "accuracy": _accuracy(flare),
+    }
+    if rag_results is None:
+        return report
+
+    rag = _as_frame(rag_results)
+    rag = rag.assign(seconds=rag["timings"].map(lambda t: (t or {}).get("total", 0.0)))
+    keys = ["model", "claim_id"]
+    joined = flare.merge(rag, on=keys, suffixes=("", "_rag"))
+    flare_seconds = float(joined["seconds"].sum())
+    rag_seconds = float(joined["seconds_rag"].sum())
+    report.update(
+        {
+            "compared_claims": len(joined),
+            "flare_seconds_compared": flare_seconds,
+            "rag_seconds": rag_seconds,
+            "time_saved": rag_seconds - flare_seconds,
+            "time_saved_fraction": (
+                (rag_seconds - flare_seconds) / rag_seconds if rag_seconds else 0.0
+            ),
+            "rag_accuracy": _accuracy(rag.merge(joined[keys], on=keys)),
+        }
+    )
+    return report
@@ -0,0 +1,193 @@
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+from methods.base_method import ClaimRecord
+from methods.dense_rag import load_scifact_papers
+from methods.simple_rag import SimpleRAG
+from helpers import pubmed
+from helpers.bm25 import BM25Index
+from helpers.dense_index import DenseIndex
+from helpers.hybrid import HybridRetriever, RetrievalSource
+from helpers.llm import embed_texts
+from helpers.pubmed import PubMedPaper
+from helpers.rag import cache_key, load_papers
+
+DEFAULT_SOURCE_BUDGETS = {"pubmed": 10.0, "bm25": 1.0, "dense": 2.0}
+
+
+class HybridRAG(SimpleRAG):
+    """
+    RAG over PubMed and local indexes fused with reciprocal-rank fusion.
+
+    The PubMed source runs a single esearch with the OR-joined keywords and
+    relies on PubMed's best-match ordering (documents matching all keywords
+    rank first), instead of the two get_papers() calls of the AND -> OR
+    fallback. The keywords are generated before the sources start, so a slow
+    keyword model does not eat into the PubMed budget. Only the fused top_k
+    documents that are not in a local index are fetched from PubMed.
+
+    RRF merges documents by id, so every source must rank PubMed ids or every
+    source SCIFACT doc ids. A local index is in the PubMed id space when it
+    was built over PubMed abstracts (it has a papers.jsonl, see
+    helpers.bm25.build_papers_bm25); the default BM25 index is such an index.
+    """
+
+    name = "hybrid_rag"
+
+    def __init__(self, config):
+        """
+        Config accepts everything SimpleRAG does, plus:
+        - sources: list of sources to fuse, among "pubmed", "bm25", "dense" (default: ["pubmed", "bm25"])
+        - source_budgets: dict of source -> latency budget in seconds (default: DEFAULT_SOURCE_BUDGETS)
+        - source_weights: dict of source -> RRF weight (default: 1.0 each)
+        - rrf_k: int, RRF constant (default: 60)
+        - bm25_index_dir: str, directory of the BM25 index (default: "./data/pubmed/bm25_index",
+          built over the PubMed abstracts of a retrieval cache with
+          python -m helpers.bm25 --retrieval-cache <cache> --index-dir ./data/pubmed/bm25_index)
+        - dense_index_dir: str, directory of the dense index (default: "./data/scifact/dense_index")
+        - embedding_model: str, the Ollama embedding model of the dense index (default: "nomic-embed-text")
+        - data_dir: str, directory with the SCIFACT dataset (default: "./data")
+        """
+        super().__init__(config)
+        self.sources = list(config.get("sources", ["pubmed", "bm25"]))
+        unknown = set(self.sources) - set(DEFAULT_SOURCE_BUDGETS)
+        if unknown:
+            raise ValueError(
+                f"Unknown sources: {sorted(unknown)}. Must be among {sorted(DEFAULT_SOURCE_BUDGETS)}"
+            )
+        self.source_budgets = {
+            **DEFAULT_SOURCE_BUDGETS,
+            **config.get("source_budgets", {}),
+        }
+        self.source_weights = config.get("source_weights", {})
+        self.rrf_k = config.get("rrf_k", 60)
+        self.bm25_index_dir = config.get("bm25_index_dir", "./data/pubmed/bm25_index")
+        self.dense_index_dir = config.get(
+            "dense_index_dir", "./data/scifact/dense_index"
+        )
+        self.embedding_model = config.get("embedding_model", "nomic-embed-text")
+        self.data_dir = config.get("data_dir", "./data")
+
+    def id_space(self, source: str) -> str:
+        """'pmid' or 'scifact': the id space of the documents a source ranks."""
+        if source == "pubmed":
+            return "pmid"
+        index_dir = self.bm25_index_dir if source == "bm25" else self.dense_index_dir
+        return "pmid" if (Path(index_dir) / "papers.jsonl").exists() else "scifact"
+
+    def setup(self):
+        spaces = {source: self.id_space(source) for source in self.sources}
+        if len(set(spaces.values())) > 1:
+            raise ValueError(
+                f"Sources rank documents in different id spaces ({spaces}), so "
+                "RRF cannot merge them. Build the local indexes over PubMed "
+                "abstracts (python -m helpers.bm25 --retrieval-cache ...) or "
+                "fuse only sources over the SCIFACT corpus"
+            )
+        super().setup()
+        self.documents: Dict[str, PubMedPaper] = {}
+        search_fns = {"pubmed": self.search_pubmed}
+
+        if "bm25" in self.sources:
+            self.bm25_index = BM25Index.load(self.bm25_index_dir)
+            search_fns["bm25"] = self.search_bm25
+            self._load_documents(self.bm25_index_dir)
+        if "dense" in self.sources:
+            self.dense_index = DenseIndex.load(self.dense_index_dir)
+            search_fns["dense"] = self.search_dense
+            self._load_documents(self.dense_index_dir)
+
+        self.retriever = HybridRetriever(
+            [
+                RetrievalSource(
+                    name=source,
+                    search=search_fns[source],
+                    budget=self.source_budgets.get(source),
+                    weight=self.source_weights.get(source, 1.0),
+                )
+                for source in self.sources
+            ],
+            rrf_k=self.rrf_k,
+            max_workers=4 * self.max_workers * len(self.sources),
+        )
+
+    def close(self) -> None:
+        retriever = getattr(self, "retriever", None)
+        if retriever is not None:
+            retriever.close()
+        super().close()
+
+    def _load_documents(self, index_dir: str) -> None:
+        papers_path = Path(index_dir) / "papers.jsonl"
+        if papers_path.exists():
+            self.documents.update(load_papers(str(papers_path)))
+        else:
+            self.documents.update(load_scifact_papers(self.data_dir))
+
+    def search_pubmed(self, query: str, top_k: int) -> List[str]:
+        # The query is the OR-joined keywords prepared by retrieve
+        if not query:
+            raise ValueError("No keywords to search PubMed with")
+        return pubmed.search_pubmed(query, top_k=top_k)
+
+    def search_bm25(self, claim: str, top_k: int) -> List[str]:
+        ids, _ = self.bm25_index.search([claim], top_k=top_k)
+        return ids[0]
+
+    def search_dense(self, claim: str, top_k: int) -> List[str]:
+        embeddings = embed_texts([claim], model=self.embedding_model, client=self.llm)
+        ids, _ = self.dense_index.search(embeddings, top_k=top_k)
+        return ids[0]
+
+    def retrieve(self, record: ClaimRecord) -> Tuple[str, List[PubMedPaper]]:
+        def compute():
+            # Keywords get their own time, outside the PubMed source's budget
+            keywords, queries = "", {}
+            if "pubmed" in self.sources:
+                keywords = self.keywords(record.claim)
+                queries["pubmed"] = keywords.replace(" AND ", " OR ")
+            fused, report = self.retriever.search(
+                record.claim, top_k=self.top_k, queries=queries
+            )
+            doc_ids = [doc_id for doc_id, _ in fused]
+            failed = []
+            fetched = {
+                paper.pmid: paper
+                for paper in pubmed.fetch_papers(
+                    [d for d in doc_ids if d not in self.documents], failed=failed
+                )
+            }
+            papers = [
+                self.documents.get(d) or fetched.get(d)
+                for d in doc_ids
+                if d in self.documents or d in fetched
+            ]
+            return {
+                "keywords": keywords,
+                "papers": [asdict(p) for p in papers],
+                "sources": report,
+                "failed_pmids": failed,
+            }
+
+        key = cache_key(
+            self.name,
+            record.claim,
+            self.sources,
+            self.source_weights,
+            self.bm25_index_dir,
+            self.dense_index_dir,
+            self.keyword_model,
+            self.n_keywords,
+            self.top_k,
+            self.rrf_k,
+        )
+        entry = self.retrieval_cache.get(key)
+        if entry is None:
+            entry = compute()
+            # Results degraded by a slow or failing source, or missing papers
+            # PubMed failed to return, are not cached
+            if not entry["failed_pmids"] and all(
+                s["status"] == "ok" for s in entry["sources"].values()
+            ):
+                self.retrieval_cache.set(key, entry)
+        return entry["keywords"], [PubMedPaper(**p) for p in entry["papers"]]
@@ -0,0 +1,71 @@
+"""
+Prompt templates used by the methods (copied from the experiment notebooks).
+"""
+
+ZERO_SHOT_PROMPT = """
+You are a biomedical expert specializing in causal inference and evidence-based reasoning.
+You task is to assess whether the following medical causal claim is SUPPORTED or CONTRADICT based on general scientific and clinical knowledge.
+Respond with only one word: SUPPORTED or CONTRADICT.
+
+Claim: "{claim}"
+Answer:
+"""
+
+COT_PROMPT = """
+You are a biomedical expert specializing in causal inference and evidence-based reasoning.
+Carefully analyze the following medical causal claim before making your decision.
+Think step-by-step through the scientific and clinical mechanisms, known studies, and plausible causal pathways.
+After reasoning through the evidence, decide whether the claim is SUPPORTED or CONTRADICT based on established knowledge.
+Respond only after completing your reasoning.
+
+Claim: "{claim}"
+
+Reasoning: [Your step-by-step analysis here]
+Final Answer: [SUPPORTED or CONTRADICT]
+"""
+
+RAG_PROMPT = """
+You are a biomedical expert specializing in causal inference.
+
+Evaluate the following medical causal claim based ONLY on the provided scientific abstracts.
+
+ABSTRACTS:
+{documents}
+
+CLAIM: "{claim}"
+
+Carefully analyze the evidence in the abstracts. If the abstracts support the claim, respond with SUPPORTED. If they contradict the claim, respond with CONTRADICT.
+
+Provide your reasoning, cite relevant papers by PMID, and then give your final answer.
+
+Final Answer: [SUPPORTED or CONTRADICT]
+"""
+
+FLARE_DRAFT_PROMPT = """
+You are a biomedical expert specializing in causal inference and evidence-based reasoning.
+Assess whether the following medical causal claim is SUPPORTED or CONTRADICT based on general scientific and clinical knowledge.
+Then state how confident you are, from 0 (guessing) to 100 (certain), that your answer is correct without consulting the literature.
+
+Claim: "{claim}"
+
+Answer: [SUPPORTED or CONTRADICT]
+Confidence: [0-100]
+"""
+
+# The instructions and the demonstrations come before the claim so that
+# prompts of different claims share a prefix the server can cache
+FEW_SHOT_PROMPT = """
+You are a biomedical expert specializing in causal inference and evidence-based reasoning.
+You task is to assess whether a medical causal claim is SUPPORTED or CONTRADICT based on general scientific and clinical knowledge.
+Respond with only one word: SUPPORTED or CONTRADICT.
+
+Examples:
+{demonstrations}
+
+Claim: "{claim}"
+Answer:
+"""
+
+FEW_SHOT_DEMONSTRATION = """Claim: "{claim}"
+Answer: {label}
+"""
@@ -0,0 +1,137 @@
+from typing import List, Sequence
+from methods.base_method import ClaimRecord
+from methods.simple_rag import SimpleRAG
+from helpers.listwise import ListwiseReranker
+from helpers.llm import embed_texts
+from helpers.pubmed import PubMedPaper
+from helpers.rag import Uncached, cache_key, format_abstracts, rerank_abstracts
+from helpers.rerank import CheapReranker
+
+
+class RerankedRAG(SimpleRAG):
+    name = "reranked_rag"
+
+    def __init__(self, config):
+        """
+        Config accepts everything SimpleRAG does, plus:
+        - rerank_model: str, the LLM used to rerank abstracts (default: "deepseek-r1:32b")
+        - rerank_top_k: int, number of abstracts kept after reranking (default: 3)
+        - reranker: str, "llm" to always rerank with rerank_model in one prompt, "listwise" to
+          rerank larger pools (top_k > ~10) with a tournament of rerank_model windows, or "cheap"
+          to score with embeddings and lexical overlap and ask rerank_model only on near-ties (default: "llm")
+        - embedding_model: str, the Ollama embedding model of the cheap reranker (default: "nomic-embed-text")
+        - rerank_margin: float, score gap below which the cheap reranker defers to the LLM (default: 0.02)
+        - rerank_max_calls: int, budget on LLM calls per claim of the listwise reranker (default: unlimited)
+        """
+        super().__init__(config)
+        self.rerank_model = config.get("rerank_model", "deepseek-r1:32b")
+        self.rerank_top_k = config.get("rerank_top_k", 3)
+        self.reranker = config.get("reranker", "llm")
+        if self.reranker not in ("llm", "listwise", "cheap"):
+            raise ValueError(
+                f"Unknown reranker: {self.reranker}. Must be 'llm', 'listwise' or 'cheap'"
+            )
+        self.embedding_model = config.get("embedding_model", "nomic-embed-text")
+        self.rerank_margin = config.get("rerank_margin", 0.02)
+        self.rerank_max_calls = config.get("rerank_max_calls")
+
+    def setup(self):
+        super().setup()
+        if self.reranker == "cheap":
+            self.cheap_reranker = CheapReranker(
+                embed_fn=lambda texts: embed_texts(
+                    texts, model=self.embedding_model, client=self.llm
+                ),
+                llm_fallback=self.llm_rerank,
+                margin=self.rerank_margin,
+            )
+        elif self.reranker == "listwise":
+            self.listwise_reranker = ListwiseReranker(
+                model=self.rerank_model,
+                client=self.llm,
+                max_llm_calls=self.rerank_max_calls,
+            )
+
+    def llm_rerank(self, claim: str, concatenated_abstracts: str, top_k: int):
+        return rerank_abstracts(
+            claim,
+            concatenated_abstracts,
+            model=self.rerank_model,
+            client=self.llm,
+            top_k=top_k,
+        )
+
+    def _key(self, record: ClaimRecord, papers: List[PubMedPaper]) -> str:
+        if self.reranker == "cheap":
+            return cache_key(
+                "cheap_rerank",
+                record.claim,
+                [paper.pmid for paper in papers],
+                self.embedding_model,
+                self.rerank_margin,
+                self.rerank_model,
+                self.rerank_top_k,
+            )
+        if self.reranker == "listwise":
+            return cache_key(
+                "listwise_rerank",
+                record.claim,
+                [paper.pmid for paper in papers],
+                self.rerank_model,
+                self.rerank_max_calls,
+                self.rerank_top_k,
+            )
+        return cache_key(
+            "llm_rerank",
+            record.claim,
+            [paper.pmid for paper in papers],
+            self.rerank_model,
+            self.rerank_top_k,
+        )
+
+    def select_documents(
+        self, record: ClaimRecord, papers: List[PubMedPaper]
+    ) -> List[PubMedPaper]:
+        def compute():
+            if self.reranker == "cheap":
+                rerank = self.cheap_reranker.rerank
+            elif self.reranker == "listwise":
+                rerank = self.listwise_reranker.rerank
+            else:
+                rerank = self.llm_rerank
+            pmids, _ = rerank(record.claim, format_abstracts(papers), self.rerank_top_k)
+            # An empty selection of a non-empty pool means the reranker failed
+            return Uncached(pmids) if papers and not pmids else pmids
+
+        key = self._key(record, papers)
+        selected = self.retrieval_cache.get_or_compute(key, compute)
+        by_pmid = {paper.pmid: paper for paper in papers}
+        return [by_pmid[pmid] for pmid in selected if pmid in by_pmid]
+
+    @property
+    def batches_prepare(self) -> bool:
+        return self.reranker == "cheap" or super().batches_prepare
+
+    def prepare_batch(self, records: Sequence[ClaimRecord]) -> None:
+        if self.reranker != "cheap":
+            return super().prepare_batch(records)
+        self.prepare_keywords(records)
+
+        # Score all pending claims with one embedding call
+        pending = []
+        for record in records:
+            papers = self.retrieve(record)[1]
+            key = self._key(record, papers)
+            if key not in self.retrieval_cache:
+                pending.append((key, record, papers))
+        if not pending:
+            return
+
+        selections = self.cheap_reranker.rerank_batch(
+            [record.claim for _, record, _ in pending],
+            [format_abstracts(papers) for _, _, papers in pending],
+            top_k=self.rerank_top_k,
+        )
+        for (key, _, papers), (pmids, _) in zip(pending, selections):
+            if pmids or not papers:
+                self.retrieval_cache.set(key, pmids)
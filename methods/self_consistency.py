@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List
+from methods.base_method import BaseMethod, ClaimRecord, ClaimResult
+from evaluation.verdicts import UNKNOWN
+from helpers import tracing
+
+
+def _ranked_counts(votes: Counter) -> List[int]:
+    """Vote counts of the verdicts other than UNKNOWN, highest first, padded to two."""
+    counts = sorted((c for v, c in votes.items() if v != UNKNOWN), reverse=True)
+    return counts + [0] * (2 - len(counts))
+
+
+def majority_decided(votes: Counter, remaining: int) -> bool:
+    """True if the remaining votes can no longer change the leading verdict."""
+    leader, runner_up = _ranked_counts(votes)[:2]
+    return leader > 0 and leader > runner_up + remaining
+
+
+def majority_verdict(votes: Counter) -> str:
+    """Most voted verdict other than UNKNOWN (UNKNOWN on a tie or without votes)."""
+    ranked = [(v, c) for v, c in votes.most_common() if v != UNKNOWN]
+    if not ranked or (len(ranked) > 1 and ranked[0][1] == ranked[1][1]):
+        return UNKNOWN
+    return ranked[0][0]
+
+
+class SelfConsistency(BaseMethod):
+    """
+    Majority vote over sampled runs of another method, stopping as soon as the vote is settled.
+
+    The base method's LLM calls sample at call_ollama's default temperature
+    (0.7), so repeated runs can disagree. Up to n_samples validations of the
+    base method run for a claim, at most parallel_samples at a time. Samples
+    that have not started are dropped once the majority can no longer change
+    or, with stop_margin set, as soon as the leading verdict is stop_margin
+    votes ahead (a sequential probability ratio test on the vote of two
+    verdicts). The votes go to ClaimResult.metadata, with the share of the
+    winning verdict as its confidence.
+    """
+
+    name = "self_consistency"
+
+    def __init__(self, config):
+        """
+        Config accepts everything the base method does, plus:
+        - base_method: str, name of the method to sample in experiments.grid.METHODS (default: "cot")
+        - n_samples: int, maximum samples per claim (default: 5)
+        - parallel_samples: int, samples of a claim in flight at once (default: 3)
+        - stop_margin: int, stop when the leader is this many votes ahead (default: None, only stop
+          when the majority is decided)
+        """
+        from experiments.grid import METHODS
+
+        super().__init__(config)
+        self.base_method = config.get("base_method", "cot")
+        if self.base_method not in METHODS or self.base_method == self.name:
+            raise ValueError(
+                f"Unknown base_method: {self.base_method}. Must be one of {sorted(METHODS)}"
+            )
+        self.n_samples = config.get("n_samples", 5)
+        self.parallel_samples = min(config.get("parallel_samples", 3), self.n_samples)
+        self.stop_margin = config.get("stop_margin")
+        self.inner = METHODS[self.base_method](config)
+        self.name = f"{self.base_method}_sc{self.n_samples}"
+        self._lock = threading.Lock()
+        self.claims = 0
+        self.samples_used = 0
+
+    def setup(self):
+        self.inner.setup()
+
+    def close(self) -> None:
+        self.inner.close()
+
+    def prepare(self, record: ClaimRecord) -> None:
+        self.inner.prepare(record)
+
+    def prepare_batch(self, records: List[ClaimRecord]) -> None:
+        self.inner.prepare_batch(records)
+
+    @property
+    def batches_prepare(self) -> bool:
+        return self.inner.batches_prepare
+
+    @property
+    def average_samples(self) -> float:
+        """Average number of samples actually used per claim so far."""
+        return self.samples_used / self.claims if self.claims else 0.0
+
+    def _settled(self, votes: Counter, remaining: int) -> bool:
+        if majority_decided(votes, remaining):
+            return True
+        if self.stop_margin is None:
+            return False
+        leader, runner_up = _ranked_counts(votes)[:2]
+        return leader - runner_up >= self.stop_margin
+
+    def validate_claim(self, record: ClaimRecord) -> ClaimResult:
+        start = time.perf_counter()
+        votes: Counter = Counter()
+        samples: List[ClaimResult] = []
+        launched = 0
+        # Samples run on pool threads; keep their spans under this claim's
+        run_sample = tracing.bind(self.inner.validate_claim)
+
+        with ThreadPoolExecutor(max_workers=self.parallel_samples) as executor:
+            pending = set()
+            while launched < self.n_samples and len(pending) < self.parallel_samples:
+                pending.add(executor.submit(run_sample, record))
+                launched += 1
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        sample = future.result()
+                    except Exception as e:
+                        sample = ClaimResult(
+                            claim_id=record.claim_id,
+                            claim=record.claim,
+                            verdict=UNKNOWN,
+                            method=self.inner.name,
+                            model=self.model,
+                            error=str(e),
+                        )
+                    samples.append(sample)
+                    votes[sample.verdict] += 1
+
+                remaining = self.n_samples - len(samples)
+                if self._settled(votes, remaining):
+                    # Running samples finish (and are counted) but no new ones start
+                    for future in pending:
+                        future.cancel()
+                    continue
+                while (
+                    launched < self.n_samples and len(pending) < self.parallel_samples
+                ):
+                    pending.add(executor.submit(run_sample, record))
+                    launched += 1
+
+        verdict = majority_verdict(votes)
+        representative = next(
+            (s for s in samples if s.verdict == verdict and s.error is None),
+            samples[0],
+        )
+        timings: Dict[str, float] = {}
+        for sample in samples:
+            for stage, seconds in sample.timings.items():
+                timings[f"{stage}_sum"] = timings.get(f"{stage}_sum", 0.0) + seconds
+        timings["sampling"] = time.perf_counter() - start
+
+        with self._lock:
+            self.claims += 1
+            self.samples_used += len(samples)
+
+        return ClaimResult(
+            claim_id=record.claim_id,
+            claim=record.claim,
+            verdict=verdict,
+            method=self.name,
+            model=self.model,
+            answer=representative.answer,
+            evidence_pmids=representative.evidence_pmids,
+            timings=timings,
+            prompt_tokens=sum(s.prompt_tokens for s in samples),
+            completion_tokens=sum(s.completion_tokens for s in samples),
+            error=representative.error if verdict == UNKNOWN else None,
+            metadata={
+                "samples": len(samples),
+                "votes": dict(votes),
+                "confidence": votes[verdict] / len(samples) if samples else 0.0,
+            },
+        )
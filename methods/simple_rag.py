@@ -1,30 +1,233 @@
-from typing import List
-from methods.base_method import BaseMethod
-from helpers.llm import setup_ollama_client, call_ollama
-from helpers.pubmed import set_api_key
+import time
+from dataclasses import asdict
+from typing import List, Sequence, Tuple
+from methods.base_method import BaseMethod, ClaimRecord, ClaimResult
+from methods.prompts import RAG_PROMPT
+from helpers import tracing
+from helpers.evidence import EvidenceExtractor, format_evidence
+from helpers.llm import setup_ollama_client, call_ollama, embed_texts
+from helpers.packing import KEYWORDS, PromptPacker
+from helpers.pubmed import PubMedPaper, get_papers, set_api_key
+from helpers.rag import (
+    RetrievalCache,
+    Uncached,
+    cache_key,
+    format_abstracts,
+    get_keywords,
+    retrieve_papers_with_fallback,
+)
 
 
 class SimpleRAG(BaseMethod):
+    name = "rag"
+
     def __init__(self, config):
         """
         Config should include:
         - model: str, the LLM model to use (default: "llama2")
+        - keyword_model: str, the LLM used to generate search keywords (default: "deepseek-r1:32b")
+        - n_keywords: int, number of search keywords per claim (default: 4)
+        - top_k: int, number of PubMed papers to retrieve per claim (default: 10)
+        - keyword_fallback: bool, top up AND-search results with an OR search of the keywords (default: True)
+        - keyword_pack_size: int, generate keywords for up to this many claims per prompt when
+          preparing a batch (default: None, one prompt per claim)
+        - retrieval_cache: RetrievalCache shared with other methods (default: a private in-memory cache)
+        - evidence_sentences: int, pass only this many best-matching sentences instead of whole abstracts (default: None)
+        - evidence_embedding_model: str, Ollama embedding model used to score sentences (default: None, lexical only)
         - llm_host: str, the host for the LLM server (default: "localhost")
         - llm_port: int, the port for the LLM server (default: 11434)
         """
         super().__init__(config)
         self.model = config.get("model", "llama2")  # use any of llama models
+        self.keyword_model = config.get("keyword_model", "deepseek-r1:32b")
+        self.n_keywords = config.get("n_keywords", 4)
+        self.top_k = config.get("top_k", 10)
+        self.keyword_fallback = config.get("keyword_fallback", True)
+        self.keyword_pack_size = config.get("keyword_pack_size")
+        self.retrieval_cache = config.get("retrieval_cache")
+        if self.retrieval_cache is None:
+            self.retrieval_cache = RetrievalCache()
         self.llm_host = config.get("llm_host", "localhost")
         self.llm_port = config.get("llm_port", 11434)
+        self.evidence_sentences = config.get("evidence_sentences")
+        self.evidence_embedding_model = config.get("evidence_embedding_model")
 
     def setup(self):
         self.llm = setup_ollama_client(self.llm_host, self.llm_port)
         set_api_key()  # Ensure PubMed API key is set
+        self.evidence_extractor = None
+        if self.evidence_sentences:
+            embed_fn = None
+            if self.evidence_embedding_model:
+                embed_fn = lambda texts: embed_texts(  # noqa: E731
+                    texts, model=self.evidence_embedding_model, client=self.llm
+                )
+            self.evidence_extractor = EvidenceExtractor(
+                embed_fn=embed_fn, top_sentences=self.evidence_sentences
+            )
+
+    def _keywords_key(self, claim: str) -> str:
+        return cache_key("keywords", claim, self.keyword_model, self.n_keywords)
+
+    def keywords(self, claim: str) -> str:
+        """
+        Search keywords for a claim (joined with ' AND '), going through the cache.
+
+        Empty keywords (an Ollama error or an unusable answer) are not cached.
+        """
+
+        def compute():
+            keywords = get_keywords(
+                claim,
+                n_keywords=self.n_keywords,
+                model=self.keyword_model,
+                client=self.llm,
+            )
+            return keywords if keywords else Uncached(keywords)
+
+        return self.retrieval_cache.get_or_compute(self._keywords_key(claim), compute)
+
+    def prepare_keywords(self, records: Sequence[ClaimRecord]) -> None:
+        """
+        Generate the missing keywords of several claims in packed prompts.
+
+        Does nothing unless keyword_pack_size is set. Claims the packed answer
+        misses are retried one by one by the packer.
+
+        Args:
+            records: Claims to generate keywords for
+        """
+        if not self.keyword_pack_size:
+            return
+        claims = list(
+            dict.fromkeys(
+                record.claim
+                for record in records
+                if self._keywords_key(record.claim) not in self.retrieval_cache
+            )
+        )
+        if not claims:
+            return
+        packer = PromptPacker(
+            KEYWORDS,
+            model=self.keyword_model,
+            client=self.llm,
+            max_pack_size=self.keyword_pack_size,
+            n_keywords=self.n_keywords,
+        )
+        for claim, keywords in zip(claims, packer.run(claims)):
+            if keywords:
+                self.retrieval_cache.set(self._keywords_key(claim), keywords)
+
+    def retrieve(self, record: ClaimRecord) -> Tuple[str, List[PubMedPaper]]:
+        """
+        Generate keywords and retrieve papers for a claim, going through the cache.
+
+        Retrievals without keywords or missing papers PubMed failed to return
+        are used for this call but not cached.
+
+        Args:
+            record: The claim
+
+        Returns:
+            Tuple of (keywords, retrieved papers)
+        """
+
+        def compute():
+            keywords = self.keywords(record.claim)
+            if not keywords:
+                return Uncached({"keywords": keywords, "papers": []})
+            failed = []
+            if self.keyword_fallback:
+                papers = retrieve_papers_with_fallback(
+                    keywords, top_k=self.top_k, failed=failed
+                )
+            else:
+                papers = get_papers(keywords, top_k=self.top_k, failed=failed)
+            entry = {"keywords": keywords, "papers": [asdict(p) for p in papers]}
+            return Uncached(entry) if failed else entry
+
+        parts = [
+            "pubmed",
+            record.claim,
+            self.keyword_model,
+            self.n_keywords,
+            self.top_k,
+        ]
+        if not self.keyword_fallback:
+            parts.append("and_only")
+        key = cache_key(*parts)
+        entry = self.retrieval_cache.get_or_compute(key, compute)
+        return entry["keywords"], [PubMedPaper(**p) for p in entry["papers"]]
+
+    def select_documents(
+        self, record: ClaimRecord, papers: List[PubMedPaper]
+    ) -> List[PubMedPaper]:
+        """Choose which retrieved papers go into the prompt (all of them here)."""
+        return papers
+
+    def format_documents(
+        self, record: ClaimRecord, papers: List[PubMedPaper]
+    ) -> Tuple[str, List[str]]:
+        """
+        Build the documents section of the prompt.
+
+        Args:
+            record: The claim
+            papers: The selected papers
+
+        Returns:
+            Tuple of (documents text, PMIDs it cites): whole abstracts, or only
+            the best-matching sentences if evidence_sentences is set
+        """
+        if self.evidence_extractor is None:
+            return format_abstracts(papers), [paper.pmid for paper in papers]
+        evidence = self.evidence_extractor.extract(
+            record.claim, [(paper.pmid, paper.abstract) for paper in papers]
+        )
+        return format_evidence(evidence), list(dict.fromkeys(e[0] for e in evidence))
+
+    def prepare(self, record: ClaimRecord) -> None:
+        self.select_documents(record, self.retrieve(record)[1])
+
+    @property
+    def batches_prepare(self) -> bool:
+        return bool(self.keyword_pack_size)
+
+    def prepare_batch(self, records: Sequence[ClaimRecord]) -> None:
+        self.prepare_keywords(records)
+        for record in records:
+            self.prepare(record)
+
+    def validate_claim(self, record: ClaimRecord) -> ClaimResult:
+        timings = {}
+
+        start = time.perf_counter()
+        with tracing.span("rag.retrieval") as span:
+            _, papers = self.retrieve(record)
+            span.set(pmids=[paper.pmid for paper in papers])
+        timings["retrieval"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with tracing.span("rag.selection") as span:
+            papers = self.select_documents(record, papers)
+            span.set(pmids=[paper.pmid for paper in papers])
+        timings["selection"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with tracing.span("rag.evidence"):
+            documents, pmids = self.format_documents(record, papers)
+        timings["evidence"] = time.perf_counter() - start
 
-    def validate_claims(self, claims: List[str]):
-        for claim in claims:
-            pass
+        start = time.perf_counter()
+        with tracing.span("rag.verification", model=self.model):
+            response = call_ollama(
+                model=self.model,
+                prompt=RAG_PROMPT.format(claim=record.claim, documents=documents),
+                client=self.llm,
+            )
+        timings["verification"] = time.perf_counter() - start
 
-    def evaluate_method(self, claims: List[str], ground_truth: List[str]):
-        # Implement evaluation logic specific to SimpleRAG
-        pass
+        return self.result_from_response(
+            record, response, evidence_pmids=pmids, timings=timings
+        )
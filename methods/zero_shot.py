@@ -0,0 +1,39 @@
+import time
+from methods.base_method import BaseMethod, ClaimRecord, ClaimResult
+from methods.prompts import COT_PROMPT, ZERO_SHOT_PROMPT
+from helpers.llm import setup_ollama_client, call_ollama
+
+
+class ZeroShot(BaseMethod):
+    name = "zero_shot"
+    prompt = ZERO_SHOT_PROMPT
+
+    def __init__(self, config):
+        """
+        Config should include:
+        - model: str, the LLM model to use (default: "llama2")
+        - llm_host: str, the host for the LLM server (default: "localhost")
+        - llm_port: int, the port for the LLM server (default: 11434)
+        """
+        super().__init__(config)
+        self.model = config.get("model", "llama2")
+        self.llm_host = config.get("llm_host", "localhost")
+        self.llm_port = config.get("llm_port", 11434)
+
+    def setup(self):
+        self.llm = setup_ollama_client(self.llm_host, self.llm_port)
+
+    def validate_claim(self, record: ClaimRecord) -> ClaimResult:
+        start = time.perf_counter()
+        response = call_ollama(
+            model=self.model,
+            prompt=self.prompt.format(claim=record.claim),
+            client=self.llm,
+        )
+        timings = {"verification": time.perf_counter() - start}
+        return self.result_from_response(record, response, timings=timings)
+
+
+class ChainOfThought(ZeroShot):
+    name = "cot"
+    prompt = COT_PROMPT
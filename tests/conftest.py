@@ -0,0 +1,32 @@
+import threading
+from typing import Callable, List
+
+import pytest
+
+
+class FakeOllama:
+    """Ollama client stand-in answering generate() with answer_fn(prompt)."""
+
+    def __init__(self, answer_fn: Callable[[str], str]):
+        self.answer_fn = answer_fn
+        self.prompts: List[str] = []
+        self.options: List[dict] = []
+        self._lock = threading.Lock()
+
+    def generate(self, model=None, prompt="", **kwargs):
+        with self._lock:
+            self.prompts.append(prompt)
+            self.options.append(kwargs.get("options") or {})
+        answer = self.answer_fn(prompt)
+        return {
+            "model": model,
+            "response": answer,
+            "done": True,
+            "prompt_eval_count": len(prompt.split()),
+            "eval_count": len(answer.split()),
+        }
+
+
+@pytest.fixture
+def fake_ollama():
+    return FakeOllama
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from methods.base_method import BaseMethod, ClaimRecord, ClaimResult
+
+
+class Echo(BaseMethod):
+    """Predicts SUPPORTED for claims mentioning 'prevents', else CONTRADICT."""
+
+    name = "echo"
+
+    def validate_claim(self, record: ClaimRecord) -> ClaimResult:
+        verdict = "SUPPORTED" if "prevents" in record.claim else "CONTRADICT"
+        return ClaimResult(
+            claim_id=record.claim_id,
+            claim=record.claim,
+            verdict=verdict,
+            method=self.name,
+        )
+
+
+CLAIMS = pd.DataFrame(
+    {
+        "id": [7, 8, 9],
+        "claim": ["Aspirin prevents stroke", "Statins cause diabetes", "X prevents Y"],
+        "label": ["SUPPORT", "CONTRADICT", "CONTRADICT"],
+        "evidence_label": ["SUPPORTED", "SUPPORTED", "CONTRADICT"],
+    }
+)
+
+
+def test_labels_come_from_dataframe_rows():
+    summary = Echo({}).evaluate_method(CLAIMS, report_every=0)
+    assert (summary["labeled"], summary["correct"]) == (3, 2)
+
+
+def test_label_key_and_dataset_are_passed_through():
+    results = []
+    summary = Echo({}).evaluate_method(
+        CLAIMS.to_dict(orient="records"),
+        report_every=0,
+        on_result=results.append,
+        label_key="evidence_label",
+        dataset="scifact_causal",
+    )
+    assert (summary["labeled"], summary["correct"]) == (3, 1)
+    assert [r.claim_id for r in results] == ["7", "8", "9"]
+    assert {r.dataset for r in results} == {"scifact_causal"}
+
+
+def test_ground_truth_overrides_record_labels():
+    summary = Echo({}).evaluate_method(
+        CLAIMS, ground_truth=["SUPPORTED", "CONTRADICT", "SUPPORTED"], report_every=0
+    )
+    assert summary["correct"] == 3
@@ -0,0 +1,72 @@
+import math
+from collections import Counter
+
+import numpy as np
+
+from helpers.bm25 import BM25Index, tokenize
+
+DOCS = {
+    "a": "IL-6 levels predict mortality in COVID-19 patients.",
+    "b": "Statins reduce cardiovascular mortality in adults.",
+    "c": "CD4+ T cells and TNF-α in chronic inflammation.",
+    "d": "Statin therapy and LDL cholesterol: a randomized trial of statins.",
+}
+
+
+def _reference_scores(query, k1=1.2, b=0.75):
+    docs = [tokenize(text) for text in DOCS.values()]
+    avgdl = sum(map(len, docs)) / len(docs)
+    scores = []
+    for tokens in docs:
+        tf = Counter(tokens)
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in d for d in docs)
+            if not tf[term]:
+                continue
+            idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5))
+            norm = k1 * (1 - b + b * len(tokens) / avgdl)
+            score += idf * tf[term] * (k1 + 1) / (tf[term] + norm)
+        scores.append(score)
+    return np.array(scores)
+
+
+def test_tokenize_keeps_biomedical_compounds():
+    assert tokenize("IL-6 levels predict COVID-19 outcomes") == [
+        "il-6",
+        "il",
+        "6",
+        "level",
+        "predict",
+        "covid-19",
+        "covid",
+        "19",
+        "outcome",
+    ]
+    assert "cd4+" in tokenize("CD4+ cells")
+    assert "tnf-alpha" in tokenize("TNF-α")
+
+
+def test_scores_match_reference_bm25():
+    index = BM25Index.build(list(DOCS), DOCS.values())
+    queries = ["statins reduce mortality", "IL-6 in COVID-19", "TNF-α inflammation"]
+    scores = index.score_batch(queries)
+    for row, query in zip(scores, queries):
+        np.testing.assert_allclose(row, _reference_scores(query), rtol=1e-5)
+
+
+def test_search_ranks_and_skips_unmatched_documents():
+    index = BM25Index.build(list(DOCS), DOCS.values())
+    ids, scores = index.search(["statins mortality", "unrelated words"], top_k=3)
+    assert ids[0][0] in ("b", "d") and set(ids[0]) <= {"a", "b", "d"}
+    assert scores[0] == sorted(scores[0], reverse=True)
+    assert ids[1] == [] and scores[1] == []
+
+
+def test_save_and_memory_mapped_load(tmp_path):
+    index = BM25Index.build(list(DOCS), DOCS.values())
+    index.save(tmp_path)
+    loaded = BM25Index.load(tmp_path)
+    assert isinstance(loaded.impacts, np.memmap)
+    assert loaded.search(["statins"], top_k=2) == index.search(["statins"], top_k=2)
+    assert loaded.metadata["n_docs"] == len(DOCS)
@@ -0,0 +1,136 @@
+import hashlib
+import io
+import json
+import re
+import tarfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dataloader.load_datasets import DOWNLOAD_CHUNK_SIZE, DatasetLoader
+
+PAYLOAD = bytes(range(256)) * 4096 * 4  # 4 MB, several download chunks
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves server.files with Range support; server.drop cuts the next response short."""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.headers.get("Range"))
+        body = server.files[self.path]
+        start = 0
+        match = re.match(r"bytes=(\d+)-", self.headers.get("Range") or "")
+        if match:
+            start = int(match.group(1))
+            if start >= len(body):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}"
+            )
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+        data = body[start:]
+        if server.drop:
+            server.drop -= 1
+            data = data[: len(data) // 3]
+        self.wfile.write(data)
+        self.wfile.flush()
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.files = {"/file.bin": PAYLOAD}
+    server.requests = []
+    server.drop = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_resumes_after_a_dropped_connection(server, tmp_path):
+    server.drop = 1
+    output = tmp_path / "file.bin"
+    DatasetLoader(str(tmp_path)).download_file(f"{server.url}/file.bin", output)
+    assert output.read_bytes() == PAYLOAD
+    assert server.requests[0] is None
+    # Whole chunks written before the drop are kept and resumed from
+    assert server.requests[1] == f"bytes={DOWNLOAD_CHUNK_SIZE}-"
+    assert not output.with_name("file.bin.part").exists()
+
+
+def test_resumes_an_existing_part_file(server, tmp_path):
+    output = tmp_path / "file.bin"
+    output.with_name("file.bin.part").write_bytes(PAYLOAD[:1000])
+    DatasetLoader(str(tmp_path)).download_file(
+        f"{server.url}/file.bin", output, sha256=hashlib.sha256(PAYLOAD).hexdigest()
+    )
+    assert output.read_bytes() == PAYLOAD
+    assert server.requests == ["bytes=1000-"]
+
+
+def test_checksum_mismatch_removes_the_download(server, tmp_path):
+    output = tmp_path / "file.bin"
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        DatasetLoader(str(tmp_path)).download_file(
+            f"{server.url}/file.bin", output, sha256="0" * 64
+        )
+    assert not output.exists()
+    assert not output.with_name("file.bin.part").exists()
+
+
+def test_first_download_records_the_hash_later_ones_verify_it(server, tmp_path):
+    loader = DatasetLoader(str(tmp_path))
+    url = f"{server.url}/file.bin"
+    output = tmp_path / "file.bin"
+    loader.download_file(url, output)
+    assert loader.known_sha256(url) == hashlib.sha256(PAYLOAD).hexdigest()
+    assert json.loads(loader.checksums_path.read_text()) == {
+        url: hashlib.sha256(PAYLOAD).hexdigest()
+    }
+
+    output.unlink()
+    server.files["/file.bin"] = PAYLOAD[::-1]
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        loader.download_file(url, output)
+    assert not output.exists()
+
+
+def _archive(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def test_streamed_archive_is_extracted_and_verified(server, tmp_path):
+    server.files["/data.tar.gz"] = _archive({"data/corpus.jsonl": b"{}\n"})
+    loader = DatasetLoader(str(tmp_path))
+    url = f"{server.url}/data.tar.gz"
+    extract_dir = tmp_path / "scifact"
+    loader.download_tar_gz(url, extract_dir)
+    assert (extract_dir / "data" / "corpus.jsonl").read_bytes() == b"{}\n"
+    assert loader.known_sha256(url) is not None
+
+    server.files["/data.tar.gz"] = _archive({"data/corpus.jsonl": b"[]\n"})
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        loader.download_tar_gz(url, extract_dir)
+    assert (extract_dir / "data" / "corpus.jsonl").read_bytes() == b"{}\n"
+    assert not (extract_dir / ".extracting").exists()
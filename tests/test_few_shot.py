@@ -0,0 +1,87 @@
+import json
+
+import numpy as np
+
+from helpers.dense_index import DenseIndex
+from helpers.rag import RetrievalCache
+from methods import few_shot
+from methods.base_method import ClaimRecord
+from methods.few_shot import FewShot, shared_demo_ids
+
+WORDS = ["aspirin", "stroke", "statin", "insulin", "vaccine", "smoking"]
+
+
+def _embed(texts):
+    # Bag of words over a tiny vocabulary, normalized
+    vectors = np.array(
+        [[text.lower().count(word) + 0.01 for word in WORDS] for text in texts],
+        dtype=np.float32,
+    )
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _build(index_dir, demos):
+    index = DenseIndex.build(
+        [demo["id"] for demo in demos], [demo["claim"] for demo in demos], _embed
+    )
+    index.metadata["shared_demo_ids"] = shared_demo_ids(
+        index, [demo["label"] for demo in demos]
+    )
+    index.save(str(index_dir))
+    with open(index_dir / "demos.jsonl", "w") as f:
+        for demo in demos:
+            f.write(json.dumps(demo) + "\n")
+
+
+def _method(index_dir, cache):
+    method = FewShot(
+        {
+            "model": "m",
+            "demo_index_dir": str(index_dir),
+            "n_demos": 2,
+            "n_shared_demos": 0,
+            "retrieval_cache": cache,
+        }
+    )
+    method.setup()
+    method.embed = _embed
+    return method
+
+
+def _demos(prefix):
+    return [
+        {"id": f"{prefix}{i}", "claim": f"{word} claim {i}", "label": label}
+        for i, (word, label) in enumerate(zip(WORDS, ["SUPPORTED", "CONTRADICT"] * 3))
+    ]
+
+
+def test_neighbours_skip_the_claim_itself(tmp_path):
+    _build(tmp_path, _demos("a"))
+    method = _method(tmp_path, RetrievalCache())
+    record = ClaimRecord(claim_id="1", claim="Aspirin claim 0")
+    ids = method.select_demos_batch([record])[0]
+    assert "a0" not in ids and len(ids) == 2
+    assert "Aspirin claim 0" in method.build_prompt(record, ids)
+
+
+def test_rebuilt_index_does_not_reuse_cached_demo_ids(tmp_path):
+    cache = RetrievalCache(str(tmp_path / "cache.jsonl"))
+    record = ClaimRecord(claim_id="1", claim="Aspirin prevents stroke")
+    index_dir = tmp_path / "index"
+    index_dir.mkdir()
+
+    _build(index_dir, _demos("a"))
+    first = _method(index_dir, cache).select_demos_batch([record])[0]
+    assert all(demo_id.startswith("a") for demo_id in first)
+
+    _build(index_dir, _demos("b"))
+    method = _method(index_dir, RetrievalCache(str(tmp_path / "cache.jsonl")))
+    second = method.select_demos_batch([record])[0]
+    assert all(demo_id.startswith("b") for demo_id in second)
+    method.build_prompt(record, second)
+
+
+def test_claims_are_normalized_for_self_matches():
+    assert few_shot._normalize_claim("  Aspirin  PREVENTS\nstroke ") == (
+        "aspirin prevents stroke"
+    )
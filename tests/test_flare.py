@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+from methods.base_method import ClaimRecord, ClaimResult
+from methods.flare import FLARE, flare_report, parse_confidence
+
+
+@pytest.mark.parametrize(
+    "answer, expected",
+    [
+        ("SUPPORTED. Confidence: 85", 0.85),
+        ("confidence level = 0.7", 0.7),
+        ("Confidence: 90%", 0.9),
+        ("Confidence: 150", 1.0),
+        ("SUPPORTED, no number given", None),
+    ],
+)
+def test_parse_confidence(answer, expected):
+    assert parse_confidence(answer) == expected
+
+
+@pytest.mark.parametrize(
+    "verdict, answer, retrieve",
+    [
+        ("SUPPORTED", "Verdict SUPPORTED. Confidence: 90", False),
+        ("SUPPORTED", "Verdict SUPPORTED. Confidence: 60", True),
+        ("SUPPORTED", "Verdict SUPPORTED", True),
+        ("UNKNOWN", "I cannot tell. Confidence: 95", True),
+        (
+            "SUPPORTED",
+            "SUPPORTED, but the evidence is mixed evidence. Confidence: 90",
+            True,
+        ),
+    ],
+)
+def test_needs_retrieval(verdict, answer, retrieve):
+    assert FLARE({}).needs_retrieval(verdict, answer) is retrieve
+    if "mixed" in answer:
+        lenient = FLARE({"retrieve_on_hedge": False})
+        assert lenient.needs_retrieval(verdict, answer) is False
+
+
+def test_confident_draft_keeps_the_gated_verdict(fake_ollama):
+    draft = (
+        "<think>I first thought the final answer: SUPPORTED, but wait.</think>\n"
+        "The evidence contradicts this. Verdict CONTRADICT. Confidence: 90"
+    )
+    method = FLARE({"model": "m"})
+    method.llm = fake_ollama(lambda prompt: draft)
+    result = method.validate_claim(ClaimRecord(claim_id="c/1", claim="A causes B."))
+    assert result.verdict == "CONTRADICT"
+    assert set(result.timings) == {"draft"}
+    assert len(method.llm.prompts) == 1
+
+
+def _result(claim_id, verdict, label, seconds, retrieved, method="flare"):
+    timings = {"total": seconds}
+    if retrieved:
+        timings["retrieval"] = seconds / 2
+    return ClaimResult(
+        claim_id=claim_id,
+        claim="claim",
+        verdict=verdict,
+        method=method,
+        model="m",
+        label=label,
+        timings=timings,
+    )
+
+
+def test_flare_report_against_rag():
+    flare = [
+        _result("c/1", "SUPPORTED", "SUPPORT", 1.0, retrieved=False),
+        _result("c/2", "CONTRADICT", "SUPPORT", 4.0, retrieved=True),
+        _result("c/3", "CONTRADICT", "CONTRADICT", 1.0, retrieved=False),
+    ]
+    rag = pd.DataFrame(
+        [
+            _result("c/1", "SUPPORTED", "SUPPORT", 4.0, True, "rag").__dict__,
+            _result("c/2", "SUPPORTED", "SUPPORT", 4.0, True, "rag").__dict__,
+        ]
+    )
+    report = flare_report(flare, rag)
+    assert report["claims"] == 3
+    assert report["retrieval_rate"] == pytest.approx(1 / 3)
+    assert report["flare_seconds"] == 6.0
+    assert report["accuracy"] == pytest.approx(2 / 3)
+    assert report["compared_claims"] == 2
+    assert report["flare_seconds_compared"] == 5.0
+    assert report["rag_seconds"] == 8.0
+    assert report["time_saved"] == 3.0
+    assert report["time_saved_fraction"] == pytest.approx(3 / 8)
+    assert report["rag_accuracy"] == 1.0
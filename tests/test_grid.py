@@ -0,0 +1,81 @@
+import pytest
+import yaml
+
+from experiments import run as run_cli
+from experiments.grid import build_method, expand_grid, load_grid
+from experiments.run_manager import RunManager
+
+
+def _grid(tmp_path, methods, **extra):
+    path = tmp_path / "grid.yaml"
+    grid = {
+        "name": "test",
+        "output_dir": str(tmp_path / "run"),
+        "models": ["m1", "m2"],
+        "methods": methods,
+        "datasets": ["scifact_causal", "healthver"],
+        **extra,
+    }
+    path.write_text(yaml.safe_dump(grid))
+    return str(path)
+
+
+def test_duplicate_method_entries_need_labels(tmp_path):
+    methods = [{"name": "rag", "top_k": 5}, {"name": "rag", "top_k": 10}]
+    with pytest.raises(ValueError, match="unique 'label'"):
+        load_grid(_grid(tmp_path, methods))
+
+    methods[1]["label"] = "rag_top10"
+    grid = load_grid(_grid(tmp_path, methods))
+    assert sorted({method for _, method, _ in expand_grid(grid)}) == [
+        "rag",
+        "rag_top10",
+    ]
+    instance = build_method(grid, grid["methods"][1], "m1")
+    assert (instance.name, instance.top_k) == ("rag_top10", 10)
+    assert "label" not in instance.config
+
+
+def test_jobs_use_the_stored_method_names(tmp_path):
+    grid = load_grid(
+        _grid(tmp_path, ["cot", {"name": "self_consistency", "n_samples": 3}])
+    )
+    assert [job for job in expand_grid(grid) if job[0] == "m1"] == [
+        ("m1", "cot", "scifact_causal"),
+        ("m1", "cot", "healthver"),
+        ("m1", "cot_sc3", "scifact_causal"),
+        ("m1", "cot_sc3", "healthver"),
+    ]
+    # Self-consistency over cot is stored apart from cot itself
+    load_grid(
+        _grid(tmp_path, ["cot", {"name": "self_consistency", "base_method": "cot"}])
+    )
+
+
+def test_dry_run_counts_per_dataset_and_worker(tmp_path, capsys):
+    path = _grid(tmp_path, ["cot", {"name": "self_consistency", "n_samples": 3}])
+    run = RunManager(str(tmp_path / "run"))
+    claim_ids = [f"scifact_causal/{i}" for i in range(6)] + ["healthver/test/1"]
+    for claim_id in claim_ids:
+        run.record({"model": "m1", "method": "cot_sc3", "claim_id": claim_id})
+    run.record({"model": "m1", "method": "cot", "claim_id": "healthver/test/2"})
+
+    def counts(*argv):
+        run_cli.main([path, "--dry-run", *argv])
+        lines = capsys.readouterr().out.splitlines()
+        return {
+            tuple(line.split()[:3]): int(line.split("done: ")[1])
+            for line in lines
+            if "done: " in line
+        }
+
+    done = counts()
+    assert done[("m1", "cot_sc3", "scifact_causal")] == 6
+    assert done[("m1", "cot_sc3", "healthver")] == 1
+    assert done[("m1", "cot", "healthver")] == 1
+    assert done[("m1", "cot", "scifact_causal")] == 0
+
+    workers = [counts("--worker-index", str(i), "--num-workers", "2") for i in (0, 1)]
+    key = ("m1", "cot_sc3", "scifact_causal")
+    assert workers[0][key] + workers[1][key] == 6
+    assert 0 < workers[0][key] < 6
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from helpers.hybrid import HybridRetriever, RetrievalSource, reciprocal_rank_fusion
+from methods.hybrid_rag import HybridRAG
+
+
+def test_rrf_scores_and_order():
+    fused = reciprocal_rank_fusion({"bm25": ["1", "2"], "dense": ["2", "3"]})
+    assert [doc_id for doc_id, _ in fused] == ["2", "1", "3"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+    assert fused[1][1] == pytest.approx(1 / 61)
+
+
+def test_rrf_weights_and_duplicates():
+    fused = dict(
+        reciprocal_rank_fusion(
+            {"a": ["1", "1", "2"], "b": ["2"]}, k=0, weights={"b": 3.0}
+        )
+    )
+    # A duplicate only counts at its best rank; "2" is third in a, first in b
+    assert fused == {"1": pytest.approx(1.0), "2": pytest.approx(1 / 3 + 3.0)}
+
+
+def test_sources_past_their_budget_are_left_out():
+    def slow(query, top_k):
+        time.sleep(0.5)
+        return ["slow"]
+
+    def broken(query, top_k):
+        raise RuntimeError("index missing")
+
+    retriever = HybridRetriever(
+        [
+            RetrievalSource("fast", lambda query, top_k: ["1", "2"], budget=1.0),
+            RetrievalSource("slow", slow, budget=0.05),
+            RetrievalSource("broken", broken),
+        ]
+    )
+    start = time.perf_counter()
+    fused, report = retriever.search("claim", top_k=5)
+    assert time.perf_counter() - start < 0.4
+    assert [doc_id for doc_id, _ in fused] == ["1", "2"]
+    assert report["fast"]["status"] == "ok" and report["fast"]["n_results"] == 2
+    assert report["slow"]["status"] == "timeout"
+    assert report["broken"] == {
+        "status": "error",
+        "latency": report["broken"]["latency"],
+        "n_results": 0,
+        "error": "index missing",
+    }
+    retriever.close()
+
+
+def test_sources_search_their_own_query():
+    seen = {}
+
+    def search(name):
+        def fn(query, top_k):
+            seen[name] = (query, top_k)
+            return []
+
+        return fn
+
+    retriever = HybridRetriever(
+        [
+            RetrievalSource("pubmed", search("pubmed")),
+            RetrievalSource("bm25", search("bm25")),
+        ]
+    )
+    retriever.search("claim", top_k=3, queries={"pubmed": "a OR b"})
+    assert seen == {"pubmed": ("a OR b", 6), "bm25": ("claim", 6)}
+    retriever.close()
+
+
+def test_hybrid_rag_rejects_mixed_id_spaces(tmp_path):
+    scifact_index = tmp_path / "scifact"
+    scifact_index.mkdir()
+    method = HybridRAG(
+        {"sources": ["pubmed", "bm25"], "bm25_index_dir": str(scifact_index)}
+    )
+    assert method.id_space("pubmed") == "pmid"
+    assert method.id_space("bm25") == "scifact"
+    with pytest.raises(ValueError, match="id spaces"):
+        method.setup()
+
+    (scifact_index / "papers.jsonl").touch()
+    assert method.id_space("bm25") == "pmid"
+
+
+def test_close_shuts_the_source_pool_down():
+    method = HybridRAG({"sources": ["pubmed"]})
+    method.close()  # nothing set up yet
+    method.setup()
+    executor = method.retriever._executor
+    method.close()
+    assert executor._shutdown
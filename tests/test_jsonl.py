@@ -0,0 +1,44 @@
+import json
+import pickle
+
+import pytest
+
+from dataloader.jsonl import JsonlRecords
+
+DOCS = [{"doc_id": 4983, "title": "a"}, {"doc_id": 5, "title": "b"}]
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    path.write_text("\n".join(json.dumps(doc) for doc in DOCS) + "\n\n")
+    return path
+
+
+def test_sequence_behaviour(path):
+    records = JsonlRecords(path, key="doc_id")
+    assert len(records) == 2
+    assert records[-1] == DOCS[1] and records[:] == DOCS and list(records) == DOCS
+    with pytest.raises(IndexError):
+        records[2]
+
+
+def test_membership_tests_keys_like_a_dict(path):
+    records = JsonlRecords(path, key="doc_id")
+    assert 4983 in records and "5" in records
+    assert 7 not in records and DOCS[0] not in records
+    assert records.get(5) == DOCS[1] and records.get(7, "x") == "x"
+
+
+def test_membership_without_key_tests_records(path):
+    records = JsonlRecords(path)
+    assert DOCS[0] in records and 4983 not in records
+
+
+def test_index_is_reused_and_rebuilt_on_change(path):
+    JsonlRecords(path, key="doc_id")
+    assert path.with_name(path.name + ".offsets.json").exists()
+    with open(path, "a") as f:
+        f.write(json.dumps({"doc_id": 9, "title": "c"}) + "\n")
+    records = pickle.loads(pickle.dumps(JsonlRecords(path, key="doc_id")))
+    assert len(records) == 3 and 9 in records and records[2]["title"] == "c"
@@ -0,0 +1,69 @@
+import re
+
+import pytest
+
+from helpers.listwise import ListwiseReranker, tournament_calls, window_starts
+from helpers.rag import DOCUMENT_SEPARATOR
+
+_ITEM_RE = re.compile(r"^(\d+)\. .*?relevance (\d+)", re.MULTILINE)
+
+
+def _ranker(prompt):
+    """Answer with the numbers of the most relevant listed abstracts."""
+    top_k = int(re.search(r"select the top (\d+)", prompt).group(1))
+    items = sorted(_ITEM_RE.findall(prompt), key=lambda item: -int(item[1]))
+    return ",".join(number for number, _ in items[:top_k])
+
+
+def _abstracts(relevances):
+    return DOCUMENT_SEPARATOR.join(
+        f"[PMID: {1000 + i}] Abstract with relevance {r}."
+        for i, r in enumerate(relevances)
+    )
+
+
+def test_window_starts_cover_the_pool():
+    assert window_starts(8, 10, 5) == [0]
+    assert window_starts(40, 10, 5) == [0, 5, 10, 15, 20, 25, 30]
+    assert window_starts(23, 10, 5) == [0, 5, 10, 13]
+
+
+def test_tournament_call_bound():
+    assert tournament_calls(0, 10, 5, 3) == 0
+    assert tournament_calls(10, 10, 5, 3) == 1
+    assert tournament_calls(40, 10, 5, 3) == 14
+
+
+def test_tournament_finds_the_global_top_k(fake_ollama):
+    relevances = [(i * 37) % 40 for i in range(40)]
+    client = fake_ollama(_ranker)
+    reranker = ListwiseReranker(client=client)
+    pmids, text = reranker.rerank("claim", _abstracts(relevances), top_k=3)
+
+    best = sorted(range(40), key=lambda i: -relevances[i])[:3]
+    assert pmids == [str(1000 + i) for i in best]
+    assert text.count("[PMID:") == 3
+    assert reranker.stats["llm_calls"] == len(client.prompts) <= 14
+    assert all(prompt.count("relevance") <= 10 for prompt in client.prompts)
+
+
+def test_budget_trims_the_pool_in_input_order(fake_ollama):
+    client = fake_ollama(_ranker)
+    reranker = ListwiseReranker(client=client, max_llm_calls=5)
+    relevances = list(range(40))  # the best documents come last
+    reranker.rerank("claim", _abstracts(relevances), top_k=3)
+    assert reranker.stats["llm_calls"] <= 5
+    shown = {int(r) for p in client.prompts for _, r in _ITEM_RE.findall(p)}
+    assert max(shown) < 39
+
+
+def test_short_answers_are_filled_in_input_order(fake_ollama):
+    reranker = ListwiseReranker(client=fake_ollama(lambda prompt: "2"))
+    assert reranker.rank("claim", ["a", "b", "c", "d"], top_k=3) == [1, 0, 2]
+
+
+def test_invalid_windows_are_rejected():
+    with pytest.raises(ValueError):
+        ListwiseReranker(window_size=5, stride=6)
+    with pytest.raises(ValueError):
+        ListwiseReranker(stride=5, advance=5)
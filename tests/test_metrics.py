@@ -0,0 +1,125 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from evaluation.metrics import METRICS, GroupedMetrics, RunningMetrics
+
+
+def _metrics(pairs):
+    metrics = RunningMetrics()
+    for prediction, label, count in pairs:
+        metrics.update(prediction, label, count)
+    return metrics
+
+
+PAIRS = [
+    ("SUPPORTED", "SUPPORT", 40),
+    ("CONTRADICT", "SUPPORT", 10),
+    ("CONTRADICT", "REFUTES", 30),
+    ("UNKNOWN", "CONTRADICT", 10),
+    ("SUPPORTED", None, 10),
+]
+
+
+def test_summary():
+    summary = _metrics(PAIRS).summary()
+    assert (summary["total"], summary["labeled"], summary["correct"]) == (100, 90, 70)
+    assert summary["accuracy"] == pytest.approx(70 / 90)
+    assert summary["accuracy_excluding_unknown"] == pytest.approx(70 / 80)
+    assert summary["unknown_rate"] == pytest.approx(10 / 100)
+    f1_supported = 2 * 40 / (40 + 50)
+    f1_contradict = 2 * 30 / (40 + 40)
+    assert summary["macro_f1"] == pytest.approx((f1_supported + f1_contradict) / 2)
+
+
+def test_intervals_contain_the_estimate_and_narrow_with_more_data():
+    small = _metrics(PAIRS)
+    large = _metrics([(p, l, n * 100) for p, l, n in PAIRS])
+    small_ci = small.confidence_intervals(n_boot=2000)
+    large_ci = large.confidence_intervals(n_boot=2000)
+    summary = small.summary()
+    for metric in METRICS:
+        low, high = small_ci[metric]
+        assert low <= summary[metric] <= high
+        assert large_ci[metric][1] - large_ci[metric][0] < high - low
+    assert large_ci["accuracy"][0] == pytest.approx(70 / 90, abs=0.02)
+
+
+def test_intervals_match_a_per_result_bootstrap():
+    # Resampling the confusion cells must agree with resampling the results themselves
+    metrics = _metrics(PAIRS)
+    correct = np.array([1] * 70 + [0] * 20 + [np.nan] * 10)
+    rng = np.random.default_rng(1)
+    draws = rng.choice(correct, size=(4000, len(correct)))
+    reference = np.percentile(np.nanmean(draws, axis=1), [2.5, 97.5])
+    low, high = metrics.confidence_intervals(n_boot=4000)["accuracy"]
+    assert low == pytest.approx(reference[0], abs=0.02)
+    assert high == pytest.approx(reference[1], abs=0.02)
+
+
+def test_intervals_are_seeded_and_validated():
+    metrics = _metrics(PAIRS)
+    assert metrics.confidence_intervals(seed=3) == metrics.confidence_intervals(seed=3)
+    assert RunningMetrics().confidence_intervals()["accuracy"] == (0.0, 0.0)
+    with pytest.raises(ValueError):
+        metrics.confidence_intervals(confidence=1.0)
+
+
+def test_grouped_frame_matches_per_result_adds():
+    df = pd.DataFrame(
+        {
+            "model": ["a", "a", "b", "b", "b"],
+            "method": "zero_shot",
+            "dataset": "scifact",
+            "verdict": ["SUPPORTED", None, "CONTRADICT", "SUPPORTED", "CONTRADICT"],
+            "label": ["SUPPORTED", "SUPPORTED", "CONTRADICT", "REFUTES", None],
+        }
+    )
+    bulk, single = GroupedMetrics(), GroupedMetrics()
+    bulk.add_frame(df)
+    single.add_results(df.to_dict(orient="records"))
+    pd.testing.assert_frame_equal(bulk.summary(), single.summary())
+    assert "[b|zero_shot|scifact] 3 claims" in bulk.describe(
+        ("b", "zero_shot", "scifact")
+    )
+
+
+def test_reads_while_results_are_added():
+    metrics = GroupedMetrics()
+    done = threading.Event()
+    errors = []
+
+    def add(model):
+        for i in range(3000):
+            metrics.add(
+                {
+                    "model": model,
+                    "verdict": ["SUPPORTED", "CONTRADICT", "UNKNOWN", "OTHER"][i % 4],
+                    "label": ["SUPPORTED", "CONTRADICT", None][i % 3],
+                }
+            )
+
+    def read():
+        while not done.is_set():
+            try:
+                metrics.rows(n_boot=10)
+                for group in list(metrics.groups):
+                    metrics.describe(group)
+                    metrics.groups[group].matrix()
+            except Exception as e:  # pragma: no cover - the failure being tested
+                errors.append(e)
+                return
+
+    writers = [threading.Thread(target=add, args=(m,)) for m in "abcd"]
+    reader = threading.Thread(target=read)
+    reader.start()
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    done.set()
+    reader.join()
+    assert not errors
+    assert sum(row["total"] for row in metrics.rows(confidence=None)) == 12000
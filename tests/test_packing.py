@@ -0,0 +1,126 @@
+import re
+
+from evaluation.verdicts import UNKNOWN
+from helpers import tracing
+from helpers.packing import (
+    CAUSAL,
+    KEYWORDS,
+    VERIFY,
+    PromptPacker,
+    build_packed_prompt,
+    parse_packed_output,
+)
+from helpers.rag import get_keywords
+
+CLAIMS = [f"claim number {i}" for i in range(10)]
+
+
+def _keywords_answer(prompt):
+    ids = re.findall(r"^(C\d+) \|", prompt, re.MULTILINE)
+    if ids:
+        return "\n".join(f"{claim_id} | a, b, c, d, e" for claim_id in ids)
+    return "<think>hmm</think> a, b, c, d, e"
+
+
+def test_parse_packed_output():
+    output = "<think>C9 | x</think>\nC1 | aspirin, stroke\n- C2: \nC3 | risk\nC7 | far"
+    assert parse_packed_output(KEYWORDS, output, 3, n_keywords=1) == {
+        0: "aspirin",
+        2: "risk",
+    }
+    assert parse_packed_output(VERIFY, "C1 | SUPPORTED\nC2 | maybe", 2) == {
+        0: "SUPPORTED"
+    }
+    assert parse_packed_output(CAUSAL, "C1 | yes.\nC2 | No", 2) == {0: "Yes", 1: "No"}
+
+
+def test_packed_keywords_match_the_per_claim_path(fake_ollama):
+    client = fake_ollama(_keywords_answer)
+    packer = PromptPacker(KEYWORDS, model="m", client=client, max_pack_size=4)
+    single = get_keywords("claim", model="m", client=client)
+    assert packer.run(CLAIMS) == [single] * len(CLAIMS)
+    assert packer.stats["packs"] == 3 and packer.stats["single_calls"] == 0
+
+
+def test_pack_size_one_counts_tokens(fake_ollama):
+    client = fake_ollama(_keywords_answer)
+    packer = PromptPacker(KEYWORDS, model="m", client=client, max_pack_size=1)
+    assert packer.run(CLAIMS[:3]) == ["a AND b AND c AND d"] * 3
+    assert packer.stats["single_calls"] == 3
+    assert packer.stats["prompt_tokens"] > 0
+    assert packer.stats["completion_tokens"] == 3 * 6
+
+
+def test_missing_claims_are_retried_and_the_pack_size_recovers(fake_ollama):
+    def answer(prompt):
+        ids = re.findall(r"^(C\d+) \|", prompt, re.MULTILINE)
+        if ids:
+            return f"{ids[0]} | SUPPORTED"  # every other line is lost
+        return "The claim is CONTRADICT"
+
+    packer = PromptPacker(
+        VERIFY, model="m", client=fake_ollama(answer), max_pack_size=4
+    )
+    answers = packer.run(CLAIMS)
+    assert UNKNOWN not in answers
+    assert answers[0] == "SUPPORTED" and answers.count("CONTRADICT") > 0
+    assert packer.stats["failed_packs"] >= 1
+    assert packer.stats["single_calls"] >= 1
+
+
+def test_context_budget_shrinks_packs(fake_ollama):
+    packer = PromptPacker(
+        KEYWORDS,
+        model="m",
+        client=fake_ollama(_keywords_answer),
+        max_pack_size=8,
+        context_tokens=300,
+        reasoning_tokens=0,
+    )
+    packer.run(CLAIMS)
+    for prompt in packer.client.prompts:
+        if "Claims:" in prompt:
+            claims = prompt.split("Claims:\n")[1].split("\n\n")[0].splitlines()
+            assert packer.fits([line.split(" | ", 1)[1] for line in claims])
+    assert build_packed_prompt(KEYWORDS, CLAIMS[:2]).count(" | claim") == 2
+
+
+def test_requests_carry_the_context_budget(fake_ollama):
+    client = fake_ollama(_keywords_answer)
+    packer = PromptPacker(
+        KEYWORDS,
+        model="m",
+        client=client,
+        max_pack_size=4,
+        context_tokens=8192,
+        reasoning_tokens=500,
+        output_tokens_per_claim=30,
+    )
+    packer.run(CLAIMS[:4])
+    packer.run_single(CLAIMS[0])
+    assert client.options == [
+        {"temperature": 0.7, "num_ctx": 8192, "num_predict": 500 + 30 * 4},
+        {"temperature": 0.7, "num_ctx": 8192},
+    ]
+
+
+def test_pool_spans_nest_under_the_caller(fake_ollama, tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracing.start_tracing(str(path))
+    try:
+        packer = PromptPacker(
+            KEYWORDS,
+            model="m",
+            client=fake_ollama(_keywords_answer),
+            max_pack_size=2,
+            parallel_requests=3,
+        )
+        with tracing.span("claims"):
+            packer.run(CLAIMS[:6])
+    finally:
+        tracing.stop_tracing()
+    spans = tracing.load_spans(str(path))
+    (root,) = [s for s in spans if s["name"] == "claims"]
+    calls = [s for s in spans if s["name"] == "llm.generate"]
+    assert len(calls) == 3
+    assert all(s["parent_id"] == root["span_id"] for s in calls)
@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from helpers.rag import DOCUMENT_SEPARATOR
+from helpers.rerank import CheapReranker
+
+
+class CountingEmbedder:
+    """Embeds a text as a one-hot vector of its length and counts the texts it sees."""
+
+    def __init__(self):
+        self.embedded = []
+
+    def __call__(self, texts):
+        self.embedded.extend(texts)
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vectors[row, len(text) % 64] = 1.0
+        return vectors
+
+
+def _abstracts(n, prefix="a"):
+    return DOCUMENT_SEPARATOR.join(f"[PMID: {i}] {prefix} {'x' * i}" for i in range(n))
+
+
+def test_embedding_cache_is_bounded_and_reused():
+    embed = CountingEmbedder()
+    reranker = CheapReranker(embed_fn=embed, max_cached_embeddings=6)
+    reranker.rerank("claim", _abstracts(5), top_k=2)
+    assert len(embed.embedded) == 6
+    reranker.rerank("claim", _abstracts(5), top_k=2)
+    assert len(embed.embedded) == 6  # all cached
+
+    reranker.rerank("other claim", _abstracts(5, prefix="b"), top_k=2)
+    assert len(reranker._embeddings) == 6
+    reranker.rerank("claim", _abstracts(5), top_k=2)
+    assert len(embed.embedded) == 18  # evicted, embedded again
+
+
+def test_more_texts_than_the_cache_holds():
+    embed = CountingEmbedder()
+    reranker = CheapReranker(embed_fn=embed, max_cached_embeddings=2)
+    pmids, _ = reranker.rerank("claim", _abstracts(8), top_k=3)
+    assert len(pmids) == 3
+    assert len(reranker._embeddings) == 2
+
+
+def test_call_counters_are_thread_safe():
+    reranker = CheapReranker(embed_fn=CountingEmbedder())
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: reranker.rerank(f"c{i}", _abstracts(4)), range(200)))
+    assert reranker.calls == 200
@@ -0,0 +1,125 @@
+import json
+
+import pandas as pd
+import pytest
+
+from experiments.results_store import COMPRESS_MIN_CHARS, ResultsStore
+
+LONG_ANSWER = "<think>" + "weighing the evidence " * 40 + "</think>\nCONTRADICT"
+DOCUMENTS = "[PMID: 1] " + "abstract text " * 50
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(tmp_path / "results.sqlite")
+    yield store
+    store.close()
+
+
+def _csv_rows():
+    # One document set and claim shared by two models, as in rag_results.csv
+    base = {
+        "claim": "Aspirin prevents stroke",
+        "label": "SUPPORTED",
+        "keywords": "aspirin AND stroke",
+        "num_papers": 1,
+        "documents": DOCUMENTS,
+    }
+    return [
+        {**base, "model": "mistral:7b", "method": "rag", "answer": "SUPPORTED."},
+        {**base, "model": "deepseek-r1:32b", "method": "rag", "answer": LONG_ANSWER},
+        {
+            "claim": "Statins cause diabetes",
+            "label": "CONTRADICT",
+            "model": "mistral:7b",
+            "method": "rag",
+            "answer": "NAN",
+            "keywords": "statins AND diabetes",
+            "num_papers": 0,
+            "documents": "",
+        },
+    ]
+
+
+def test_csv_round_trip(store, tmp_path):
+    path = tmp_path / "rag_results.csv"
+    pd.DataFrame(_csv_rows()).to_csv(path, index=False)
+    assert store.import_file(path) == 3
+    assert store.import_file(path) == 0  # re-importing is a no-op
+
+    df = store.load(documents=True)
+    assert df["answer"].tolist() == ["SUPPORTED.", LONG_ANSWER, "NAN"]
+    assert df["dataset"].unique().tolist() == ["scifact_causal"]
+    assert df["documents"].iloc[0] == DOCUMENTS
+    assert df["keywords"].iloc[1] == "aspirin AND stroke"
+    assert pd.isna(df["document_set_id"].iloc[2])
+
+    stats = store.stats()
+    assert (stats["claims"], stats["document_sets"], stats["answers"]) == (2, 1, 3)
+    assert stats["jobs"] == {"mistral:7b|rag": 2, "deepseek-r1:32b|rag": 1}
+    assert store.load(models=["deepseek-r1:32b"])["claim"].tolist() == [
+        "Aspirin prevents stroke"
+    ]
+
+
+def test_long_texts_are_compressed(store):
+    store.add_rows(_csv_rows(), dataset="scifact_causal")
+    raw = store._conn.execute("SELECT answer FROM answers ORDER BY id").fetchall()
+    assert isinstance(raw[1][0], bytes) and len(LONG_ANSWER) >= COMPRESS_MIN_CHARS
+    assert raw[0][0] == "SUPPORTED."
+    content = store._conn.execute("SELECT content FROM document_sets").fetchone()[0]
+    assert isinstance(content, bytes)
+
+
+def test_jsonl_round_trip_skips_retryable_and_partial_lines(store, tmp_path):
+    rows = [
+        {
+            "claim_id": "12",
+            "claim": "Aspirin prevents stroke",
+            "dataset": "scifact",
+            "label": "SUPPORT",
+            "model": "m",
+            "method": "hybrid_rag",
+            "verdict": "SUPPORTED",
+            "answer": "SUPPORTED",
+            "prompt_tokens": 100,
+            "completion_tokens": 3,
+            "evidence_pmids": ["1", "2"],
+            "timings": {"verification": 1.5},
+        },
+        {
+            "claim_id": "13",
+            "claim": "Statins cause diabetes",
+            "dataset": "scifact",
+            "model": "m",
+            "method": "hybrid_rag",
+            "answer": "NAN",
+            "error": "Ollama error: timeout",
+            "retryable": True,
+        },
+    ]
+    path = tmp_path / "results.jsonl"
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows) + '{"claim')
+    assert store.import_file(path, dataset=None) == 1
+
+    df = store.load(documents=True)
+    row = df.iloc[0]
+    assert (row["dataset"], row["source_id"], row["label"]) == (
+        "scifact",
+        "12",
+        "SUPPORT",
+    )
+    assert row["verdict"] == "SUPPORTED" and json.loads(row["paper_ids"]) == ["1", "2"]
+    extra = store._conn.execute("SELECT extra, prompt_tokens FROM answers").fetchone()
+    assert (
+        json.loads(extra[0]) == {"timings": {"verification": 1.5}} and extra[1] == 100
+    )
+
+
+def test_failed_transaction_rolls_back(store):
+    rows = _csv_rows()
+    with pytest.raises(ValueError):
+        store.add_rows(rows[:2] + [{"model": "m", "method": "rag"}])
+    assert len(store) == 0
+    assert store.add_rows(rows) == 3
+    assert store.stats()["claims"] == 2
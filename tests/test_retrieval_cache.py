@@ -0,0 +1,143 @@
+import threading
+import time
+
+from helpers import pubmed
+from helpers.pubmed import RateLimiter
+from helpers.rag import RetrievalCache, Uncached
+from methods import simple_rag
+from methods.base_method import ClaimRecord
+from methods.simple_rag import SimpleRAG
+
+
+def test_cache_persists_and_reloads(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    cache = RetrievalCache(str(path))
+    assert cache.get_or_compute("k", lambda: {"papers": [1, 2]}) == {"papers": [1, 2]}
+    with open(path, "a") as f:
+        f.write('{"key": "partial"')
+
+    reloaded = RetrievalCache(str(path))
+    assert reloaded.get("k") == {"papers": [1, 2]}
+    assert "partial" not in reloaded
+
+
+def test_uncached_values_are_returned_but_not_stored(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    cache = RetrievalCache(str(path))
+    assert cache.get_or_compute("k", lambda: Uncached("")) == ""
+    assert "k" not in cache
+    assert not path.exists()
+    assert cache.get_or_compute("k", lambda: "a AND b") == "a AND b"
+    assert RetrievalCache(str(path)).get("k") == "a AND b"
+
+
+def test_concurrent_callers_share_one_computation():
+    cache = RetrievalCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    threads = [
+        threading.Thread(target=cache.get_or_compute, args=("k", compute))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (7, 1)
+
+
+def test_misses_are_counted_on_lookup():
+    cache = RetrievalCache()
+    cache.get_or_compute("k", lambda: Uncached(""))
+    cache.get_or_compute("k", lambda: Uncached(""))
+    assert (cache.hits, cache.misses) == (0, 2)
+    cache.set("k", "a AND b")  # e.g. packed keywords
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert cache.get("k") == "a AND b" and cache.get("other") is None
+    assert cache.get_or_compute("k", lambda: "unused") == "a AND b"
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_failed_computation_releases_the_key():
+    cache = RetrievalCache()
+
+    def fail():
+        raise RuntimeError("PubMed is down")
+
+    try:
+        cache.get_or_compute("k", fail)
+    except RuntimeError:
+        pass
+    assert cache.get_or_compute("k", lambda: "ok") == "ok"
+
+
+def test_rate_limiter_spaces_threads():
+    limiter = RateLimiter(rate=50.0)
+    start = time.monotonic()
+    threads = [threading.Thread(target=limiter.acquire) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for _ in range(6):
+        limiter.acquire()
+    # The first request is free, the other nine wait 20 ms each
+    assert time.monotonic() - start >= 9 / 50.0 - 0.01
+
+
+def test_rate_limiter_defaults_to_ncbi_limits(monkeypatch):
+    limiter = RateLimiter()
+    monkeypatch.setattr(pubmed.Entrez, "api_key", None)
+    assert limiter.current_rate == 3.0
+    monkeypatch.setattr(pubmed.Entrez, "api_key", "key")
+    assert limiter.current_rate == 10.0
+
+
+def test_fetch_papers_reports_failures(monkeypatch):
+    def fetch(pmid, check_pmc=True):
+        if pmid == "2":
+            raise Exception("HTTP 429")
+        return pmid
+
+    monkeypatch.setattr(pubmed, "fetch_paper_details", fetch)
+    failed = []
+    assert pubmed.fetch_papers(["1", "2", "3"], failed=failed) == ["1", "3"]
+    assert failed == ["2"]
+
+
+def _rag(monkeypatch, keywords, papers, lost=()):
+    def retrieve(keywords, top_k=10, failed=None):
+        failed.extend(lost)
+        return list(papers)
+
+    monkeypatch.setattr(simple_rag, "get_keywords", lambda claim, **kw: keywords)
+    monkeypatch.setattr(simple_rag, "retrieve_papers_with_fallback", retrieve)
+    rag = SimpleRAG({"model": "m"})
+    rag.llm = None
+    return rag
+
+
+def test_failed_keywords_are_not_cached(monkeypatch):
+    rag = _rag(monkeypatch, "", [])
+    record = ClaimRecord(claim_id="1", claim="Statins reduce mortality.")
+    assert rag.retrieve(record) == ("", [])
+    assert len(rag.retrieval_cache) == 0
+
+
+def test_retrievals_with_lost_papers_are_not_cached(monkeypatch):
+    paper = pubmed.PubMedPaper("1", "t", "a", ["x"], "j", "2020")
+    record = ClaimRecord(claim_id="1", claim="Statins reduce mortality.")
+
+    rag = _rag(monkeypatch, "statins AND mortality", [paper], lost=["2"])
+    assert rag.retrieve(record)[1] == [paper]
+    assert len(rag.retrieval_cache) == 1  # only the keywords
+
+    rag = _rag(monkeypatch, "statins AND mortality", [paper])
+    rag.retrieve(record)
+    assert len(rag.retrieval_cache) == 2
@@ -0,0 +1,103 @@
+from experiments.run_manager import RunManager, is_retryable
+from methods.base_method import BaseMethod, ClaimResult
+
+
+def _row(claim_id, answer="SUPPORTED", **extra):
+    return {
+        "model": "m",
+        "method": "rag",
+        "claim_id": claim_id,
+        "answer": answer,
+        **extra,
+    }
+
+
+class EchoMethod(BaseMethod):
+    name = "echo"
+
+    def __init__(self, fail=()):
+        super().__init__({"model": "m"})
+        self.fail = set(fail)
+        self.calls = []
+
+    def setup(self):
+        pass
+
+    def validate_claim(self, record):
+        self.calls.append(record.claim_id)
+        if record.claim_id in self.fail:
+            raise RuntimeError("ollama is down")
+        return ClaimResult(
+            claim_id=record.claim_id,
+            claim=record.claim,
+            verdict="SUPPORTED",
+            method=self.name,
+            model=self.model,
+            answer="SUPPORTED",
+        )
+
+
+def test_record_dedupes_keys(tmp_path):
+    run = RunManager(tmp_path)
+    assert run.record(_row(1))
+    assert not run.record(_row(1))
+    assert run.is_done("m", "rag", "1")
+    assert len(list(run.iter_results())) == 1
+
+
+def test_resume_skips_stored_results(tmp_path):
+    claims = ["a", "b", "c"]
+    first = EchoMethod()
+    assert len(list(RunManager(tmp_path).run(first, claims))) == 3
+
+    second = EchoMethod()
+    assert list(RunManager(tmp_path).run(second, claims)) == []
+    assert second.calls == []
+
+
+def test_partial_line_is_ignored_and_terminated(tmp_path):
+    run = RunManager(tmp_path)
+    run.record(_row(1))
+    with open(run.results_path, "ab") as f:
+        f.write(b'{"model": "m", "method": "rag", "claim_id": 2')
+
+    reopened = RunManager(tmp_path)
+    assert not reopened.is_done("m", "rag", 2)
+    assert reopened.record(_row(3))
+    assert [row["claim_id"] for row in reopened.iter_results()] == [1, 3]
+
+
+def test_failed_results_stay_pending(tmp_path):
+    claims = ["a", "b", "c"]
+    method = EchoMethod(fail={"1"})
+    results = list(RunManager(tmp_path).run(method, claims))
+    assert [r.error is not None for r in results] == [False, True, False]
+
+    run = RunManager(tmp_path)
+    assert not run.is_done("m", "echo", "1")
+    assert [r.claim_id for r in run.pending(claims, "m", "echo")] == ["1"]
+    assert len(run.load_results()) == 2
+    assert len(run.load_results(include_retryable=True)) == 3
+
+    retry = EchoMethod()
+    assert [r.claim_id for r in run.run(retry, claims)] == ["1"]
+    assert retry.calls == ["1"]
+    assert RunManager(tmp_path).is_done("m", "echo", "1")
+    assert sorted(run.load_results()["claim_id"]) == ["0", "1", "2"]
+
+
+def test_nan_answers_are_retryable(tmp_path):
+    run = RunManager(tmp_path)
+    assert run.record(_row(1, answer="NAN"))
+    assert not run.is_done("m", "rag", 1)
+    assert run.record(_row(1))
+    assert run.is_done("m", "rag", 1)
+    assert is_retryable({"error": "timeout"})
+    assert not is_retryable(_row(1))
+
+
+def test_workers_shard_claims(tmp_path):
+    ids = [str(i) for i in range(50)]
+    owners = [[i for i in ids if RunManager(tmp_path, w, 3).owns(i)] for w in range(3)]
+    assert sorted(sum(owners, [])) == sorted(ids)
+    assert all(owners)
@@ -0,0 +1,60 @@
+from experiments import grid as grid_module
+from experiments.grid import load_grid
+from experiments.run_manager import RunManager
+from experiments.scheduler import GridScheduler
+from methods.base_method import BaseMethod, ClaimRecord, ClaimResult
+
+CLOSED = []
+
+
+class Probe(BaseMethod):
+    """Answers SUPPORTED, fails claim '1' and records when it is closed."""
+
+    name = "probe"
+
+    def setup(self):
+        pass
+
+    def prepare(self, record):
+        pass
+
+    def validate_claim(self, record):
+        if record.claim_id.endswith("/1"):
+            raise RuntimeError("ollama is down")
+        return ClaimResult(
+            claim_id=record.claim_id,
+            claim=record.claim,
+            verdict="SUPPORTED",
+            method=self.name,
+            model=self.model,
+            answer="SUPPORTED",
+        )
+
+    def close(self):
+        CLOSED.append(self.model)
+
+
+def test_methods_are_closed_and_failures_stay_pending(tmp_path, monkeypatch):
+    monkeypatch.setitem(grid_module.METHODS, "probe", Probe)
+    path = tmp_path / "grid.yaml"
+    path.write_text(
+        "models: [m1, m2]\nmethods: [probe]\ndatasets: [scifact_causal]\n"
+        "scheduler: {parallel_requests: 2, metrics_every: 0}\n"
+    )
+    grid = load_grid(str(path))
+    records = [
+        ClaimRecord(claim_id=f"scifact_causal/{i}", claim=f"claim {i}", label="SUPPORT")
+        for i in range(4)
+    ]
+    run = RunManager(str(tmp_path / "run"))
+    scheduler = GridScheduler(grid, run)
+    monkeypatch.setattr(scheduler, "_load_records", lambda: records)
+
+    CLOSED.clear()
+    report = scheduler.run_grid()
+    # One instance for the prepare phase, one per model for verification
+    assert sorted(CLOSED) == ["m1", "m1", "m2"]
+    assert report["jobs"]["m1|probe"]["claims"] == 4
+    assert report["jobs"]["m1|probe"]["errors"] == 1
+    assert len(run) == 6
+    assert not run.is_done("m1", "probe", "scifact_causal/1")
@@ -0,0 +1,130 @@
+import threading
+from collections import Counter
+
+import pytest
+
+from experiments import grid as grid_module
+from methods.base_method import BaseMethod, ClaimRecord, ClaimResult
+from methods.self_consistency import (
+    SelfConsistency,
+    majority_decided,
+    majority_verdict,
+)
+
+
+class Scripted(BaseMethod):
+    """Answers with the verdicts of config['verdicts'], one per call, in order."""
+
+    name = "scripted"
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.verdicts = list(config["verdicts"])
+        self.calls = 0
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def setup(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def validate_claim(self, record):
+        with self._lock:
+            verdict = self.verdicts[self.calls]
+            self.calls += 1
+        if verdict == "error":
+            raise RuntimeError("ollama is down")
+        return ClaimResult(
+            claim_id=record.claim_id,
+            claim=record.claim,
+            verdict=verdict,
+            method=self.name,
+            model=self.model,
+            answer=verdict,
+            timings={"generation": 1.0},
+            prompt_tokens=10,
+            completion_tokens=2,
+        )
+
+
+@pytest.fixture
+def sampler(monkeypatch):
+    monkeypatch.setitem(grid_module.METHODS, "scripted", Scripted)
+
+    def make(verdicts, **config):
+        config.setdefault("parallel_samples", 1)
+        return SelfConsistency(
+            {"base_method": "scripted", "model": "m", "verdicts": verdicts, **config}
+        )
+
+    return make
+
+
+RECORD = ClaimRecord(claim_id="c/1", claim="A causes B.")
+
+
+def test_majority_decided():
+    assert majority_decided(Counter(SUPPORTED=3), remaining=2)
+    assert not majority_decided(Counter(SUPPORTED=2, CONTRADICT=1), remaining=1)
+    assert majority_decided(Counter(SUPPORTED=3, CONTRADICT=1), remaining=1)
+    # UNKNOWN votes never lead
+    assert not majority_decided(Counter(UNKNOWN=4), remaining=1)
+
+
+def test_majority_verdict_ties_and_unknown():
+    assert majority_verdict(Counter(SUPPORTED=2, CONTRADICT=1)) == "SUPPORTED"
+    assert majority_verdict(Counter(SUPPORTED=2, CONTRADICT=2)) == "UNKNOWN"
+    assert majority_verdict(Counter(UNKNOWN=3, CONTRADICT=1)) == "CONTRADICT"
+    assert majority_verdict(Counter()) == "UNKNOWN"
+
+
+def test_stops_once_the_majority_is_decided(sampler):
+    method = sampler(["SUPPORTED"] * 5, n_samples=5)
+    assert method.name == "scripted_sc5"
+    result = method.validate_claim(RECORD)
+    assert result.verdict == "SUPPORTED"
+    assert result.method == "scripted_sc5"
+    assert result.metadata == {
+        "samples": 3,
+        "votes": {"SUPPORTED": 3},
+        "confidence": 1.0,
+    }
+    assert method.inner.calls == 3
+    assert result.prompt_tokens == 30
+    assert result.timings["generation_sum"] == 3.0
+
+
+def test_stop_margin_stops_early(sampler):
+    verdicts = ["CONTRADICT", "CONTRADICT", "SUPPORTED"] + ["SUPPORTED"] * 6
+    method = sampler(verdicts, n_samples=9, stop_margin=2)
+    result = method.validate_claim(RECORD)
+    assert result.verdict == "CONTRADICT"
+    assert result.metadata["samples"] == 2
+    assert method.average_samples == 2.0
+
+    without_margin = sampler(verdicts, n_samples=9)
+    result = without_margin.validate_claim(RECORD)
+    # 5 to 2 with two samples left is decided
+    assert result.verdict == "SUPPORTED"
+    assert result.metadata["samples"] == 7
+
+
+def test_tie_and_failed_samples(sampler):
+    method = sampler(["SUPPORTED", "error", "CONTRADICT", "UNKNOWN"], n_samples=4)
+    result = method.validate_claim(RECORD)
+    assert result.verdict == "UNKNOWN"
+    assert result.metadata["samples"] == 4
+    assert result.metadata["votes"] == {"SUPPORTED": 1, "UNKNOWN": 2, "CONTRADICT": 1}
+    assert result.metadata["confidence"] == 0.5
+
+
+def test_parallel_samples_and_close(sampler):
+    method = sampler(["SUPPORTED"] * 7, n_samples=7, parallel_samples=3)
+    result = method.validate_claim(RECORD)
+    assert result.verdict == "SUPPORTED"
+    # The vote is decided after four; at most the two samples in flight are extra
+    assert 4 <= result.metadata["samples"] <= 6
+    method.close()
+    assert method.inner.closed
@@ -0,0 +1,87 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from evaluation.verdicts import (
+    CONTRADICT,
+    SUPPORTED,
+    UNKNOWN,
+    VerdictStream,
+    extract_classification,
+    extract_classifications,
+    normalize_label,
+)
+
+RESPONSES = [
+    "SUPPORTED.",
+    "supported",
+    "Reasoning: the trial did not support it.\nFinal Answer: CONTRADICT",
+    "Answer: contradicted",
+    "Answer: maybe. The evidence supports it.",
+    "<think>It could be SUPPORTED or CONTRADICT...</think>\nSUPPORTED",
+    "<think>supported?</think> The claim is contradicted by the data.",
+    "It supports X but contradicts Y.",
+    "It contradicts X but supports Y.",
+    "SUPPORTIVE evidence, no verdict",
+    "No idea.",
+    "",
+    "NAN",
+    "nan",
+    None,
+    np.nan,
+    pd.NA,
+    pd.NaT,
+    42,
+    "SUPPORTED.",  # repeated answers are classified once
+]
+
+
+def test_vectorized_matches_per_response():
+    expected = [extract_classification(response) for response in RESPONSES]
+    assert extract_classifications(RESPONSES).tolist() == expected
+
+
+def test_missing_responses_are_unknown():
+    for response in (None, np.nan, pd.NA, pd.NaT, "NAN"):
+        assert extract_classification(response) == "UNKNOWN"
+
+
+def test_vectorized_keeps_the_index():
+    responses = pd.Series(RESPONSES, index=range(100, 100 + len(RESPONSES)))
+    result = extract_classifications(responses)
+    assert result.index.equals(responses.index)
+    assert result.equals(responses.apply(extract_classification).astype(object))
+
+
+def test_strategies():
+    assert extract_classification("Final Answer: SUPPORTED") == SUPPORTED
+    assert extract_classification("It supports X but contradicts Y.") == CONTRADICT
+    assert extract_classification("NAN") == UNKNOWN
+    assert extract_classifications([]).tolist() == []
+
+
+def test_normalize_label():
+    assert normalize_label(" refutes ") == CONTRADICT
+    assert normalize_label("Neutral") == "NEUTRAL"
+    assert normalize_label(float("nan")) is None
+
+
+def test_stream_reads_completed_lines_and_skips_retryable(tmp_path):
+    path = tmp_path / "results.jsonl"
+    rows = [
+        {"claim_id": 1, "answer": "SUPPORTED"},
+        {"claim_id": 2, "answer": "NAN", "retryable": True},
+    ]
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows) + '{"claim_id"')
+    stream = VerdictStream(path)
+    first = stream.poll()
+    assert first["claim_id"].tolist() == [1]
+    assert first["classification"].tolist() == [SUPPORTED]
+
+    with open(path, "a") as f:
+        f.write(': 3, "answer": "Answer: CONTRADICT"}\n')
+    second = stream.poll()
+    assert second.index.tolist() == [1]
+    assert second["classification"].tolist() == [CONTRADICT]
+    assert stream.poll().empty